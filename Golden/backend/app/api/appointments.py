@@ -4,17 +4,20 @@ from __future__ import annotations
 
 import json
 import logging
+from collections import defaultdict
 from dataclasses import dataclass
-from datetime import date, datetime, time
-from uuid import uuid4
+from datetime import date, datetime, time, timedelta
+from uuid import UUID, uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from psycopg2.extras import RealDictCursor
 from pydantic import BaseModel, Field, model_validator
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
+from app.core.live_events import publish_live_event
 from app.core.lookup_sql import (
     TableRef,
+    column_types,
     empty_page,
     page_window,
     pick_column,
@@ -23,6 +26,15 @@ from app.core.lookup_sql import (
     table_columns,
 )
 from app.core.middleware import require_auth
+from app.core.pagination import (
+    InvalidCursorError,
+    PageQuery,
+    SortKey,
+    capturing_page_query,
+    cursor_requested,
+    paginate,
+)
+from app.core.query_cache import compiled_query, compiled_template
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +65,19 @@ STATE_TRANSITIONS: dict[str, set[str]] = {
 CALENDAR_START_HOUR = 6
 CALENDAR_END_HOUR = 23
 CALENDAR_SLOT_MINUTES = 30
+# Enough for a month grid (six weeks).
+CALENDAR_RANGE_MAX_DAYS = 42
+
+APPOINTMENT_ORDER_SQL = "ORDER BY appointment_date DESC NULLS LAST, start_time ASC NULLS LAST, id"
+
+# Cursor-mode ordering; mirrors ``APPOINTMENT_ORDER_SQL`` with the source
+# table as a final tie-breaker because ids are only unique per table.
+APPOINTMENT_KEYSET = (
+    SortKey("appointment_date", descending=True, nullable=True, nulls_last=True),
+    SortKey("start_time", nullable=True, nulls_last=True),
+    SortKey("id"),
+    SortKey("source_table"),
+)
 
 APPOINTMENTS_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS app_appointments (
@@ -84,6 +109,12 @@ CREATE INDEX IF NOT EXISTS idx_app_appointments_doctor_id ON app_appointments(do
 CREATE INDEX IF NOT EXISTS idx_app_appointments_active ON app_appointments(active);
 """
 
+# Branch-level filters compare native types, so company + day is one index range.
+APPOINTMENT_BRANCH_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_app_appointments_company_day
+    ON app_appointments(company_id, appointment_date, start_time);
+"""
+
 
 class AppointmentCreate(BaseModel):
     companyId: str | None = None
@@ -158,6 +189,10 @@ class AppointmentContext:
     columns: tuple[str, ...]
     mapping: AppointmentColumnMap
     is_bootstrap: bool
+    column_types: tuple[tuple[str, str], ...] = ()
+
+    def type_of(self, column: str) -> str:
+        return dict(self.column_types).get(column.lower(), "")
 
 
 def _normalize_state_value(raw: str | None) -> str:
@@ -289,11 +324,18 @@ def _parse_iso_datetime(value: str | None) -> str | None:
         return raw
 
 
-def _ensure_bootstrap_table(conn) -> None:
+def ensure_appointment_tables(conn) -> None:
+    """Create the app-owned appointments table and its indexes."""
     with conn.cursor() as cur:
         cur.execute(APPOINTMENTS_TABLE_SQL)
 
 
+def ensure_appointment_branch_index(conn) -> None:
+    """Index the company/day filter pushed into the app_appointments branch."""
+    with conn.cursor() as cur:
+        cur.execute(APPOINTMENT_BRANCH_INDEX_SQL)
+
+
 def _build_context(conn, ref: TableRef, *, is_bootstrap: bool) -> AppointmentContext | None:
     columns = table_columns(conn, ref)
     mapped = AppointmentColumnMap(
@@ -405,12 +447,12 @@ def _build_context(conn, ref: TableRef, *, is_bootstrap: bool) -> AppointmentCon
         columns=columns,
         mapping=mapped,
         is_bootstrap=is_bootstrap,
+        column_types=tuple(sorted(column_types(conn, ref).items())),
     )
 
 
+@compiled_query
 def _resolve_contexts(conn) -> list[AppointmentContext]:
-    _ensure_bootstrap_table(conn)
-
     contexts: list[AppointmentContext] = []
 
     bootstrap_ref = resolve_table(conn, "app_appointments")
@@ -443,44 +485,163 @@ def _visibility_conditions(ctx: AppointmentContext) -> list[str]:
 
     if ctx.mapping.active:
         active_col = quote_ident(ctx.mapping.active)
-        conditions.append(
-            "COALESCE(lower(NULLIF(CAST({col} AS TEXT), '')), 'true') "
-            "IN ('1', 't', 'true', 'yes', 'y')".format(col=active_col)
-        )
+        if _type_family(ctx, ctx.mapping.active) == "boolean":
+            conditions.append(f"COALESCE({active_col}, TRUE)")
+        else:
+            conditions.append(
+                "COALESCE(lower(NULLIF(CAST({col} AS TEXT), '')), 'true') "
+                "IN ('1', 't', 'true', 'yes', 'y')".format(col=active_col)
+            )
 
     if ctx.mapping.deleted_at:
         deleted_col = quote_ident(ctx.mapping.deleted_at)
-        conditions.append(
-            "({col} IS NULL OR NULLIF(CAST({col} AS TEXT), '') IS NULL)".format(col=deleted_col)
-        )
+        if _type_family(ctx, ctx.mapping.deleted_at) in {"timestamp", "date"}:
+            conditions.append(f"{deleted_col} IS NULL")
+        else:
+            conditions.append(
+                "({col} IS NULL OR NULLIF(CAST({col} AS TEXT), '') IS NULL)".format(col=deleted_col)
+            )
 
     return conditions
 
 
-def _text_expr(column: str | None) -> str:
+_TYPE_FAMILIES = {
+    "text": "text",
+    "character varying": "text",
+    "character": "text",
+    "uuid": "uuid",
+    "date": "date",
+    "timestamp without time zone": "timestamp",
+    "timestamp with time zone": "timestamp",
+    "time without time zone": "time",
+    "boolean": "boolean",
+}
+
+
+def _type_family(ctx: AppointmentContext, column: str | None) -> str | None:
+    """Coarse type of *column*; ``None`` when the catalog does not say."""
+    if not column:
+        return None
+    return _TYPE_FAMILIES.get(ctx.type_of(column))
+
+
+def _text_expr(ctx: AppointmentContext, column: str | None) -> str:
     if not column:
         return "NULL::TEXT"
+    if _type_family(ctx, column) == "text":
+        return quote_ident(column)
     return f"CAST({quote_ident(column)} AS TEXT)"
 
 
-def _date_expr(column: str | None) -> str:
+def _date_expr(ctx: AppointmentContext, column: str | None) -> str:
     if not column:
         return "NULL::DATE"
+    if _type_family(ctx, column) == "date":
+        return quote_ident(column)
     return f"CAST({quote_ident(column)} AS DATE)"
 
 
-def _time_expr(time_column: str | None, fallback_datetime_column: str | None = None) -> str:
-    if time_column:
-        return f"CAST({quote_ident(time_column)} AS TIME)"
-    if fallback_datetime_column:
-        return f"CAST({quote_ident(fallback_datetime_column)} AS TIME)"
-    return "NULL::TIME"
+def _time_expr(
+    ctx: AppointmentContext,
+    time_column: str | None,
+    fallback_datetime_column: str | None = None,
+) -> str:
+    column = time_column or fallback_datetime_column
+    if not column:
+        return "NULL::TIME"
+    if _type_family(ctx, column) == "time":
+        return quote_ident(column)
+    return f"CAST({quote_ident(column)} AS TIME)"
 
 
-def _state_expr(column: str | None) -> str:
+def _state_expr(ctx: AppointmentContext, column: str | None) -> str:
     if not column:
         return "'waiting'::TEXT"
-    return f"LOWER(CAST({quote_ident(column)} AS TEXT))"
+    if ctx.is_bootstrap:
+        # app_appointments_state_check only admits lowercase states.
+        return quote_ident(column)
+    return f"LOWER({_text_expr(ctx, column)})"
+
+
+def _equals_sql(ctx: AppointmentContext, column: str) -> str:
+    """``<column> = %s`` on the column's own type, so its indexes apply."""
+    family = _type_family(ctx, column)
+    if family == "text":
+        return f"{quote_ident(column)} = %s"
+    if family == "uuid":
+        return f"{quote_ident(column)} = %s::uuid"
+    return f"CAST({quote_ident(column)} AS TEXT) = %s"
+
+
+def _comparable(ctx: AppointmentContext, column: str, value: str) -> bool:
+    """Whether *value* can equal a value of *column* at all (UUID columns)."""
+    if _type_family(ctx, column) != "uuid":
+        return True
+    try:
+        UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+@compiled_template
+def _select_projection(ctx: AppointmentContext) -> str:
+    """SELECT list and FROM clause for *ctx*; only the WHERE part varies per request."""
+    return f"""
+        SELECT
+            {_text_expr(ctx, ctx.mapping.id)} AS id,
+            {_text_expr(ctx, ctx.mapping.company_id)} AS company_id,
+            {_text_expr(ctx, ctx.mapping.partner_id)} AS partner_id,
+            {_text_expr(ctx, ctx.mapping.patient_name)} AS patient_name,
+            {_text_expr(ctx, ctx.mapping.patient_phone)} AS patient_phone,
+            {_text_expr(ctx, ctx.mapping.doctor_id)} AS doctor_id,
+            {_text_expr(ctx, ctx.mapping.doctor_name)} AS doctor_name,
+            {_date_expr(ctx, ctx.mapping.appointment_date)} AS appointment_date,
+            {_time_expr(ctx, ctx.mapping.start_time, ctx.mapping.appointment_date)} AS start_time,
+            {_time_expr(ctx, ctx.mapping.end_time)} AS end_time,
+            {_state_expr(ctx, ctx.mapping.state)} AS state,
+            {_text_expr(ctx, ctx.mapping.services)} AS services,
+            {_text_expr(ctx, ctx.mapping.notes)} AS notes,
+            {_text_expr(ctx, ctx.mapping.created_at)} AS created_at,
+            {_text_expr(ctx, ctx.mapping.updated_at)} AS updated_at,
+            %s::TEXT AS source_table
+        FROM {ctx.ref.qualified_name}"""
+
+
+def _date_clauses(
+    ctx: AppointmentContext,
+    date_from: date | None,
+    date_to: date | None,
+) -> tuple[list[str], list]:
+    """Date-range filter on the raw column (half-open for timestamps)."""
+    column = ctx.mapping.appointment_date
+    if not column:
+        return ["1 = 0"], []
+
+    family = _type_family(ctx, column)
+    col = quote_ident(column)
+    clauses: list[str] = []
+    params: list = []
+    if family in {"date", "timestamp"}:
+        if date_from:
+            clauses.append(f"{col} >= %s")
+            params.append(date_from)
+        if date_to:
+            if family == "date":
+                clauses.append(f"{col} <= %s")
+                params.append(date_to)
+            else:
+                clauses.append(f"{col} < %s")
+                params.append(date_to + timedelta(days=1))
+        return clauses, params
+
+    if date_from:
+        clauses.append(f"CAST({col} AS DATE) >= %s")
+        params.append(date_from)
+    if date_to:
+        clauses.append(f"CAST({col} AS DATE) <= %s")
+        params.append(date_to)
+    return clauses, params
 
 
 def _build_select_sql(
@@ -497,43 +658,37 @@ def _build_select_sql(
     params: list = []
 
     if appointment_id:
-        clauses.append(f"CAST({quote_ident(ctx.mapping.id)} AS TEXT) = %s")
-        params.append(appointment_id)
-
-    if company_id:
-        if not ctx.mapping.company_id:
+        if not _comparable(ctx, ctx.mapping.id, appointment_id):
             clauses.append("1 = 0")
         else:
-            clauses.append(f"CAST({quote_ident(ctx.mapping.company_id)} AS TEXT) = %s")
-            params.append(company_id)
+            clauses.append(_equals_sql(ctx, ctx.mapping.id))
+            params.append(appointment_id)
 
-    if date_from:
-        if not ctx.mapping.appointment_date:
+    if company_id:
+        if not ctx.mapping.company_id or not _comparable(ctx, ctx.mapping.company_id, company_id):
             clauses.append("1 = 0")
         else:
-            clauses.append(f"CAST({quote_ident(ctx.mapping.appointment_date)} AS DATE) >= %s")
-            params.append(date_from)
+            clauses.append(_equals_sql(ctx, ctx.mapping.company_id))
+            params.append(company_id)
 
-    if date_to:
-        if not ctx.mapping.appointment_date:
-            clauses.append("1 = 0")
-        else:
-            clauses.append(f"CAST({quote_ident(ctx.mapping.appointment_date)} AS DATE) <= %s")
-            params.append(date_to)
+    if date_from or date_to:
+        date_sql, date_params = _date_clauses(ctx, date_from, date_to)
+        clauses.extend(date_sql)
+        params.extend(date_params)
 
     if states:
         if not ctx.mapping.state:
             clauses.append("1 = 0")
         else:
-            clauses.append(f"LOWER(CAST({quote_ident(ctx.mapping.state)} AS TEXT)) = ANY(%s)")
-            params.append(list(states))
+            clauses.append(f"{_state_expr(ctx, ctx.mapping.state)} = ANY(%s)")
+            params.append(sorted(states))
 
     if search:
         search_value = f"%{search.strip()}%"
         search_clauses: list[str] = []
         for col in (ctx.mapping.patient_name, ctx.mapping.patient_phone, ctx.mapping.doctor_name):
             if col:
-                search_clauses.append(f"CAST({quote_ident(col)} AS TEXT) ILIKE %s")
+                search_clauses.append(f"{_text_expr(ctx, col)} ILIKE %s")
                 params.append(search_value)
         if search_clauses:
             clauses.append("(" + " OR ".join(search_clauses) + ")")
@@ -543,28 +698,7 @@ def _build_select_sql(
         where_sql = "WHERE " + " AND ".join(clauses)
 
     source_label = f"{ctx.ref.schema}.{ctx.ref.table}"
-
-    sql = f"""
-        SELECT
-            {_text_expr(ctx.mapping.id)} AS id,
-            {_text_expr(ctx.mapping.company_id)} AS company_id,
-            {_text_expr(ctx.mapping.partner_id)} AS partner_id,
-            {_text_expr(ctx.mapping.patient_name)} AS patient_name,
-            {_text_expr(ctx.mapping.patient_phone)} AS patient_phone,
-            {_text_expr(ctx.mapping.doctor_id)} AS doctor_id,
-            {_text_expr(ctx.mapping.doctor_name)} AS doctor_name,
-            {_date_expr(ctx.mapping.appointment_date)} AS appointment_date,
-            {_time_expr(ctx.mapping.start_time, ctx.mapping.appointment_date)} AS start_time,
-            {_time_expr(ctx.mapping.end_time)} AS end_time,
-            {_state_expr(ctx.mapping.state)} AS state,
-            {_text_expr(ctx.mapping.services)} AS services,
-            {_text_expr(ctx.mapping.notes)} AS notes,
-            {_text_expr(ctx.mapping.created_at)} AS created_at,
-            {_text_expr(ctx.mapping.updated_at)} AS updated_at,
-            %s::TEXT AS source_table
-        FROM {ctx.ref.qualified_name}
-        {where_sql}
-    """
+    sql = f"{_select_projection(ctx)}\n        {where_sql}\n    "
     return sql, [source_label, *params]
 
 
@@ -575,18 +709,37 @@ def _run_union_query(
     offset: int,
     limit: int,
 ) -> tuple[int, list[dict]]:
+    """Fetch one page of the union and its total in a single statement.
+
+    Each branch is ordered and cut to its own top ``offset + limit`` rows
+    before the union, so the outer sort only sees a few rows per source.
+    The first row of every branch carries that branch's ``COUNT(*) OVER ()``
+    (window functions run before the branch LIMIT), and the outer query sums
+    them. "First" is numbered in the branch's own order, so it is always a
+    row the LIMIT keeps. Only a page past the end needs a separate count.
+    """
     if not select_parts:
         return 0, []
 
-    union_sql = " UNION ALL ".join(f"({sql})" for sql, _ in select_parts)
+    branch_limit = ""
+    if limit > 0:
+        branch_limit = f" LIMIT {offset + limit:d}"
+
+    branches: list[str] = []
     params: list = []
-    for _sql, sql_params in select_parts:
+    for index, (sql, sql_params) in enumerate(select_parts):
+        branches.append(
+            "SELECT * FROM (SELECT branch.*, "
+            f"CASE WHEN ROW_NUMBER() OVER ({APPOINTMENT_ORDER_SQL}) = 1 THEN COUNT(*) OVER () ELSE 0 END "
+            f"AS branch_total FROM ({sql}) AS branch {APPOINTMENT_ORDER_SQL}{branch_limit}) AS branch_{index}"
+        )
         params.extend(sql_params)
+    union_sql = " UNION ALL ".join(branches)
 
-    count_sql = f"SELECT COUNT(*) AS total FROM ({union_sql}) AS unioned"
-
-    order_sql = "ORDER BY appointment_date DESC NULLS LAST, start_time ASC NULLS LAST, id"
-    fetch_sql = f"SELECT * FROM ({union_sql}) AS unioned {order_sql}"
+    fetch_sql = (
+        "SELECT *, SUM(branch_total) OVER () AS total_items "
+        f"FROM ({union_sql}) AS unioned {APPOINTMENT_ORDER_SQL}"
+    )
     fetch_params = list(params)
 
     if limit == 0:
@@ -598,14 +751,19 @@ def _run_union_query(
         fetch_params.extend([limit, offset])
 
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute(count_sql, params)
-        total = int(cur.fetchone()["total"])
-        if total == 0:
-            return 0, []
-
         cur.execute(fetch_sql, fetch_params)
         rows = [dict(row) for row in cur.fetchall()]
-
+        if not rows:
+            if offset == 0:
+                return 0, []
+            plain_union = " UNION ALL ".join(f"({sql})" for sql, _ in select_parts)
+            cur.execute(f"SELECT COUNT(*) AS total FROM ({plain_union}) AS unioned", params)
+            return int(cur.fetchone()["total"]), []
+
+    total = int(rows[0]["total_items"])
+    for row in rows:
+        row.pop("branch_total", None)
+        row.pop("total_items", None)
     return total, rows
 
 
@@ -670,9 +828,8 @@ def _fetch_items(
     offset: int,
     limit: int,
 ) -> tuple[int, list[dict]]:
-    select_parts: list[tuple[str, list]] = []
-    for ctx in contexts:
-        sql, params = _build_select_sql(
+    select_parts = [
+        _build_select_sql(
             ctx,
             appointment_id=appointment_id,
             company_id=company_id,
@@ -681,11 +838,61 @@ def _fetch_items(
             states=states,
             search=search,
         )
-        select_parts.append((sql, params))
-
+        for ctx in contexts
+    ]
     return _run_union_query(conn, select_parts, offset=offset, limit=limit)
 
 
+def _union_query(
+    contexts: list[AppointmentContext],
+    *,
+    company_id: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    states: set[str] | None = None,
+    search: str | None = None,
+) -> tuple[str, list]:
+    """``SELECT * FROM (<union of all sources>) AS unioned``, unordered."""
+    select_parts = [
+        _build_select_sql(
+            ctx,
+            company_id=company_id,
+            date_from=date_from,
+            date_to=date_to,
+            states=states,
+            search=search,
+        )
+        for ctx in contexts
+    ]
+    union_sql = " UNION ALL ".join(f"({sql})" for sql, _ in select_parts)
+    params: list = []
+    for _sql, sql_params in select_parts:
+        params.extend(sql_params)
+    return f"SELECT * FROM ({union_sql}) AS unioned", params
+
+
+def _fetch_cursor_page(
+    conn,
+    contexts: list[AppointmentContext],
+    *,
+    limit: int,
+    after: str | None,
+    before: str | None,
+    **filters,
+) -> dict:
+    """Keyset-paginate the appointment union; no count is run."""
+    query, params = _union_query(contexts, **filters)
+    return paginate(
+        query,
+        params,
+        conn,
+        limit=limit,
+        keyset=APPOINTMENT_KEYSET,
+        after=after,
+        before=before,
+    )
+
+
 def _find_context_by_source(
     contexts: list[AppointmentContext],
     source_table: str | None,
@@ -740,7 +947,7 @@ def _apply_state_update_locked(conn, ctx: AppointmentContext, appointment_id: st
             detail="Appointment state cannot be changed for this source table",
         )
 
-    id_sql = f"CAST({quote_ident(ctx.mapping.id)} AS TEXT) = %s"
+    id_sql = _equals_sql(ctx, ctx.mapping.id)
     clauses = [id_sql, *_visibility_conditions(ctx)]
     where_sql = " AND ".join(clauses)
 
@@ -845,13 +1052,26 @@ def _parse_company_id(company_id: str | None, company: str | None) -> str | None
     return company_id or company
 
 
+def _publish_change(conn, op: str, item: dict) -> dict:
+    """Push *item* to live reception/calendar subscribers once the write commits."""
+    with conn.cursor() as cur:
+        publish_live_event(
+            cur,
+            "appointment",
+            company_id=item.get("companyId"),
+            data={"op": op, "item": item},
+        )
+    return item
+
+
 @router.get("/states")
 async def appointment_states():
     return [*APPOINTMENT_STATES]
 
 
 @router.get("")
-async def list_appointments(
+@offload_db
+def list_appointments(
     page: int | None = Query(default=None, ge=1),
     perPage: int | None = Query(default=None, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -862,8 +1082,12 @@ async def list_appointments(
     company: str | None = Query(default=None),
     state: str | None = Query(default=None),
     q: str | None = Query(default=None),
+    after: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    paging: str | None = Query(default=None),
 ):
     company_filter = _parse_company_id(companyId, company)
+    use_cursor = cursor_requested(after, before, paging)
 
     normalized_states: set[str] | None = None
     if state:
@@ -881,7 +1105,34 @@ async def list_appointments(
         with get_conn() as conn:
             contexts = _resolve_contexts(conn)
             if not contexts:
-                return empty_page(resolved_offset, resolved_limit)
+                return empty_page(resolved_offset, resolved_limit, cursor=use_cursor)
+
+            if use_cursor:
+                result = _fetch_cursor_page(
+                    conn,
+                    contexts,
+                    company_id=company_filter,
+                    date_from=dateFrom,
+                    date_to=dateTo,
+                    states=normalized_states,
+                    search=q,
+                    limit=resolved_limit,
+                    after=after,
+                    before=before,
+                )
+                result["items"] = [_row_to_item(row) for row in result["items"]]
+                return result
+
+            if capturing_page_query():
+                query, params = _union_query(
+                    contexts,
+                    company_id=company_filter,
+                    date_from=dateFrom,
+                    date_to=dateTo,
+                    states=normalized_states,
+                    search=q,
+                )
+                return PageQuery(f"{query} {APPOINTMENT_ORDER_SQL}", tuple(params), transform=_row_to_item)
 
             total, rows = _fetch_items(
                 conn,
@@ -902,12 +1153,15 @@ async def list_appointments(
                 "totalItems": total,
                 "items": items,
             }
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
 
 
 @router.get("/calendar")
-async def calendar_day(
+@offload_db
+def calendar_day(
     date: date = Query(...),
     companyId: str | None = Query(default=None),
     company: str | None = Query(default=None),
@@ -987,8 +1241,183 @@ async def calendar_day(
     }
 
 
+# Row layout of ``/calendar/range``; ``day`` and ``doctor`` index the
+# response's ``days`` and ``doctors`` arrays (``doctor`` is null if unassigned).
+CALENDAR_RANGE_FIELDS = (
+    "id",
+    "day",
+    "doctor",
+    "startMinute",
+    "endMinute",
+    "slotStart",
+    "slotSpan",
+    "state",
+    "patientName",
+    "patientPhone",
+    "services",
+    "notes",
+)
+
+
+def _calendar_range_query(
+    contexts: list[AppointmentContext],
+    *,
+    company_id: str | None,
+    date_from: date,
+    date_to: date,
+) -> tuple[str, list]:
+    """Appointments in the range with minute offsets and slot indexes computed in SQL."""
+    union_sql, params = _union_query(
+        contexts,
+        company_id=company_id,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    day_start = CALENDAR_START_HOUR * 60
+    slot = CALENDAR_SLOT_MINUTES
+    sql = f"""
+        SELECT
+            m.id, m.doctor_id, m.doctor_name, m.appointment_date, m.state,
+            m.patient_name, m.patient_phone, m.services, m.notes,
+            m.start_minute,
+            CASE WHEN m.end_raw > m.start_minute THEN m.end_raw ELSE m.start_minute + {slot} END AS end_minute,
+            GREATEST((m.start_minute - {day_start}) / {slot}, 0) AS slot_start,
+            GREATEST(
+                (CASE WHEN m.end_raw > m.start_minute THEN m.end_raw - m.start_minute ELSE {slot} END
+                 + {slot - 1}) / {slot},
+                1
+            ) AS slot_span
+        FROM (
+            SELECT
+                u.*,
+                COALESCE(
+                    (EXTRACT(HOUR FROM u.start_time) * 60 + EXTRACT(MINUTE FROM u.start_time))::int,
+                    {day_start}
+                ) AS start_minute,
+                (EXTRACT(HOUR FROM u.end_time) * 60 + EXTRACT(MINUTE FROM u.end_time))::int AS end_raw
+            FROM ({union_sql}) AS u
+        ) AS m
+        ORDER BY m.appointment_date, m.start_minute, m.id
+    """
+    return sql, params
+
+
+@router.get("/calendar/range")
+@offload_db
+def calendar_range(
+    dateFrom: date = Query(...),
+    dateTo: date | None = Query(default=None),
+    companyId: str | None = Query(default=None),
+    company: str | None = Query(default=None),
+):
+    """Doctor-by-day slot occupancy for a week or month view in one query.
+
+    Appointments come back as positional ``rows`` (see ``fields``) instead of
+    objects, which keeps a month of a busy clinic to a small payload.
+    """
+    company_filter = _parse_company_id(companyId, company)
+    date_to = dateTo or dateFrom + timedelta(days=6)
+    span = (date_to - dateFrom).days + 1
+    if span < 1:
+        raise HTTPException(status_code=422, detail="dateTo must not be before dateFrom")
+    if span > CALENDAR_RANGE_MAX_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A calendar range covers at most {CALENDAR_RANGE_MAX_DAYS} days",
+        )
+
+    days = [dateFrom + timedelta(days=offset) for offset in range(span)]
+    payload = {
+        "dateFrom": dateFrom.isoformat(),
+        "dateTo": date_to.isoformat(),
+        "companyId": company_filter,
+        "slotMinutes": CALENDAR_SLOT_MINUTES,
+        "startHour": CALENDAR_START_HOUR,
+        "endHour": CALENDAR_END_HOUR,
+        "days": [day.isoformat() for day in days],
+        "doctors": [],
+        "unassigned": {"counts": [0] * span, "busySlots": [0] * span},
+        "fields": list(CALENDAR_RANGE_FIELDS),
+        "rows": [],
+    }
+
+    try:
+        with get_conn() as conn:
+            contexts = _resolve_contexts(conn)
+            if not contexts:
+                return payload
+            sql, params = _calendar_range_query(
+                contexts,
+                company_id=company_filter,
+                date_from=dateFrom,
+                date_to=date_to,
+            )
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+    except RuntimeError:
+        raise HTTPException(status_code=503, detail="Database is unavailable")
+
+    day_index = {day: index for index, day in enumerate(days)}
+    doctor_keys: dict[tuple[str, str], dict] = {}
+    occupied: dict[tuple[tuple[str, str] | None, int], set[int]] = defaultdict(set)
+    grouped: list[tuple[tuple[str, str] | None, list]] = []
+
+    for row in rows:
+        day = day_index.get(row["appointment_date"])
+        if day is None:
+            continue
+        doctor_id = row.get("doctor_id") or ""
+        doctor_name = row.get("doctor_name") or ""
+        key = (doctor_id, doctor_name) if doctor_id or doctor_name else None
+        if key is not None and key not in doctor_keys:
+            doctor_keys[key] = {
+                "doctorId": doctor_id or None,
+                "doctorName": doctor_name or "N/A",
+                "counts": [0] * span,
+                "busySlots": [0] * span,
+            }
+        target = doctor_keys[key] if key is not None else payload["unassigned"]
+        target["counts"][day] += 1
+        occupied[(key, day)].update(range(row["slot_start"], row["slot_start"] + row["slot_span"]))
+        grouped.append(
+            (
+                key,
+                [
+                    str(row["id"]),
+                    day,
+                    None,
+                    row["start_minute"],
+                    row["end_minute"],
+                    row["slot_start"],
+                    row["slot_span"],
+                    _normalize_state_or_default(row.get("state")),
+                    row.get("patient_name") or "",
+                    row.get("patient_phone"),
+                    _normalize_services(row.get("services")),
+                    row.get("notes"),
+                ],
+            )
+        )
+
+    ordered = sorted(doctor_keys, key=lambda item: ((doctor_keys[item]["doctorName"] or "").lower(), item[0]))
+    doctor_position = {key: index for index, key in enumerate(ordered)}
+    for (key, day), slots in occupied.items():
+        target = doctor_keys[key] if key is not None else payload["unassigned"]
+        target["busySlots"][day] = len(slots)
+
+    doctor_slot = CALENDAR_RANGE_FIELDS.index("doctor")
+    for key, values in grouped:
+        values[doctor_slot] = doctor_position.get(key) if key is not None else None
+
+    payload["doctors"] = [doctor_keys[key] for key in ordered]
+    payload["rows"] = [values for _key, values in grouped]
+    return payload
+
+
 @router.get("/reception")
-async def reception_feed(
+@offload_db
+def reception_feed(
     date: str | None = Query(default="today"),
     companyId: str | None = Query(default=None),
     company: str | None = Query(default=None),
@@ -1062,7 +1491,8 @@ async def reception_feed(
 
 
 @router.get("/{appointment_id}")
-async def get_appointment(appointment_id: str):
+@offload_db
+def get_appointment(appointment_id: str):
     try:
         with get_conn() as conn:
             contexts = _resolve_contexts(conn)
@@ -1085,7 +1515,8 @@ async def get_appointment(appointment_id: str):
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-async def create_appointment(payload: AppointmentCreate):
+@offload_db
+def create_appointment(payload: AppointmentCreate):
     try:
         with get_conn() as conn:
             contexts = _resolve_contexts(conn)
@@ -1142,13 +1573,14 @@ async def create_appointment(payload: AppointmentCreate):
             if total == 0 or not rows:
                 raise HTTPException(status_code=500, detail="Created appointment could not be loaded")
 
-            return _row_to_item(rows[0])
+            return _publish_change(conn, "upsert", _row_to_item(rows[0]))
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
 
 
 @router.put("/{appointment_id}")
-async def update_appointment(appointment_id: str, payload: AppointmentUpdate):
+@offload_db
+def update_appointment(appointment_id: str, payload: AppointmentUpdate):
     patch = payload.model_dump(exclude_unset=True)
     if not patch:
         raise HTTPException(status_code=422, detail="No fields supplied for update")
@@ -1259,7 +1691,7 @@ async def update_appointment(appointment_id: str, payload: AppointmentUpdate):
                     detail="None of the supplied fields can be updated on this source table",
                 )
 
-            id_sql = f"CAST({quote_ident(mapping.id)} AS TEXT) = %s"
+            id_sql = _equals_sql(context, mapping.id)
             clauses = [id_sql, *_visibility_conditions(context)]
             where_sql = " AND ".join(clauses)
 
@@ -1287,20 +1719,21 @@ async def update_appointment(appointment_id: str, payload: AppointmentUpdate):
             if total == 0 or not rows:
                 raise HTTPException(status_code=404, detail="Appointment not found")
 
-            return _row_to_item(rows[0])
+            return _publish_change(conn, "upsert", _row_to_item(rows[0]))
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
 
 
 @router.delete("/{appointment_id}")
-async def delete_appointment(appointment_id: str):
+@offload_db
+def delete_appointment(appointment_id: str):
     try:
         with get_conn() as conn:
             contexts = _resolve_contexts(conn)
-            context, _current = _find_appointment_for_update(conn, contexts, appointment_id)
+            context, current = _find_appointment_for_update(conn, contexts, appointment_id)
             mapping = context.mapping
 
-            id_sql = f"CAST({quote_ident(mapping.id)} AS TEXT) = %s"
+            id_sql = _equals_sql(context, mapping.id)
             clauses = [id_sql, *_visibility_conditions(context)]
             where_sql = " AND ".join(clauses)
 
@@ -1338,13 +1771,23 @@ async def delete_appointment(appointment_id: str):
                 if cur.rowcount == 0:
                     raise HTTPException(status_code=404, detail="Appointment not found")
 
+            _publish_change(
+                conn,
+                "delete",
+                {
+                    "id": current["id"],
+                    "companyId": current["companyId"],
+                    "appointmentDate": current["appointmentDate"],
+                },
+            )
             return {"id": appointment_id, "deleted": True}
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
 
 
 @router.patch("/{appointment_id}/state")
-async def patch_appointment_state(appointment_id: str, payload: AppointmentStatePatch):
+@offload_db
+def patch_appointment_state(appointment_id: str, payload: AppointmentStatePatch):
     try:
         with get_conn() as conn:
             contexts = _resolve_contexts(conn)
@@ -1360,6 +1803,6 @@ async def patch_appointment_state(appointment_id: str, payload: AppointmentState
             )
             if total == 0 or not rows:
                 raise HTTPException(status_code=404, detail="Appointment not found")
-            return _row_to_item(rows[0])
+            return _publish_change(conn, "upsert", _row_to_item(rows[0]))
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
@@ -10,7 +10,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 
 from app.core.config import settings
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.middleware import (
     assert_login_allowed,
     extract_auth_token,
@@ -25,6 +25,7 @@ from app.core.security import (
     is_bcrypt_hash,
     verify_password,
 )
+from app.core.session_cache import publish_session_change, session_cache, token_key
 
 logger = logging.getLogger(__name__)
 
@@ -124,7 +125,8 @@ def bootstrap_auth_tables() -> None:
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(body: LoginRequest, request: Request, response: Response):
+@offload_db
+def login(body: LoginRequest, request: Request, response: Response):
     """Authenticate with email + password, return JWT and set session cookie."""
     normalized_email = body.email.strip().lower()
     assert_login_allowed(request, normalized_email)
@@ -226,16 +228,19 @@ async def session(user: dict = Depends(require_auth)):
 
 
 @router.post("/logout")
-async def logout(request: Request, response: Response):
+@offload_db
+def logout(request: Request, response: Response):
     """Clear session cookie and delete session record if possible."""
     token = extract_auth_token(request)
 
     # Attempt to remove session row from database
     if token:
+        session_cache.invalidate_token(token_key(token))
         try:
             with get_conn() as conn:
                 with conn.cursor() as cur:
                     cur.execute("DELETE FROM app_sessions WHERE token = %s", (token,))
+                    publish_session_change(cur, token=token)
         except Exception:
             logger.warning("Failed to delete session record", exc_info=True)
 
@@ -0,0 +1,142 @@
+"""Batched GET endpoint for SPA screen loads.
+
+``POST /api/batch`` runs several read-only API calls in one round trip::
+
+    {"requests": [
+        {"id": "companies", "path": "/api/companies?limit=0"},
+        {"id": "reception", "path": "/api/appointments/reception?date=2026-03-01"}
+    ]}
+
+The session is validated once for the batch; sub-requests are dispatched
+concurrently to the router in-process with the caller's headers, so each
+still gets its own dependencies, permission checks and pooled connection.
+The response keeps the request order::
+
+    {"responses": [{"id": "companies", "status": 200, "body": {...}}, ...]}
+
+JSON bodies are spliced into the response as produced by the endpoint.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from urllib.parse import urlsplit
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from app.core.config import settings
+from app.core.middleware import authenticated_as, require_auth
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["batch"])
+
+# Not useful (or not safe) to fan out from a batch: recursion, file and event streams.
+_EXCLUDED_PREFIXES = ("/api/batch", "/api/export/", "/api/events/")
+_ROUTING_KEYS = {"router", "endpoint", "route", "path_params"}
+_DROPPED_HEADERS = {b"content-length", b"content-type", b"transfer-encoding", b"expect"}
+
+
+class BatchItem(BaseModel):
+    id: str | None = None
+    path: str = Field(min_length=1, max_length=2048)
+
+
+class BatchRequest(BaseModel):
+    requests: list[BatchItem] = Field(default_factory=list)
+
+
+@router.post("/batch")
+async def batch(body: BatchRequest, request: Request, _user: dict = Depends(require_auth)):
+    if not body.requests:
+        raise HTTPException(status_code=400, detail="requests must not be empty")
+    if len(body.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_MAX_REQUESTS} requests per batch",
+        )
+
+    with authenticated_as(_user):
+        results = await asyncio.gather(*(_dispatch(request, item) for item in body.requests))
+
+    parts = []
+    for index, (item, (status, payload)) in enumerate(zip(body.requests, results)):
+        item_id = item.id if item.id is not None else str(index)
+        parts.append(
+            b'{"id":' + json.dumps(item_id).encode("utf-8")
+            + b',"status":' + str(status).encode("ascii")
+            + b',"body":' + payload + b"}"
+        )
+    return Response(
+        content=b'{"responses":[' + b",".join(parts) + b"]}",
+        media_type="application/json",
+    )
+
+
+async def _dispatch(request: Request, item: BatchItem) -> tuple[int, bytes]:
+    """Run one GET against the router; returns ``(status, JSON body bytes)``."""
+    target = urlsplit(item.path)
+    path = target.path
+    if target.scheme or target.netloc or not path.startswith("/api/"):
+        return 400, _error("path must be a relative /api/ URL")
+    if path.startswith(_EXCLUDED_PREFIXES):
+        return 400, _error("path cannot be batched")
+
+    scope = {key: value for key, value in request.scope.items() if key not in _ROUTING_KEYS}
+    scope.update(
+        method="GET",
+        path=path,
+        raw_path=path.encode("utf-8"),
+        query_string=target.query.encode("latin-1", errors="ignore"),
+        headers=[(name, value) for name, value in request.scope["headers"] if name not in _DROPPED_HEADERS],
+    )
+    finished = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    status = 500
+    content_type = b""
+    chunks: list[bytes] = []
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-type":
+                    content_type = value.lower()
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app.router(scope, receive, send)
+    except StarletteHTTPException as exc:
+        return exc.status_code, _error(exc.detail)
+    except Exception:
+        logger.exception("Batched request %s failed", path)
+        return 500, _error("Internal Server Error")
+    finally:
+        finished.set()
+
+    body = b"".join(chunks)
+    if content_type.startswith(b"application/json"):
+        return status, body or b"null"
+    if not body:
+        return status, b"null"
+    return status, json.dumps({"message": body.decode("utf-8", errors="replace")}).encode("utf-8")
+
+
+def _error(detail) -> bytes:
+    return json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
@@ -6,7 +6,7 @@ from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import (
     empty_page,
     page_window,
@@ -22,7 +22,8 @@ router = APIRouter(prefix="/api/callcenter", tags=["callcenter"])
 
 
 @router.get("/history")
-async def callcenter_history(
+@offload_db
+def callcenter_history(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
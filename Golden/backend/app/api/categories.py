@@ -10,7 +10,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import (
     TableRef,
     empty_page,
@@ -22,6 +22,7 @@ from app.core.lookup_sql import (
 )
 from app.core.middleware import require_auth
 from app.core.pagination import paginate
+from app.core.schema_catalog import get_catalog
 
 router = APIRouter(prefix="/api", tags=["catalog"])
 
@@ -42,7 +43,8 @@ class ManageSpec:
 
 
 @router.get("/products")
-async def list_products(
+@offload_db
+def list_products(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -221,19 +223,22 @@ async def list_products(
 
 
 @router.get("/categories/products")
-async def list_product_categories(_user: dict = Depends(require_auth)):
+@offload_db
+def list_product_categories(_user: dict = Depends(require_auth)):
     """Return product category tree with parent links."""
     return _list_categories("product_categories", "productcategories")
 
 
 @router.get("/categories/partners")
-async def list_partner_categories(_user: dict = Depends(require_auth)):
+@offload_db
+def list_partner_categories(_user: dict = Depends(require_auth)):
     """Return partner/customer categories."""
     return _list_categories("partner_categories", "partnercategories")
 
 
 @router.get("/sources")
-async def list_sources(_user: dict = Depends(require_auth)):
+@offload_db
+def list_sources(_user: dict = Depends(require_auth)):
     """Return partner sources list for dropdowns."""
     try:
         with get_conn() as conn:
@@ -469,6 +474,14 @@ _APP_MANAGE_TABLE_BY_KIND: dict[str, str] = {
 }
 
 
+def ensure_category_fallback_tables(conn) -> None:
+    """Create app-owned tables for category kinds missing from the legacy schema."""
+    for spec in _MANAGE_SPECS.values():
+        fallback_table = _APP_MANAGE_TABLE_BY_KIND.get(spec.key)
+        if fallback_table and not _resolve_manage_table(conn, spec.table_candidates):
+            _ensure_app_manage_table(conn, fallback_table)
+
+
 def _ensure_app_manage_table(conn, table_name: str) -> TableRef:
     with conn.cursor() as cur:
         cur.execute(
@@ -515,18 +528,8 @@ def _normalise_manage_kind(kind: str) -> ManageSpec:
 
 
 def _table_column_data_types(conn, table_ref) -> dict[str, str]:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT lower(column_name), lower(data_type)
-            FROM information_schema.columns
-            WHERE table_schema = %s
-              AND table_name = %s
-            """,
-            (table_ref.schema, table_ref.table),
-        )
-        rows = cur.fetchall()
-    return {row[0]: row[1] for row in rows}
+    table = get_catalog(conn).get(table_ref.schema, table_ref.table)
+    return dict(table.data_types) if table else {}
 
 
 def _resolve_manage_table(conn, candidates: tuple[str, ...]) -> TableRef | None:
@@ -543,7 +546,7 @@ def _manage_context(conn, spec: ManageSpec) -> dict | None:
     if not table:
         fallback_table = _APP_MANAGE_TABLE_BY_KIND.get(spec.key)
         if fallback_table:
-            table = _ensure_app_manage_table(conn, fallback_table)
+            table = resolve_table(conn, fallback_table)
     if not table:
         return None
 
@@ -617,7 +620,8 @@ def _manage_filters(context: dict, spec: ManageSpec, search: str, company_id: st
 
 
 @router.get("/categories/manage/{kind}")
-async def list_manage_categories(
+@offload_db
+def list_manage_categories(
     kind: str,
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
@@ -704,7 +708,8 @@ async def list_manage_categories(
 
 
 @router.post("/categories/manage/{kind}", status_code=201)
-async def create_manage_category(
+@offload_db
+def create_manage_category(
     kind: str,
     body: CategorySavePayload,
     _user: dict = Depends(require_auth),
@@ -744,7 +749,8 @@ async def create_manage_category(
 
 
 @router.put("/categories/manage/{kind}/{item_id}")
-async def update_manage_category(
+@offload_db
+def update_manage_category(
     kind: str,
     item_id: str,
     body: CategorySavePayload,
@@ -784,7 +790,8 @@ async def update_manage_category(
 
 
 @router.delete("/categories/manage/{kind}/{item_id}")
-async def delete_manage_category(
+@offload_db
+def delete_manage_category(
     kind: str,
     item_id: str,
     _user: dict = Depends(require_auth),
@@ -9,7 +9,7 @@ from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from pydantic import BaseModel, Field
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import (
     TableRef,
     empty_page,
@@ -43,6 +43,12 @@ class CommissionUpdateRequest(BaseModel):
     description: str | None = None
 
 
+def ensure_commission_fallback_table(conn) -> None:
+    """Create the app-owned commissions table when the legacy one is missing."""
+    if not resolve_table(conn, "commissions", "commission"):
+        _ensure_app_commission_table(conn)
+
+
 def _ensure_app_commission_table(conn) -> None:
     with conn.cursor() as cur:
         cur.execute(
@@ -78,7 +84,6 @@ def _resolve_commission_table(conn) -> TableRef:
     if table_ref:
         return table_ref
 
-    _ensure_app_commission_table(conn)
     return TableRef(schema="public", table=_APP_COMMISSIONS_TABLE)
 
 
@@ -155,7 +160,8 @@ def _fetch_commission_by_id(
 
 
 @router.get("/commissions")
-async def list_commissions(
+@offload_db
+def list_commissions(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -245,7 +251,8 @@ async def list_commissions(
 
 
 @router.get("/commissions/employees")
-async def commissions_by_employee(
+@offload_db
+def commissions_by_employee(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -517,7 +524,8 @@ def _commissions_employees_from_employees(
 
 
 @router.get("/commissions/{commission_id}")
-async def get_commission(
+@offload_db
+def get_commission(
     commission_id: str = Path(..., min_length=1),
     _user: dict = Depends(require_auth),
 ):
@@ -535,7 +543,8 @@ async def get_commission(
 
 
 @router.post("/commissions")
-async def create_commission(
+@offload_db
+def create_commission(
     body: CommissionCreateRequest,
     user: dict = Depends(require_auth),
 ):
@@ -587,7 +596,8 @@ async def create_commission(
 
 
 @router.put("/commissions/{commission_id}")
-async def update_commission(
+@offload_db
+def update_commission(
     body: CommissionUpdateRequest,
     commission_id: str = Path(..., min_length=1),
     user: dict = Depends(require_auth),
@@ -643,7 +653,8 @@ async def update_commission(
 
 
 @router.delete("/commissions/{commission_id}")
-async def delete_commission(
+@offload_db
+def delete_commission(
     commission_id: str = Path(..., min_length=1),
     user: dict = Depends(require_auth),
 ):
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import (
     empty_page,
     page_window,
@@ -20,7 +20,8 @@ router = APIRouter(prefix="/api", tags=["companies"])
 
 
 @router.get("/companies")
-async def list_companies(
+@offload_db
+def list_companies(
     active: bool | None = Query(default=None),
     page: int | None = Query(default=None, ge=1),
     per_page: int | None = Query(default=None, ge=0, le=500),
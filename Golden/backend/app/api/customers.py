@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
 import re
-import time
 import unicodedata
 from collections import defaultdict
 from dataclasses import dataclass, field
@@ -16,12 +18,31 @@ from fastapi import APIRouter, Depends, Query
 from fastapi.responses import JSONResponse
 from psycopg2.extras import Json, RealDictCursor
 
-from app.core.database import get_conn
+from app.core.config import settings
+from app.core.database import ProjectedDictCursor, get_conn, run_db
+from app.core.json_response import FastJSONRoute
+from app.core.lookup_sql import app_table
 from app.core.middleware import require_auth
+from app.core.migrations import optional_ddl
+from app.core.pagination import (
+    InvalidCursorError,
+    PageQuery,
+    SortKey,
+    capturing_page_query,
+    count_rows,
+    cursor_requested,
+    paginate,
+    remember_total,
+    settle_total,
+)
+from app.core.schema_catalog import get_catalog, invalidate_catalog
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/api/customers",
     tags=["customers"],
+    route_class=FastJSONRoute,
 )
 
 # ---------------------------------------------------------------------------
@@ -69,11 +90,6 @@ class TableMeta:
     defaults: dict[str, str | None] = field(default_factory=dict)
 
 
-_SCHEMA_CACHE_TTL_SECONDS = 30.0
-_schema_cache_snapshot: dict[str, TableMeta] | None = None
-_schema_cache_at: float = 0.0
-
-
 def _q(identifier: str) -> str:
     """Quote SQL identifier safely."""
     return '"' + identifier.replace('"', '""') + '"'
@@ -93,64 +109,31 @@ def _schema_priority(schema_name: str) -> int:
 
 
 def _load_schema_snapshot(conn, force_refresh: bool = False) -> dict[str, TableMeta]:
-    """Load table/column metadata from information_schema (cached for 30s)."""
-    global _schema_cache_snapshot, _schema_cache_at
-
-    now = time.monotonic()
-    if (
-        not force_refresh
-        and _schema_cache_snapshot is not None
-        and (now - _schema_cache_at) < _SCHEMA_CACHE_TTL_SECONDS
-    ):
-        return _schema_cache_snapshot
-
-    sql = """
-        SELECT
-            c.table_schema,
-            c.table_name,
-            c.column_name,
-            c.data_type,
-            c.is_nullable,
-            c.column_default
-        FROM information_schema.columns c
-        JOIN information_schema.tables t
-          ON t.table_schema = c.table_schema
-         AND t.table_name = c.table_name
-        WHERE t.table_type = 'BASE TABLE'
-          AND c.table_schema NOT IN ('pg_catalog', 'information_schema')
-        ORDER BY c.table_schema, c.table_name, c.ordinal_position
-    """
-
-    by_schema_table: dict[tuple[str, str], TableMeta] = {}
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute(sql)
-        rows = cur.fetchall()
+    """Table/column metadata keyed by table name, built from the shared schema catalog."""
+    if force_refresh:
+        invalidate_catalog()
+    current = get_catalog(conn)
+    return current.memo(("customers.schema_snapshot",), lambda: _snapshot_from_catalog(current))
 
-    for row in rows:
-        schema_name = str(row["table_schema"]).lower()
-        table_name = str(row["table_name"]).lower()
-        column_name = str(row["column_name"]).lower()
-        meta = by_schema_table.setdefault(
-            (schema_name, table_name),
-            TableMeta(schema=schema_name, table=table_name),
-        )
-        meta.columns.append(column_name)
-        meta.data_types[column_name] = str(row["data_type"]).lower()
-        meta.nullable[column_name] = str(row["is_nullable"]).upper() == "YES"
-        meta.defaults[column_name] = row["column_default"]
 
+def _snapshot_from_catalog(current) -> dict[str, TableMeta]:
     # Collapse to table-name map using schema priority (public > dbo > others)
     by_table_name: dict[str, TableMeta] = {}
-    for meta in by_schema_table.values():
+    for table in current.tables.values():
+        meta = TableMeta(
+            schema=table.schema.lower(),
+            table=table.table.lower(),
+            columns=list(table.columns),
+            data_types=dict(table.data_types),
+            nullable=dict(table.nullable),
+            defaults=dict(table.defaults),
+        )
         existing = by_table_name.get(meta.table)
         if existing is None:
             by_table_name[meta.table] = meta
             continue
         if _schema_priority(meta.schema) < _schema_priority(existing.schema):
             by_table_name[meta.table] = meta
-
-    _schema_cache_snapshot = by_table_name
-    _schema_cache_at = now
     return by_table_name
 
 
@@ -207,6 +190,142 @@ def _fold_vietnamese(text: str) -> str:
     return stripped.lower().strip()
 
 
+# ---------------------------------------------------------------------------
+# Folded search index
+# ---------------------------------------------------------------------------
+#
+# ``app_customer_search`` holds one accent-folded, lower-cased string per
+# customer (name, display name, phone and ref) under a trigram index, so
+# typeahead search is one indexed ``LIKE`` instead of eight unindexable
+# predicates over the whole customer table. A trigger on the customer table
+# keeps it current for every writer; create/update here also refresh their
+# row so the index stays correct where the trigger could not be installed.
+# The trigger names the table with its schema, since it fires for writers
+# whose ``search_path`` may not include it. Without pg_trgm no btree can
+# serve the infix ``LIKE``, so the table is not kept and search falls back
+# to the per-column predicates.
+
+CUSTOMER_SEARCH_TABLE = "app_customer_search"
+_SEARCH_TRIGGER = "app_customer_search_sync"
+
+
+def _customer_search_columns(meta: TableMeta) -> list[str]:
+    columns: list[str] = []
+    for col in (
+        _find_column(meta, "name"),
+        _find_column(meta, "displayname", "display_name"),
+        _find_column(meta, "phone", "phonenumber"),
+        _find_column(meta, "ref"),
+    ):
+        if col is not None and col not in columns:
+            columns.append(col)
+    return columns
+
+
+def _search_text_expr(meta: TableMeta, alias: str) -> str:
+    parts = ", ".join(f"{alias}.{_q(col)}" for col in _customer_search_columns(meta))
+    return _sql_fold_expr(f"concat_ws(' ', {parts})")
+
+
+def _search_id_type(meta: TableMeta, id_col: str) -> str:
+    data_type = meta.data_types.get(id_col, "")
+    if not data_type or data_type in {"ARRAY", "USER-DEFINED"}:
+        return "text"
+    return data_type
+
+
+def ensure_customer_search_index(conn) -> None:
+    """Create, backfill and wire up the folded customer search index."""
+    snapshot = _load_schema_snapshot(conn)
+    customer_meta = _resolve_table(snapshot, CUSTOMER_TABLE_CANDIDATES)
+    id_col = _find_column(customer_meta, "id") if customer_meta else None
+    if customer_meta is None or id_col is None or not _customer_search_columns(customer_meta):
+        logger.warning("[BOOT] Customer table not found; skipping customer search index")
+        return
+
+    with conn.cursor() as cur:
+        if not optional_ddl(cur, "CREATE EXTENSION IF NOT EXISTS pg_trgm"):
+            logger.warning("[BOOT] pg_trgm unavailable; customer search uses per-column predicates")
+            optional_ddl(cur, f"DROP TRIGGER IF EXISTS {_SEARCH_TRIGGER} ON {_qt(customer_meta)}")
+            cur.execute(f"DROP TABLE IF EXISTS {CUSTOMER_SEARCH_TABLE}")
+            return
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {CUSTOMER_SEARCH_TABLE} (
+                partner_id {_search_id_type(customer_meta, id_col)} PRIMARY KEY,
+                search_text TEXT NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """
+        )
+        # The first version fell back to this btree, which no infix LIKE can use.
+        cur.execute(f"DROP INDEX IF EXISTS idx_{CUSTOMER_SEARCH_TABLE}_prefix")
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{CUSTOMER_SEARCH_TABLE}_trgm "
+            f"ON {CUSTOMER_SEARCH_TABLE} USING gin (search_text gin_trgm_ops)"
+        )
+        search_table = app_table(cur, CUSTOMER_SEARCH_TABLE).qualified_name
+        cur.execute(
+            f"""
+            INSERT INTO {CUSTOMER_SEARCH_TABLE} (partner_id, search_text)
+            SELECT p.{_q(id_col)}, {_search_text_expr(customer_meta, "p")}
+            FROM {_qt(customer_meta)} p
+            ON CONFLICT (partner_id) DO UPDATE SET search_text = EXCLUDED.search_text
+            """
+        )
+
+        watched = ", ".join(_q(col) for col in _customer_search_columns(customer_meta))
+        installed = optional_ddl(
+            cur,
+            f"""
+            CREATE OR REPLACE FUNCTION {_SEARCH_TRIGGER}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM {search_table} WHERE partner_id = OLD.{_q(id_col)};
+                    RETURN OLD;
+                END IF;
+                INSERT INTO {search_table} (partner_id, search_text, updated_at)
+                VALUES (NEW.{_q(id_col)}, {_search_text_expr(customer_meta, "NEW")}, NOW())
+                ON CONFLICT (partner_id) DO UPDATE
+                    SET search_text = EXCLUDED.search_text, updated_at = NOW();
+                RETURN NEW;
+            END
+            $$;
+            DROP TRIGGER IF EXISTS {_SEARCH_TRIGGER} ON {_qt(customer_meta)};
+            CREATE TRIGGER {_SEARCH_TRIGGER}
+                AFTER INSERT OR DELETE OR UPDATE OF {_q(id_col)}, {watched}
+                ON {_qt(customer_meta)}
+                FOR EACH ROW EXECUTE PROCEDURE {_SEARCH_TRIGGER}();
+            """,
+        )
+        if not installed:
+            logger.warning(
+                "[BOOT] Could not install customer search trigger; only API writes refresh the index"
+            )
+
+
+def _refresh_customer_search(conn, snapshot: dict[str, TableMeta], customer_meta: TableMeta, customer_id) -> None:
+    """Re-fold one customer's search row after an API create/update."""
+    if _resolve_table(snapshot, (CUSTOMER_SEARCH_TABLE,)) is None:
+        return
+    id_col = _find_column(customer_meta, "id")
+    if id_col is None or not _customer_search_columns(customer_meta):
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO {CUSTOMER_SEARCH_TABLE} (partner_id, search_text, updated_at)
+            SELECT p.{_q(id_col)}, {_search_text_expr(customer_meta, "p")}, NOW()
+            FROM {_qt(customer_meta)} p
+            WHERE p.{_q(id_col)} = %s
+            ON CONFLICT (partner_id) DO UPDATE
+                SET search_text = EXCLUDED.search_text, updated_at = NOW()
+            """,
+            (str(customer_id),),
+        )
+
+
 def _parse_uuid(value: Any) -> UUID | None:
     try:
         return UUID(str(value))
@@ -342,8 +461,8 @@ def _customer_error_invalid_uuid() -> JSONResponse:
     )
 
 
-def _build_customer_aliases(item: dict[str, Any]) -> dict[str, Any]:
-    row = dict(item)
+def _build_customer_aliases(row: dict[str, Any]) -> dict[str, Any]:
+    """Add the camelCase aliases to a fetched customer row, in place."""
     company_name = _first_non_empty(row, "__company_name", "companyname", "company_name")
     row.pop("__company_name", None)
 
@@ -557,9 +676,13 @@ def list_customers(
     order: str = Query(default="desc"),
     company: str | None = Query(default=None),
     company_id: str | None = Query(default=None, alias="companyId"),
+    after: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    paging: str | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
     resolved_offset, resolved_limit = _resolve_paging(page, per_page, offset, limit)
+    use_cursor = cursor_requested(after, before, paging)
     normalized_order = order.lower().strip()
     if normalized_order not in {"asc", "desc"}:
         return _validation_error([{"field": "order", "message": "Order must be asc or desc"}])
@@ -618,24 +741,18 @@ def list_customers(
                 where_clauses.append(f"p.{_q(company_col)} = %s")
                 params.append(str(company_filter_uuid))
 
-            if search:
+            search_index = _resolve_table(snapshot, (CUSTOMER_SEARCH_TABLE,))
+            if search and search.strip() and search_index is not None:
+                where_clauses.append(
+                    f"p.{_q(customer_id_col)} IN ("
+                    f"SELECT cs.partner_id FROM {_qt(search_index)} cs "
+                    f"WHERE cs.search_text LIKE %s)"
+                )
+                params.append(f"%{_fold_vietnamese(search.strip())}%")
+            elif search:
                 cleaned = search.strip()
                 folded = _fold_vietnamese(cleaned)
-                search_columns = [
-                    col
-                    for col in (
-                        _find_column(customer_meta, "name"),
-                        _find_column(customer_meta, "displayname", "display_name"),
-                        _find_column(customer_meta, "phone", "phonenumber"),
-                        _find_column(customer_meta, "ref"),
-                    )
-                    if col is not None
-                ]
-                # Remove duplicates while preserving order.
-                unique_search_columns: list[str] = []
-                for col in search_columns:
-                    if col not in unique_search_columns:
-                        unique_search_columns.append(col)
+                unique_search_columns = _customer_search_columns(customer_meta)
 
                 if unique_search_columns:
                     search_parts: list[str] = []
@@ -672,7 +789,7 @@ def list_customers(
                     # Fallback when Vietnamese ICU collation is unavailable.
                     sort_expr = _sql_fold_expr(sort_expr)
 
-            count_sql = f"SELECT COUNT(*) AS total FROM {_qt(customer_meta)} p{company_join_sql}{where_sql}"
+            count_sql = f"SELECT 1 FROM {_qt(customer_meta)} p{company_join_sql}{where_sql}"
 
             # Appointment date aggregation subqueries
             appt_meta = _resolve_table(snapshot, APPOINTMENT_TABLE_CANDIDATES)
@@ -697,36 +814,81 @@ def list_customers(
             if treatment_col:
                 treatment_select = f", p.{_q(treatment_col)} AS __last_treatment"
 
-            list_sql = (
+            if use_cursor:
+                # Keyset mode: expose the (possibly collated) sort expression
+                # so the cursor compares exactly what the listing orders by.
+                descending = normalized_order == "desc"
+                keyset_sql = (
+                    f"SELECT p.*{company_select_sql}{appt_select_sql}{treatment_select}, "
+                    f"{sort_expr} AS __sort_key "
+                    f"FROM {_qt(customer_meta)} p"
+                    f"{company_join_sql}"
+                    f"{appt_join_sql}"
+                    f"{where_sql}"
+                )
+                try:
+                    result = paginate(
+                        keyset_sql,
+                        tuple(params),
+                        conn,
+                        limit=resolved_limit,
+                        keyset=(
+                            SortKey("__sort_key", descending=descending, nullable=True),
+                            SortKey(customer_id_col, descending=descending),
+                        ),
+                        after=after,
+                        before=before,
+                    )
+                except InvalidCursorError as exc:
+                    field_name = "after" if after else "before"
+                    return _validation_error([{"field": field_name, "message": str(exc)}])
+                for row in result["items"]:
+                    row.pop("__sort_key", None)
+                result["items"] = [_build_customer_aliases(row) for row in result["items"]]
+                return result
+
+            ordered_sql = (
                 f"SELECT p.*{company_select_sql}{appt_select_sql}{treatment_select} "
                 f"FROM {_qt(customer_meta)} p"
                 f"{company_join_sql}"
                 f"{appt_join_sql}"
                 f"{where_sql} "
-                f"ORDER BY {sort_expr} {normalized_order.upper()} "
-                f"LIMIT %s OFFSET %s"
+                f"ORDER BY {sort_expr} {normalized_order.upper()}"
             )
+            if capturing_page_query():
+                return PageQuery(ordered_sql, tuple(params), transform=_build_customer_aliases)
+            list_sql = f"{ordered_sql} LIMIT %s OFFSET %s"
+
+            # Large customer sets get a planner-estimated (cached) total so
+            # the first page does not wait on a full count.
+            count_tables = (_qt(customer_meta),)
+            total, total_exact = count_rows(conn, count_sql, tuple(params), tables=count_tables)
+            if total == 0 and total_exact:
+                return {
+                    "offset": resolved_offset,
+                    "limit": resolved_limit,
+                    "totalItems": 0,
+                    "totalExact": True,
+                    "items": [],
+                }
 
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(count_sql, tuple(params))
-                total = int(cur.fetchone()["total"])
-
-                if total == 0:
-                    return {
-                        "offset": resolved_offset,
-                        "limit": resolved_limit,
-                        "totalItems": 0,
-                        "items": [],
-                    }
-
+            with conn.cursor(cursor_factory=ProjectedDictCursor) as cur:
                 cur.execute(list_sql, (*params, resolved_limit, resolved_offset))
                 rows = cur.fetchall()
 
-            items = [_build_customer_aliases(dict(row)) for row in rows]
+            if not total_exact:
+                total, total_exact = settle_total(
+                    total, offset=resolved_offset, limit=resolved_limit, fetched=len(rows)
+                )
+                if total_exact:
+                    remember_total(conn, count_sql, tuple(params), count_tables, total)
+
+            items = [_build_customer_aliases(row) for row in rows]
             return {
                 "offset": resolved_offset,
                 "limit": resolved_limit,
                 "totalItems": total,
+                "totalExact": total_exact,
                 "items": items,
             }
 
@@ -758,30 +920,7 @@ def get_customer_detail(
 
     try:
         with get_conn() as conn:
-            snapshot = _load_schema_snapshot(conn)
-            customer_meta = _resolve_table(snapshot, CUSTOMER_TABLE_CANDIDATES)
-            company_meta = _resolve_table(snapshot, COMPANY_TABLE_CANDIDATES)
-            if customer_meta is None:
-                return _error(
-                    status_code=503,
-                    code="CUSTOMER_TABLE_NOT_FOUND",
-                    detail="Customer table is not available in the current database.",
-                )
-
-            row = _fetch_customer_by_id(
-                conn=conn,
-                customer_meta=customer_meta,
-                company_meta=company_meta,
-                customer_uuid=customer_uuid,
-                include_inactive=False,
-            )
-            if row is None:
-                return _error(
-                    status_code=404,
-                    code="CUSTOMER_NOT_FOUND",
-                    detail=f"Customer {customer_id} was not found.",
-                )
-            return _build_customer_aliases(row)
+            return _load_customer_detail(conn, _load_schema_snapshot(conn), customer_uuid)
 
     except RuntimeError:
         return _error(
@@ -800,6 +939,72 @@ def get_customer_detail(
         )
 
 
+def _load_customer_detail(
+    conn,
+    snapshot: dict[str, TableMeta],
+    customer_uuid: UUID,
+) -> dict[str, Any] | JSONResponse:
+    customer_meta = _resolve_table(snapshot, CUSTOMER_TABLE_CANDIDATES)
+    company_meta = _resolve_table(snapshot, COMPANY_TABLE_CANDIDATES)
+    if customer_meta is None:
+        return _error(
+            status_code=503,
+            code="CUSTOMER_TABLE_NOT_FOUND",
+            detail="Customer table is not available in the current database.",
+        )
+
+    row = _fetch_customer_by_id(
+        conn=conn,
+        customer_meta=customer_meta,
+        company_meta=company_meta,
+        customer_uuid=customer_uuid,
+        include_inactive=False,
+    )
+    if row is None:
+        return _error(
+            status_code=404,
+            code="CUSTOMER_NOT_FOUND",
+            detail=f"Customer {customer_uuid} was not found.",
+        )
+    return _build_customer_aliases(row)
+
+
+_TOTAL_ALIAS = "__total_items"
+
+
+def _fetch_counted_page(
+    cur,
+    select_sql: str,
+    from_sql: str,
+    order_sql: str,
+    params: list[Any],
+    offset: int,
+    limit: int,
+) -> tuple[int, list[dict[str, Any]]]:
+    """One round trip for a page and its total (``COUNT(*) OVER ()``).
+
+    Only a page past the end needs the separate ``COUNT``.
+    """
+    cur.execute(
+        f"{select_sql}, COUNT(*) OVER () AS {_TOTAL_ALIAS} {from_sql} {order_sql} LIMIT %s OFFSET %s",
+        (*params, limit, offset),
+    )
+    rows = [dict(row) for row in cur.fetchall()]
+    if not rows:
+        if offset == 0:
+            return 0, []
+        cur.execute(f"SELECT COUNT(*) AS total {from_sql}", tuple(params))
+        return int(cur.fetchone()["total"]), []
+    total = int(rows[0][_TOTAL_ALIAS])
+    for row in rows:
+        row.pop(_TOTAL_ALIAS, None)
+    return total, rows
+
+
+def _empty_sub_page(offset: int, limit: int) -> dict[str, Any]:
+    return {"offset": offset, "limit": limit, "totalItems": 0, "items": []}
+
+
 @router.get("/{customer_id}/appointments")
 def get_customer_appointments(
     customer_id: str,
@@ -817,96 +1022,9 @@ def get_customer_appointments(
 
     try:
         with get_conn() as conn:
-            snapshot = _load_schema_snapshot(conn)
-            customer_meta = _resolve_table(snapshot, CUSTOMER_TABLE_CANDIDATES)
-            appointment_meta = _resolve_table(snapshot, APPOINTMENT_TABLE_CANDIDATES)
-            if customer_meta is None or appointment_meta is None:
-                return _error(
-                    status_code=503,
-                    code="APPOINTMENT_SCHEMA_UNAVAILABLE",
-                    detail="Customer/appointment tables are not available.",
-                )
-
-            appointment_customer_col = _find_column(
-                appointment_meta,
-                "partnerid",
-                "partner_id",
-                "customerid",
-                "customer_id",
-                "patientid",
-                "patient_id",
+            return _load_customer_appointments(
+                conn, _load_schema_snapshot(conn), customer_uuid, resolved_offset, resolved_limit
             )
-            if appointment_customer_col is None:
-                return _error(
-                    status_code=503,
-                    code="APPOINTMENT_SCHEMA_INVALID",
-                    detail="Appointment table is missing customer reference column.",
-                )
-
-            active_col = _find_column(appointment_meta, "active", "isactive")
-            date_col = _find_column(
-                appointment_meta,
-                "appointmentdate",
-                "date",
-                "startdate",
-                "start_date",
-                "created_at",
-            ) or _find_column(appointment_meta, "id")
-
-            where = [f"a.{_q(appointment_customer_col)} = %s"]
-            params: list[Any] = [str(customer_uuid)]
-            if active_col:
-                where.append(f"COALESCE(a.{_q(active_col)}, TRUE) = TRUE")
-            where_sql = " WHERE " + " AND ".join(where)
-
-            count_sql = f"SELECT COUNT(*) AS total FROM {_qt(appointment_meta)} a{where_sql}"
-            list_sql = (
-                f"SELECT a.* FROM {_qt(appointment_meta)} a"
-                f"{where_sql} "
-                f"ORDER BY a.{_q(date_col)} DESC "
-                f"LIMIT %s OFFSET %s"
-            )
-
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(count_sql, tuple(params))
-                total = int(cur.fetchone()["total"])
-
-                if total == 0:
-                    return {
-                        "offset": resolved_offset,
-                        "limit": resolved_limit,
-                        "totalItems": 0,
-                        "items": [],
-                    }
-
-                cur.execute(list_sql, (*params, resolved_limit, resolved_offset))
-                rows = cur.fetchall()
-
-            items: list[dict[str, Any]] = []
-            for row in rows:
-                item = dict(row)
-                item["customerId"] = _first_non_empty(item, appointment_customer_col)
-                item["appointmentDate"] = _first_non_empty(
-                    item, "appointmentdate", "date", "startdate", "start_date"
-                )
-                item["doctorName"] = _first_non_empty(
-                    item,
-                    "doctorname",
-                    "doctor_name",
-                    "doctor",
-                    "salename",
-                    "employee_name",
-                )
-                item["state"] = _first_non_empty(item, "state", "status", "appointmentstate")
-                item["notes"] = _first_non_empty(item, "note", "notes", "comment")
-                items.append(item)
-
-            return {
-                "offset": resolved_offset,
-                "limit": resolved_limit,
-                "totalItems": total,
-                "items": items,
-            }
 
     except RuntimeError:
         return _error(
@@ -925,6 +1043,91 @@ def get_customer_appointments(
         )
 
 
+def _load_customer_appointments(
+    conn,
+    snapshot: dict[str, TableMeta],
+    customer_uuid: UUID,
+    offset: int,
+    limit: int,
+) -> dict[str, Any] | JSONResponse:
+    customer_meta = _resolve_table(snapshot, CUSTOMER_TABLE_CANDIDATES)
+    appointment_meta = _resolve_table(snapshot, APPOINTMENT_TABLE_CANDIDATES)
+    if customer_meta is None or appointment_meta is None:
+        return _error(
+            status_code=503,
+            code="APPOINTMENT_SCHEMA_UNAVAILABLE",
+            detail="Customer/appointment tables are not available.",
+        )
+
+    appointment_customer_col = _find_column(
+        appointment_meta,
+        "partnerid",
+        "partner_id",
+        "customerid",
+        "customer_id",
+        "patientid",
+        "patient_id",
+    )
+    if appointment_customer_col is None:
+        return _error(
+            status_code=503,
+            code="APPOINTMENT_SCHEMA_INVALID",
+            detail="Appointment table is missing customer reference column.",
+        )
+
+    active_col = _find_column(appointment_meta, "active", "isactive")
+    date_col = _find_column(
+        appointment_meta,
+        "appointmentdate",
+        "date",
+        "startdate",
+        "start_date",
+        "created_at",
+    ) or _find_column(appointment_meta, "id")
+
+    where = [f"a.{_q(appointment_customer_col)} = %s"]
+    params: list[Any] = [str(customer_uuid)]
+    if active_col:
+        where.append(f"COALESCE(a.{_q(active_col)}, TRUE) = TRUE")
+    where_sql = " WHERE " + " AND ".join(where)
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        total, rows = _fetch_counted_page(
+            cur,
+            "SELECT a.*",
+            f"FROM {_qt(appointment_meta)} a{where_sql}",
+            f"ORDER BY a.{_q(date_col)} DESC",
+            params,
+            offset,
+            limit,
+        )
+
+    items: list[dict[str, Any]] = []
+    for item in rows:
+        item["customerId"] = _first_non_empty(item, appointment_customer_col)
+        item["appointmentDate"] = _first_non_empty(
+            item, "appointmentdate", "date", "startdate", "start_date"
+        )
+        item["doctorName"] = _first_non_empty(
+            item,
+            "doctorname",
+            "doctor_name",
+            "doctor",
+            "salename",
+            "employee_name",
+        )
+        item["state"] = _first_non_empty(item, "state", "status", "appointmentstate")
+        item["notes"] = _first_non_empty(item, "note", "notes", "comment")
+        items.append(item)
+
+    return {
+        "offset": offset,
+        "limit": limit,
+        "totalItems": total,
+        "items": items,
+    }
+
+
 @router.get("/{customer_id}/treatments")
 def get_customer_treatments(
     customer_id: str,
@@ -942,134 +1145,9 @@ def get_customer_treatments(
 
     try:
         with get_conn() as conn:
-            snapshot = _load_schema_snapshot(conn)
-            order_meta = _resolve_table(snapshot, TREATMENT_TABLE_CANDIDATES)
-            line_meta = _resolve_table(snapshot, TREATMENT_LINE_TABLE_CANDIDATES)
-            if order_meta is None:
-                return _error(
-                    status_code=503,
-                    code="TREATMENT_TABLE_NOT_FOUND",
-                    detail="Sale-order table is not available.",
-                )
-
-            order_customer_col = _find_column(
-                order_meta,
-                "partnerid",
-                "partner_id",
-                "customerid",
-                "customer_id",
-                "patientid",
-                "patient_id",
+            return _load_customer_treatments(
+                conn, _load_schema_snapshot(conn), customer_uuid, resolved_offset, resolved_limit
             )
-            order_id_col = _find_column(order_meta, "id", "saleorderid", "sale_order_id")
-            if order_customer_col is None or order_id_col is None:
-                return _error(
-                    status_code=503,
-                    code="TREATMENT_SCHEMA_INVALID",
-                    detail="Sale-order table is missing required relationship columns.",
-                )
-
-            active_col = _find_column(order_meta, "active", "isactive")
-            date_col = _find_column(
-                order_meta,
-                "date",
-                "orderdate",
-                "saleorderdate",
-                "created_at",
-            ) or order_id_col
-
-            where = [f"o.{_q(order_customer_col)} = %s"]
-            params: list[Any] = [str(customer_uuid)]
-            if active_col:
-                where.append(f"COALESCE(o.{_q(active_col)}, TRUE) = TRUE")
-            where_sql = " WHERE " + " AND ".join(where)
-
-            count_sql = f"SELECT COUNT(*) AS total FROM {_qt(order_meta)} o{where_sql}"
-            list_sql = (
-                f"SELECT o.* FROM {_qt(order_meta)} o"
-                f"{where_sql} "
-                f"ORDER BY o.{_q(date_col)} DESC "
-                f"LIMIT %s OFFSET %s"
-            )
-
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(count_sql, tuple(params))
-                total = int(cur.fetchone()["total"])
-
-                if total == 0:
-                    return {
-                        "offset": resolved_offset,
-                        "limit": resolved_limit,
-                        "totalItems": 0,
-                        "items": [],
-                    }
-
-                cur.execute(list_sql, (*params, resolved_limit, resolved_offset))
-                order_rows = [dict(r) for r in cur.fetchall()]
-
-                # Pull nested line-items in one query.
-                lines_by_order: dict[str, list[dict[str, Any]]] = defaultdict(list)
-                if line_meta is not None:
-                    line_order_col = _find_column(
-                        line_meta,
-                        "saleorderid",
-                        "sale_order_id",
-                        "orderid",
-                        "order_id",
-                    )
-                    if line_order_col:
-                        order_ids = [str(order[order_id_col]) for order in order_rows]
-                        placeholders = ", ".join(["%s"] * len(order_ids))
-                        line_active_col = _find_column(line_meta, "active", "isactive")
-                        line_where = f"l.{_q(line_order_col)} IN ({placeholders})"
-                        if line_active_col:
-                            line_where += f" AND COALESCE(l.{_q(line_active_col)}, TRUE) = TRUE"
-                        line_sql = (
-                            f"SELECT l.* FROM {_qt(line_meta)} l "
-                            f"WHERE {line_where} "
-                            f"ORDER BY l.{_q(line_order_col)}"
-                        )
-                        cur.execute(line_sql, tuple(order_ids))
-                        for line in cur.fetchall():
-                            line_item = dict(line)
-                            line_item["productName"] = _first_non_empty(
-                                line_item, "productname", "product_name", "name"
-                            )
-                            line_item["quantity"] = _first_non_empty(
-                                line_item, "quantity", "qty", "product_uom_qty"
-                            )
-                            line_item["priceUnit"] = _first_non_empty(
-                                line_item, "priceunit", "price_unit", "unitprice"
-                            )
-                            line_item["teeth"] = _first_non_empty(
-                                line_item, "teeth", "tooth", "toothposition", "tooth_position"
-                            )
-                            lines_by_order[str(line_item.get(line_order_col))].append(line_item)
-
-            items: list[dict[str, Any]] = []
-            for order_row in order_rows:
-                order_item = dict(order_row)
-                order_key = str(order_item.get(order_id_col))
-                line_items = lines_by_order.get(order_key, [])
-                order_item["customerId"] = _first_non_empty(order_item, order_customer_col)
-                order_item["lineItems"] = line_items
-                order_item["lines"] = line_items
-                order_item["totalAmount"] = _first_non_empty(
-                    order_item,
-                    "amounttotal",
-                    "amount_total",
-                    "totalamount",
-                    "total",
-                )
-                order_item["state"] = _first_non_empty(order_item, "state", "status", "orderstate")
-                items.append(order_item)
-
-            return {
-                "offset": resolved_offset,
-                "limit": resolved_limit,
-                "totalItems": total,
-                "items": items,
-            }
 
     except RuntimeError:
         return _error(
@@ -1088,6 +1166,136 @@ def get_customer_treatments(
         )
 
 
+def _load_customer_treatments(
+    conn,
+    snapshot: dict[str, TableMeta],
+    customer_uuid: UUID,
+    offset: int,
+    limit: int,
+) -> dict[str, Any] | JSONResponse:
+    order_meta = _resolve_table(snapshot, TREATMENT_TABLE_CANDIDATES)
+    line_meta = _resolve_table(snapshot, TREATMENT_LINE_TABLE_CANDIDATES)
+    if order_meta is None:
+        return _error(
+            status_code=503,
+            code="TREATMENT_TABLE_NOT_FOUND",
+            detail="Sale-order table is not available.",
+        )
+
+    order_customer_col = _find_column(
+        order_meta,
+        "partnerid",
+        "partner_id",
+        "customerid",
+        "customer_id",
+        "patientid",
+        "patient_id",
+    )
+    order_id_col = _find_column(order_meta, "id", "saleorderid", "sale_order_id")
+    if order_customer_col is None or order_id_col is None:
+        return _error(
+            status_code=503,
+            code="TREATMENT_SCHEMA_INVALID",
+            detail="Sale-order table is missing required relationship columns.",
+        )
+
+    active_col = _find_column(order_meta, "active", "isactive")
+    date_col = _find_column(
+        order_meta,
+        "date",
+        "orderdate",
+        "saleorderdate",
+        "created_at",
+    ) or order_id_col
+
+    where = [f"o.{_q(order_customer_col)} = %s"]
+    params: list[Any] = [str(customer_uuid)]
+    if active_col:
+        where.append(f"COALESCE(o.{_q(active_col)}, TRUE) = TRUE")
+    where_sql = " WHERE " + " AND ".join(where)
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        total, order_rows = _fetch_counted_page(
+            cur,
+            "SELECT o.*",
+            f"FROM {_qt(order_meta)} o{where_sql}",
+            f"ORDER BY o.{_q(date_col)} DESC",
+            params,
+            offset,
+            limit,
+        )
+        if not order_rows:
+            return {
+                "offset": offset,
+                "limit": limit,
+                "totalItems": total,
+                "items": [],
+            }
+
+        # Pull nested line-items in one query.
+        lines_by_order: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        if line_meta is not None:
+            line_order_col = _find_column(
+                line_meta,
+                "saleorderid",
+                "sale_order_id",
+                "orderid",
+                "order_id",
+            )
+            if line_order_col:
+                order_ids = [str(order[order_id_col]) for order in order_rows]
+                placeholders = ", ".join(["%s"] * len(order_ids))
+                line_active_col = _find_column(line_meta, "active", "isactive")
+                line_where = f"l.{_q(line_order_col)} IN ({placeholders})"
+                if line_active_col:
+                    line_where += f" AND COALESCE(l.{_q(line_active_col)}, TRUE) = TRUE"
+                line_sql = (
+                    f"SELECT l.* FROM {_qt(line_meta)} l "
+                    f"WHERE {line_where} "
+                    f"ORDER BY l.{_q(line_order_col)}"
+                )
+                cur.execute(line_sql, tuple(order_ids))
+                for line in cur.fetchall():
+                    line_item = dict(line)
+                    line_item["productName"] = _first_non_empty(
+                        line_item, "productname", "product_name", "name"
+                    )
+                    line_item["quantity"] = _first_non_empty(
+                        line_item, "quantity", "qty", "product_uom_qty"
+                    )
+                    line_item["priceUnit"] = _first_non_empty(
+                        line_item, "priceunit", "price_unit", "unitprice"
+                    )
+                    line_item["teeth"] = _first_non_empty(
+                        line_item, "teeth", "tooth", "toothposition", "tooth_position"
+                    )
+                    lines_by_order[str(line_item.get(line_order_col))].append(line_item)
+
+    items: list[dict[str, Any]] = []
+    for order_item in order_rows:
+        order_key = str(order_item.get(order_id_col))
+        line_items = lines_by_order.get(order_key, [])
+        order_item["customerId"] = _first_non_empty(order_item, order_customer_col)
+        order_item["lineItems"] = line_items
+        order_item["lines"] = line_items
+        order_item["totalAmount"] = _first_non_empty(
+            order_item,
+            "amounttotal",
+            "amount_total",
+            "totalamount",
+            "total",
+        )
+        order_item["state"] = _first_non_empty(order_item, "state", "status", "orderstate")
+        items.append(order_item)
+
+    return {
+        "offset": offset,
+        "limit": limit,
+        "totalItems": total,
+        "items": items,
+    }
+
+
 # ---------------------------------------------------------------------------
 # Customer detail sub-resources
 # ---------------------------------------------------------------------------
@@ -1107,6 +1315,9 @@ DEBT_TABLE_CANDIDATES = (
 DOT_KHAM_TABLE_CANDIDATES = (
     "dot_khams", "dotkham", "dotkhams", "exam_sessions", "exam_session",
 )
+PARTNER_COLUMN_CANDIDATES = (
+    "partner_id", "partnerid", "customer_id", "customerid", "patient_id", "patientid",
+)
 
 
 def _customer_sub_resource(
@@ -1118,9 +1329,7 @@ def _customer_sub_resource(
     limit: int | None,
     error_code: str,
     *,
-    partner_col_candidates: tuple[str, ...] = (
-        "partner_id", "partnerid", "customer_id", "customerid", "patient_id", "patientid",
-    ),
+    partner_col_candidates: tuple[str, ...] = PARTNER_COLUMN_CANDIDATES,
 ):
     """Generic paginated sub-resource loader for a customer."""
     customer_uuid = _parse_uuid(customer_id)
@@ -1131,66 +1340,15 @@ def _customer_sub_resource(
 
     try:
         with get_conn() as conn:
-            snapshot = _load_schema_snapshot(conn)
-            meta = _resolve_table(snapshot, table_candidates)
-            if meta is None:
-                return {
-                    "offset": resolved_offset,
-                    "limit": resolved_limit,
-                    "totalItems": 0,
-                    "items": [],
-                }
-
-            id_col = _find_column(meta, "id")
-            partner_col = None
-            for cand in partner_col_candidates:
-                partner_col = _find_column(meta, cand)
-                if partner_col:
-                    break
-
-            if not id_col or not partner_col:
-                return {
-                    "offset": resolved_offset,
-                    "limit": resolved_limit,
-                    "totalItems": 0,
-                    "items": [],
-                }
-
-            date_col = _find_column(meta, "date", "created_at", "create_date") or id_col
-            active_col = _find_column(meta, "active", "is_active")
-
-            where = [f"t.{_q(partner_col)} = %s"]
-            params: list[Any] = [str(customer_uuid)]
-            if active_col:
-                where.append(f"COALESCE(t.{_q(active_col)}, TRUE) = TRUE")
-            where_sql = " WHERE " + " AND ".join(where)
-
-            count_sql = f"SELECT COUNT(*) AS total FROM {_qt(meta)} t{where_sql}"
-            list_sql = (
-                f"SELECT t.* FROM {_qt(meta)} t{where_sql} "
-                f"ORDER BY t.{_q(date_col)} DESC "
-                f"LIMIT %s OFFSET %s"
+            return _load_customer_sub_resource(
+                conn,
+                _load_schema_snapshot(conn),
+                customer_uuid,
+                table_candidates,
+                resolved_offset,
+                resolved_limit,
+                partner_col_candidates=partner_col_candidates,
             )
-
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(count_sql, tuple(params))
-                total = int(cur.fetchone()["total"])
-                if total == 0:
-                    return {
-                        "offset": resolved_offset,
-                        "limit": resolved_limit,
-                        "totalItems": 0,
-                        "items": [],
-                    }
-                cur.execute(list_sql, (*params, resolved_limit, resolved_offset))
-                rows = [dict(r) for r in cur.fetchall()]
-
-            return {
-                "offset": resolved_offset,
-                "limit": resolved_limit,
-                "totalItems": total,
-                "items": rows,
-            }
     except RuntimeError:
         return _error(status_code=503, code="DATABASE_UNAVAILABLE", detail="Database is unavailable.")
     except psycopg2.Error as exc:
@@ -1198,6 +1356,58 @@ def _customer_sub_resource(
         return _error(status_code=500, code=error_code, detail=msg)
 
 
+def _load_customer_sub_resource(
+    conn,
+    snapshot: dict[str, TableMeta],
+    customer_uuid: UUID,
+    table_candidates: tuple[str, ...],
+    offset: int,
+    limit: int,
+    *,
+    partner_col_candidates: tuple[str, ...] = PARTNER_COLUMN_CANDIDATES,
+) -> dict[str, Any]:
+    meta = _resolve_table(snapshot, table_candidates)
+    if meta is None:
+        return _empty_sub_page(offset, limit)
+
+    id_col = _find_column(meta, "id")
+    partner_col = None
+    for cand in partner_col_candidates:
+        partner_col = _find_column(meta, cand)
+        if partner_col:
+            break
+
+    if not id_col or not partner_col:
+        return _empty_sub_page(offset, limit)
+
+    date_col = _find_column(meta, "date", "created_at", "create_date") or id_col
+    active_col = _find_column(meta, "active", "is_active")
+
+    where = [f"t.{_q(partner_col)} = %s"]
+    params: list[Any] = [str(customer_uuid)]
+    if active_col:
+        where.append(f"COALESCE(t.{_q(active_col)}, TRUE) = TRUE")
+    where_sql = " WHERE " + " AND ".join(where)
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        total, rows = _fetch_counted_page(
+            cur,
+            "SELECT t.*",
+            f"FROM {_qt(meta)} t{where_sql}",
+            f"ORDER BY t.{_q(date_col)} DESC",
+            params,
+            offset,
+            limit,
+        )
+
+    return {
+        "offset": offset,
+        "limit": limit,
+        "totalItems": total,
+        "items": rows,
+    }
+
+
 @router.get("/{customer_id}/teeth-status")
 def get_customer_teeth_status(
     customer_id: str,
@@ -1310,6 +1520,147 @@ def get_customer_debt(
     )
 
 
+# ---------------------------------------------------------------------------
+# Aggregate customer profile
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class _ProfileSection:
+    default_limit: int
+    error_code: str
+    table_candidates: tuple[str, ...] = ()
+
+
+# Heaviest first: sections are dealt round-robin onto connections in this order.
+PROFILE_SECTIONS: dict[str, _ProfileSection] = {
+    "detail": _ProfileSection(1, "CUSTOMER_QUERY_FAILED"),
+    "treatments": _ProfileSection(20, "TREATMENT_QUERY_FAILED"),
+    "appointments": _ProfileSection(20, "APPOINTMENT_QUERY_FAILED"),
+    "teethStatus": _ProfileSection(50, "TEETH_QUERY_FAILED", TEETH_TABLE_CANDIDATES),
+    "images": _ProfileSection(50, "IMAGE_QUERY_FAILED", IMAGE_TABLE_CANDIDATES),
+    "examSessions": _ProfileSection(20, "EXAM_SESSION_QUERY_FAILED", DOT_KHAM_TABLE_CANDIDATES),
+    "quotations": _ProfileSection(20, "QUOTATION_QUERY_FAILED", QUOTATION_TABLE_CANDIDATES),
+    "laboOrders": _ProfileSection(20, "LABO_QUERY_FAILED", LABO_TABLE_CANDIDATES),
+    "advances": _ProfileSection(20, "ADVANCE_QUERY_FAILED", ADVANCE_TABLE_CANDIDATES),
+    "debt": _ProfileSection(20, "DEBT_QUERY_FAILED", DEBT_TABLE_CANDIDATES),
+}
+
+
+def _parse_profile_sections(raw: str | None, limit: int | None) -> dict[str, int] | None:
+    """Parse ``sections=detail,appointments,images:100`` into name -> page size.
+
+    Returns ``None`` when a name is unknown or a size is out of range.
+    """
+    tokens = [token.strip() for token in (raw or "").split(",") if token.strip()]
+    if not tokens:
+        tokens = list(PROFILE_SECTIONS)
+    requested: dict[str, int] = {}
+    for token in tokens:
+        name, _, size = token.partition(":")
+        section = PROFILE_SECTIONS.get(name.strip())
+        if section is None:
+            return None
+        if size:
+            if not size.strip().isdigit() or not 1 <= int(size) <= 200:
+                return None
+            requested[name.strip()] = int(size)
+        else:
+            requested[name.strip()] = limit or section.default_limit
+    return {name: requested[name] for name in PROFILE_SECTIONS if name in requested}
+
+
+def _load_profile_group(customer_uuid: UUID, sections: list[tuple[str, int]]) -> dict[str, Any]:
+    """Load several sections on one pooled connection (runs in a worker thread)."""
+    results: dict[str, Any] = {}
+    with get_conn() as conn:
+        snapshot = _load_schema_snapshot(conn)
+        for name, limit in sections:
+            section = PROFILE_SECTIONS[name]
+            try:
+                if name == "detail":
+                    payload = _load_customer_detail(conn, snapshot, customer_uuid)
+                elif name == "appointments":
+                    payload = _load_customer_appointments(conn, snapshot, customer_uuid, 0, limit)
+                elif name == "treatments":
+                    payload = _load_customer_treatments(conn, snapshot, customer_uuid, 0, limit)
+                else:
+                    payload = _load_customer_sub_resource(
+                        conn, snapshot, customer_uuid, section.table_candidates, 0, limit
+                    )
+            except psycopg2.Error as exc:
+                # Keep the connection usable for the remaining sections.
+                conn.rollback()
+                message = str(getattr(exc, "pgerror", None) or str(exc)).strip().splitlines()[0]
+                payload = _error(status_code=500, code=section.error_code, detail=message)
+            results[name] = payload
+    return results
+
+
+@router.get("/{customer_id}/profile")
+async def get_customer_profile(
+    customer_id: str,
+    sections: str | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=200),
+    _user: dict = Depends(require_auth),
+):
+    """Return the customer chart (detail plus sub-resources) in one payload.
+
+    ``sections`` is a comma list of ``PROFILE_SECTIONS`` keys (default: all),
+    each optionally suffixed with ``:<limit>``. The sections are spread over
+    at most ``CUSTOMER_PROFILE_MAX_CONNECTIONS`` pooled connections that run
+    concurrently. A failing section is reported under ``errors`` while the
+    others are still returned.
+    """
+    customer_uuid = _parse_uuid(customer_id)
+    if customer_uuid is None:
+        return _customer_error_invalid_uuid()
+
+    requested = _parse_profile_sections(sections, limit)
+    if requested is None:
+        return _error(
+            status_code=422,
+            code="INVALID_PROFILE_SECTIONS",
+            detail="sections must be a comma list of: " + ", ".join(PROFILE_SECTIONS),
+        )
+
+    group_count = max(1, min(settings.CUSTOMER_PROFILE_MAX_CONNECTIONS, len(requested)))
+    groups: list[list[tuple[str, int]]] = [[] for _ in range(group_count)]
+    for index, item in enumerate(requested.items()):
+        groups[index % group_count].append(item)
+
+    try:
+        loaded = await asyncio.gather(
+            *(run_db(_load_profile_group, customer_uuid, group) for group in groups)
+        )
+    except RuntimeError:
+        return _error(
+            status_code=503,
+            code="DATABASE_UNAVAILABLE",
+            detail="Database is unavailable.",
+        )
+
+    results: dict[str, Any] = {}
+    for group in loaded:
+        results.update(group)
+
+    detail = results.get("detail")
+    if isinstance(detail, JSONResponse) and detail.status_code == 404:
+        return detail
+
+    payload: dict[str, Any] = {"customerId": str(customer_uuid)}
+    errors: dict[str, Any] = {}
+    for name in requested:
+        result = results[name]
+        if isinstance(result, JSONResponse):
+            errors[name] = json.loads(result.body)
+            payload[name] = None
+        else:
+            payload[name] = result
+    payload["errors"] = errors
+    return payload
+
+
 @router.post("", status_code=201)
 def create_customer(
     payload: dict[str, Any],
@@ -1379,6 +1730,8 @@ def create_customer(
             with conn.cursor() as cur:
                 cur.execute(insert_sql, tuple(values[col] for col in insert_cols))
                 created_id = cur.fetchone()[0]
+            if id_col:
+                _refresh_customer_search(conn, snapshot, customer_meta, created_id)
 
             created_uuid = _parse_uuid(created_id)
             if created_uuid is None:
@@ -1506,6 +1859,7 @@ def update_customer(
                         code="CUSTOMER_NOT_FOUND",
                         detail=f"Customer {customer_id} was not found.",
                     )
+            _refresh_customer_search(conn, snapshot, customer_meta, customer_uuid)
 
             refreshed = _fetch_customer_by_id(
                 conn=conn,
@@ -9,12 +9,30 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import pick_column, quote_ident, resolve_table, table_columns
 from app.core.middleware import require_auth
+from app.core.payment_rollup import (
+    JOURNAL_TABLE_CANDIDATES,
+    ROLLUP_TABLE,
+    RollupSource,
+    rollup_for,
+    rollup_where,
+)
+from app.core.query_cache import compiled_query
+from app.core.response_cache import cached_response
 
 router = APIRouter(prefix="/api/reports", tags=["dashboard"])
 
+PAYMENT_TABLE_CANDIDATES = (
+    "account_payments",
+    "accountpayments",
+    "sale_order_payments",
+    "saleorderpayments",
+    "sale_order_payment",
+    "saleorderpayment",
+)
+
 
 class SummaryRequest(BaseModel):
     companyId: str | None = None
@@ -30,16 +48,9 @@ def _to_float(value: Decimal | int | float | None) -> float:
     return float(value)
 
 
+@compiled_query
 def _resolve_payment_context(conn) -> dict | None:
-    payment_table = resolve_table(
-        conn,
-        "account_payments",
-        "accountpayments",
-        "sale_order_payments",
-        "saleorderpayments",
-        "sale_order_payment",
-        "saleorderpayment",
-    )
+    payment_table = resolve_table(conn, *PAYMENT_TABLE_CANDIDATES)
     if not payment_table:
         return None
 
@@ -165,6 +176,26 @@ def _bank_predicate(channel_expr: str) -> str:
     )
 
 
+def _payment_rollup(conn, ctx: dict, company_id: str | None) -> RollupSource | None:
+    if company_id and not ctx["company_col"]:
+        return None
+    return rollup_for(
+        conn,
+        ctx["payment_table"],
+        date_col=ctx["date_col"],
+        amount_col=ctx["amount_col"],
+        company_col=ctx["company_col"],
+    )
+
+
+_ROLLUP_CHANNEL_TOTALS = (
+    "COALESCE(SUM(r.amount_total) FILTER (WHERE r.dashboard_cash), 0) AS total_cash, "
+    "COALESCE(SUM(r.amount_total) FILTER (WHERE r.dashboard_bank), 0) AS total_bank, "
+    "COALESCE(SUM(r.amount_total) FILTER (WHERE NOT (r.dashboard_cash OR r.dashboard_bank)), 0) AS total_other, "
+    "COALESCE(SUM(r.amount_total), 0) AS total_amount "
+)
+
+
 def _build_daily_items(rows: list[dict], start_date: date, end_date: date) -> list[dict]:
     by_day: dict[str, dict] = {}
     cursor = start_date
@@ -199,10 +230,27 @@ def _build_daily_items(rows: list[dict], start_date: date, end_date: date) -> li
 @router.post("/summary")
 async def reports_summary(body: SummaryRequest, _user: dict = Depends(require_auth)):
     """Return dashboard totals by payment channel for a date range."""
-    if body.dateFrom > body.dateTo:
+    return await _channel_summary(company_id=body.companyId, date_from=body.dateFrom, date_to=body.dateTo)
+
+
+@router.get("/channel-summary")
+async def reports_channel_summary(
+    companyId: str | None = Query(default=None),
+    dateFrom: date = Query(...),
+    dateTo: date = Query(...),
+    _user: dict = Depends(require_auth),
+):
+    """GET form of ``POST /summary`` so the dashboard can load it through ``/api/batch``."""
+    return await _channel_summary(company_id=companyId, date_from=dateFrom, date_to=dateTo)
+
+
+@cached_response("dashboard.summary", tables=PAYMENT_TABLE_CANDIDATES + JOURNAL_TABLE_CANDIDATES)
+@offload_db
+def _channel_summary(*, company_id: str | None, date_from: date, date_to: date) -> dict:
+    if date_from > date_to:
         raise HTTPException(status_code=422, detail="dateFrom must be <= dateTo")
 
-    company_id = body.companyId.strip() if body.companyId else None
+    company_id = company_id.strip() if company_id else None
 
     try:
         with get_conn() as conn:
@@ -216,7 +264,32 @@ async def reports_summary(body: SummaryRequest, _user: dict = Depends(require_au
                     "totalAmountYesterday": 0.0,
                 }
 
-            start_dt, end_dt = _date_window(body.dateFrom, body.dateTo)
+            if _payment_rollup(conn, ctx, company_id) is not None:
+                where_sql, params = rollup_where(
+                    date_from=date_from,
+                    date_to=date_to,
+                    company_id=company_id,
+                    exclude_cancelled=True,
+                )
+                yesterday = date_to - timedelta(days=1)
+                y_where_sql, y_params = rollup_where(
+                    date_from=yesterday,
+                    date_to=yesterday,
+                    company_id=company_id,
+                    exclude_cancelled=True,
+                )
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(f"SELECT {_ROLLUP_CHANNEL_TOTALS}FROM {ROLLUP_TABLE} r{where_sql}", tuple(params))
+                    row = dict(cur.fetchone() or {})
+                    cur.execute(
+                        "SELECT COALESCE(SUM(r.amount_total), 0) AS total_amount_yesterday "
+                        f"FROM {ROLLUP_TABLE} r{y_where_sql}",
+                        tuple(y_params),
+                    )
+                    y_row = dict(cur.fetchone() or {})
+                return _summary_response(row, y_row)
+
+            start_dt, end_dt = _date_window(date_from, date_to)
             where_sql, params = _build_payment_where(
                 ctx,
                 start_dt=start_dt,
@@ -244,7 +317,7 @@ async def reports_summary(body: SummaryRequest, _user: dict = Depends(require_au
                 cur.execute(summary_sql, params)
                 row = dict(cur.fetchone() or {})
 
-                y_start, y_end = _date_window(body.dateTo - timedelta(days=1), body.dateTo - timedelta(days=1))
+                y_start, y_end = _date_window(date_to - timedelta(days=1), date_to - timedelta(days=1))
                 y_where_sql, y_params = _build_payment_where(
                     ctx,
                     start_dt=y_start,
@@ -261,19 +334,25 @@ async def reports_summary(body: SummaryRequest, _user: dict = Depends(require_au
                 cur.execute(yesterday_sql, y_params)
                 y_row = dict(cur.fetchone() or {})
 
-            return {
-                "totalCash": _to_float(row.get("total_cash")),
-                "totalBank": _to_float(row.get("total_bank")),
-                "totalOther": _to_float(row.get("total_other")),
-                "totalAmount": _to_float(row.get("total_amount")),
-                "totalAmountYesterday": _to_float(y_row.get("total_amount_yesterday")),
-            }
+            return _summary_response(row, y_row)
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
 
 
+def _summary_response(row: dict, y_row: dict) -> dict:
+    return {
+        "totalCash": _to_float(row.get("total_cash")),
+        "totalBank": _to_float(row.get("total_bank")),
+        "totalOther": _to_float(row.get("total_other")),
+        "totalAmount": _to_float(row.get("total_amount")),
+        "totalAmountYesterday": _to_float(y_row.get("total_amount_yesterday")),
+    }
+
+
 @router.get("/overview-trend")
-async def dashboard_overview_trend(
+@cached_response("dashboard.overview_trend", tables=PAYMENT_TABLE_CANDIDATES + JOURNAL_TABLE_CANDIDATES)
+@offload_db
+def dashboard_overview_trend(
     companyId: str | None = Query(default=None),
     days: int = Query(default=7, ge=1, le=90),
     dateTo: date | None = Query(default=None),
@@ -295,6 +374,27 @@ async def dashboard_overview_trend(
                     "items": _build_daily_items([], start_date, end_date),
                 }
 
+            if _payment_rollup(conn, ctx, company_id) is not None:
+                where_sql, params = rollup_where(
+                    date_from=start_date,
+                    date_to=end_date,
+                    company_id=company_id,
+                    exclude_cancelled=True,
+                )
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(
+                        f"SELECT r.day AS bucket_date, {_ROLLUP_CHANNEL_TOTALS}"
+                        f"FROM {ROLLUP_TABLE} r{where_sql} GROUP BY r.day ORDER BY r.day ASC",
+                        tuple(params),
+                    )
+                    rows = [dict(row) for row in cur.fetchall()]
+                return {
+                    "dateFrom": start_date.isoformat(),
+                    "dateTo": end_date.isoformat(),
+                    "companyId": company_id,
+                    "items": _build_daily_items(rows, start_date, end_date),
+                }
+
             start_dt, end_dt = _date_window(start_date, end_date)
             where_sql, params = _build_payment_where(
                 ctx,
@@ -337,7 +437,8 @@ async def dashboard_overview_trend(
 
 
 @router.get("/overview")
-async def reports_overview(
+@offload_db
+def reports_overview(
     companyId: str | None = Query(default=None),
     reportDate: date | None = Query(default=None, alias="date"),
     _user: dict = Depends(require_auth),
@@ -471,7 +572,8 @@ class DashboardSummaryRequest(BaseModel):
 
 
 @router.post("/dashboard/summary", tags=["dashboard"])
-async def dashboard_summary(body: DashboardSummaryRequest, _user: dict = Depends(require_auth)):
+@offload_db
+def dashboard_summary(body: DashboardSummaryRequest, _user: dict = Depends(require_auth)):
     """Aggregate stats for the dashboard KPI cards: total customers,
     appointments today, revenue today, and pending payments."""
     target_date = body.reportDate or date.today()
@@ -8,7 +8,7 @@ from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query
 from pydantic import BaseModel, Field
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import (
     empty_page,
     page_window,
@@ -40,7 +40,8 @@ class EmployeeUpdatePayload(BaseModel):
 
 
 @router.get("/employees")
-async def list_employees(
+@offload_db
+def list_employees(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -181,7 +182,8 @@ def _resolve_employees_table(conn):
 
 
 @router.post("/employees", status_code=201)
-async def create_employee(
+@offload_db
+def create_employee(
     body: EmployeeCreatePayload = Body(...),
     _user: dict = Depends(require_auth),
 ):
@@ -260,7 +262,8 @@ async def create_employee(
 
 
 @router.put("/employees/{emp_id}")
-async def update_employee(
+@offload_db
+def update_employee(
     emp_id: str = Path(..., min_length=1),
     body: EmployeeUpdatePayload = Body(...),
     _user: dict = Depends(require_auth),
@@ -324,7 +327,8 @@ async def update_employee(
 
 
 @router.delete("/employees/{emp_id}")
-async def delete_employee(
+@offload_db
+def delete_employee(
     emp_id: str = Path(..., min_length=1),
     _user: dict = Depends(require_auth),
 ):
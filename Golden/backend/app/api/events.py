@@ -0,0 +1,62 @@
+"""Server-Sent Events stream of live changes (see ``app.core.live_events``)."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.live_events import Subscription, live_events
+from app.core.middleware import require_auth
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+# Browsers wait this long before reconnecting a dropped EventSource.
+RECONNECT_MS = 3000
+
+
+@router.get("/stream")
+async def event_stream(
+    request: Request,
+    companyId: str | None = Query(default=None),
+    company: str | None = Query(default=None),
+    _user: dict = Depends(require_auth),
+):
+    """Appointment and notification deltas for one branch (all when omitted)."""
+    subscription = live_events.subscribe(
+        asyncio.get_running_loop(),
+        companyId or company,
+        request.headers.get("last-event-id"),
+    )
+    if subscription is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many live subscribers on this worker",
+            headers={"Retry-After": "30"},
+        )
+    return StreamingResponse(
+        _stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream(request: Request, subscription: Subscription) -> AsyncIterator[bytes]:
+    heartbeat = max(settings.LIVE_EVENTS_HEARTBEAT_SECONDS, 1.0)
+    try:
+        yield f"retry: {RECONNECT_MS}\n: connected\n\n".encode("ascii")
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                # Keeps proxies from closing an idle stream.
+                yield b": keep-alive\n\n"
+                continue
+            yield event.encode()
+    finally:
+        live_events.unsubscribe(subscription)
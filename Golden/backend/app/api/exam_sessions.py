@@ -9,7 +9,7 @@ from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query
 from pydantic import BaseModel
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import (
     empty_page,
     page_window,
@@ -19,7 +19,7 @@ from app.core.lookup_sql import (
     table_columns,
 )
 from app.core.middleware import require_auth
-from app.core.pagination import paginate
+from app.core.pagination import InvalidCursorError, SortKey, cursor_requested, paginate
 
 router = APIRouter(prefix="/api", tags=["exam-sessions"])
 
@@ -64,7 +64,8 @@ def _resolve_exam_table(conn):
 
 
 @router.get("/dot-khams")
-async def list_dot_khams(
+@offload_db
+def list_dot_khams(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -74,9 +75,15 @@ async def list_dot_khams(
     dateFrom: date | None = Query(default=None),
     dateTo: date | None = Query(default=None),
     state: str | None = Query(default=None),
+    after: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    paging: str | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
-    """Return paginated exam sessions with optional patient/company filters."""
+    """Return paginated exam sessions with optional patient/company filters.
+
+    ``after``/``before`` (or ``paging=cursor``) select keyset pagination.
+    """
     effective_offset, effective_limit = page_window(
         page=page,
         per_page=per_page,
@@ -84,6 +91,7 @@ async def list_dot_khams(
         limit=limit,
         default_limit=20,
     )
+    use_cursor = cursor_requested(after, before, paging)
 
     try:
         with get_conn() as conn:
@@ -96,12 +104,12 @@ async def list_dot_khams(
                 "exam_session",
             )
             if not sessions_table:
-                return empty_page(effective_offset, effective_limit)
+                return empty_page(effective_offset, effective_limit, cursor=use_cursor)
 
             cols = table_columns(conn, sessions_table)
             id_col = pick_column(cols, "id")
             if not id_col:
-                return empty_page(effective_offset, effective_limit)
+                return empty_page(effective_offset, effective_limit, cursor=use_cursor)
 
             name_col = pick_column(cols, "name", "display_name", "session_name")
             date_col = pick_column(cols, "date", "exam_date", "kham_date", "created_at")
@@ -188,31 +196,31 @@ async def list_dot_khams(
 
             if partnerId:
                 if not partner_id_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"s.{quote_ident(partner_id_col)}::text = %s")
                 params.append(partnerId)
 
             if companyId:
                 if not company_id_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"s.{quote_ident(company_id_col)}::text = %s")
                 params.append(companyId)
 
             if dateFrom:
                 if not date_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"s.{quote_ident(date_col)}::date >= %s")
                 params.append(dateFrom)
 
             if dateTo:
                 if not date_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"s.{quote_ident(date_col)}::date <= %s")
                 params.append(dateTo)
 
             if state:
                 if not state_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"LOWER(COALESCE(s.{quote_ident(state_col)}::text, '')) = %s")
                 params.append(state.strip().lower())
 
@@ -223,6 +231,21 @@ async def list_dot_khams(
             )
             if where_clauses:
                 base_query += " WHERE " + " AND ".join(where_clauses)
+            if use_cursor:
+                keyset = [SortKey("id", descending=True)]
+                if date_col:
+                    keyset.insert(
+                        0, SortKey("date", descending=True, nullable=True, nulls_last=True)
+                    )
+                return paginate(
+                    query=base_query,
+                    params=tuple(params),
+                    conn=conn,
+                    limit=effective_limit,
+                    keyset=keyset,
+                    after=after,
+                    before=before,
+                )
             if date_col:
                 base_query += (
                     f" ORDER BY s.{quote_ident(date_col)} DESC NULLS LAST, "
@@ -238,12 +261,15 @@ async def list_dot_khams(
                 offset=effective_offset,
                 limit=effective_limit,
             )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
 
 
 @router.post("/dot-khams", status_code=201)
-async def create_exam_session(
+@offload_db
+def create_exam_session(
     body: ExamSessionCreatePayload = Body(...),
     _user: dict = Depends(require_auth),
 ):
@@ -317,7 +343,8 @@ async def create_exam_session(
 
 
 @router.put("/dot-khams/{session_id}")
-async def update_exam_session(
+@offload_db
+def update_exam_session(
     session_id: str = Path(..., min_length=1),
     body: ExamSessionUpdatePayload = Body(...),
     _user: dict = Depends(require_auth),
@@ -389,7 +416,8 @@ async def update_exam_session(
 
 
 @router.delete("/dot-khams/{session_id}")
-async def delete_exam_session(
+@offload_db
+def delete_exam_session(
     session_id: str = Path(..., min_length=1),
     _user: dict = Depends(require_auth),
 ):
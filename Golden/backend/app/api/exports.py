@@ -1,16 +1,17 @@
-"""Excel export endpoints for major data tables."""
+"""Export endpoints (xlsx, csv, ndjson) for major data tables.
+
+``GET /api/export/{resource}`` streams the file in the response; the
+``/jobs`` endpoints run the same export in the background (see
+``app.core.export_jobs``) and serve the finished file with Range support.
+"""
 
 from __future__ import annotations
 
-from datetime import date, datetime
-from io import BytesIO
-import json
+from datetime import date
 import re
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from app.api import appointments as appointments_module
 from app.api import customers as customers_module
@@ -18,7 +19,18 @@ from app.api import employees as employees_module
 from app.api import finance as finance_module
 from app.api import settings as settings_module
 from app.api import treatments as treatments_module
+from app.core.database import get_conn, run_db
+from app.core.export_jobs import ExportQueueFullError, export_jobs
+from app.core.export_stream import (
+    EXPORT_MEDIA_TYPES,
+    csv_chunks,
+    file_chunks,
+    file_range,
+    ndjson_chunks,
+    write_xlsx,
+)
 from app.core.middleware import require_auth
+from app.core.pagination import PageQuery, capture_page_query
 
 router = APIRouter(prefix="/api", tags=["exports"])
 
@@ -31,67 +43,118 @@ async def export_resource(
     columns: str | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
-    if (format or "").strip().lower() != "xlsx":
-        raise HTTPException(status_code=400, detail="Only format=xlsx is supported")
+    export_format = _parse_format(format)
+    source = await _load_rows(resource=resource, request=request, user=_user)
+    requested_columns = _parse_columns(columns)
+
+    if export_format == "csv":
+        body = csv_chunks(source, requested_columns)
+    elif export_format == "ndjson":
+        body = ndjson_chunks(source, requested_columns)
+    else:
+        body = file_chunks(await run_db(write_xlsx, source, requested_columns))
+
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": _attachment(_filename(resource, export_format))},
+    )
 
-    rows = await _load_rows(resource=resource, request=request, user=_user)
 
+@router.post("/export/{resource}/jobs")
+async def submit_export_job(
+    resource: str,
+    request: Request,
+    format: str = Query(default="xlsx"),
+    columns: str | None = Query(default=None),
+    _user: dict = Depends(require_auth),
+):
+    """Queue a background export; identical requests share one job and file."""
+    export_format = _parse_format(format)
+    source = await _load_rows(resource=resource, request=request, user=_user)
     requested_columns = _parse_columns(columns)
-    all_columns = requested_columns or _collect_columns(rows)
-
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Export"
-
-    if not all_columns:
-        all_columns = ["message"]
-        rows = [{"message": "No data"}]
-
-    header_labels = [_column_label(col) for col in all_columns]
-    sheet.append(header_labels)
-
-    header_fill = PatternFill(fill_type="solid", fgColor="E8F0FE")
-    for idx in range(1, len(header_labels) + 1):
-        cell = sheet.cell(row=1, column=idx)
-        cell.font = Font(bold=True)
-        cell.fill = header_fill
-
-    for row in rows:
-        output_row = []
-        for col in all_columns:
-            value = row.get(col)
-            output_row.append(_serialise_cell(value))
-        sheet.append(output_row)
-
-    for column_cells in sheet.columns:
-        max_length = 10
-        column_letter = column_cells[0].column_letter
-        for cell in column_cells:
-            value = "" if cell.value is None else str(cell.value)
-            if len(value) > max_length:
-                max_length = len(value)
-        sheet.column_dimensions[column_letter].width = min(max(max_length + 2, 10), 52)
-
-    buffer = BytesIO()
-    workbook.save(buffer)
-    buffer.seek(0)
 
-    safe_resource = re.sub(r"[^a-zA-Z0-9_-]+", "-", resource.strip().lower()) or "export"
-    filename = f"{safe_resource}-{date.today().isoformat()}.xlsx"
+    def _submit():
+        with get_conn() as conn:
+            return export_jobs.submit(
+                conn,
+                resource=resource,
+                fmt=export_format,
+                columns=requested_columns,
+                source=source,
+                filename=_filename(resource, export_format),
+            )
 
+    try:
+        job, reused = await run_db(_submit)
+    except ExportQueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "30"}) from exc
+
+    payload = {**_job_payload(job), "reused": reused}
+    return JSONResponse(payload, status_code=200 if job.status == "done" else 202)
+
+
+@router.get("/export/jobs/{job_id}")
+async def get_export_job(job_id: str, _user: dict = Depends(require_auth)):
+    job = await run_db(export_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return _job_payload(job)
+
+
+@router.get("/export/jobs/{job_id}/download")
+async def download_export_job(job_id: str, request: Request, _user: dict = Depends(require_auth)):
+    job = await run_db(export_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+    path = export_jobs.output_path(job)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Export file has expired") from None
+
+    etag = f'"{job.id}-{size}-{int(job.finished_at or 0)}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": _attachment(job.filename),
+    }
+    media_type = EXPORT_MEDIA_TYPES[job.format]
+
+    byte_range = _requested_range(request.headers.get("range"), size)
+    if_range = request.headers.get("if-range")
+    if byte_range is None or (if_range and if_range.strip() != etag):
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(file_range(path, 0, size), media_type=media_type, headers=headers)
+    if byte_range == "unsatisfiable":
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}", **headers})
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
     return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        file_range(path, start, end - start + 1),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
     )
 
 
-async def _load_rows(resource: str, request: Request, user: dict) -> list[dict]:
+async def _load_rows(resource: str, request: Request, user: dict) -> PageQuery | list[dict]:
+    """The listing's full query (or, for listings without one, its rows)."""
+    with capture_page_query():
+        return await _call_listing(resource, request, user)
+
+
+async def _call_listing(resource: str, request: Request, user: dict) -> PageQuery | list[dict]:
     key = (resource or "").strip().lower()
     params = request.query_params
 
     if key == "customers":
-        payload = customers_module.list_customers(
+        payload = await run_db(
+            customers_module.list_customers,
             page=1,
             per_page=0,
             offset=0,
@@ -179,7 +242,9 @@ async def _load_rows(resource: str, request: Request, user: dict) -> list[dict]:
     raise HTTPException(status_code=404, detail=f"Unsupported export resource: {resource}")
 
 
-def _items(payload) -> list[dict]:
+def _items(payload) -> PageQuery | list[dict]:
+    if isinstance(payload, PageQuery):
+        return payload
     if payload is None:
         return []
     if isinstance(payload, list):
@@ -191,6 +256,62 @@ def _items(payload) -> list[dict]:
     return []
 
 
+def _job_payload(job) -> dict:
+    payload = job.to_dict()
+    payload["statusUrl"] = f"/api/export/jobs/{job.id}"
+    payload["downloadUrl"] = f"/api/export/jobs/{job.id}/download" if job.status == "done" else None
+    return payload
+
+
+def _requested_range(header: str | None, size: int):
+    """``(start, end)`` for a single ``bytes=`` range, ``"unsatisfiable"``, or None.
+
+    None means "send the whole file": no header, another unit, a malformed
+    value or several ranges (which would need a multipart response).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.strip().partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    if size <= 0:
+        return "unsatisfiable"
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                return "unsatisfiable"
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return "unsatisfiable"
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _parse_format(raw: str | None) -> str:
+    export_format = (raw or "").strip().lower()
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be one of: xlsx, csv, ndjson")
+    return export_format
+
+
+def _filename(resource: str, export_format: str) -> str:
+    safe_resource = re.sub(r"[^a-zA-Z0-9_-]+", "-", resource.strip().lower()) or "export"
+    return f"{safe_resource}-{date.today().isoformat()}.{export_format}"
+
+
+def _attachment(filename: str) -> str:
+    return f'attachment; filename="{filename}"'
+
+
 def _parse_date(value: str | None) -> date | None:
     if not value:
         return None
@@ -226,37 +347,3 @@ def _parse_columns(raw: str | None) -> list[str]:
         seen.add(key)
         items.append(key)
     return items
-
-
-def _collect_columns(rows: list[dict]) -> list[str]:
-    if not rows:
-        return []
-    ordered: list[str] = []
-    seen: set[str] = set()
-    for row in rows:
-        for key in row.keys():
-            if key in seen:
-                continue
-            seen.add(key)
-            ordered.append(key)
-    return ordered
-
-
-def _column_label(key: str) -> str:
-    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", key)
-    spaced = spaced.replace("_", " ")
-    return spaced[:1].upper() + spaced[1:]
-
-
-def _serialise_cell(value):
-    if value is None:
-        return ""
-    if isinstance(value, (int, float, bool)):
-        return value
-    if isinstance(value, date):
-        return value.isoformat()
-    if isinstance(value, datetime):
-        return value.isoformat()
-    if isinstance(value, (list, dict)):
-        return json.dumps(value, ensure_ascii=False)
-    return str(value)
@@ -9,7 +9,8 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
+from app.core.json_response import FastJSONRoute
 from app.core.lookup_sql import (
     empty_page,
     page_window,
@@ -19,12 +20,16 @@ from app.core.lookup_sql import (
     table_columns,
 )
 from app.core.middleware import require_auth
-from app.core.pagination import paginate
-
-router = APIRouter(prefix="/api", tags=["finance"])
+from app.core.pagination import InvalidCursorError, SortKey, cursor_requested, paginate
+from app.core.payment_rollup import (
+    INBOUND_TYPES as _INBOUND_TYPES,
+    OUTBOUND_TYPES as _OUTBOUND_TYPES,
+    ROLLUP_TABLE,
+    rollup_for,
+    rollup_where,
+)
 
-_INBOUND_TYPES = ("inbound", "incoming", "in", "receipt", "customer", "thu")
-_OUTBOUND_TYPES = ("outbound", "outgoing", "out", "payment", "vendor", "chi")
+router = APIRouter(prefix="/api", tags=["finance"], route_class=FastJSONRoute)
 
 
 class PaymentCreateRequest(BaseModel):
@@ -278,7 +283,8 @@ def create_payment_record(conn, payload: PaymentCreateRequest, user: dict | None
 
 
 @router.post("/payments")
-async def create_payment(
+@offload_db
+def create_payment(
     payload: PaymentCreateRequest,
     _user: dict = Depends(require_auth),
 ):
@@ -291,7 +297,8 @@ async def create_payment(
 
 
 @router.get("/payments")
-async def list_payments(
+@offload_db
+def list_payments(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -302,9 +309,16 @@ async def list_payments(
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
     state: str | None = Query(default=None),
+    after: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    paging: str | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
-    """Return paginated cashbook payments with optional filters."""
+    """Return paginated cashbook payments with optional filters.
+
+    ``after``/``before`` (or ``paging=cursor`` for the first page) switch to
+    keyset pagination, which skips the count and stays flat on deep pages.
+    """
     effective_offset, effective_limit = page_window(
         page=page,
         per_page=per_page,
@@ -312,6 +326,7 @@ async def list_payments(
         limit=limit,
         default_limit=20,
     )
+    use_cursor = cursor_requested(after, before, paging)
 
     try:
         with get_conn() as conn:
@@ -328,12 +343,12 @@ async def list_payments(
                 "payment",
             )
             if not payments_table:
-                return empty_page(effective_offset, effective_limit)
+                return empty_page(effective_offset, effective_limit, cursor=use_cursor)
 
             cols = table_columns(conn, payments_table)
             id_col = pick_column(cols, "id")
             if not id_col:
-                return empty_page(effective_offset, effective_limit)
+                return empty_page(effective_offset, effective_limit, cursor=use_cursor)
 
             name_col = pick_column(cols, "name", "display_name", "description", "reference", "ref")
             date_col = pick_column(cols, "date", "payment_date", "paymentdate", "created_at", "created_date")
@@ -471,30 +486,30 @@ async def list_payments(
 
             if companyId:
                 if not company_id_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"t.{quote_ident(company_id_col)}::text = %s")
                 params.append(companyId)
 
             if partnerId:
                 if not partner_id_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"t.{quote_ident(partner_id_col)}::text = %s")
                 params.append(partnerId)
 
             if dateFrom:
                 if not date_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"t.{quote_ident(date_col)}::date >= %s")
                 params.append(dateFrom)
             if dateTo:
                 if not date_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"t.{quote_ident(date_col)}::date <= %s")
                 params.append(dateTo)
 
             if state:
                 if not state_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"LOWER(COALESCE(t.{quote_ident(state_col)}::text, '')) = %s")
                 params.append(state.strip().lower())
 
@@ -524,9 +539,9 @@ async def list_payments(
                     elif normalized_type in _OUTBOUND_TYPES:
                         where_clauses.append(f"{amount_expr} < 0")
                     else:
-                        return empty_page(effective_offset, effective_limit)
+                        return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 else:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
 
             base_query = (
                 f"SELECT {', '.join(select_fields)} "
@@ -536,6 +551,17 @@ async def list_payments(
             if where_clauses:
                 base_query += " WHERE " + " AND ".join(where_clauses)
 
+            if use_cursor:
+                return paginate(
+                    query=base_query,
+                    params=tuple(params),
+                    conn=conn,
+                    limit=effective_limit,
+                    keyset=_payment_keyset(date_col),
+                    after=after,
+                    before=before,
+                )
+
             if date_col:
                 base_query += (
                     f" ORDER BY t.{quote_ident(date_col)} DESC NULLS LAST, "
@@ -550,7 +576,11 @@ async def list_payments(
                 conn=conn,
                 offset=effective_offset,
                 limit=effective_limit,
+                count="auto",
+                count_tables=(payments_table,),
             )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
 
@@ -561,7 +591,8 @@ async def list_payments(
 
 
 @router.get("/receipts")
-async def list_receipts(
+@offload_db
+def list_receipts(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -570,6 +601,9 @@ async def list_receipts(
     search: str = Query(default=""),
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
+    after: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    paging: str | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
     """Return receipt vouchers (phieu thu) -- inbound payments."""
@@ -577,6 +611,7 @@ async def list_receipts(
         type_filter="inbound", page=page, per_page=per_page,
         offset=offset, limit=limit, companyId=companyId,
         dateFrom=dateFrom, dateTo=dateTo,
+        after=after, before=before, paging=paging,
     )
 
 
@@ -586,7 +621,8 @@ async def list_receipts(
 
 
 @router.get("/payment-vouchers")
-async def list_payment_vouchers(
+@offload_db
+def list_payment_vouchers(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -595,6 +631,9 @@ async def list_payment_vouchers(
     search: str = Query(default=""),
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
+    after: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    paging: str | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
     """Return payment vouchers (phieu chi) -- outbound payments."""
@@ -602,6 +641,7 @@ async def list_payment_vouchers(
         type_filter="outbound", page=page, per_page=per_page,
         offset=offset, limit=limit, companyId=companyId,
         dateFrom=dateFrom, dateTo=dateTo,
+        after=after, before=before, paging=paging,
     )
 
 
@@ -611,7 +651,8 @@ async def list_payment_vouchers(
 
 
 @router.get("/account-payments")
-async def list_account_payments(
+@offload_db
+def list_account_payments(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -779,6 +820,14 @@ async def list_account_payments(
 # Shared helper for payment-type filtered endpoints
 # ---------------------------------------------------------------------------
 
+def _payment_keyset(date_col: str | None) -> tuple[SortKey, ...]:
+    """Cursor-mode ordering matching the offset listings (newest first)."""
+    id_key = SortKey("id", descending=True)
+    if not date_col:
+        return (id_key,)
+    return (SortKey("date", descending=True, nullable=True, nulls_last=True), id_key)
+
+
 def _payment_type_endpoint(
     *,
     type_filter: str,
@@ -789,11 +838,15 @@ def _payment_type_endpoint(
     companyId: str | None,
     dateFrom: dt_date | None,
     dateTo: dt_date | None,
+    after: str | None = None,
+    before: str | None = None,
+    paging: str | None = None,
 ):
     """Shared logic for receipts, expenses, transfers."""
     effective_offset, effective_limit = page_window(
         page=page, per_page=per_page, offset=offset, limit=limit, default_limit=20,
     )
+    use_cursor = cursor_requested(after, before, paging)
 
     try:
         with get_conn() as conn:
@@ -805,12 +858,12 @@ def _payment_type_endpoint(
                 "payments", "payment",
             )
             if not payments_table:
-                return empty_page(effective_offset, effective_limit)
+                return empty_page(effective_offset, effective_limit, cursor=use_cursor)
 
             cols = table_columns(conn, payments_table)
             id_col = pick_column(cols, "id")
             if not id_col:
-                return empty_page(effective_offset, effective_limit)
+                return empty_page(effective_offset, effective_limit, cursor=use_cursor)
 
             name_col = pick_column(cols, "name", "display_name", "description", "reference", "ref")
             date_col = pick_column(cols, "date", "payment_date", "paymentdate", "created_at", "created_date")
@@ -874,7 +927,7 @@ def _payment_type_endpoint(
 
             if companyId:
                 if not company_id_col:
-                    return empty_page(effective_offset, effective_limit)
+                    return empty_page(effective_offset, effective_limit, cursor=use_cursor)
                 where_clauses.append(f"t.{quote_ident(company_id_col)}::text = %s")
                 params.append(companyId)
 
@@ -888,6 +941,12 @@ def _payment_type_endpoint(
             base_query = f"SELECT {', '.join(select_fields)} FROM {payments_table.qualified_name} t"
             if where_clauses:
                 base_query += " WHERE " + " AND ".join(where_clauses)
+            if use_cursor:
+                return paginate(
+                    query=base_query, params=tuple(params), conn=conn,
+                    limit=effective_limit, keyset=_payment_keyset(date_col),
+                    after=after, before=before,
+                )
             if date_col:
                 base_query += f" ORDER BY t.{quote_ident(date_col)} DESC NULLS LAST, t.{quote_ident(id_col)} DESC"
             else:
@@ -896,7 +955,10 @@ def _payment_type_endpoint(
             return paginate(
                 query=base_query, params=tuple(params), conn=conn,
                 offset=effective_offset, limit=effective_limit,
+                count="auto", count_tables=(payments_table,),
             )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
 
@@ -907,7 +969,8 @@ def _payment_type_endpoint(
 
 
 @router.get("/finance/receipts")
-async def finance_receipts(
+@offload_db
+def finance_receipts(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -915,6 +978,9 @@ async def finance_receipts(
     companyId: str | None = Query(default=None),
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
+    after: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    paging: str | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
     """Return receipt vouchers (Thu khac)."""
@@ -922,6 +988,7 @@ async def finance_receipts(
         type_filter="inbound", page=page, per_page=per_page,
         offset=offset, limit=limit, companyId=companyId,
         dateFrom=dateFrom, dateTo=dateTo,
+        after=after, before=before, paging=paging,
     )
 
 
@@ -931,7 +998,8 @@ async def finance_receipts(
 
 
 @router.get("/finance/expenses")
-async def finance_expenses(
+@offload_db
+def finance_expenses(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -939,6 +1007,9 @@ async def finance_expenses(
     companyId: str | None = Query(default=None),
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
+    after: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    paging: str | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
     """Return expense vouchers (Chi khac)."""
@@ -946,6 +1017,7 @@ async def finance_expenses(
         type_filter="outbound", page=page, per_page=per_page,
         offset=offset, limit=limit, companyId=companyId,
         dateFrom=dateFrom, dateTo=dateTo,
+        after=after, before=before, paging=paging,
     )
 
 
@@ -955,7 +1027,8 @@ async def finance_expenses(
 
 
 @router.get("/finance/transfers")
-async def finance_transfers(
+@offload_db
+def finance_transfers(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -963,6 +1036,9 @@ async def finance_transfers(
     companyId: str | None = Query(default=None),
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
+    after: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    paging: str | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
     """Return internal transfer vouchers."""
@@ -970,6 +1046,7 @@ async def finance_transfers(
         type_filter="transfer", page=page, per_page=per_page,
         offset=offset, limit=limit, companyId=companyId,
         dateFrom=dateFrom, dateTo=dateTo,
+        after=after, before=before, paging=paging,
     )
 
 
@@ -989,7 +1066,8 @@ def _to_float_val(value) -> float:
 
 
 @router.get("/finance/fund-book")
-async def finance_fund_book(
+@offload_db
+def finance_fund_book(
     companyId: str | None = Query(default=None),
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
@@ -1019,6 +1097,37 @@ async def finance_fund_book(
             if not id_col or not amount_col:
                 return {"cashInbound": 0, "cashOutbound": 0, "bankInbound": 0, "bankOutbound": 0, "items": []}
 
+            rollup = (
+                rollup_for(
+                    conn,
+                    payments_table,
+                    date_col=date_col,
+                    amount_col=amount_col,
+                    company_col=company_id_col,
+                )
+                if date_col and (dateFrom or dateTo)
+                else None
+            )
+            if rollup is not None:
+                where_sql, params = rollup_where(
+                    date_from=dateFrom,
+                    date_to=dateTo,
+                    company_id=companyId if companyId and company_id_col else None,
+                    exclude_cancelled=True,
+                )
+                sql = (
+                    "SELECT "
+                    "COALESCE(SUM(r.amount_abs) FILTER (WHERE r.journal_cash AND r.direction = 'inbound'), 0) AS cash_in, "
+                    "COALESCE(SUM(r.amount_abs) FILTER (WHERE r.journal_cash AND r.direction = 'outbound'), 0) AS cash_out, "
+                    "COALESCE(SUM(r.amount_abs) FILTER (WHERE r.journal_bank AND r.direction = 'inbound'), 0) AS bank_in, "
+                    "COALESCE(SUM(r.amount_abs) FILTER (WHERE r.journal_bank AND r.direction = 'outbound'), 0) AS bank_out "
+                    f"FROM {ROLLUP_TABLE} r{where_sql}"
+                )
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(sql, tuple(params))
+                    row = dict(cur.fetchone() or {})
+                return _fund_book_response(row, dateFrom, dateTo, companyId)
+
             amount_expr = f"COALESCE(p.{quote_ident(amount_col)}, 0)"
 
             # Journal join for cash/bank detection
@@ -1088,14 +1197,18 @@ async def finance_fund_book(
                 cur.execute(sql, tuple(params))
                 row = dict(cur.fetchone() or {})
 
-            return {
-                "cashInbound": _to_float_val(row.get("cash_in")),
-                "cashOutbound": _to_float_val(row.get("cash_out")),
-                "bankInbound": _to_float_val(row.get("bank_in")),
-                "bankOutbound": _to_float_val(row.get("bank_out")),
-                "dateFrom": dateFrom.isoformat() if dateFrom else None,
-                "dateTo": dateTo.isoformat() if dateTo else None,
-                "companyId": companyId,
-            }
+            return _fund_book_response(row, dateFrom, dateTo, companyId)
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
+
+
+def _fund_book_response(row: dict, date_from: dt_date | None, date_to: dt_date | None, company_id: str | None) -> dict:
+    return {
+        "cashInbound": _to_float_val(row.get("cash_in")),
+        "cashOutbound": _to_float_val(row.get("cash_out")),
+        "bankInbound": _to_float_val(row.get("bank_in")),
+        "bankOutbound": _to_float_val(row.get("bank_out")),
+        "dateFrom": date_from.isoformat() if date_from else None,
+        "dateTo": date_to.isoformat() if date_to else None,
+        "companyId": company_id,
+    }
@@ -13,9 +13,10 @@ from app.api.finance import (
     create_payment_record,
     list_payments as finance_list_payments,
 )
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import pick_column, quote_ident, resolve_table, table_columns
 from app.core.middleware import require_auth
+from app.core.schema_catalog import get_catalog
 
 router = APIRouter(prefix="/api/hr", tags=["hr"])
 
@@ -43,7 +44,8 @@ class HrAdvanceCreateRequest(BaseModel):
 
 
 @router.get("/salary")
-async def salary_overview(
+@offload_db
+def salary_overview(
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
     companyId: str | None = Query(default=None),
@@ -285,18 +287,8 @@ def _load_timekeeping(
 
 
 def _table_column_data_types(conn, table_ref) -> dict[str, str]:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT lower(column_name), lower(data_type)
-            FROM information_schema.columns
-            WHERE table_schema = %s
-              AND table_name = %s
-            """,
-            (table_ref.schema, table_ref.table),
-        )
-        rows = cur.fetchall()
-    return {row[0]: row[1] for row in rows}
+    table = get_catalog(conn).get(table_ref.schema, table_ref.table)
+    return dict(table.data_types) if table else {}
 
 
 def _numeric_select_expr(alias: str, column_name: str, data_type: str) -> str:
@@ -417,7 +409,8 @@ def _load_advances(
 
 
 @router.get("/timekeeping")
-async def hr_timekeeping(
+@offload_db
+def hr_timekeeping(
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
     companyId: str | None = Query(default=None),
@@ -451,7 +444,8 @@ async def hr_timekeeping(
 
 
 @router.get("/salary-advances")
-async def hr_salary_advances(
+@offload_db
+def hr_salary_advances(
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
     companyId: str | None = Query(default=None),
@@ -550,7 +544,8 @@ async def hr_advances(
 
 
 @router.post("/advances")
-async def create_hr_advance(
+@offload_db
+def create_hr_advance(
     payload: HrAdvanceCreateRequest,
     _user: dict = Depends(require_auth),
 ):
@@ -591,7 +586,8 @@ async def create_hr_advance(
 
 
 @router.get("/salary-payments")
-async def hr_salary_payments(
+@offload_db
+def hr_salary_payments(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -734,7 +730,8 @@ async def hr_salary_payments(
 
 
 @router.get("/salary-reports")
-async def hr_salary_reports(
+@offload_db
+def hr_salary_reports(
     dateFrom: dt_date | None = Query(default=None),
     dateTo: dt_date | None = Query(default=None),
     companyId: str | None = Query(default=None),
@@ -9,7 +9,7 @@ from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query
 from pydantic import BaseModel, Field
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import (
     empty_page,
     page_window,
@@ -20,6 +20,7 @@ from app.core.lookup_sql import (
 )
 from app.core.middleware import require_auth
 from app.core.pagination import paginate
+from app.core.query_cache import compiled_query
 
 router = APIRouter(prefix="/api", tags=["inventory"])
 
@@ -65,7 +66,8 @@ class LaboOrderUpdatePayload(BaseModel):
 
 
 @router.get("/stock-pickings")
-async def list_stock_pickings(
+@offload_db
+def list_stock_pickings(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -275,7 +277,8 @@ async def list_stock_pickings(
 
 
 @router.get("/stock-moves")
-async def list_stock_moves(
+@offload_db
+def list_stock_moves(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -371,7 +374,8 @@ async def list_stock_moves(
 
 
 @router.get("/stock-moves/summary")
-async def stock_moves_summary(
+@offload_db
+def stock_moves_summary(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -452,7 +456,8 @@ async def stock_moves_summary(
 
 
 @router.post("/reports/stock")
-async def stock_report(
+@offload_db
+def stock_report(
     body: StockReportRequest,
     _user: dict = Depends(require_auth),
 ):
@@ -558,7 +563,8 @@ async def stock_report(
 
 
 @router.get("/labo-orders")
-async def list_labo_orders(
+@offload_db
+def list_labo_orders(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -752,7 +758,8 @@ def _resolve_labo_table(conn):
 
 
 @router.post("/labo-orders", status_code=201)
-async def create_labo_order(
+@offload_db
+def create_labo_order(
     body: LaboOrderCreatePayload = Body(...),
     _user: dict = Depends(require_auth),
 ):
@@ -845,7 +852,8 @@ async def create_labo_order(
 
 
 @router.put("/labo-orders/{order_id}")
-async def update_labo_order(
+@offload_db
+def update_labo_order(
     order_id: str = Path(..., min_length=1),
     body: LaboOrderUpdatePayload = Body(...),
     _user: dict = Depends(require_auth),
@@ -938,7 +946,8 @@ async def update_labo_order(
 
 
 @router.delete("/labo-orders/{order_id}")
-async def delete_labo_order(
+@offload_db
+def delete_labo_order(
     order_id: str = Path(..., min_length=1),
     _user: dict = Depends(require_auth),
 ):
@@ -1036,6 +1045,7 @@ def _stock_move_filters(
     return where_clauses, params
 
 
+@compiled_query
 def _stock_move_context(conn) -> dict | None:
     table = resolve_table(
         conn,
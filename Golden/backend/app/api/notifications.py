@@ -6,13 +6,19 @@ import psycopg2
 from fastapi import APIRouter, Depends, HTTPException, Query
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
+from app.core.live_events import NOTIFY_CHANNEL as LIVE_EVENTS_CHANNEL, publish_live_event
 from app.core.lookup_sql import pick_column, quote_ident, resolve_table, table_columns
 from app.core.middleware import require_auth
+from app.core.migrations import optional_ddl
+from app.core.query_cache import compiled_query
+
+LIVE_TRIGGER = "app_live_notification_created"
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 
 
+@compiled_query
 def _resolve_notification_context(conn) -> dict | None:
     table = resolve_table(
         conn,
@@ -63,7 +69,8 @@ def _unread_predicate(ctx: dict, alias: str = "m") -> str:
 
 
 @router.get("/init")
-async def notifications_init(_user: dict = Depends(require_auth)):
+@offload_db
+def notifications_init(_user: dict = Depends(require_auth)):
     try:
         with get_conn() as conn:
             ctx = _resolve_notification_context(conn)
@@ -85,7 +92,8 @@ async def notifications_init(_user: dict = Depends(require_auth)):
 
 
 @router.get("/inbox")
-async def notifications_inbox(
+@offload_db
+def notifications_inbox(
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=0, le=200),
     _user: dict = Depends(require_auth),
@@ -177,7 +185,8 @@ async def notifications_inbox(
 
 
 @router.post("/{notification_id}/read")
-async def mark_notification_read(
+@offload_db
+def mark_notification_read(
     notification_id: str,
     _user: dict = Depends(require_auth),
 ):
@@ -209,9 +218,46 @@ async def mark_notification_read(
                         status_code=404,
                         detail="Notification not found",
                     )
+                publish_live_event(
+                    cur,
+                    "notification",
+                    data={"op": "read", "id": notification_id},
+                )
 
             return {"success": True, "message": "Notification marked as read"}
     except HTTPException:
         raise
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
+
+
+def ensure_notification_live_trigger(conn) -> None:
+    """Publish a live ``notification`` event for every inserted message row.
+
+    Messages are written by other systems too, so this is a row trigger
+    rather than a call in the app's write paths.
+    """
+    ctx = _resolve_notification_context(conn)
+    if not ctx:
+        return
+    with conn.cursor() as cur:
+        optional_ddl(
+            cur,
+            f"""
+            CREATE OR REPLACE FUNCTION {LIVE_TRIGGER}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                PERFORM pg_notify('{LIVE_EVENTS_CHANNEL}', json_build_object(
+                    'type', 'notification',
+                    'companyId', NULL,
+                    'data', json_build_object('op', 'created', 'id', NEW.{quote_ident(ctx['id_col'])}::text)
+                )::text);
+                RETURN NULL;
+            END
+            $$;
+            DROP TRIGGER IF EXISTS {LIVE_TRIGGER} ON {ctx['table'].qualified_name};
+            CREATE TRIGGER {LIVE_TRIGGER}
+                AFTER INSERT ON {ctx['table'].qualified_name}
+                FOR EACH ROW EXECUTE PROCEDURE {LIVE_TRIGGER}();
+            """,
+        )
@@ -12,7 +12,7 @@ from uuid import uuid4
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, Field
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 
 logger = logging.getLogger(__name__)
 
@@ -115,7 +115,8 @@ def _save_fallback(record: dict) -> None:
 
 
 @router.post("/consultations")
-async def create_consultation(payload: ConsultationRequest, request: Request):
+@offload_db
+def create_consultation(payload: ConsultationRequest, request: Request):
     """Create a consultation request from the static public site."""
     full_name, phone, email = _validate_input(payload)
 
@@ -148,7 +149,6 @@ async def create_consultation(payload: ConsultationRequest, request: Request):
     storage = "database"
     try:
         with get_conn() as conn:
-            ensure_public_site_tables(conn)
             with conn.cursor() as cur:
                 cur.execute(
                     """
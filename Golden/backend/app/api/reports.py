@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 from datetime import date, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
+from app.core.json_response import FastJSONRoute
 from app.core.lookup_sql import (
     empty_page,
     page_window,
@@ -18,12 +20,69 @@ from app.core.lookup_sql import (
 )
 from app.core.middleware import require_auth
 from app.core.pagination import paginate
+from app.core.payment_rollup import ROLLUP_TABLE, RollupSource, rollup_for, rollup_where
+from app.core.query_cache import compiled_query
+from app.core.response_cache import cached_response, install_notify_trigger
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/reports", tags=["reports"], route_class=FastJSONRoute)
+
+PAYMENT_TABLE_CANDIDATES = (
+    "account_payments",
+    "accountpayments",
+    "accountpayment",
+    "sale_order_payments",
+    "saleorderpayments",
+    "customer_receipts",
+    "customerreceipts",
+    "payments",
+)
+SALE_ORDER_TABLE_CANDIDATES = ("sale_orders", "saleorder", "saleorders", "sale_order")
+SALE_ORDER_LINE_TABLE_CANDIDATES = (
+    "sale_order_lines",
+    "saleorderlines",
+    "sale_order_line",
+    "saleorderline",
+)
+APPOINTMENT_TABLE_CANDIDATES = ("appointments", "appointment")
+PARTNER_TABLE_CANDIDATES = ("partners", "res_partners", "respartners")
+COMPANY_TABLE_CANDIDATES = ("companies", "company")
+EMPLOYEE_TABLE_CANDIDATES = ("employees", "employee")
+PURCHASE_ORDER_TABLE_CANDIDATES = (
+    "purchase_orders",
+    "purchase_order",
+    "purchaseorders",
+    "purchaseorder",
+)
+INSURANCE_LEDGER_TABLE_CANDIDATES = (
+    "account_move_lines",
+    "account_move_line",
+    "accountmovelines",
+    "accountmoveline",
+)
+PARTNER_SOURCE_TABLE_CANDIDATES = ("partner_sources", "partnersources", "sources")
+INSURANCE_TABLE_CANDIDATES = ("res_insurances", "resinsurances", "insurances", "insurance")
+INSURANCE_PAYMENT_TABLE_CANDIDATES = (
+    "res_insurance_payments",
+    "resinsurancepayments",
+    "insurance_payments",
+    "insurancepayments",
+)
 
-router = APIRouter(prefix="/api/reports", tags=["reports"])
+# Tables whose writes reach every worker's report cache via NOTIFY; the
+# others invalidate the writing worker at once and the rest within the TTL.
+REPORT_NOTIFY_TABLE_GROUPS = (
+    PAYMENT_TABLE_CANDIDATES,
+    SALE_ORDER_TABLE_CANDIDATES,
+    SALE_ORDER_LINE_TABLE_CANDIDATES,
+    APPOINTMENT_TABLE_CANDIDATES,
+)
 
 
 @router.get("/revenue-trend")
-async def report_revenue_trend(
+@offload_db
+def report_revenue_trend(
     dateFrom: date | None = Query(default=None),
     dateTo: date | None = Query(default=None),
     companyId: str | None = Query(default=None),
@@ -37,29 +96,44 @@ async def report_revenue_trend(
             if not ctx:
                 return {"items": []}
 
-            where: list[str] = []
-            params: list = []
-            _append_date_filter(
-                where, params,
-                expr=f"p.{quote_ident(ctx.date_col)}",
-                date_from=date_from, date_to=date_to,
-            )
-            if companyId and ctx.company_id_col:
-                where.append(f"p.{quote_ident(ctx.company_id_col)}::text = %s")
-                params.append(companyId)
-
-            where_sql = " WHERE " + " AND ".join(where) if where else ""
-            amount_expr = f"COALESCE(p.{quote_ident(ctx.amount_col)}, 0)"
-            date_expr = f"p.{quote_ident(ctx.date_col)}::date"
+            if _payment_rollup(conn, ctx) is not None:
+                where_sql, params = rollup_where(
+                    date_from=date_from,
+                    date_to=date_to,
+                    company_id=companyId if companyId and ctx.company_id_col else None,
+                )
+                sql = (
+                    "SELECT r.day AS report_date, "
+                    "COALESCE(SUM(r.amount_positive), 0) AS income, "
+                    "COALESCE(SUM(r.amount_negative), 0) AS expense, "
+                    "COALESCE(SUM(r.amount_total), 0) AS revenue "
+                    f"FROM {ROLLUP_TABLE} r{where_sql} "
+                    "GROUP BY r.day ORDER BY r.day ASC"
+                )
+            else:
+                where: list[str] = []
+                params: list = []
+                _append_date_filter(
+                    where, params,
+                    expr=f"p.{quote_ident(ctx.date_col)}",
+                    date_from=date_from, date_to=date_to,
+                )
+                if companyId and ctx.company_id_col:
+                    where.append(f"p.{quote_ident(ctx.company_id_col)}::text = %s")
+                    params.append(companyId)
 
-            sql = (
-                f"SELECT {date_expr} AS report_date, "
-                f"COALESCE(SUM(CASE WHEN {amount_expr} > 0 THEN {amount_expr} ELSE 0 END), 0) AS income, "
-                f"COALESCE(SUM(CASE WHEN {amount_expr} < 0 THEN ABS({amount_expr}) ELSE 0 END), 0) AS expense, "
-                f"COALESCE(SUM({amount_expr}), 0) AS revenue "
-                f"FROM {ctx.table.qualified_name} p{where_sql} "
-                f"GROUP BY {date_expr} ORDER BY {date_expr} ASC"
-            )
+                where_sql = " WHERE " + " AND ".join(where) if where else ""
+                amount_expr = f"COALESCE(p.{quote_ident(ctx.amount_col)}, 0)"
+                date_expr = f"p.{quote_ident(ctx.date_col)}::date"
+
+                sql = (
+                    f"SELECT {date_expr} AS report_date, "
+                    f"COALESCE(SUM(CASE WHEN {amount_expr} > 0 THEN {amount_expr} ELSE 0 END), 0) AS income, "
+                    f"COALESCE(SUM(CASE WHEN {amount_expr} < 0 THEN ABS({amount_expr}) ELSE 0 END), 0) AS expense, "
+                    f"COALESCE(SUM({amount_expr}), 0) AS revenue "
+                    f"FROM {ctx.table.qualified_name} p{where_sql} "
+                    f"GROUP BY {date_expr} ORDER BY {date_expr} ASC"
+                )
             cur = conn.cursor()
             cur.execute(sql, params)
             cols = [d[0] for d in cur.description]
@@ -79,7 +153,9 @@ async def report_revenue_trend(
 
 
 @router.get("/appointments")
-async def report_appointments(
+@cached_response("reports.appointments", tables=APPOINTMENT_TABLE_CANDIDATES)
+@offload_db
+def report_appointments(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -97,7 +173,7 @@ async def report_appointments(
     try:
         with get_conn() as conn:
             from app.core.lookup_sql import resolve_table, table_columns, pick_column
-            apt_table = resolve_table(conn, "appointments", "appointment")
+            apt_table = resolve_table(conn, *APPOINTMENT_TABLE_CANDIDATES)
             if not apt_table:
                 return empty_page(resolved_offset, resolved_limit)
 
@@ -130,7 +206,8 @@ async def report_appointments(
 
 
 @router.get("/reception")
-async def report_reception(
+@offload_db
+def report_reception(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -147,7 +224,7 @@ async def report_reception(
     date_from, date_to = _resolve_window(dateFrom, dateTo)
     try:
         with get_conn() as conn:
-            apt_table = resolve_table(conn, "appointments", "appointment")
+            apt_table = resolve_table(conn, *APPOINTMENT_TABLE_CANDIDATES)
             if not apt_table:
                 return empty_page(resolved_offset, resolved_limit)
 
@@ -234,18 +311,9 @@ def _resolve_window(date_from: date | None, date_to: date | None) -> tuple[date,
     return start, end
 
 
+@compiled_query
 def _payment_context(conn) -> PaymentContext | None:
-    payment_table = resolve_table(
-        conn,
-        "account_payments",
-        "accountpayments",
-        "accountpayment",
-        "sale_order_payments",
-        "saleorderpayments",
-        "customer_receipts",
-        "customerreceipts",
-        "payments",
-    )
+    payment_table = resolve_table(conn, *PAYMENT_TABLE_CANDIDATES)
     if not payment_table:
         return None
 
@@ -280,8 +348,9 @@ def _payment_context(conn) -> PaymentContext | None:
     )
 
 
+@compiled_query
 def _sale_order_context(conn) -> SaleOrderContext | None:
-    order_table = resolve_table(conn, "sale_orders", "saleorder", "saleorders", "sale_order")
+    order_table = resolve_table(conn, *SALE_ORDER_TABLE_CANDIDATES)
     if not order_table:
         return None
 
@@ -326,14 +395,9 @@ def _sale_order_context(conn) -> SaleOrderContext | None:
     )
 
 
+@compiled_query
 def _purchase_order_context(conn) -> PurchaseOrderContext | None:
-    purchase_table = resolve_table(
-        conn,
-        "purchase_orders",
-        "purchase_order",
-        "purchaseorders",
-        "purchaseorder",
-    )
+    purchase_table = resolve_table(conn, *PURCHASE_ORDER_TABLE_CANDIDATES)
     if not purchase_table:
         return None
 
@@ -372,14 +436,9 @@ def _purchase_order_context(conn) -> PurchaseOrderContext | None:
     )
 
 
+@compiled_query
 def _insurance_ledger_context(conn) -> InsuranceLedgerContext | None:
-    ledger_table = resolve_table(
-        conn,
-        "account_move_lines",
-        "account_move_line",
-        "accountmovelines",
-        "accountmoveline",
-    )
+    ledger_table = resolve_table(conn, *INSURANCE_LEDGER_TABLE_CANDIDATES)
     if not ledger_table:
         return None
 
@@ -406,6 +465,16 @@ def _insurance_ledger_context(conn) -> InsuranceLedgerContext | None:
     )
 
 
+def _payment_rollup(conn, ctx: PaymentContext) -> RollupSource | None:
+    return rollup_for(
+        conn,
+        ctx.table,
+        date_col=ctx.date_col,
+        amount_col=ctx.amount_col,
+        company_col=ctx.company_id_col,
+    )
+
+
 def _append_date_filter(
     where_clauses: list[str],
     params: list,
@@ -420,7 +489,8 @@ def _append_date_filter(
 
 
 @router.get("/daily")
-async def report_daily(
+@offload_db
+def report_daily(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -445,6 +515,31 @@ async def report_daily(
             if not ctx:
                 return empty_page(resolved_offset, resolved_limit)
 
+            if companyId and not ctx.company_id_col:
+                return empty_page(resolved_offset, resolved_limit)
+
+            if _payment_rollup(conn, ctx) is not None:
+                where_sql, params = rollup_where(
+                    date_from=date_from,
+                    date_to=date_to,
+                    company_id=companyId or None,
+                )
+                return paginate(
+                    query=(
+                        "SELECT "
+                        "r.day AS \"reportDate\", "
+                        "COALESCE(SUM(r.amount_total), 0) AS \"totalAmount\", "
+                        "SUM(r.payment_count)::bigint AS \"paymentCount\" "
+                        f"FROM {ROLLUP_TABLE} r{where_sql} "
+                        "GROUP BY r.day "
+                        "ORDER BY r.day DESC"
+                    ),
+                    params=tuple(params),
+                    conn=conn,
+                    offset=resolved_offset,
+                    limit=resolved_limit,
+                )
+
             where: list[str] = []
             params: list = []
             _append_date_filter(
@@ -456,8 +551,6 @@ async def report_daily(
             )
 
             if companyId:
-                if not ctx.company_id_col:
-                    return empty_page(resolved_offset, resolved_limit)
                 where.append(f"p.{quote_ident(ctx.company_id_col)}::text = %s")
                 params.append(companyId)
 
@@ -490,7 +583,12 @@ async def report_daily(
 
 
 @router.get("/services")
-async def report_services(
+@cached_response(
+    "reports.services",
+    tables=SALE_ORDER_TABLE_CANDIDATES + SALE_ORDER_LINE_TABLE_CANDIDATES,
+)
+@offload_db
+def report_services(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -511,13 +609,7 @@ async def report_services(
 
     try:
         with get_conn() as conn:
-            line_table = resolve_table(
-                conn,
-                "sale_order_lines",
-                "saleorderlines",
-                "sale_order_line",
-                "saleorderline",
-            )
+            line_table = resolve_table(conn, *SALE_ORDER_LINE_TABLE_CANDIDATES)
             if not line_table:
                 return empty_page(resolved_offset, resolved_limit)
 
@@ -650,7 +742,12 @@ async def report_services(
 
 
 @router.get("/customers")
-async def report_customers(
+@cached_response(
+    "reports.customers",
+    tables=PAYMENT_TABLE_CANDIDATES + SALE_ORDER_TABLE_CANDIDATES + PARTNER_TABLE_CANDIDATES,
+)
+@offload_db
+def report_customers(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -773,7 +870,13 @@ async def report_customers(
 
 
 @router.get("/sources")
-async def report_sources(
+@cached_response(
+    "reports.sources",
+    tables=PAYMENT_TABLE_CANDIDATES + PARTNER_TABLE_CANDIDATES + PARTNER_SOURCE_TABLE_CANDIDATES,
+    ttl=120.0,
+)
+@offload_db
+def report_sources(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -794,7 +897,7 @@ async def report_sources(
 
     try:
         with get_conn() as conn:
-            partner_table = resolve_table(conn, "partners", "res_partners", "respartners")
+            partner_table = resolve_table(conn, *PARTNER_TABLE_CANDIDATES)
             if not partner_table:
                 return empty_page(resolved_offset, resolved_limit)
 
@@ -820,7 +923,7 @@ async def report_sources(
             if not source_id_col and not source_name_col:
                 return empty_page(resolved_offset, resolved_limit)
 
-            source_table = resolve_table(conn, "partner_sources", "partnersources", "sources")
+            source_table = resolve_table(conn, *PARTNER_SOURCE_TABLE_CANDIDATES)
             source_join = ""
             source_label_expr = (
                 f"COALESCE(NULLIF(p.{quote_ident(source_name_col)}::text, ''), 'Không xác định')"
@@ -904,7 +1007,12 @@ async def report_sources(
 
 
 @router.get("/staff")
-async def report_staff(
+@cached_response(
+    "reports.staff",
+    tables=SALE_ORDER_TABLE_CANDIDATES + EMPLOYEE_TABLE_CANDIDATES,
+)
+@offload_db
+def report_staff(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -936,7 +1044,7 @@ async def report_staff(
                 else "'N/A'::text"
             )
             if not ctx.doctor_name_col:
-                employees_table = resolve_table(conn, "employees", "employee")
+                employees_table = resolve_table(conn, *EMPLOYEE_TABLE_CANDIDATES)
                 if employees_table:
                     employee_cols = table_columns(conn, employees_table)
                     e_id_col = pick_column(employee_cols, "id")
@@ -1000,7 +1108,12 @@ async def report_staff(
 
 
 @router.get("/branches")
-async def report_branches(
+@cached_response(
+    "reports.branches",
+    tables=PAYMENT_TABLE_CANDIDATES + SALE_ORDER_TABLE_CANDIDATES + COMPANY_TABLE_CANDIDATES,
+)
+@offload_db
+def report_branches(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -1031,7 +1144,7 @@ async def report_branches(
                 )
 
                 if not payment_ctx.company_name_col:
-                    company_table = resolve_table(conn, "companies", "company")
+                    company_table = resolve_table(conn, *COMPANY_TABLE_CANDIDATES)
                     if company_table:
                         company_cols = table_columns(conn, company_table)
                         c_id_col = pick_column(company_cols, "id")
@@ -1093,7 +1206,7 @@ async def report_branches(
                 else "'N/A'::text"
             )
             if not order_ctx.company_name_col:
-                company_table = resolve_table(conn, "companies", "company")
+                company_table = resolve_table(conn, *COMPANY_TABLE_CANDIDATES)
                 if company_table:
                     company_cols = table_columns(conn, company_table)
                     c_id_col = pick_column(company_cols, "id")
@@ -1170,7 +1283,8 @@ def _to_float(value) -> float:
 
 
 @router.get("/summary")
-async def reports_fund_summary(
+@offload_db
+def reports_fund_summary(
     companyId: str | None = Query(default=None),
     dateFrom: date | None = Query(default=None),
     dateTo: date | None = Query(default=None),
@@ -1187,7 +1301,23 @@ async def reports_fund_summary(
 
                 cash_fund = 0.0
                 bank_fund = 0.0
-                if payment_ctx:
+                if payment_ctx and _payment_rollup(conn, payment_ctx) is not None:
+                    where_sql, params = rollup_where(
+                        date_from=date_from,
+                        date_to=date_to,
+                        company_id=companyId if companyId and payment_ctx.company_id_col else None,
+                    )
+                    cur.execute(
+                        "SELECT "
+                        "COALESCE(SUM(r.amount_total) FILTER (WHERE r.journal_cash), 0) AS cash_fund, "
+                        "COALESCE(SUM(r.amount_total) FILTER (WHERE r.journal_bank), 0) AS bank_fund "
+                        f"FROM {ROLLUP_TABLE} r{where_sql}",
+                        tuple(params),
+                    )
+                    row = dict(cur.fetchone() or {})
+                    cash_fund = _to_float(row.get("cash_fund"))
+                    bank_fund = _to_float(row.get("bank_fund"))
+                elif payment_ctx:
                     amount_expr = f"COALESCE(p.{quote_ident(payment_ctx.amount_col)}, 0)"
                     where: list[str] = []
                     params: list = []
@@ -1371,7 +1501,15 @@ async def reports_fund_summary(
 # ---------------------------------------------------------------------------
 
 @router.get("/supplier-debt")
-async def report_supplier_debt(
+@cached_response(
+    "reports.supplier_debt",
+    tables=PURCHASE_ORDER_TABLE_CANDIDATES
+    + PARTNER_TABLE_CANDIDATES
+    + ("partner_debt_adjustments", "partnerdebtadjustments"),
+    ttl=60.0,
+)
+@offload_db
+def report_supplier_debt(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -1398,7 +1536,7 @@ async def report_supplier_debt(
                     else "'N/A'::text"
                 )
                 if not purchase_ctx.partner_name_col:
-                    partner_table = resolve_table(conn, "partners", "res_partners", "respartners")
+                    partner_table = resolve_table(conn, *PARTNER_TABLE_CANDIDATES)
                     if partner_table:
                         partner_cols = table_columns(conn, partner_table)
                         p_id_col = pick_column(partner_cols, "id")
@@ -1516,7 +1654,7 @@ async def report_supplier_debt(
             if not partner_id_col or not date_col or (not debt_col and not adjust_col):
                 return empty_page(resolved_offset, resolved_limit)
 
-            partner_table = resolve_table(conn, "partners", "res_partners", "respartners")
+            partner_table = resolve_table(conn, *PARTNER_TABLE_CANDIDATES)
             joins = ""
             supplier_name_expr = "'N/A'::text"
             if partner_table:
@@ -1600,7 +1738,16 @@ async def report_supplier_debt(
 # ---------------------------------------------------------------------------
 
 @router.get("/insurance-debt")
-async def report_insurance_debt(
+@cached_response(
+    "reports.insurance_debt",
+    tables=INSURANCE_LEDGER_TABLE_CANDIDATES
+    + INSURANCE_TABLE_CANDIDATES
+    + INSURANCE_PAYMENT_TABLE_CANDIDATES
+    + PARTNER_TABLE_CANDIDATES,
+    ttl=60.0,
+)
+@offload_db
+def report_insurance_debt(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -1620,8 +1767,8 @@ async def report_insurance_debt(
         with get_conn() as conn:
             ledger_ctx = _insurance_ledger_context(conn)
             if ledger_ctx and (ledger_ctx.residual_col or ledger_ctx.balance_col):
-                insurance_table = resolve_table(conn, "res_insurances", "resinsurances", "insurances", "insurance")
-                partner_table = resolve_table(conn, "partners", "res_partners", "respartners")
+                insurance_table = resolve_table(conn, *INSURANCE_TABLE_CANDIDATES)
+                partner_table = resolve_table(conn, *PARTNER_TABLE_CANDIDATES)
 
                 joins = ""
                 insurance_name_expr = "'N/A'::text"
@@ -1722,13 +1869,7 @@ async def report_insurance_debt(
                     limit=resolved_limit,
                 )
 
-            payment_table = resolve_table(
-                conn,
-                "res_insurance_payments",
-                "resinsurancepayments",
-                "insurance_payments",
-                "insurancepayments",
-            )
+            payment_table = resolve_table(conn, *INSURANCE_PAYMENT_TABLE_CANDIDATES)
             if not payment_table:
                 return empty_page(resolved_offset, resolved_limit)
 
@@ -1747,7 +1888,7 @@ async def report_insurance_debt(
             if not insurance_id_col or not amount_col or not date_col:
                 return empty_page(resolved_offset, resolved_limit)
 
-            insurance_table = resolve_table(conn, "res_insurances", "resinsurances", "insurances", "insurance")
+            insurance_table = resolve_table(conn, *INSURANCE_TABLE_CANDIDATES)
             joins = ""
             insurance_name_expr = "'N/A'::text"
             if insurance_table:
@@ -1809,3 +1950,12 @@ async def report_insurance_debt(
             )
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
+
+
+def ensure_report_cache_triggers(conn) -> None:
+    """Install the report-cache NOTIFY trigger on the payment, order and appointment tables."""
+    with conn.cursor() as cur:
+        for candidates in REPORT_NOTIFY_TABLE_GROUPS:
+            table = resolve_table(conn, *candidates)
+            if table is not None and not install_notify_trigger(cur, table):
+                logger.warning("[BOOT] Report cache relies on TTL for writes to %s", table.qualified_name)
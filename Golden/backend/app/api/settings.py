@@ -10,7 +10,7 @@ from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query
 from pydantic import BaseModel, Field
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import (
     empty_page,
     page_window,
@@ -21,6 +21,7 @@ from app.core.lookup_sql import (
 )
 from app.core.middleware import require_admin
 from app.core.pagination import paginate
+from app.core.session_cache import publish_session_change
 
 
 class CompanyCreatePayload(BaseModel):
@@ -82,7 +83,8 @@ def _normalise_role(role: str | None) -> str:
     return raw
 
 
-def _ensure_settings_table(conn) -> None:
+def ensure_settings_table(conn) -> None:
+    """Create the key/value settings table if it does not exist."""
     with conn.cursor() as cur:
         cur.execute(
             """
@@ -98,7 +100,8 @@ def _ensure_settings_table(conn) -> None:
 
 
 @router.get("/users")
-async def list_users(
+@offload_db
+def list_users(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -148,7 +151,8 @@ async def list_users(
 
 
 @router.post("/users", status_code=201)
-async def create_user(body: UserCreatePayload, _user: dict = Depends(require_admin)):
+@offload_db
+def create_user(body: UserCreatePayload, _user: dict = Depends(require_admin)):
     from app.core.security import hash_password
 
     email = _normalise_email(body.email)
@@ -189,7 +193,8 @@ async def create_user(body: UserCreatePayload, _user: dict = Depends(require_adm
 
 
 @router.put("/users/{user_id}")
-async def update_user(user_id: str, body: UserUpdatePayload, _user: dict = Depends(require_admin)):
+@offload_db
+def update_user(user_id: str, body: UserUpdatePayload, _user: dict = Depends(require_admin)):
     from app.core.security import hash_password
 
     updates: list[str] = []
@@ -242,6 +247,8 @@ async def update_user(user_id: str, body: UserUpdatePayload, _user: dict = Depen
                 row = cur.fetchone()
                 if not row:
                     raise HTTPException(status_code=404, detail="Không tìm thấy tài khoản")
+                # Cached sessions carry name/email/role and assume the user is active.
+                publish_session_change(cur, user_id=row["id"])
                 return dict(row)
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
@@ -254,7 +261,8 @@ async def update_user(user_id: str, body: UserUpdatePayload, _user: dict = Depen
 
 
 @router.delete("/users/{user_id}")
-async def delete_user(user_id: str, _user: dict = Depends(require_admin)):
+@offload_db
+def delete_user(user_id: str, _user: dict = Depends(require_admin)):
     if user_id == str(_user.get("id") or ""):
         raise HTTPException(status_code=400, detail="Không thể xóa tài khoản đang đăng nhập")
 
@@ -268,19 +276,20 @@ async def delete_user(user_id: str, _user: dict = Depends(require_admin)):
                 row = cur.fetchone()
                 if not row:
                     raise HTTPException(status_code=404, detail="Không tìm thấy tài khoản")
+                publish_session_change(cur, user_id=row[0])
                 return {"id": row[0], "deleted": True}
     except RuntimeError:
         raise HTTPException(status_code=503, detail="Database is unavailable")
 
 
 @router.get("/settings")
-async def list_settings(
+@offload_db
+def list_settings(
     prefix: str | None = Query(default=None),
     _user: dict = Depends(require_admin),
 ):
     try:
         with get_conn() as conn:
-            _ensure_settings_table(conn)
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 if prefix and prefix.strip():
                     like_pattern = f"{prefix.strip()}%"
@@ -311,13 +320,13 @@ async def list_settings(
 
 
 @router.post("/settings")
-async def upsert_settings(body: SettingsUpsertPayload, _user: dict = Depends(require_admin)):
+@offload_db
+def upsert_settings(body: SettingsUpsertPayload, _user: dict = Depends(require_admin)):
     if not body.items:
         raise HTTPException(status_code=422, detail="Danh sách cài đặt trống")
 
     try:
         with get_conn() as conn:
-            _ensure_settings_table(conn)
             saved: list[dict] = []
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 for item in body.items:
@@ -363,7 +372,8 @@ async def upsert_settings(body: SettingsUpsertPayload, _user: dict = Depends(req
 
 
 @router.get("/settings/logs")
-async def list_activity_logs(
+@offload_db
+def list_activity_logs(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -500,7 +510,8 @@ async def list_activity_logs(
 
 
 @router.get("/teams")
-async def list_teams(_user: dict = Depends(require_admin)):
+@offload_db
+def list_teams(_user: dict = Depends(require_admin)):
     """Return teams list from CRM/app team tables."""
     try:
         with get_conn() as conn:
@@ -543,7 +554,8 @@ async def list_teams(_user: dict = Depends(require_admin)):
 
 
 @router.post("/teams")
-async def create_team(body: dict, _user: dict = Depends(require_admin)):
+@offload_db
+def create_team(body: dict, _user: dict = Depends(require_admin)):
     """Create a team in the resolved CRM/app team table."""
     name = str((body or {}).get("name") or "").strip()
     description = str((body or {}).get("description") or "").strip() or None
@@ -641,7 +653,8 @@ async def create_team(body: dict, _user: dict = Depends(require_admin)):
 
 
 @router.get("/teams/{team_id}/members")
-async def team_members(team_id: str, _user: dict = Depends(require_admin)):
+@offload_db
+def team_members(team_id: str, _user: dict = Depends(require_admin)):
     """Return team members with user info when available."""
     try:
         with get_conn() as conn:
@@ -786,7 +799,8 @@ def _resolve_team_members_table(conn):
 
 
 @router.post("/teams/{team_id}/members", status_code=201)
-async def add_team_member(
+@offload_db
+def add_team_member(
     team_id: str = Path(..., min_length=1),
     body: dict = Body(...),
     _user: dict = Depends(require_admin),
@@ -858,7 +872,8 @@ async def add_team_member(
 
 
 @router.delete("/teams/{team_id}/members/{member_id}")
-async def remove_team_member(
+@offload_db
+def remove_team_member(
     team_id: str = Path(..., min_length=1),
     member_id: str = Path(..., min_length=1),
     _user: dict = Depends(require_admin),
@@ -939,7 +954,8 @@ def _resolve_teams_table(conn):
 
 
 @router.put("/teams/{team_id}")
-async def update_team(
+@offload_db
+def update_team(
     team_id: str = Path(..., min_length=1),
     body: dict = Body(...),
     _user: dict = Depends(require_admin),
@@ -1003,7 +1019,8 @@ async def update_team(
 
 
 @router.delete("/teams/{team_id}")
-async def delete_team(
+@offload_db
+def delete_team(
     team_id: str = Path(..., min_length=1),
     _user: dict = Depends(require_admin),
 ):
@@ -1055,7 +1072,8 @@ async def delete_team(
 
 
 @router.post("/settings/companies", status_code=201)
-async def create_company(
+@offload_db
+def create_company(
     body: CompanyCreatePayload = Body(...),
     _user: dict = Depends(require_admin),
 ):
@@ -1118,7 +1136,8 @@ async def create_company(
 
 
 @router.put("/settings/companies/{company_id}")
-async def update_company(
+@offload_db
+def update_company(
     company_id: str = Path(..., min_length=1),
     body: CompanyUpdatePayload = Body(...),
     _user: dict = Depends(require_admin),
@@ -1186,7 +1205,8 @@ async def update_company(
 
 
 @router.delete("/settings/companies/{company_id}")
-async def delete_company(
+@offload_db
+def delete_company(
     company_id: str = Path(..., min_length=1),
     _user: dict = Depends(require_admin),
 ):
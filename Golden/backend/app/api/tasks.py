@@ -9,7 +9,7 @@ from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from pydantic import BaseModel, Field
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
 from app.core.lookup_sql import (
     TableRef,
     empty_page,
@@ -64,6 +64,20 @@ class TaskUpdateRequest(BaseModel):
     note: str | None = None
 
 
+def ensure_task_fallback_tables(conn) -> None:
+    """Create app-owned task tables when either legacy task table is missing."""
+    tasks_table = resolve_table(conn, "crm_tasks", "crmtasks", "tasks", "task")
+    categories_table = resolve_table(
+        conn,
+        "crm_task_categories",
+        "crmtaskcategories",
+        "task_categories",
+        "taskcategory",
+    )
+    if not tasks_table or not categories_table:
+        _ensure_app_task_tables(conn)
+
+
 def _ensure_app_task_tables(conn) -> None:
     with conn.cursor() as cur:
         cur.execute(
@@ -151,7 +165,6 @@ def _resolve_tasks_table(conn) -> TableRef:
     if table_ref:
         return table_ref
 
-    _ensure_app_task_tables(conn)
     return TableRef(schema="public", table=_APP_TASKS_TABLE)
 
 
@@ -166,7 +179,6 @@ def _resolve_task_categories_table(conn) -> TableRef:
     if table_ref:
         return table_ref
 
-    _ensure_app_task_tables(conn)
     return TableRef(schema="public", table=_APP_TASK_CATEGORIES_TABLE)
 
 
@@ -397,7 +409,8 @@ def _fetch_task_by_id(conn, table_ref: TableRef, fields: dict[str, str | None],
 
 
 @router.get("/tasks")
-async def list_tasks(
+@offload_db
+def list_tasks(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -463,7 +476,8 @@ async def list_tasks(
 
 
 @router.get("/tasks/counts")
-async def task_counts(
+@offload_db
+def task_counts(
     companyId: str | None = Query(default=None),
     dateCreateFrom: date | None = Query(default=None),
     dateCreateTo: date | None = Query(default=None),
@@ -522,7 +536,8 @@ async def task_counts(
 
 
 @router.get("/task-categories")
-async def list_task_categories(
+@offload_db
+def list_task_categories(
     active: bool | None = Query(default=None),
     _user: dict = Depends(require_auth),
 ):
@@ -597,7 +612,8 @@ class TaskCategoryUpdateRequest(BaseModel):
 
 
 @router.post("/task-categories", status_code=201)
-async def create_task_category(
+@offload_db
+def create_task_category(
     body: TaskCategoryCreateRequest,
     user: dict = Depends(require_auth),
 ):
@@ -683,7 +699,8 @@ async def create_task_category(
 
 
 @router.put("/task-categories/{cat_id}")
-async def update_task_category(
+@offload_db
+def update_task_category(
     body: TaskCategoryUpdateRequest,
     cat_id: str = Path(..., min_length=1),
     user: dict = Depends(require_auth),
@@ -736,7 +753,8 @@ async def update_task_category(
 
 
 @router.delete("/task-categories/{cat_id}")
-async def delete_task_category(
+@offload_db
+def delete_task_category(
     cat_id: str = Path(..., min_length=1),
     user: dict = Depends(require_auth),
 ):
@@ -782,7 +800,8 @@ async def delete_task_category(
 
 
 @router.post("/tasks")
-async def create_task(
+@offload_db
+def create_task(
     body: TaskCreateRequest,
     user: dict = Depends(require_auth),
 ):
@@ -863,7 +882,8 @@ async def create_task(
 
 
 @router.put("/tasks/{task_id}")
-async def update_task(
+@offload_db
+def update_task(
     body: TaskUpdateRequest,
     task_id: str = Path(..., min_length=1),
     user: dict = Depends(require_auth),
@@ -942,7 +962,8 @@ async def update_task(
 
 
 @router.delete("/tasks/{task_id}")
-async def delete_task(
+@offload_db
+def delete_task(
     task_id: str = Path(..., min_length=1),
     user: dict = Depends(require_auth),
 ):
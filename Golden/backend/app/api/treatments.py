@@ -10,7 +10,8 @@ from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query
 from pydantic import BaseModel, Field
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_conn
+from app.core.database import get_conn, offload_db
+from app.core.json_response import FastJSONRoute
 from app.core.lookup_sql import (
     empty_page,
     page_window,
@@ -22,7 +23,7 @@ from app.core.lookup_sql import (
 from app.core.middleware import require_auth
 from app.core.pagination import paginate
 
-router = APIRouter(prefix="/api", tags=["sale-orders"])
+router = APIRouter(prefix="/api", tags=["sale-orders"], route_class=FastJSONRoute)
 
 
 class SaleOrderLineCreate(BaseModel):
@@ -61,7 +62,8 @@ _STATE_BUCKETS = ("draft", "sale", "done", "cancel")
 
 
 @router.get("/sale-orders")
-async def list_sale_orders(
+@offload_db
+def list_sale_orders(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=0, le=500),
     offset: int | None = Query(default=None, ge=0),
@@ -268,7 +270,8 @@ async def list_sale_orders(
 
 
 @router.get("/sale-orders/states")
-async def sale_order_states(
+@offload_db
+def sale_order_states(
     companyId: str | None = Query(default=None),
     dateFrom: date | None = Query(default=None),
     dateTo: date | None = Query(default=None),
@@ -285,7 +288,8 @@ async def sale_order_states(
 
 
 @router.get("/sale-orders/states/summary")
-async def sale_order_states_summary(
+@offload_db
+def sale_order_states_summary(
     companyId: str | None = Query(default=None),
     dateFrom: date | None = Query(default=None),
     dateTo: date | None = Query(default=None),
@@ -297,7 +301,8 @@ async def sale_order_states_summary(
 
 
 @router.get("/sale-orders/{sale_order_id}")
-async def get_sale_order_detail(
+@offload_db
+def get_sale_order_detail(
     sale_order_id: str,
     _user: dict = Depends(require_auth),
 ):
@@ -684,7 +689,8 @@ def _resolve_sale_order_meta(conn) -> dict | None:
 
 
 @router.post("/sale-orders")
-async def create_sale_order(
+@offload_db
+def create_sale_order(
     body: SaleOrderCreate,
     _user: dict = Depends(require_auth),
 ):
@@ -816,7 +822,8 @@ async def create_sale_order(
 
 
 @router.put("/sale-orders/{order_id}")
-async def update_sale_order(
+@offload_db
+def update_sale_order(
     order_id: str = Path(..., min_length=1),
     body: SaleOrderUpdatePayload = Body(...),
     _user: dict = Depends(require_auth),
@@ -958,7 +965,8 @@ async def update_sale_order(
 
 
 @router.delete("/sale-orders/{order_id}")
-async def delete_sale_order(
+@offload_db
+def delete_sale_order(
     order_id: str = Path(..., min_length=1),
     _user: dict = Depends(require_auth),
 ):
@@ -0,0 +1,286 @@
+"""Negotiated response compression (zstd, brotli, gzip).
+
+:class:`CompressionMiddleware` wraps the whole app. For each response it
+picks the best encoding the client accepts (``COMPRESSION_ENCODINGS``, in
+server preference order, limited to what is installed: ``zstandard`` and
+``brotli`` are optional, gzip is always available) and compresses bodies of
+at least ``COMPRESSION_MIN_BYTES`` whose content type is text-like.
+
+Single-message bodies are compressed in one go; bodies of
+``COMPRESSION_OFFLOAD_BYTES`` or more are compressed in a worker thread so
+a 5000-row report does not stall the event loop. Streaming responses
+(``StreamingResponse`` exports) are buffered up to the threshold and then
+compressed chunk by chunk with a streaming compressor, dropping
+``Content-Length``.
+
+Left alone: responses that already carry ``Content-Encoding`` (the static
+manifest's pre-built variants), Server-Sent Events (each event must reach
+the client immediately), range/resumable downloads (``Content-Range`` or
+``Accept-Ranges``, whose byte offsets refer to the identity body), ``HEAD``
+requests and non-text types such as xlsx, which is already a zip.
+
+Byte counts per encoding and the total saved are exposed on
+``/api/health/compression``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import threading
+import zlib
+from typing import Callable
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_PREFIXES = ("text/",)
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+}
+UNCOMPRESSIBLE_TYPES = {"text/event-stream"}
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Map each coding in an ``Accept-Encoding`` header to its q-value."""
+    accepted: dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def available_encodings() -> tuple[str, ...]:
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    configured = [name.strip().lower() for name in settings.COMPRESSION_ENCODINGS.split(",")]
+    return tuple(name for name in configured if installed.get(name))
+
+
+def negotiate(header: str, offered: tuple[str, ...]) -> str | None:
+    """Pick the offered coding with the highest q-value; ties go to *offered* order."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in offered:
+        quality = accepted.get(name, wildcard)
+        if quality > best_q:
+            best, best_q = name, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _stream_compressor(encoding: str) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """Return ``(compress_chunk, finish)`` for a streaming body."""
+    if encoding == "zstd":
+        zstd = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        return zstd.compress, zstd.flush
+    if encoding == "br":
+        br = brotli.Compressor(quality=BROTLI_QUALITY)
+        return br.process, br.finish
+    gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return gz.compress, gz.flush
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers or "content-range" in headers or "accept-ranges" in headers:
+        return False
+    media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if media_type in UNCOMPRESSIBLE_TYPES:
+        return False
+    return media_type in COMPRESSIBLE_TYPES or media_type.startswith(COMPRESSIBLE_PREFIXES)
+
+
+async def _run(func: Callable[..., bytes], data: bytes, *args) -> bytes:
+    """Call ``func(data, *args)``, in a worker thread when *data* is large."""
+    if len(data) >= settings.COMPRESSION_OFFLOAD_BYTES:
+        return await anyio.to_thread.run_sync(func, data, *args)
+    return func(data, *args)
+
+
+class CompressionStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int) -> None:
+        with self._lock:
+            counters = self._by_encoding.setdefault(
+                encoding, {"responses": 0, "bytesIn": 0, "bytesOut": 0}
+            )
+            counters["responses"] += 1
+            counters["bytesIn"] += bytes_in
+            counters["bytesOut"] += bytes_out
+
+    def skip(self) -> None:
+        with self._lock:
+            self._skipped += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_encoding = {name: dict(counters) for name, counters in self._by_encoding.items()}
+            skipped = self._skipped
+        bytes_in = sum(counters["bytesIn"] for counters in by_encoding.values())
+        bytes_out = sum(counters["bytesOut"] for counters in by_encoding.values())
+        return {
+            "encodings": list(available_encodings()),
+            "minBytes": settings.COMPRESSION_MIN_BYTES,
+            "compressed": by_encoding,
+            "skipped": skipped,
+            "bytesIn": bytes_in,
+            "bytesOut": bytes_out,
+            "bytesSaved": bytes_in - bytes_out,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_encoding: dict[str, dict[str, int]] = {}
+            self._skipped = 0
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        offered = available_encodings()
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), offered) if offered else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding).send)
+
+
+class _CompressingSend:
+    """Per-response state: decide on the first body chunk, then pass through or compress."""
+
+    def __init__(self, send: Send, encoding: str) -> None:
+        self._send = send
+        self.encoding = encoding
+        self._start: Message | None = None
+        self._mode = "pending"  # pending | identity | streaming
+        self._buffer = bytearray()
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._compress_chunk: Callable[[bytes], bytes] | None = None
+        self._finish: Callable[[], bytes] | None = None
+
+    async def send(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if message["status"] in (204, 206, 304) or not _compressible(headers):
+                self._mode = "identity"
+                await self._send(message)
+            else:
+                self._start = message
+            return
+        if kind != "http.response.body" or self._mode == "identity":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._mode == "streaming":
+            await self._stream(body, more_body)
+            return
+
+        self._buffer.extend(body)
+        if more_body and len(self._buffer) < settings.COMPRESSION_MIN_BYTES:
+            return
+        if len(self._buffer) < settings.COMPRESSION_MIN_BYTES:
+            compression_stats.skip()
+            await self._send_identity(more_body=False)
+        elif more_body:
+            self._mode = "streaming"
+            self._compress_chunk, self._finish = _stream_compressor(self.encoding)
+            await self._send(self._encoded_start(length=None))
+            buffered, self._buffer = bytes(self._buffer), bytearray()
+            await self._stream(buffered, True)
+        else:
+            await self._send_whole(bytes(self._buffer))
+
+    async def _send_identity(self, *, more_body: bool) -> None:
+        self._mode = "identity"
+        await self._send(self._start)
+        await self._send({"type": "http.response.body", "body": bytes(self._buffer), "more_body": more_body})
+
+    async def _send_whole(self, body: bytes) -> None:
+        compressed = await _run(compress, body, self.encoding)
+        if len(compressed) >= len(body):
+            compression_stats.skip()
+            await self._send_identity(more_body=False)
+            return
+        compression_stats.record(self.encoding, len(body), len(compressed))
+        await self._send(self._encoded_start(length=len(compressed)))
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    async def _stream(self, chunk: bytes, more_body: bool) -> None:
+        self._bytes_in += len(chunk)
+        out = await _run(self._compress_chunk, chunk) if chunk else b""
+        if not more_body:
+            out += self._finish()
+        self._bytes_out += len(out)
+        if out or not more_body:
+            await self._send({"type": "http.response.body", "body": out, "more_body": more_body})
+        if not more_body:
+            compression_stats.record(self.encoding, self._bytes_in, self._bytes_out)
+
+    def _encoded_start(self, *, length: int | None) -> Message:
+        start = dict(self._start)
+        headers = MutableHeaders(raw=list(start["headers"]))
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            # The encoded body is not byte-identical to what the tag names.
+            headers["ETag"] = f"W/{etag}"
+        if length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
+        start["headers"] = headers.raw
+        return start
@@ -28,6 +28,16 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        return float(raw.strip())
+    except ValueError:
+        return default
+
+
 def _env_origins(default: str) -> list[str]:
     raw = os.getenv("CORS_ORIGINS", default)
     parsed: list[str] = []
@@ -62,6 +72,48 @@ class Settings:
     LOGIN_RATE_LIMIT_MAX_ATTEMPTS: int = _env_int("LOGIN_RATE_LIMIT_MAX_ATTEMPTS", 5)
     LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = _env_int("LOGIN_RATE_LIMIT_WINDOW_SECONDS", 60)
     ENABLE_RATE_LIMIT: bool = _env_bool("ENABLE_RATE_LIMIT", True)
+    DB_POOL_MIN_SIZE: int = _env_int("DB_POOL_MIN_SIZE", 2)
+    DB_POOL_MAX_SIZE: int = _env_int("DB_POOL_MAX_SIZE", 10)
+    DB_POOL_ACQUIRE_TIMEOUT_SECONDS: float = _env_float("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", 10.0)
+    DB_POOL_MAX_WAITERS: int = _env_int("DB_POOL_MAX_WAITERS", 100)
+    DB_POOL_MAX_IDLE_SECONDS: float = _env_float("DB_POOL_MAX_IDLE_SECONDS", 300.0)
+    SCHEMA_CATALOG_CACHE_PATH: str = os.getenv("SCHEMA_CATALOG_CACHE_PATH", "").strip()
+    SCHEMA_CATALOG_CHECK_SECONDS: float = _env_float("SCHEMA_CATALOG_CHECK_SECONDS", 60.0)
+    DDL_GUARD_MODE: str = os.getenv(
+        "DDL_GUARD_MODE",
+        "log" if IS_PRODUCTION else "raise",
+    ).strip().lower()
+    PAGINATION_EXACT_COUNT_THRESHOLD: int = _env_int("PAGINATION_EXACT_COUNT_THRESHOLD", 10000)
+    COUNT_CACHE_TTL_SECONDS: float = _env_float("COUNT_CACHE_TTL_SECONDS", 300.0)
+    COUNT_CACHE_MAX_ENTRIES: int = _env_int("COUNT_CACHE_MAX_ENTRIES", 512)
+    SESSION_CACHE_TTL_SECONDS: float = _env_float("SESSION_CACHE_TTL_SECONDS", 60.0)
+    SESSION_CACHE_MAX_ENTRIES: int = _env_int("SESSION_CACHE_MAX_ENTRIES", 10000)
+    BATCH_MAX_REQUESTS: int = _env_int("BATCH_MAX_REQUESTS", 20)
+    CUSTOMER_PROFILE_MAX_CONNECTIONS: int = _env_int("CUSTOMER_PROFILE_MAX_CONNECTIONS", 3)
+    LIVE_EVENTS_MAX_SUBSCRIBERS: int = _env_int("LIVE_EVENTS_MAX_SUBSCRIBERS", 500)
+    LIVE_EVENTS_QUEUE_SIZE: int = _env_int("LIVE_EVENTS_QUEUE_SIZE", 256)
+    LIVE_EVENTS_BACKLOG: int = _env_int("LIVE_EVENTS_BACKLOG", 1024)
+    LIVE_EVENTS_HEARTBEAT_SECONDS: float = _env_float("LIVE_EVENTS_HEARTBEAT_SECONDS", 15.0)
+    EXPORT_FETCH_ROWS: int = _env_int("EXPORT_FETCH_ROWS", 2000)
+    EXPORT_WIDTH_SAMPLE_ROWS: int = _env_int("EXPORT_WIDTH_SAMPLE_ROWS", 200)
+    REPORT_CACHE_TTL_SECONDS: float = _env_float("REPORT_CACHE_TTL_SECONDS", 300.0)
+    REPORT_CACHE_MAX_ENTRIES: int = _env_int("REPORT_CACHE_MAX_ENTRIES", 512)
+    REPORT_CACHE_WAIT_SECONDS: float = _env_float("REPORT_CACHE_WAIT_SECONDS", 30.0)
+    EXPORT_SPOOL_DIR: str = os.getenv("EXPORT_SPOOL_DIR", "").strip()
+    EXPORT_JOB_WORKERS: int = _env_int("EXPORT_JOB_WORKERS", 2)
+    EXPORT_JOB_MAX_PENDING: int = _env_int("EXPORT_JOB_MAX_PENDING", 16)
+    EXPORT_JOB_TTL_SECONDS: float = _env_float("EXPORT_JOB_TTL_SECONDS", 3600.0)
+    ACCESS_LOG: bool = _env_bool("ACCESS_LOG", True)
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "").strip()
+    SLOW_QUERY_MS: float = _env_float("SLOW_QUERY_MS", 500.0)
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = _env_float("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", 3600.0)
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = _env_int("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", 10000)
+    SLOW_QUERY_QUEUE_SIZE: int = _env_int("SLOW_QUERY_QUEUE_SIZE", 1000)
+    COMPRESSION_ENCODINGS: str = os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+    COMPRESSION_MIN_BYTES: int = _env_int("COMPRESSION_MIN_BYTES", 1024)
+    COMPRESSION_OFFLOAD_BYTES: int = _env_int("COMPRESSION_OFFLOAD_BYTES", 65536)
+    STATIC_ASSETS_WATCH: bool = _env_bool("STATIC_ASSETS_WATCH", not IS_PRODUCTION)
+    STATIC_ASSETS_WATCH_SECONDS: float = _env_float("STATIC_ASSETS_WATCH_SECONDS", 1.0)
 
 
 settings = Settings()
@@ -0,0 +1,130 @@
+"""Cached ``totalItems`` counts for paged list endpoints.
+
+An exact ``COUNT(*)`` over a large filtered set often costs more than the
+page itself. :func:`app.core.pagination.paginate` (``count="auto"``) keeps
+each total here, keyed by the count query and its parameters, and stamps it
+with the write state of the tables the listing reads:
+
+* a per-process generation per table, bumped when a transaction on this
+  worker commits a write to it (see ``database.add_write_listener``);
+* ``pg_stat_user_tables`` insert/update/delete counters, which catch writes
+  from other workers and processes a moment later.
+
+A total is served from cache only while both stamps are unchanged and the
+entry is younger than ``COUNT_CACHE_TTL_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Iterable, Sequence
+
+from app.core.config import settings
+from app.core.database import add_write_listener
+
+_WRITE_STAMP_SQL = """
+SELECT COALESCE(SUM(s.n_tup_ins + s.n_tup_upd + s.n_tup_del), 0)::bigint
+FROM pg_catalog.pg_stat_user_tables s
+WHERE s.relid IN (SELECT to_regclass(name) FROM unnest(%s::text[]) AS name)
+"""
+
+
+@dataclass(frozen=True)
+class CachedCount:
+    total: int
+    exact: bool
+    stamp: tuple
+    stored_at: float
+
+
+class CountCache:
+    """Bounded LRU of counts, invalidated by table writes and a TTL."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedCount] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def key(self, query: str, params: Sequence) -> str:
+        raw = repr((" ".join(query.split()), tuple(params)))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def stamp(self, conn, tables: Sequence) -> tuple:
+        """Current write state of *tables* (``TableRef`` or table names)."""
+        with self._lock:
+            local = tuple(self._generations.get(_bare_name(table), 0) for table in tables)
+        names = [getattr(table, "qualified_name", table) for table in tables]
+        with conn.cursor() as cur:
+            cur.execute(_WRITE_STAMP_SQL, (names,))
+            row = cur.fetchone()
+        remote = _first_value(row)
+        return (local, int(remote or 0))
+
+    def get(self, key: str, stamp: tuple) -> CachedCount | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is None
+                or entry.stamp != stamp
+                or monotonic() - entry.stored_at > settings.COUNT_CACHE_TTL_SECONDS
+            ):
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: str, stamp: tuple, total: int, *, exact: bool) -> None:
+        with self._lock:
+            self._entries[key] = CachedCount(total, exact, stamp, monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(settings.COUNT_CACHE_MAX_ENTRIES, 1):
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        """Mark *tables* as written; stale entries miss on their next lookup."""
+        with self._lock:
+            for table in tables:
+                name = _bare_name(table)
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+def _bare_name(table) -> str:
+    """``'"dbo"."Partners"'`` -> ``'partners'``; matches ``database.written_table``."""
+    name = str(getattr(table, "table", table)).rsplit(".", 1)[-1].strip()
+    if name.startswith('"') and name.endswith('"'):
+        name = name[1:-1].replace('""', '"')
+    return name.lower()
+
+
+def _first_value(row):
+    if row is None:
+        return None
+    if isinstance(row, dict):
+        return next(iter(row.values()), None)
+    return row[0]
+
+
+count_cache = CountCache()
+add_write_listener(count_cache.invalidate)
@@ -1,36 +1,370 @@
 """Database connection pool using psycopg2 ThreadedConnectionPool."""
 
+import asyncio
+import functools
+import inspect
 import logging
+import re
+import threading
+import weakref
+from bisect import bisect_left
 from contextlib import contextmanager
-from typing import Generator, Optional
+from contextvars import ContextVar
+from time import monotonic, perf_counter
+from typing import Any, Awaitable, Callable, Generator, Optional, TypeVar
 
+import anyio
+import anyio.to_thread
 import psycopg2
+from psycopg2 import extensions as pg_extensions
 from psycopg2 import pool as pg_pool
 
+from app.core.config import settings
+from app.core.request_metrics import record_pool_wait, record_statement
+
 logger = logging.getLogger(__name__)
 
+# Upper bounds (seconds) of the acquisition wait-time histogram buckets.
+WAIT_BUCKETS: tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection became available in time.
+
+    Subclasses ``RuntimeError`` so routers that already map an unavailable
+    pool to ``503`` handle an exhausted pool the same way.
+    """
+
+
+class RequestDDLError(Exception):
+    """Raised when a schema-changing statement runs while serving a request."""
+
+
+# ---------------------------------------------------------------------------
+# Request DDL guard
+# ---------------------------------------------------------------------------
+
+serving_request: ContextVar[bool] = ContextVar("serving_request", default=False)
+
+_DDL_RE = re.compile(
+    r"^\s*(?:(?:--[^\n]*\n|/\*.*?\*/)\s*)*"
+    r"(CREATE|ALTER|DROP|TRUNCATE|COMMENT\s+ON|GRANT|REVOKE|REINDEX|CLUSTER)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def is_ddl(sql) -> bool:
+    """Return ``True`` when *sql* starts with a schema-changing statement."""
+    return isinstance(sql, str) and _DDL_RE.match(sql) is not None
+
+
+def check_request_ddl(sql) -> None:
+    """Apply ``DDL_GUARD_MODE`` when *sql* is DDL issued inside a request.
+
+    App tables are created by the boot-time migrations, so DDL on a request
+    path means a read takes catalog locks and pays an extra round-trip.
+    """
+    if not serving_request.get() or settings.DDL_GUARD_MODE == "off" or not is_ddl(sql):
+        return
+    statement = " ".join(sql.split())[:160]
+    if settings.DDL_GUARD_MODE == "raise":
+        raise RequestDDLError(f"DDL issued while serving a request: {statement}")
+    logger.warning("DDL issued while serving a request: %s", statement)
+
+
+# ---------------------------------------------------------------------------
+# Table write tracking
+# ---------------------------------------------------------------------------
+
+_IDENT = r'(?:"(?:[^"]|"")+"|[A-Za-z_][\w$]*)'
+_WRITE_RE = re.compile(
+    r"^\s*(?:(?:--[^\n]*\n|/\*.*?\*/)\s*)*"
+    r"(?:INSERT\s+INTO|UPDATE(?:\s+ONLY)?|DELETE\s+FROM(?:\s+ONLY)?|TRUNCATE(?:\s+TABLE)?(?:\s+ONLY)?)\s+"
+    rf"((?:{_IDENT}\s*\.\s*)?{_IDENT})",
+    re.IGNORECASE | re.DOTALL,
+)
+
+_write_listeners: list[Callable[[frozenset[str]], None]] = []
+_slow_statement_listeners: list[Callable[[str, Any, float], None]] = []
+
+
+def written_table(sql) -> str | None:
+    """Return the lower-cased, unqualified table *sql* writes to, if any."""
+    if not isinstance(sql, str):
+        return None
+    match = _WRITE_RE.match(sql)
+    if match is None:
+        return None
+    name = re.split(r'\s*\.\s*(?=(?:"|[A-Za-z_]))', match.group(1))[-1]
+    if name.startswith('"'):
+        name = name[1:-1].replace('""', '"')
+    return name.lower()
+
+
+def add_write_listener(callback: Callable[[frozenset[str]], None]) -> None:
+    """Call *callback* with the tables written by each committed transaction."""
+    if callback not in _write_listeners:
+        _write_listeners.append(callback)
+
+
+def add_slow_statement_listener(callback: Callable[[str, Any, float], None]) -> None:
+    """Call *callback* with ``(sql, params, seconds)`` for statements over ``SLOW_QUERY_MS``."""
+    if callback not in _slow_statement_listeners:
+        _slow_statement_listeners.append(callback)
+
+
+def _notify_slow_statement(cursor, query, vars, seconds: float) -> None:
+    if not isinstance(query, (str, bytes)):
+        query = query.as_string(cursor)
+    elif isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    for callback in list(_slow_statement_listeners):
+        try:
+            callback(query, vars, seconds)
+        except Exception:
+            logger.exception("Slow statement listener failed")
+
+
+def notify_table_writes(tables) -> None:
+    """Tell the write listeners that *tables* changed (outside ``get_conn``)."""
+    written = frozenset(str(table).lower() for table in tables if table)
+    if not written:
+        return
+    for callback in list(_write_listeners):
+        try:
+            callback(written)
+        except Exception:
+            logger.exception("Table write listener failed")
+
+
+@functools.lru_cache(maxsize=None)
+def _guarded_cursor_class(base: type) -> type:
+    def execute(self, query, vars=None):
+        check_request_ddl(query)
+        table = written_table(query)
+        if table is not None:
+            pending = getattr(self.connection, "pending_writes", None)
+            if pending is not None:
+                pending.add(table)
+        started = perf_counter()
+        try:
+            return base.execute(self, query, vars)
+        finally:
+            elapsed = perf_counter() - started
+            record_statement(query, elapsed)
+            threshold = settings.SLOW_QUERY_MS
+            if _slow_statement_listeners and 0 < threshold <= elapsed * 1000:
+                _notify_slow_statement(self, query, vars, elapsed)
+
+    return type(f"Guarded{base.__name__}", (base,), {"execute": execute})
+
+
+class GuardedConnection(pg_extensions.connection):
+    """psycopg2 connection whose cursors run :func:`check_request_ddl` on execute.
+
+    It also records which tables the open transaction writes and hands them
+    to the write listeners once the transaction commits.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pending_writes: set[str] = set()
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get("cursor_factory") or self.cursor_factory or pg_extensions.cursor
+        kwargs["cursor_factory"] = _guarded_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        super().commit()
+        if self.pending_writes:
+            written, self.pending_writes = self.pending_writes, set()
+            notify_table_writes(written)
+
+    def rollback(self):
+        self.pending_writes.clear()
+        super().rollback()
+
+
+class ProjectedDictCursor(pg_extensions.cursor):
+    """Cursor returning plain ``dict`` rows built from the driver's tuples.
+
+    ``RealDictCursor`` assembles each row in Python, one ``__setitem__`` per
+    column, and list endpoints then copied it again with ``dict(row)``. Here
+    the column names are resolved once per result set and every row is a
+    single ``dict(zip(names, row))``.
+    """
+
+    def _names(self) -> tuple[str, ...]:
+        return tuple(column[0] for column in self.description or ())
+
+    def fetchone(self):
+        row = super().fetchone()
+        return None if row is None else dict(zip(self._names(), row))
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany() if size is None else super().fetchmany(size)
+        names = self._names()
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchall(self):
+        names = self._names()
+        return [dict(zip(names, row)) for row in super().fetchall()]
+
+    def __iter__(self):
+        names = self._names()
+        while (row := super().fetchone()) is not None:
+            yield dict(zip(names, row))
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class _PoolGate:
+    """Bounded wait queue in front of the psycopg2 pool plus live counters.
+
+    ``ThreadedConnectionPool`` raises ``PoolError`` as soon as it runs out of
+    connections. The gate makes callers wait (up to *timeout*) for a slot
+    instead, rejects immediately once *max_waiters* are already queued, and
+    records how long each acquisition waited. A caller on an event-loop
+    thread is rejected rather than parked: waiting there would stall every
+    other request, including the ones that would free the slot.
+    """
+
+    def __init__(self, *, minconn: int, maxconn: int, timeout: float, max_waiters: int) -> None:
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_waiters = max_waiters
+        self._cond = threading.Condition()
+        self.in_use = 0
+        self.waiters = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.recycled = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def acquire(self) -> float:
+        started = monotonic()
+        with self._cond:
+            if self.in_use >= self.maxconn:
+                if self.waiters >= self.max_waiters:
+                    self.rejected += 1
+                    raise PoolTimeoutError("Database pool wait queue is full")
+                if _on_event_loop():
+                    self.rejected += 1
+                    raise PoolTimeoutError(
+                        "Database pool is exhausted; not waiting on the event loop (use run_db/offload_db)"
+                    )
+                self.waiters += 1
+                try:
+                    deadline = started + self.timeout
+                    while self.in_use >= self.maxconn:
+                        remaining = deadline - monotonic()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise PoolTimeoutError(
+                                f"Timed out after {self.timeout:g}s waiting for a database connection"
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiters -= 1
+            self.in_use += 1
+            waited = monotonic() - started
+            self.acquired += 1
+            self.wait_sum += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.wait_counts[bisect_left(WAIT_BUCKETS, waited)] += 1
+        return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            histogram = {f"le_{bound:g}": count for bound, count in zip(WAIT_BUCKETS, self.wait_counts)}
+            histogram["le_inf"] = self.wait_counts[-1]
+            return {
+                "minSize": self.minconn,
+                "maxSize": self.maxconn,
+                "inUse": self.in_use,
+                "waiters": self.waiters,
+                "maxWaiters": self.max_waiters,
+                "acquireTimeoutSeconds": self.timeout,
+                "acquired": self.acquired,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "recycled": self.recycled,
+                "waitSecondsSum": round(self.wait_sum, 6),
+                "waitSecondsMax": round(self.wait_max, 6),
+                "waitHistogram": histogram,
+            }
+
+
 _pool: Optional[pg_pool.ThreadedConnectionPool] = None
+_gate: Optional[_PoolGate] = None
+_pool_created_at = 0.0
+_last_used: dict[int, float] = {}
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, anyio.CapacityLimiter]" = (
+    weakref.WeakKeyDictionary()
+)
+
+T = TypeVar("T")
 
 
-def init_pool(database_url: str) -> None:
+def init_pool(
+    database_url: str,
+    *,
+    minconn: int | None = None,
+    maxconn: int | None = None,
+    timeout: float | None = None,
+    max_waiters: int | None = None,
+) -> None:
     """Initialise the global connection pool.
 
+    Sizing, acquisition timeout and wait-queue length default to the
+    ``DB_POOL_*`` settings.
+
     Logs success on creation. On failure (bad URL, unreachable host, etc.)
     the error is logged and the pool remains ``None`` so the app can still
     start and serve non-DB routes.
     """
-    global _pool
-    if _pool is not None:
-        _pool.closeall()
-        _pool = None
+    global _pool, _gate, _pool_created_at
+    close_pool()
 
+    resolved_max = max(maxconn if maxconn is not None else settings.DB_POOL_MAX_SIZE, 1)
+    resolved_min = min(max(minconn if minconn is not None else settings.DB_POOL_MIN_SIZE, 0), resolved_max)
     try:
         _pool = pg_pool.ThreadedConnectionPool(
-            minconn=2,
-            maxconn=10,
+            minconn=resolved_min,
+            maxconn=resolved_max,
             dsn=database_url,
+            connection_factory=GuardedConnection,
+        )
+        _gate = _PoolGate(
+            minconn=resolved_min,
+            maxconn=resolved_max,
+            timeout=max(
+                timeout if timeout is not None else settings.DB_POOL_ACQUIRE_TIMEOUT_SECONDS,
+                0.0,
+            ),
+            max_waiters=max(
+                max_waiters if max_waiters is not None else settings.DB_POOL_MAX_WAITERS,
+                0,
+            ),
         )
-        logger.info("[BOOT] Database pool ready (2-10 connections)")
+        _pool_created_at = monotonic()
+        logger.info("[BOOT] Database pool ready (%s-%s connections)", resolved_min, resolved_max)
     except psycopg2.OperationalError as exc:
         logger.error("[BOOT] Failed to create database pool: %s", exc)
         _pool = None
@@ -41,11 +375,82 @@ def init_pool(database_url: str) -> None:
 
 def close_pool() -> None:
     """Close all connections in the pool."""
-    global _pool
+    global _pool, _gate
     if _pool is not None:
         _pool.closeall()
         logger.info("[SHUTDOWN] Database pool closed")
         _pool = None
+    _gate = None
+    _last_used.clear()
+    _limiters.clear()
+
+
+def pool_stats() -> dict:
+    """Return live pool statistics for sizing and health dashboards."""
+    if _pool is None or _gate is None:
+        return {"status": "unavailable"}
+    stats = _gate.snapshot()
+    stats["status"] = "ok"
+    stats["idle"] = len(getattr(_pool, "_pool", ()))
+    return stats
+
+
+def _acquire():
+    """Wait for a pool slot, then check out a healthy connection."""
+    if _pool is None or _gate is None:
+        raise RuntimeError("Database pool is not initialised")
+
+    pool, gate = _pool, _gate
+    record_pool_wait(gate.acquire())
+    try:
+        # A slot is reserved, so the pool always has a connection for us;
+        # loop only to skip connections that are closed or idle too long.
+        for _ in range(gate.maxconn + 1):
+            conn = pool.getconn()
+            idle_for = monotonic() - _last_used.get(id(conn), _pool_created_at)
+            if getattr(conn, "closed", 0) or idle_for > settings.DB_POOL_MAX_IDLE_SECONDS:
+                _discard(pool, gate, conn)
+                continue
+            return conn
+        raise RuntimeError("Could not obtain a healthy database connection")
+    except BaseException:
+        gate.release()
+        raise
+
+
+def _release(conn, *, broken: bool = False) -> None:
+    """Return *conn* to the pool (closing it when broken) and free its slot."""
+    pool, gate = _pool, _gate
+    try:
+        if pool is None:
+            return
+        if broken or getattr(conn, "closed", 0):
+            _discard(pool, gate, conn)
+        else:
+            _last_used[id(conn)] = monotonic()
+            pool.putconn(conn)
+    finally:
+        if gate is not None:
+            gate.release()
+
+
+def _discard(pool, gate: Optional[_PoolGate], conn) -> None:
+    _last_used.pop(id(conn), None)
+    if gate is not None:
+        gate.recycled += 1
+    try:
+        pool.putconn(conn, close=True)
+    except Exception:
+        logger.warning("Failed to close recycled database connection", exc_info=True)
+
+
+def _rollback(conn) -> bool:
+    """Roll back *conn*; return ``True`` when the connection is unusable."""
+    try:
+        conn.rollback()
+    except (psycopg2.InterfaceError, psycopg2.OperationalError):
+        return True
+    return bool(getattr(conn, "closed", 0))
 
 
 @contextmanager
@@ -59,17 +464,69 @@ def get_conn() -> Generator:
                 cur.execute("SELECT 1")
 
     The connection is returned to the pool after the block exits.
-    If the block raises, the transaction is rolled back before returning.
+    If the block raises, the transaction is rolled back before returning;
+    connections that turn out to be broken are closed instead of reused.
+    When the pool is exhausted the caller waits up to
+    ``DB_POOL_ACQUIRE_TIMEOUT_SECONDS`` before :class:`PoolTimeoutError`.
     """
-    if _pool is None:
-        raise RuntimeError("Database pool is not initialised")
-
-    conn = _pool.getconn()
+    conn = _acquire()
+    broken = False
     try:
         yield conn
         conn.commit()
     except Exception:
-        conn.rollback()
+        broken = _rollback(conn)
         raise
     finally:
-        _pool.putconn(conn)
+        _release(conn, broken=broken)
+
+
+# ---------------------------------------------------------------------------
+# Async layer
+# ---------------------------------------------------------------------------
+
+
+def _db_limiter() -> anyio.CapacityLimiter:
+    """Return the per-event-loop limiter that bounds concurrent DB work.
+
+    The limiter is sized to the pool so offloaded handlers queue on the
+    event loop instead of exhausting the pool from worker threads.
+    """
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = anyio.CapacityLimiter(_gate.maxconn if _gate is not None else settings.DB_POOL_MAX_SIZE)
+        _limiters[loop] = limiter
+    return limiter
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking database work in a worker thread without stalling the loop."""
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=_db_limiter(),
+    )
+
+
+def offload_db(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """Decorate a blocking route handler so it is awaited off the event loop.
+
+    The wrapped handler keeps its coroutine interface (other handlers and
+    tests still ``await`` it) and its signature, so FastAPI resolves query
+    parameters and dependencies exactly as before::
+
+        @router.get("/summary")
+        @offload_db
+        def summary(...):
+            with get_conn() as conn:
+                ...
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_db(func, *args, **kwargs)
+
+    # Resolve postponed annotations against the handler's own module so
+    # FastAPI does not look them up in this module's globals.
+    wrapper.__signature__ = inspect.signature(func, eval_str=True)
+    return wrapper
@@ -0,0 +1,316 @@
+"""Background export jobs: submit, poll, download.
+
+``POST /api/export/{resource}/jobs`` captures the listing's query exactly
+like the streaming exporter and hands it to a small thread pool
+(``EXPORT_JOB_WORKERS``, at most ``EXPORT_JOB_MAX_PENDING`` queued or
+running jobs). Each job writes ``<job id>.<format>`` into the spool
+directory, next to a ``<job id>.json`` status file that any worker on the
+host can read, so polling and downloads do not depend on which process ran
+the job.
+
+The job id is a digest of resource, format, columns and the captured query
+with its parameters, which makes identical requests land on the same job:
+
+* while a job is queued or running (and its heartbeat is fresh) repeated
+  submissions return it instead of starting another;
+* a finished file is reused while the write stamp of the tables the query
+  reads (see :meth:`app.core.count_cache.CountCache.stamp`) is unchanged
+  and the file is younger than ``EXPORT_JOB_TTL_SECONDS``.
+
+Expired files are pruned on every submission.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import monotonic, time
+from typing import Iterator
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.count_cache import count_cache
+from app.core.database import get_conn
+from app.core.export_stream import csv_chunks, iter_rows, ndjson_chunks, write_xlsx
+from app.core.pagination import PageQuery, count_rows
+
+logger = logging.getLogger(__name__)
+
+# A running job rewrites its status file at least this often; a status file
+# older than this belongs to a worker that died mid-job.
+HEARTBEAT_SECONDS = 2.0
+_STALE_AFTER_SECONDS = 60.0
+
+_TABLE_RE = re.compile(
+    r'\b(?:FROM|JOIN)\s+((?:"[^"]+"|[A-Za-z_][\w$]*)(?:\s*\.\s*(?:"[^"]+"|[A-Za-z_][\w$]*))?)',
+    re.IGNORECASE,
+)
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ExportQueueFullError(RuntimeError):
+    """Raised when ``EXPORT_JOB_MAX_PENDING`` jobs are already queued or running."""
+
+
+@dataclass
+class ExportJob:
+    id: str
+    resource: str
+    format: str
+    filename: str
+    status: str = "queued"
+    rows_written: int = 0
+    total_rows: int | None = None
+    total_exact: bool = False
+    size: int | None = None
+    stamp: list | None = None
+    error: str | None = None
+    created_at: float = field(default_factory=time)
+    finished_at: float | None = None
+    heartbeat: float = field(default_factory=time)
+
+    @property
+    def output_name(self) -> str:
+        return f"{self.id}.{self.format}"
+
+    def to_dict(self) -> dict:
+        progress = None
+        if self.status == "done":
+            progress = 1.0
+        elif self.total_rows:
+            progress = round(min(self.rows_written / self.total_rows, 0.99), 4)
+        return {
+            "id": self.id,
+            "resource": self.resource,
+            "format": self.format,
+            "filename": self.filename,
+            "status": self.status,
+            "rowsWritten": self.rows_written,
+            "totalRows": self.total_rows,
+            "totalExact": self.total_exact,
+            "progress": progress,
+            "size": self.size,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+class ExportJobManager:
+    """Owns the worker pool and the spool directory of one process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._active: set[str] = set()
+
+    # -- public API -----------------------------------------------------
+
+    def spool_dir(self) -> Path:
+        path = Path(settings.EXPORT_SPOOL_DIR or os.path.join(tempfile.gettempdir(), "tdental-exports"))
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def submit(
+        self,
+        conn,
+        *,
+        resource: str,
+        fmt: str,
+        columns: list[str],
+        source: PageQuery | list[dict],
+        filename: str,
+    ) -> tuple[ExportJob, bool]:
+        """Start (or join) the job for *source*; returns ``(job, reused)``.
+
+        *conn* is only used to read the write stamp of the source tables.
+        """
+        self.prune()
+        job_id = job_key(resource, fmt, columns, source)
+        tables = source_tables(source)
+        stamp = _jsonable(count_cache.stamp(conn, tables)) if tables else None
+
+        with self._lock:
+            existing = self.get(job_id)
+            if existing is not None:
+                if job_id in self._active or (
+                    existing.status in {"queued", "running"} and not _is_stale(existing)
+                ):
+                    return existing, False
+                if (
+                    existing.status == "done"
+                    and stamp is not None
+                    and existing.stamp == stamp
+                    and (self.spool_dir() / existing.output_name).is_file()
+                ):
+                    return existing, True
+
+            if len(self._active) >= max(settings.EXPORT_JOB_MAX_PENDING, 1):
+                raise ExportQueueFullError("Too many export jobs in progress")
+
+            job = ExportJob(id=job_id, resource=resource, format=fmt, filename=filename, stamp=stamp)
+            self._save(job)
+            self._active.add(job_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(settings.EXPORT_JOB_WORKERS, 1),
+                    thread_name_prefix="export-job",
+                )
+            self._executor.submit(self._run, job, source, columns, tables)
+        return job, False
+
+    def get(self, job_id: str) -> ExportJob | None:
+        if not _JOB_ID_RE.match(job_id or ""):
+            return None
+        try:
+            raw = json.loads((self.spool_dir() / f"{job_id}.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            return ExportJob(**raw)
+        except TypeError:
+            return None
+
+    def output_path(self, job: ExportJob) -> Path:
+        return self.spool_dir() / job.output_name
+
+    def prune(self) -> None:
+        """Remove jobs finished (or last heard from) more than a TTL ago."""
+        cutoff = time() - max(settings.EXPORT_JOB_TTL_SECONDS, 0)
+        spool = self.spool_dir()
+        for status_file in spool.glob("*.json"):
+            job = self.get(status_file.stem)
+            if job is None or job.id in self._active:
+                continue
+            if (job.finished_at or job.heartbeat) >= cutoff:
+                continue
+            for path in (spool / job.output_name, status_file):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # -- worker ---------------------------------------------------------
+
+    def _run(self, job: ExportJob, source, columns: list[str], tables: list[str]) -> None:
+        spool = self.spool_dir()
+        partial = spool / f"{job.output_name}.{uuid4().hex}.part"
+        try:
+            job.status = "running"
+            job.total_rows, job.total_exact = _total_rows(source, tables)
+            self._save(job)
+
+            rows = self._counted(job, iter_rows(source))
+            if job.format == "xlsx":
+                shutil.move(write_xlsx(rows, columns), partial)
+            else:
+                writer = csv_chunks if job.format == "csv" else ndjson_chunks
+                with open(partial, "wb") as handle:
+                    for chunk in writer(rows, columns):
+                        handle.write(chunk)
+            os.replace(partial, spool / job.output_name)
+
+            job.status = "done"
+            job.size = (spool / job.output_name).stat().st_size
+            if job.total_rows is None or not job.total_exact:
+                job.total_rows, job.total_exact = job.rows_written, True
+        except Exception as exc:
+            logger.exception("Export job %s (%s) failed", job.id, job.resource)
+            job.status = "failed"
+            job.error = str(exc) or exc.__class__.__name__
+            try:
+                partial.unlink()
+            except FileNotFoundError:
+                pass
+        finally:
+            job.finished_at = time()
+            self._save(job)
+            with self._lock:
+                self._active.discard(job.id)
+
+    def _counted(self, job: ExportJob, rows: Iterator[dict]) -> Iterator[dict]:
+        last_saved = monotonic()
+        for row in rows:
+            job.rows_written += 1
+            if monotonic() - last_saved >= HEARTBEAT_SECONDS:
+                self._save(job)
+                last_saved = monotonic()
+            yield row
+
+    def _save(self, job: ExportJob) -> None:
+        job.heartbeat = time()
+        spool = self.spool_dir()
+        handle, tmp_path = tempfile.mkstemp(prefix=f".{job.id}-", suffix=".json", dir=spool)
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as out:
+                json.dump(asdict(job), out)
+            os.replace(tmp_path, spool / f"{job.id}.json")
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+def job_key(resource: str, fmt: str, columns: list[str], source: PageQuery | list[dict]) -> str:
+    if isinstance(source, PageQuery):
+        payload = [" ".join(source.query.split()), list(source.params)]
+        transform = getattr(source.transform, "__qualname__", None)
+    else:
+        payload, transform = list(source), None
+    raw = json.dumps(
+        [resource.strip().lower(), fmt, list(columns), payload, transform],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def source_tables(source: PageQuery | list[dict]) -> list[str]:
+    """Tables a captured query reads; empty (never reusable) for row lists."""
+    if not isinstance(source, PageQuery):
+        return []
+    seen: dict[str, None] = {}
+    for match in _TABLE_RE.finditer(source.query):
+        name = re.sub(r"\s+", "", match.group(1))
+        if name.lower() not in {"lateral", "unnest"}:
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+def _total_rows(source, tables: list[str]) -> tuple[int | None, bool]:
+    if not isinstance(source, PageQuery):
+        return len(source), True
+    try:
+        with get_conn() as conn:
+            return count_rows(conn, source.query, source.params, tables=tables)
+    except Exception:
+        logger.warning("Could not estimate export size", exc_info=True)
+        return None, False
+
+
+def _is_stale(job: ExportJob) -> bool:
+    return time() - job.heartbeat > _STALE_AFTER_SECONDS
+
+
+def _jsonable(value):
+    return json.loads(json.dumps(value))
+
+
+export_jobs = ExportJobManager()
@@ -0,0 +1,215 @@
+"""Constant-memory writers for ``/api/export/{resource}``.
+
+Listings hand the exporter a :class:`~app.core.pagination.PageQuery` (see
+``capture_page_query``); :func:`iter_rows` runs it on a server-side cursor
+and fetches ``EXPORT_FETCH_ROWS`` rows at a time, so no format ever holds
+more than one batch:
+
+* ``csv`` and ``ndjson`` are generated chunk by chunk while rows arrive;
+* ``xlsx`` goes through a write-only workbook, which spools rows to a
+  temporary file. Column widths come from the first
+  ``EXPORT_WIDTH_SAMPLE_ROWS`` rows, because write-only sheets cannot be
+  revisited once written.
+
+The generators are blocking and are meant to be iterated from a worker
+thread (``StreamingResponse`` does this for sync iterators).
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from itertools import chain, islice
+from typing import Iterable, Iterator
+from uuid import uuid4
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+from psycopg2.extras import RealDictCursor
+
+from app.core.config import settings
+from app.core.database import get_conn
+from app.core.pagination import PageQuery
+
+EXPORT_MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+_CHUNK_ROWS = 500
+_FILE_CHUNK_BYTES = 64 * 1024
+
+
+def iter_rows(source: PageQuery | Iterable[dict]) -> Iterator[dict]:
+    """Yield export rows; a ``PageQuery`` is read through a named cursor."""
+    if not isinstance(source, PageQuery):
+        yield from source
+        return
+
+    with get_conn() as conn:
+        with conn.cursor(name=f"export_{uuid4().hex}", cursor_factory=RealDictCursor) as cur:
+            cur.itersize = max(settings.EXPORT_FETCH_ROWS, 1)
+            cur.execute(source.query, source.params)
+            for row in cur:
+                item = dict(row)
+                yield source.transform(item) if source.transform else item
+
+
+def csv_chunks(source: PageQuery | Iterable[dict], columns: list[str]) -> Iterator[bytes]:
+    """UTF-8 CSV (with BOM so Excel detects the encoding), streamed."""
+    columns, rows = _resolve_columns(iter_rows(source), columns)
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow([column_label(col) for col in columns])
+    for index, row in enumerate(rows, start=1):
+        writer.writerow([serialise_cell(row.get(col)) for col in columns])
+        if index % _CHUNK_ROWS == 0:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def ndjson_chunks(source: PageQuery | Iterable[dict], columns: list[str]) -> Iterator[bytes]:
+    """One JSON object per line; all keys of each row unless *columns* is given."""
+    lines: list[str] = []
+    for row in iter_rows(source):
+        record = {col: row.get(col) for col in columns} if columns else row
+        lines.append(json.dumps(record, ensure_ascii=False, default=_json_default))
+        if len(lines) >= _CHUNK_ROWS:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def write_xlsx(source: PageQuery | Iterable[dict], columns: list[str]) -> str:
+    """Write a workbook to a temporary file and return its path.
+
+    The caller owns the file; :func:`file_chunks` deletes it once streamed.
+    """
+    columns, rows = _resolve_columns(iter_rows(source), columns)
+    sample = list(islice(rows, max(settings.EXPORT_WIDTH_SAMPLE_ROWS, 0)))
+    labels = [column_label(col) for col in columns]
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Export")
+    for index, col in enumerate(columns, start=1):
+        longest = max(
+            [len(labels[index - 1])]
+            + [len(str(serialise_cell(row.get(col)))) for row in sample]
+        )
+        sheet.column_dimensions[get_column_letter(index)].width = min(max(longest + 2, 10), 52)
+
+    header_font = Font(bold=True)
+    header_fill = PatternFill(fill_type="solid", fgColor="E8F0FE")
+    header = []
+    for label in labels:
+        cell = WriteOnlyCell(sheet, value=label)
+        cell.font = header_font
+        cell.fill = header_fill
+        header.append(cell)
+    sheet.append(header)
+
+    for row in chain(sample, rows):
+        sheet.append([serialise_cell(row.get(col)) for col in columns])
+
+    handle, path = tempfile.mkstemp(prefix="export-", suffix=".xlsx")
+    os.close(handle)
+    try:
+        workbook.save(path)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+
+def file_chunks(path: str) -> Iterator[bytes]:
+    """Stream *path* and remove it afterwards (also on client disconnect)."""
+    try:
+        with open(path, "rb") as handle:
+            while chunk := handle.read(_FILE_CHUNK_BYTES):
+                yield chunk
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def file_range(path: str | os.PathLike, start: int, length: int) -> Iterator[bytes]:
+    """Stream *length* bytes of *path* starting at *start*; the file is kept."""
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(_FILE_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def column_label(key: str) -> str:
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", key)
+    spaced = spaced.replace("_", " ")
+    return spaced[:1].upper() + spaced[1:]
+
+
+def serialise_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (int, float, bool)):
+        return value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=_json_default)
+    return str(value)
+
+
+def _resolve_columns(rows: Iterator[dict], columns: list[str]) -> tuple[list[str], Iterator[dict]]:
+    """Columns to write plus the (re-chained) row iterator.
+
+    Without explicit *columns* the keys come from the first batch: every row
+    of a listing query has the same shape.
+    """
+    if columns:
+        return columns, rows
+    head = list(islice(rows, max(settings.EXPORT_FETCH_ROWS, 1)))
+    ordered: list[str] = []
+    seen: set[str] = set()
+    for row in head:
+        for key in row:
+            if key not in seen:
+                seen.add(key)
+                ordered.append(key)
+    if not ordered:
+        close = getattr(rows, "close", None)
+        if close is not None:
+            close()
+        return ["message"], iter([{"message": "No data"}])
+    return ordered, chain(head, rows)
+
+
+def _drain(buffer: StringIO) -> bytes:
+    data = buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
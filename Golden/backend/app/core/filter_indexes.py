@@ -0,0 +1,210 @@
+"""Composite and partial indexes matching the routers' filter and sort shapes.
+
+The imported schema indexes single raw columns (``companyid``, ``date``,
+``state``...), but the listings filter on expressions such as::
+
+    t.companyid::text = %s AND t.paymentdate::date >= %s AND t.paymentdate::date <= %s
+    ORDER BY t.paymentdate DESC NULLS LAST, t.id DESC
+
+A btree on ``companyid`` cannot answer ``companyid::text = $1``, and an
+ascending index on ``paymentdate`` read backwards yields ``DESC NULLS FIRST``,
+not ``NULLS LAST``, so these queries scanned and sorted whole tables. The
+specs here index exactly those expressions, with the partial predicates the
+routers repeat verbatim (active partners, non-cancelled payments), because
+the planner only uses an expression or partial index whose text matches
+the query's.
+
+Each :class:`FilterIndex` names its table and columns by candidates, the
+way the routers resolve them, and is skipped when the table or a column is
+missing. Specs are grouped per migration (:func:`filter_index_migration`);
+``benchmarks.index_advisor`` proposes the next group from the statements
+the API actually runs and reports which indexes those statements use.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+
+from app.core.database import get_conn
+from app.core.lookup_sql import TableRef, pick_column, quote_ident, resolve_table, table_columns
+from app.core.migrations import Migration, optional_ddl
+
+logger = logging.getLogger(__name__)
+
+INDEX_PREFIX = "app_ix_"
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+PARTNER_TABLES = ("partners", "res_partners", "respartners")
+PAYMENT_TABLES = ("account_payments", "accountpayments", "accountpayment")
+SALE_ORDER_TABLES = ("sale_orders", "saleorders", "saleorder")
+EXAM_TABLES = ("dot_khams", "dotkham", "dotkhams", "exam_sessions", "exam_session")
+
+ID = ("id",)
+COMPANY = ("company_id", "companyid")
+PARTNER = ("partner_id", "partnerid", "customer_id", "customerid")
+STATE = ("state", "status")
+PAYMENT_DATE = ("date", "payment_date", "paymentdate", "created_at", "created_date")
+ORDER_DATE = ("date_order", "order_date", "date", "created_at")
+EXAM_DATE = ("date", "exam_date", "kham_date", "created_at")
+
+NOT_CANCELLED = "COALESCE(LOWER({state}::text), '') NOT IN ('cancel', 'cancelled')"
+
+
+@dataclass(frozen=True)
+class FilterIndex:
+    """One index over a table resolved by candidates.
+
+    ``keys`` and ``where`` use ``{placeholder}`` for the columns in
+    ``columns`` (placeholder -> ``pick_column`` candidates).
+    """
+
+    name: str
+    tables: tuple[str, ...]
+    columns: dict[str, tuple[str, ...]] = field(hash=False)
+    keys: tuple[str, ...]
+    where: str = ""
+    serves: str = ""
+
+    def index_name(self, ref: TableRef) -> str:
+        return f"{INDEX_PREFIX}{ref.table}_{self.name}"[:63]
+
+    def render(self, conn) -> tuple[TableRef, str] | None:
+        """``(table, CREATE INDEX ...)`` or ``None`` when the schema lacks a column."""
+        ref = resolve_table(conn, *self.tables)
+        if ref is None:
+            return None
+        available = table_columns(conn, ref)
+        resolved = {}
+        for placeholder, candidates in self.columns.items():
+            column = pick_column(available, *candidates)
+            if column is None:
+                return None
+            resolved[placeholder] = quote_ident(column)
+
+        def fill(text: str) -> str:
+            return _PLACEHOLDER_RE.sub(lambda match: resolved[match.group(1)], text)
+
+        sql = (
+            f"CREATE INDEX IF NOT EXISTS {quote_ident(self.index_name(ref))} "
+            f"ON {ref.qualified_name} ({', '.join(fill(key) for key in self.keys)})"
+        )
+        if self.where:
+            sql += f" WHERE {fill(self.where)}"
+        return ref, sql
+
+
+def _dated_listing(tables: tuple[str, ...], date: tuple[str, ...], route: str) -> tuple[FilterIndex, ...]:
+    """The three shapes every dated listing produces: by branch, by customer, unfiltered."""
+    return (
+        FilterIndex(
+            name="company_day",
+            tables=tables,
+            columns={"company": COMPANY, "date": date},
+            keys=("({company}::text)", "({date}::date)"),
+            serves=f"{route}?companyId=&dateFrom=&dateTo=",
+        ),
+        FilterIndex(
+            name="partner_recent",
+            tables=tables,
+            columns={"partner": PARTNER, "date": date, "id": ID},
+            keys=("({partner}::text)", "{date} DESC NULLS LAST", "{id} DESC"),
+            serves=f"{route}?partnerId=",
+        ),
+        FilterIndex(
+            name="recent",
+            tables=tables,
+            columns={"date": date, "id": ID},
+            keys=("{date} DESC NULLS LAST", "{id} DESC"),
+            serves=f"{route} default order and keyset pages",
+        ),
+    )
+
+
+FILTER_INDEXES_V1: tuple[FilterIndex, ...] = (
+    FilterIndex(
+        name="active_company_created",
+        tables=PARTNER_TABLES,
+        columns={
+            "company": COMPANY,
+            "created": ("datecreated", "date_created", "created_at"),
+            "active": ("active", "isactive"),
+        },
+        keys=("{company}", "{created}"),
+        where="COALESCE({active}, TRUE) = TRUE",
+        serves="/api/customers?companyId= (active partners by branch, newest first)",
+    ),
+    FilterIndex(
+        name="live_company_day",
+        tables=PAYMENT_TABLES,
+        columns={"company": COMPANY, "date": PAYMENT_DATE, "state": STATE},
+        keys=("({company}::text)", "({date}::date)"),
+        where=NOT_CANCELLED,
+        serves="/api/finance/fund-book?companyId= (non-cancelled payments by branch and day)",
+    ),
+    FilterIndex(
+        name="live_day",
+        tables=PAYMENT_TABLES,
+        columns={"date": PAYMENT_DATE, "state": STATE},
+        keys=("({date}::date)",),
+        where=NOT_CANCELLED,
+        serves="/api/finance/fund-book without a branch",
+    ),
+    *_dated_listing(PAYMENT_TABLES, PAYMENT_DATE, "/api/payments"),
+    *_dated_listing(SALE_ORDER_TABLES, ORDER_DATE, "/api/sale-orders"),
+    *_dated_listing(EXAM_TABLES, EXAM_DATE, "/api/dot-khams"),
+)
+
+
+def ensure_filter_indexes(conn, specs: tuple[FilterIndex, ...] = FILTER_INDEXES_V1) -> list[str]:
+    """Create *specs* that fit this schema; returns the index names created or kept."""
+    created: list[str] = []
+    analyze: set[str] = set()
+    with conn.cursor() as cur:
+        for spec in specs:
+            rendered = spec.render(conn)
+            if rendered is None:
+                logger.info("[BOOT] Filter index %s skipped: table or column not found", spec.name)
+                continue
+            ref, sql = rendered
+            if optional_ddl(cur, sql):
+                created.append(spec.index_name(ref))
+                analyze.add(ref.qualified_name)
+        for table in sorted(analyze):
+            # Expression indexes get their own statistics only from ANALYZE.
+            optional_ddl(cur, f"ANALYZE {table}")
+    return created
+
+
+def filter_index_migration(migration_id: str, specs: tuple[FilterIndex, ...]) -> Migration:
+    return Migration(migration_id, lambda conn: ensure_filter_indexes(conn, specs))
+
+
+def filter_index_usage() -> list[dict]:
+    """Scan counts and size of every ``app_ix_`` index, least used first."""
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT s.schemaname, s.relname, s.indexrelname, s.idx_scan, s.idx_tup_read,
+                       s.idx_tup_fetch, pg_relation_size(s.indexrelid), pg_get_indexdef(s.indexrelid)
+                FROM pg_stat_user_indexes s
+                WHERE s.indexrelname LIKE %s
+                ORDER BY s.idx_scan, s.relname, s.indexrelname
+                """,
+                (INDEX_PREFIX.replace("_", r"\_") + "%",),
+            )
+            rows = cur.fetchall()
+    return [
+        {
+            "table": f"{row[0]}.{row[1]}",
+            "index": row[2],
+            "scans": row[3],
+            "tuplesRead": row[4],
+            "tuplesFetched": row[5],
+            "bytes": row[6],
+            "definition": row[7],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,562 @@
+"""Derive index candidates from the SQL the API runs and check them against the catalog.
+
+:func:`extract_access_patterns` reads one statement the way the routers
+write them (alias-qualified columns, ``%s`` parameters) and returns, per
+table and per ``WHERE``/``ON``/``ORDER BY`` clause:
+
+* equality keys - ``expr = %s``, ``expr IN (...)``, ``expr = ANY(%s)``;
+* range keys - ``<``, ``<=``, ``>``, ``>=``, ``BETWEEN`` against a parameter
+  or ``now()``/``CURRENT_DATE``;
+* constant predicates - conjuncts with only literals on the right
+  (``COALESCE(p.active, TRUE) = TRUE``), which become partial-index
+  ``WHERE`` clauses;
+* join keys and ``ORDER BY`` items with their direction.
+
+Expressions are kept as written, minus the alias, because PostgreSQL only
+matches an expression index (``(companyid::text)``) or a partial predicate
+whose text matches the query's. :func:`recommend` turns the patterns into
+btree candidates (equality keys, then the first range key or the sort keys)
+and marks the ones an existing index already serves, comparing against
+``pg_get_indexdef`` output via :func:`parse_index_definition`.
+:func:`render_migration` prints the uncovered ones as
+:class:`app.core.filter_indexes.FilterIndex` specs for the next migration.
+
+Conjuncts under ``OR``, ``LIKE`` filters (served by the trigram search
+table) and unqualified columns are ignored.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable
+
+_STRING_RE = re.compile(r"(?:E|e)?'(?:[^']|'')*'")
+_MASK_RE = re.compile(r"\x00(\d+)\x00")
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_SPACE_RE = re.compile(r"\s+")
+_PARAM_RE = re.compile(r"%\([^)]+\)s|%s|\$\d+|\?")
+_VOLATILE_RE = re.compile(
+    r"\b(?:now|clock_timestamp|statement_timestamp|transaction_timestamp)\s*\(|"
+    r"\b(?:current_date|current_timestamp|localtimestamp)\b",
+    re.IGNORECASE,
+)
+_ANALYZED_RE = re.compile(r"^\(*\s*(?:SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+_TABLE_RE = re.compile(
+    r'\b(?:FROM|JOIN)\s+((?:"?\w+\b"?\s*\.\s*)?"?\w+\b"?)(?!\s*[(.])(?:\s+(?:AS\s+)?("?\w+\b"?))?',
+    re.IGNORECASE,
+)
+_REF_RE = re.compile(r'("?\w+\b"?)\s*\.\s*("?\w+\b"?)(?!\s*\()')
+_WHERE_RE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+_ON_RE = re.compile(r"\bON\b(?!\s+CONFLICT)", re.IGNORECASE)
+_ORDER_RE = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+_CLAUSE_END = r"GROUP\s+BY|ORDER\s+BY|LIMIT|OFFSET|HAVING|UNION|INTERSECT|EXCEPT|WINDOW|FOR|RETURNING|FETCH"
+_WHERE_END_RE = re.compile(rf"(?:{_CLAUSE_END})\b", re.IGNORECASE)
+_ON_END_RE = re.compile(rf"(?:{_CLAUSE_END}|WHERE|JOIN|LEFT|RIGHT|INNER|FULL|CROSS|NATURAL)\b", re.IGNORECASE)
+_ORDER_END_RE = re.compile(r"(?:LIMIT|OFFSET|FOR|UNION|INTERSECT|EXCEPT|FETCH)\b", re.IGNORECASE)
+_AND_RE = re.compile(r"\bAND\b", re.IGNORECASE)
+_OR_RE = re.compile(r"\bOR\b", re.IGNORECASE)
+_BETWEEN_RE = re.compile(r"\bBETWEEN\b", re.IGNORECASE)
+_COMMA_RE = re.compile(r",")
+_OPERATOR_RE = re.compile(
+    r"\s+(NOT\s+IN|IN|NOT\s+I?LIKE|I?LIKE|IS\s+NOT|IS|BETWEEN|SIMILAR\s+TO)\s+|"
+    r"\s*(?<![-<>!=:])(<>|!=|>=|<=|=|<|>|@>|&&)(?![>=])\s*",
+    re.IGNORECASE,
+)
+_DIRECTION_RE = re.compile(r"\s+(ASC|DESC)?\s*(?:NULLS\s+(FIRST|LAST))?\s*$", re.IGNORECASE)
+_OPCLASS_RE = re.compile(r"\s+\w+_ops$", re.IGNORECASE)
+_INDEXDEF_RE = re.compile(
+    r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+(\S+)\s+ON\s+(?:ONLY\s+)?(\S+)\s+USING\s+(\w+)\s*\(",
+    re.IGNORECASE,
+)
+_NOT_ALIASES = {
+    "where", "on", "join", "left", "right", "inner", "full", "cross", "natural", "lateral", "group",
+    "order", "limit", "offset", "using", "union", "intersect", "except", "for", "set", "returning",
+    "outer", "window", "tablesample", "having", "fetch",
+}
+# FROM inside these calls is not a table reference.
+_FROM_FUNCTIONS = re.compile(r"\b(?:extract|substring|trim|overlay|position)\s*$", re.IGNORECASE)
+
+EQUALITY_OPERATORS = {"=", "IN", "IS"}
+RANGE_OPERATORS = {"<", "<=", ">", ">=", "BETWEEN"}
+
+# (descending, nulls_first); ``None`` for filter keys, where direction does not matter.
+Direction = tuple[bool, bool] | None
+
+
+@dataclass
+class AccessPattern:
+    """How one clause of one statement reaches one table."""
+
+    table: str
+    equality: list[str] = field(default_factory=list)
+    ranges: list[str] = field(default_factory=list)
+    constants: list[str] = field(default_factory=list)
+    joins: list[str] = field(default_factory=list)
+    order: list[tuple[str, Direction]] = field(default_factory=list)
+    columns: set[str] = field(default_factory=set)
+
+
+@dataclass(frozen=True)
+class IndexDef:
+    """An existing index as ``pg_get_indexdef`` describes it."""
+
+    name: str
+    table: str
+    method: str
+    keys: tuple[tuple[str, Direction], ...]
+    where: str = ""
+
+
+@dataclass
+class Candidate:
+    """A btree index some statement would use: equality keys first, then range or sort keys."""
+
+    table: str
+    keys: tuple[tuple[str, Direction], ...]
+    equality_count: int
+    where: str = ""
+    columns: set[str] = field(default_factory=set)
+    endpoints: set[str] = field(default_factory=set)
+    statements: int = 0
+    covered_by: str | None = None
+
+    @property
+    def signature(self) -> tuple:
+        equality = tuple(sorted(_norm(expr) for expr, _ in self.keys[: self.equality_count]))
+        rest = tuple((_norm(expr), direction) for expr, direction in self.keys[self.equality_count :])
+        return (_table_name(self.table), equality, rest, _norm(self.where))
+
+    def as_index(self) -> IndexDef:
+        return IndexDef("", self.table, "btree", self.keys, self.where)
+
+    def definition(self) -> str:
+        keys = ", ".join(_render_key(expr, direction) for expr, direction in self.keys)
+        return f"{self.table} ({keys})" + (f" WHERE {self.where}" if self.where else "")
+
+
+# ---------------------------------------------------------------------------
+# Text helpers
+# ---------------------------------------------------------------------------
+
+
+def _mask_strings(sql: str) -> tuple[str, list[str]]:
+    literals: list[str] = []
+
+    def keep(match: re.Match) -> str:
+        literals.append(match.group(0))
+        return f"\x00{len(literals) - 1}\x00"
+
+    return _STRING_RE.sub(keep, sql), literals
+
+
+def _unmask(text: str, literals: list[str]) -> str:
+    return _MASK_RE.sub(lambda match: literals[int(match.group(1))], text)
+
+
+def _depths(text: str) -> list[int]:
+    """Parenthesis depth before each character of *text*."""
+    depths, depth = [], 0
+    for char in text:
+        if char == ")":
+            depth -= 1
+        depths.append(depth)
+        if char == "(":
+            depth += 1
+    return depths
+
+
+def _top_level(text: str, pattern: re.Pattern) -> list[re.Match]:
+    depths = _depths(text)
+    return [match for match in pattern.finditer(text) if depths[match.start()] == 0]
+
+
+def _split(text: str, separator: re.Pattern) -> list[str]:
+    parts, start, between = [], 0, False
+    for match in _top_level(text, separator):
+        piece = text[start : match.start()]
+        if separator is _AND_RE and not between and _top_level(piece, _BETWEEN_RE):
+            between = True
+            continue
+        parts.append(piece)
+        start, between = match.end(), False
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _strip_parens(text: str) -> str:
+    text = text.strip()
+    while text.startswith("(") and text.endswith(")") and min(_depths(text)[1:-1] or [1]) >= 1:
+        text = text[1:-1].strip()
+    return text
+
+
+def _clauses(sql: str, depths: list[int], start: re.Pattern, end: re.Pattern) -> list[tuple[int, int, str]]:
+    """``(start, end, body)`` of every clause opened by *start*, at any depth."""
+    found = []
+    for match in start.finditer(sql):
+        level, position = depths[match.start()], match.end()
+        while position < len(sql):
+            if depths[position] < level:
+                break
+            at_word = position == 0 or not (sql[position - 1].isalnum() or sql[position - 1] == "_")
+            if depths[position] == level and at_word and end.match(sql, position):
+                break
+            position += 1
+        found.append((match.start(), position, sql[match.end() : position]))
+    return found
+
+
+def _norm(expr: str) -> str:
+    """Comparable form of an expression written by a router or printed by PostgreSQL."""
+    text = expr.lower().replace('"', "")
+    text = re.sub(r"('(?:[^']|'')*')::(?:text|character varying|varchar)", r"\1", text)
+    text = re.sub(r"[\s()]", "", text)
+    text = re.sub(r"<>allarray\[([^\]]*)\]", r"notin\1", text)
+    return re.sub(r"=anyarray\[([^\]]*)\]", r"in\1", text)
+
+
+def _table_name(table: str) -> str:
+    return table.lower().replace('"', "").replace(" ", "")
+
+
+def _same_table(left: str, right: str) -> bool:
+    left, right = _table_name(left), _table_name(right)
+    if "." in left and "." in right:
+        return left == right
+    return left.rsplit(".", 1)[-1] == right.rsplit(".", 1)[-1]
+
+
+def _split_direction(item: str) -> tuple[str, Direction]:
+    match = _DIRECTION_RE.search(item)
+    expr = item[: match.start()] if match and match.group(0).strip() else item
+    expr = _OPCLASS_RE.sub("", expr.strip())
+    if not match or not match.group(0).strip():
+        return expr, (False, False)
+    descending = (match.group(1) or "").upper() == "DESC"
+    nulls = match.group(2)
+    return expr, (descending, descending if nulls is None else nulls.upper() == "FIRST")
+
+
+def _render_key(expr: str, direction: Direction) -> str:
+    if direction is None or direction == (False, False):
+        return expr
+    descending, nulls_first = direction
+    text = f"{expr} DESC" if descending else expr
+    if nulls_first != descending:
+        text += " NULLS FIRST" if nulls_first else " NULLS LAST"
+    return text
+
+
+# ---------------------------------------------------------------------------
+# Statements -> access patterns
+# ---------------------------------------------------------------------------
+
+
+def _aliases(sql: str, depths: list[int]) -> dict[str, str]:
+    openers: list[int] = []
+    opener_at: list[int] = []
+    for index, char in enumerate(sql):
+        if char == ")" and openers:
+            openers.pop()
+        opener_at.append(openers[-1] if openers else -1)
+        if char == "(":
+            openers.append(index)
+
+    aliases: dict[str, str] = {}
+    for match in _TABLE_RE.finditer(sql):
+        opener = opener_at[match.start()]
+        if opener >= 0 and _FROM_FUNCTIONS.search(sql[:opener]):
+            continue
+        table = _table_name(match.group(1))
+        alias = (match.group(2) or "").replace('"', "").lower()
+        if not alias or alias in _NOT_ALIASES:
+            alias = table.rsplit(".", 1)[-1]
+        aliases[alias] = table
+    return aliases
+
+
+def _references(expr: str, aliases: dict[str, str]) -> tuple[set[str], set[str], str]:
+    """Tables and columns *expr* references, and *expr* without aliases or quotes."""
+    tables, columns = set(), set()
+
+    def strip(match: re.Match) -> str:
+        alias = match.group(1).replace('"', "").lower()
+        if alias not in aliases:
+            return match.group(0)
+        column = match.group(2).replace('"', "")
+        tables.add(aliases[alias])
+        columns.add(column.lower())
+        return column
+
+    bare = _REF_RE.sub(strip, expr)
+    return tables, columns, _SPACE_RE.sub(" ", bare.replace('"', "")).strip()
+
+
+def _classify(conjunct: str, aliases: dict[str, str], patterns: dict[str, AccessPattern], literals: list[str]) -> None:
+    conjunct = _strip_parens(conjunct)
+    if _top_level(conjunct, _OR_RE) or re.match(r"(?:NOT\s+)?EXISTS\b", conjunct, re.IGNORECASE):
+        return
+    operators = _top_level(conjunct, _OPERATOR_RE)
+    if operators:
+        first = operators[0]
+        left, operator, right = conjunct[: first.start()], first.group(1) or first.group(2), conjunct[first.end() :]
+    else:
+        left, operator, right = conjunct, "", ""
+    operator = _SPACE_RE.sub(" ", operator.upper())
+    left_tables, left_columns, left_expr = _references(left, aliases)
+    right_tables, right_columns, _ = _references(right, aliases)
+    if len(left_tables) != 1:
+        return
+    table = next(iter(left_tables))
+    pattern = patterns.setdefault(table, AccessPattern(table))
+
+    if right_tables - left_tables:
+        if operator == "=" and len(right_tables) == 1:
+            other = next(iter(right_tables))
+            _, _, right_expr = _references(right, aliases)
+            pattern.joins.append(_unmask(left_expr, literals))
+            pattern.columns |= left_columns
+            joined = patterns.setdefault(other, AccessPattern(other))
+            joined.joins.append(_unmask(right_expr, literals))
+            joined.columns |= right_columns
+        return
+    if right_tables:
+        return
+    if _PARAM_RE.search(right) or _VOLATILE_RE.search(right):
+        expr = _unmask(left_expr, literals)
+        if operator in EQUALITY_OPERATORS:
+            pattern.equality.append(expr)
+        elif operator in RANGE_OPERATORS:
+            pattern.ranges.append(expr)
+        else:
+            return
+    else:
+        _, _, bare = _references(conjunct, aliases)
+        pattern.constants.append(_unmask(bare, literals))
+    pattern.columns |= left_columns
+
+
+def _order_items(body: str, aliases: dict[str, str], patterns: dict[str, AccessPattern], literals: list[str]) -> None:
+    items: list[tuple[str, tuple[str, Direction], set[str]]] = []
+    for item in _split(body, _COMMA_RE):
+        expr, direction = _split_direction(item)
+        tables, columns, bare = _references(expr, aliases)
+        if len(tables) != 1:
+            break
+        items.append((next(iter(tables)), (_unmask(bare, literals), direction), columns))
+    # Only a sort prefix on a single table can come from one index.
+    for table, item, columns in items:
+        if table != items[0][0]:
+            break
+        pattern = patterns.setdefault(table, AccessPattern(table))
+        pattern.order.append(item)
+        pattern.columns |= columns
+
+
+def extract_access_patterns(sql: str) -> list[AccessPattern]:
+    """Per-table access patterns of every ``WHERE``/``ON``/``ORDER BY`` clause in *sql*."""
+    sql = _SPACE_RE.sub(" ", _COMMENT_RE.sub(" ", sql)).strip()
+    if not _ANALYZED_RE.match(sql):
+        return []
+    sql, literals = _mask_strings(sql)
+    depths = _depths(sql)
+    aliases = _aliases(sql, depths)
+    found: list[AccessPattern] = []
+
+    wheres = _clauses(sql, depths, _WHERE_RE, _WHERE_END_RE)
+    attached: dict[int, dict[str, AccessPattern]] = {}
+    for _, end, body in wheres:
+        patterns: dict[str, AccessPattern] = {}
+        for conjunct in _split(body, _AND_RE):
+            _classify(conjunct, aliases, patterns, literals)
+        attached[end] = patterns
+        found.extend(patterns.values())
+    for _, _, body in _clauses(sql, depths, _ON_RE, _ON_END_RE):
+        patterns = {}
+        for conjunct in _split(body, _AND_RE):
+            _classify(conjunct, aliases, patterns, literals)
+        found.extend(patterns.values())
+    for start, _, body in _clauses(sql, depths, _ORDER_RE, _ORDER_END_RE):
+        if re.search(r"\bOVER\s*\(\s*(?:PARTITION\s+BY\b[^()]*)?$", sql[:start], re.IGNORECASE):
+            continue
+        patterns = attached.get(start)
+        if patterns is None:
+            patterns = {}
+            _order_items(body, aliases, patterns, literals)
+            found.extend(patterns.values())
+        else:
+            added = {}
+            _order_items(body, aliases, added, literals)
+            for table, extra in added.items():
+                if table in patterns:
+                    patterns[table].order.extend(extra.order)
+                    patterns[table].columns |= extra.columns
+                else:
+                    found.append(extra)
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Existing indexes and recommendations
+# ---------------------------------------------------------------------------
+
+
+def parse_index_definition(definition: str) -> IndexDef | None:
+    """Parse ``pg_get_indexdef`` output; ``None`` for anything unrecognised."""
+    match = _INDEXDEF_RE.match(definition.strip())
+    if match is None:
+        return None
+    text = definition.strip()
+    depths = _depths(text)
+    close = next(
+        (index for index in range(match.end(), len(text)) if text[index] == ")" and depths[index] == 0),
+        None,
+    )
+    if close is None:
+        return None
+    keys = tuple(_split_direction(item) for item in _split(text[match.end() : close], _COMMA_RE))
+    rest = text[close + 1 :]
+    where = re.search(r"\bWHERE\b(.*)$", rest, re.IGNORECASE | re.DOTALL)
+    return IndexDef(
+        name=match.group(1).replace('"', ""),
+        table=_table_name(match.group(2)),
+        method=match.group(3).lower(),
+        keys=keys,
+        where=_strip_parens(where.group(1)) if where else "",
+    )
+
+
+def covers(index: IndexDef, candidate: Candidate) -> bool:
+    """Whether *index* serves *candidate*'s filter and sort through a btree prefix."""
+    if index.method != "btree" or not _same_table(index.table, candidate.table):
+        return False
+    if len(index.keys) < len(candidate.keys):
+        return False
+    if index.where and _norm(index.where) != _norm(candidate.where):
+        return False
+    count = candidate.equality_count
+    if {_norm(expr) for expr, _ in index.keys[:count]} != {_norm(expr) for expr, _ in candidate.keys[:count]}:
+        return False
+    forward = backward = True
+    for (expr, direction), (index_expr, index_direction) in zip(candidate.keys[count:], index.keys[count:]):
+        if _norm(expr) != _norm(index_expr):
+            return False
+        if direction is None:
+            continue
+        index_direction = index_direction or (False, False)
+        forward &= index_direction == direction
+        backward &= index_direction == (not direction[0], not direction[1])
+    return forward or backward
+
+
+def candidates_for(pattern: AccessPattern) -> list[Candidate]:
+    equality = sorted(dict.fromkeys(pattern.equality), key=_norm)
+    where = " AND ".join(sorted(dict.fromkeys(pattern.constants), key=_norm))
+    found: list[Candidate] = []
+
+    def add(keys: list[tuple[str, Direction]], equality_count: int) -> None:
+        if keys:
+            found.append(Candidate(pattern.table, tuple(keys), equality_count, where, set(pattern.columns)))
+
+    # A range bounds the rows left to sort, so it wins over the sort keys.
+    filters = [(expr, None) for expr in equality]
+    if pattern.ranges:
+        add(filters + [(pattern.ranges[0], None)], len(equality))
+    else:
+        add(filters + list(pattern.order), len(equality))
+    for join in dict.fromkeys(pattern.joins):
+        add([(join, None)], 1)
+    return found
+
+
+def recommend(statements: Iterable[tuple[str, str]], existing: Iterable[IndexDef]) -> list[Candidate]:
+    """Merged candidates for ``(endpoint, sql)`` pairs, most used first.
+
+    A candidate another candidate's keys already serve is dropped; the rest
+    get ``covered_by`` set when an existing index serves them.
+    """
+    merged: dict[tuple, Candidate] = {}
+    for endpoint, sql in statements:
+        for pattern in extract_access_patterns(sql):
+            for candidate in candidates_for(pattern):
+                current = merged.setdefault(candidate.signature, candidate)
+                current.endpoints.add(endpoint)
+                current.statements += 1
+
+    kept: list[Candidate] = []
+    for candidate in sorted(merged.values(), key=lambda item: -len(item.keys)):
+        wider = next((other for other in kept if covers(other.as_index(), candidate)), None)
+        if wider is None:
+            kept.append(candidate)
+        else:
+            wider.endpoints |= candidate.endpoints
+            wider.statements += candidate.statements
+
+    existing = list(existing)
+    for candidate in kept:
+        candidate.covered_by = next((index.name for index in existing if covers(index, candidate)), None)
+    return sorted(kept, key=lambda item: (-len(item.endpoints), -item.statements, item.table, item.definition()))
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+
+def _template(expr: str, columns: set[str]) -> str:
+    masked, literals = _mask_strings(expr)
+    for column in sorted(columns, key=len, reverse=True):
+        masked = re.sub(rf"(?<![\w{{.:]){re.escape(column)}(?![\w}}(])", f"{{{column}}}", masked, flags=re.IGNORECASE)
+    return _unmask(masked, literals)
+
+
+def render_migration(candidates: Iterable[Candidate], constant: str, migration_id: str) -> str:
+    """``FilterIndex`` specs for the uncovered *candidates*, ready for ``filter_indexes.py``."""
+    lines = [f"{constant}: tuple[FilterIndex, ...] = ("]
+    for candidate in candidates:
+        if candidate.covered_by:
+            continue
+        definition = candidate.definition()
+        used = sorted(
+            column for column in candidate.columns if re.search(rf"\b{re.escape(column)}\b", definition, re.IGNORECASE)
+        )
+        keys = []
+        for expr, direction in candidate.keys:
+            text = _template(expr, set(used))
+            keys.append(_render_key(text if re.fullmatch(r"\{\w+\}", text) else f"({text})", direction))
+        name = "_".join(
+            dict.fromkeys(
+                column
+                for expr, _ in candidate.keys
+                for column in used
+                if re.search(rf"\b{re.escape(column)}\b", expr, re.IGNORECASE)
+            )
+        )
+        lines.append("    FilterIndex(")
+        lines.append(f"        name={(name + ('_partial' if candidate.where else ''))[:40]!r},")
+        lines.append(f"        tables=({_table_name(candidate.table).rsplit('.', 1)[-1]!r},),")
+        lines.append("        columns={" + ", ".join(f"{column!r}: ({column!r},)" for column in used) + "},")
+        lines.append("        keys=(" + ", ".join(repr(key) for key in keys) + ("," if len(keys) == 1 else "") + "),")
+        if candidate.where:
+            lines.append(f"        where={_template(candidate.where, set(used))!r},")
+        lines.append(f"        serves={', '.join(sorted(candidate.endpoints))!r},")
+        lines.append("    ),")
+    lines.append(")")
+    lines.append("")
+    lines.append(f"# APP_MIGRATIONS: filter_index_migration({migration_id!r}, {constant}),")
+    return "\n".join(lines) + "\n"
+
+
+def plan_usage(plan) -> dict[str, list[str]]:
+    """Indexes an ``EXPLAIN (FORMAT JSON)`` plan uses and tables it reads sequentially."""
+    indexes, seq_scans = set(), set()
+    stack = [entry["Plan"] for entry in plan] if isinstance(plan, list) else [plan.get("Plan", plan)]
+    while stack:
+        node = stack.pop()
+        if node.get("Index Name"):
+            indexes.add(node["Index Name"])
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name"):
+            seq_scans.add(node["Relation Name"])
+        stack.extend(node.get("Plans", []))
+    return {"indexes": sorted(indexes), "seqScans": sorted(seq_scans)}
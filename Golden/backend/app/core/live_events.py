@@ -0,0 +1,240 @@
+"""Push channel for front-desk screens (reception board, notification bell).
+
+Writers call :func:`publish_live_event` inside the writing transaction. It
+issues ``NOTIFY app_live_events`` with a small JSON envelope::
+
+    {"type": "appointment", "companyId": "...", "data": {"op": "upsert", "item": {...}}}
+
+so the event reaches every worker only once the change has committed,
+including changes made by other workers, and nothing is sent for a rollback.
+Database triggers (see ``notifications.ensure_notification_live_trigger``)
+publish the same envelope for rows written outside the app.
+
+Each worker fans the notifications out to its Server-Sent Events
+subscribers (``GET /api/events/stream``), filtered by company. Events carry
+ids of the form ``<worker>-<sequence>``. A reconnecting client that sends
+``Last-Event-ID`` gets the events it missed from a short backlog, or a
+``resync`` event when they are no longer available (other worker, backlog
+overflowed, listener reconnected). A subscriber that cannot keep up is sent
+``resync`` instead of an unbounded queue. Clients re-fetch in full only on
+``resync``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import secrets
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from app.core import pg_listener
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "app_live_events"
+# NOTIFY payloads must stay below 8000 bytes.
+MAX_PAYLOAD_BYTES = 7900
+RESYNC = "resync"
+
+
+@dataclass(frozen=True)
+class LiveEvent:
+    id: str
+    type: str
+    company_id: str | None
+    data: str
+
+    def encode(self) -> bytes:
+        """Serialize as one SSE message."""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {self.data}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """One SSE client: a bounded queue fed from the listener thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, company_id: str | None) -> None:
+        self.loop = loop
+        self.company_id = company_id
+        self.queue: asyncio.Queue[LiveEvent] = asyncio.Queue(
+            maxsize=max(settings.LIVE_EVENTS_QUEUE_SIZE, 1)
+        )
+
+    def wants(self, event: LiveEvent) -> bool:
+        return (
+            event.type == RESYNC
+            or self.company_id is None
+            or event.company_id is None
+            or event.company_id == self.company_id
+        )
+
+
+class LiveEventHub:
+    """Per-worker fan-out of ``app_live_events`` notifications."""
+
+    def __init__(self) -> None:
+        # Re-entrant: subscribe() replays the backlog through _offer().
+        self._lock = threading.RLock()
+        self._subscribers: set[Subscription] = set()
+        self._backlog: deque[LiveEvent] = deque(maxlen=max(settings.LIVE_EVENTS_BACKLOG, 1))
+        self._worker = secrets.token_hex(4)
+        self._sequence = 0
+        self._published = 0
+        self._delivered = 0
+        self._overflows = 0
+        self.listening = False
+
+    def subscribe(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        company_id: str | None,
+        last_event_id: str | None = None,
+    ) -> Subscription | None:
+        """Register a subscriber; ``None`` when the worker is at capacity."""
+        subscription = Subscription(loop, company_id)
+        with self._lock:
+            if len(self._subscribers) >= settings.LIVE_EVENTS_MAX_SUBSCRIBERS:
+                return None
+            self._subscribers.add(subscription)
+            if last_event_id:
+                missed = self._missed_since(last_event_id)
+                if missed is None:
+                    subscription.queue.put_nowait(self._resync_event())
+                else:
+                    for event in missed:
+                        if subscription.wants(event):
+                            self._offer(subscription, event)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def dispatch(self, payload: str) -> None:
+        """Handle one NOTIFY payload (listener thread)."""
+        try:
+            envelope = json.loads(payload)
+            event_type = str(envelope["type"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("[LIVE] Ignoring malformed event payload")
+            return
+        company_id = envelope.get("companyId")
+        data = json.dumps(envelope.get("data"), ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._sequence += 1
+            event = LiveEvent(
+                id=f"{self._worker}-{self._sequence}",
+                type=event_type,
+                company_id=str(company_id) if company_id is not None else None,
+                data=data,
+            )
+            self._backlog.append(event)
+            self._published += 1
+            targets = [sub for sub in self._subscribers if sub.wants(event)]
+        for subscription in targets:
+            self._schedule(subscription, event)
+
+    def resync_all(self) -> None:
+        """Tell every subscriber to re-fetch; events may have been missed."""
+        with self._lock:
+            self._backlog.clear()
+            event = self._resync_event()
+            targets = list(self._subscribers)
+        for subscription in targets:
+            self._schedule(subscription, event)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self._published,
+                "delivered": self._delivered,
+                "overflows": self._overflows,
+                "backlog": len(self._backlog),
+                "listening": self.listening,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._subscribers.clear()
+            self._backlog.clear()
+            self._published = 0
+            self._delivered = 0
+            self._overflows = 0
+
+    def _missed_since(self, last_event_id: str) -> list[LiveEvent] | None:
+        worker, _, sequence = last_event_id.partition("-")
+        if worker != self._worker or not sequence.isdigit():
+            return None
+        last = int(sequence)
+        if last >= self._sequence:
+            return []
+        if not self._backlog or int(self._backlog[0].id.rsplit("-", 1)[1]) > last + 1:
+            return None
+        return [event for event in self._backlog if int(event.id.rsplit("-", 1)[1]) > last]
+
+    def _resync_event(self) -> LiveEvent:
+        return LiveEvent(id=f"{self._worker}-{self._sequence}", type=RESYNC, company_id=None, data="{}")
+
+    def _schedule(self, subscription: Subscription, event: LiveEvent) -> None:
+        try:
+            subscription.loop.call_soon_threadsafe(self._offer, subscription, event)
+        except RuntimeError:
+            # The subscriber's loop is gone; the stream is ending anyway.
+            self.unsubscribe(subscription)
+
+    def _offer(self, subscription: Subscription, event: LiveEvent) -> None:
+        queue = subscription.queue
+        with self._lock:
+            try:
+                queue.put_nowait(event)
+                self._delivered += 1
+            except asyncio.QueueFull:
+                # Slow consumer: drop what it has not read and ask it to re-fetch.
+                self._overflows += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._resync_event())
+
+
+live_events = LiveEventHub()
+
+
+def publish_live_event(cur, event_type: str, *, company_id: Any = None, data: dict) -> None:
+    """Queue an event for every worker; delivered when *cur*'s transaction commits."""
+    envelope = {
+        "type": event_type,
+        "companyId": str(company_id) if company_id is not None else None,
+        "data": data,
+    }
+    payload = json.dumps(envelope, ensure_ascii=False, separators=(",", ":"), default=str)
+    if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+        # Too large for NOTIFY: send the identity only; clients re-fetch it.
+        item = data.get("item") or {}
+        envelope["data"] = {"op": data.get("op"), "stale": True, "item": {"id": item.get("id")}}
+        payload = json.dumps(envelope, ensure_ascii=False, separators=(",", ":"), default=str)
+    cur.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, payload))
+
+
+def _on_connect() -> None:
+    live_events.listening = True
+    live_events.resync_all()
+
+
+def _on_disconnect() -> None:
+    live_events.listening = False
+
+
+def start_live_events_listener(dsn: str) -> None:
+    """Subscribe this worker to ``app_live_events``."""
+    pg_listener.listen(
+        NOTIFY_CHANNEL,
+        live_events.dispatch,
+        on_connect=_on_connect,
+        on_disconnect=_on_disconnect,
+    )
+    pg_listener.start_listener(dsn)
@@ -5,6 +5,9 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable
 
+from app.core.pagination import empty_cursor_page
+from app.core.schema_catalog import get_catalog, table_names
+
 
 @dataclass(frozen=True)
 class TableRef:
@@ -18,67 +21,62 @@ class TableRef:
         return f'{quote_ident(self.schema)}.{quote_ident(self.table)}'
 
 
-_TABLE_CACHE: dict[tuple[str, ...], TableRef | None] = {}
-_COLUMN_CACHE: dict[tuple[str, str], tuple[str, ...]] = {}
+_SCHEMA_PRIORITY = {"dbo": 0, "public": 1}
 
 
 def resolve_table(conn, *candidates: str) -> TableRef | None:
-    """Resolve the first existing table from *candidates* across non-system schemas."""
-    key = tuple(_normalise_candidates(candidates))
+    """Resolve the first existing table from *candidates* across non-system schemas.
+
+    Matches are ranked by schema (``dbo``, then ``public``, then others) and
+    then by schema/table name, using the shared schema catalog.
+    """
+    key = table_names(candidates)
     if not key:
         return None
 
-    if key in _TABLE_CACHE:
-        return _TABLE_CACHE[key]
-
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT table_schema, table_name
-            FROM information_schema.tables
-            WHERE table_type = 'BASE TABLE'
-              AND table_schema NOT IN ('pg_catalog', 'information_schema')
-              AND lower(table_name) = ANY(%s)
-            ORDER BY
-              CASE table_schema
-                WHEN 'dbo' THEN 0
-                WHEN 'public' THEN 1
-                ELSE 2
-              END,
-              table_schema,
-              table_name
-            LIMIT 1
-            """,
-            (list(key),),
-        )
-        row = cur.fetchone()
-
-    table_ref = TableRef(schema=row[0], table=row[1]) if row else None
-    _TABLE_CACHE[key] = table_ref
-    return table_ref
+    current = get_catalog(conn)
+    return current.memo(("resolve_table", key), lambda: _rank_tables(current, key))
+
+
+def app_table(cur, name: str) -> TableRef:
+    """Where the unqualified app table *name* lives for this connection.
+
+    Trigger functions fire for every writer, whatever its ``search_path``,
+    so the app tables they touch must be named with their schema.
+    """
+    cur.execute(
+        "SELECT n.nspname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.oid = to_regclass(%s)",
+        (name,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        raise LookupError(f"Table {name} not found on the search_path")
+    schema = next(iter(row.values())) if isinstance(row, dict) else row[0]
+    return TableRef(schema, name)
 
 
 def table_columns(conn, table_ref: TableRef) -> tuple[str, ...]:
     """Return all lowercased column names for *table_ref*."""
-    key = (table_ref.schema, table_ref.table)
-    if key in _COLUMN_CACHE:
-        return _COLUMN_CACHE[key]
-
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT lower(column_name)
-            FROM information_schema.columns
-            WHERE table_schema = %s
-              AND table_name = %s
-            ORDER BY ordinal_position
-            """,
-            (table_ref.schema, table_ref.table),
-        )
-        cols = tuple(row[0] for row in cur.fetchall())
-
-    _COLUMN_CACHE[key] = cols
-    return cols
+    table = get_catalog(conn).get(table_ref.schema, table_ref.table)
+    return table.columns if table else ()
+
+
+def column_types(conn, table_ref: TableRef) -> dict[str, str]:
+    """Return ``{column: data_type}`` (lowercased ``format_type`` names) for *table_ref*."""
+    table = get_catalog(conn).get(table_ref.schema, table_ref.table)
+    return dict(table.data_types) if table else {}
+
+
+def _rank_tables(current, key: tuple[str, ...]) -> TableRef | None:
+    matches = [table for name in key for table in current.lookup(name)]
+    if not matches:
+        return None
+    best = min(
+        matches,
+        key=lambda table: (_SCHEMA_PRIORITY.get(table.schema, 2), table.schema, table.table),
+    )
+    return TableRef(schema=best.schema, table=best.table)
 
 
 def pick_column(columns: Iterable[str], *candidates: str) -> str | None:
@@ -121,8 +119,10 @@ def page_window(
     return (resolved_page - 1) * resolved_limit, resolved_limit
 
 
-def empty_page(offset: int, limit: int) -> dict:
-    """Standard empty paged envelope."""
+def empty_page(offset: int, limit: int, *, cursor: bool = False) -> dict:
+    """Standard empty paged envelope (cursor-mode shape when *cursor*)."""
+    if cursor:
+        return empty_cursor_page(limit)
     return {"offset": offset, "limit": limit, "totalItems": 0, "items": []}
 
 
@@ -131,14 +131,3 @@ def quote_ident(identifier: str) -> str:
     escaped = identifier.replace('"', '""')
     return f'"{escaped}"'
 
-
-def _normalise_candidates(candidates: Iterable[str]) -> tuple[str, ...]:
-    deduped: list[str] = []
-    seen: set[str] = set()
-    for candidate in candidates:
-        key = candidate.strip().lower()
-        if not key or key in seen:
-            continue
-        seen.add(key)
-        deduped.append(key)
-    return tuple(deduped)
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import logging
+import secrets
 from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
 from threading import Lock
 from time import monotonic
 
@@ -13,11 +16,16 @@ from jose import JWTError
 from app.core.config import settings
 from app.core.database import get_conn
 from app.core.security import decode_access_token
+from app.core.session_cache import session_cache
 
 logger = logging.getLogger(__name__)
 _rate_limit_lock = Lock()
 _login_failures: dict[str, deque[float]] = defaultdict(deque)
 
+# Set by ``/api/batch`` while it dispatches sub-requests that carry the
+# credentials it has already validated.
+_validated_user: ContextVar[dict | None] = ContextVar("validated_user", default=None)
+
 
 def extract_auth_token(request: Request) -> str | None:
     """Extract JWT from Authorization header or session cookie.
@@ -42,6 +50,9 @@ def extract_auth_token(request: Request) -> str | None:
 def validate_token(token: str, require_session: bool = True) -> dict:
     """Decode token and optionally enforce an active DB session.
 
+    Validated sessions are served from :mod:`app.core.session_cache` until
+    they expire there or are revoked.
+
     Returns a normalized user dict with keys:
     ``id``, ``sub``, ``name``, ``email``, ``role``.
     """
@@ -64,12 +75,17 @@ def validate_token(token: str, require_session: bool = True) -> dict:
     if not require_session:
         return user
 
+    cached = session_cache.get(token)
+    if cached is not None and cached["id"] == user["id"]:
+        return cached
+
+    generation = session_cache.generation()
     try:
         with get_conn() as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     """
-                    SELECT u.id::text, u.name, u.email, u.role
+                    SELECT u.id::text, u.name, u.email, u.role, s.expires_at
                     FROM app_sessions s
                     JOIN app_users u ON u.id = s.user_id
                     WHERE s.token = %s
@@ -99,11 +115,26 @@ def validate_token(token: str, require_session: bool = True) -> dict:
     if session_user["id"] != user["id"]:
         raise HTTPException(status_code=401, detail="Session user mismatch")
 
+    session_cache.put(token, session_user, row[4] if len(row) > 4 else None, generation=generation)
     return session_user
 
 
+@contextmanager
+def authenticated_as(user: dict):
+    """Let :func:`require_auth` accept *user* without validating again."""
+    token = _validated_user.set(user)
+    try:
+        yield
+    finally:
+        _validated_user.reset(token)
+
+
 def require_auth(request: Request) -> dict:
     """FastAPI dependency that enforces JWT authentication."""
+    validated = _validated_user.get()
+    if validated is not None:
+        return validated
+
     token = extract_auth_token(request)
     if not token:
         raise HTTPException(status_code=401, detail="Missing authentication token")
@@ -119,6 +150,16 @@ def require_admin(user: dict = Depends(require_auth)) -> dict:
     return user
 
 
+def require_metrics_access(request: Request) -> None:
+    """Allow ``/api/metrics`` for the ``METRICS_TOKEN`` bearer, else admins only."""
+    if settings.METRICS_TOKEN:
+        header = request.headers.get("Authorization", "")
+        scheme, _, token = header.partition(" ")
+        if scheme.lower() == "bearer" and secrets.compare_digest(token.strip(), settings.METRICS_TOKEN):
+            return
+    require_admin(require_auth(request))
+
+
 def _client_ip(request: Request) -> str:
     """Best-effort client IP extraction for rate-limiting keys."""
     forwarded_for = request.headers.get("X-Forwarded-For", "")
@@ -0,0 +1,120 @@
+"""Versioned boot-time migrations for app-owned tables.
+
+Routers used to run ``CREATE TABLE IF NOT EXISTS`` on every request. Those
+statements now live in migrations that run once at boot: each one is
+recorded in ``app_schema_migrations`` by id, so a restart only reads that
+table. Changing a migration's DDL means adding a new migration with a new
+id, never editing an applied one.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+import psycopg2
+
+from app.core.database import get_conn
+from app.core.schema_catalog import invalidate_catalog
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS app_schema_migrations (
+    id TEXT PRIMARY KEY,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+# Serialises concurrent workers booting against the same database.
+_ADVISORY_LOCK_KEY = 7_420_001
+
+
+class MigrationError(Exception):
+    """A migration failed; the app must not start against a half-migrated schema.
+
+    Deliberately not a ``RuntimeError``: boot treats those as "no database"
+    and carries on.
+    """
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One idempotent schema step, applied at most once per database."""
+
+    id: str
+    apply: Callable[[object], None]
+
+
+def _applied_ids(cur) -> set[str]:
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (_ADVISORY_LOCK_KEY,))
+    cur.execute(MIGRATIONS_TABLE_SQL)
+    cur.execute("SELECT id FROM app_schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def _apply_one(migration: Migration) -> bool:
+    """Apply *migration* and record it in one transaction; ``False`` if already applied.
+
+    Each migration commits on its own, so a later failure does not roll back
+    the ones before it. The advisory lock is re-taken per transaction and
+    the applied set re-read under it, in case another worker got there first.
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            if migration.id in _applied_ids(cur):
+                return False
+        migration.apply(conn)
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO app_schema_migrations (id) VALUES (%s) ON CONFLICT (id) DO NOTHING",
+                (migration.id,),
+            )
+    return True
+
+
+def run_migrations(migrations: Iterable[Migration]) -> list[str]:
+    """Apply pending *migrations* in order and return the ids applied.
+
+    Raises :class:`MigrationError` on the first failure; migrations applied
+    before it stay committed.
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            done = _applied_ids(cur)
+
+    applied: list[str] = []
+    try:
+        for migration in migrations:
+            if migration.id in done:
+                continue
+            try:
+                if _apply_one(migration):
+                    applied.append(migration.id)
+            except Exception as exc:
+                raise MigrationError(f"Migration {migration.id} failed: {exc}") from exc
+            done.add(migration.id)
+    finally:
+        if applied:
+            invalidate_catalog()
+            logger.info("[BOOT] Applied migrations: %s", ", ".join(applied))
+    return applied
+
+
+def optional_ddl(cur, sql: str) -> bool:
+    """Run DDL a migration can live without (extensions, triggers).
+
+    The statement runs inside a savepoint so a refusal (missing privilege,
+    unavailable extension) does not abort the migration; returns ``False``
+    when it was refused.
+    """
+    cur.execute("SAVEPOINT optional_ddl")
+    try:
+        cur.execute(sql)
+    except psycopg2.Error as exc:
+        cur.execute("ROLLBACK TO SAVEPOINT optional_ddl")
+        logger.info("[BOOT] Optional DDL skipped: %s", str(exc).strip())
+        return False
+    cur.execute("RELEASE SAVEPOINT optional_ddl")
+    return True
@@ -2,8 +2,115 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import Any, Callable, Iterator, Sequence
+
 from psycopg2.extras import RealDictCursor
 
+from app.core.config import settings
+from app.core.count_cache import count_cache
+from app.core.database import ProjectedDictCursor
+
+
+class InvalidCursorError(ValueError):
+    """Raised when an ``after``/``before`` token cannot be decoded."""
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """One column of a keyset ordering.
+
+    ``column`` names an output column of the paginated query. ``nullable``
+    keys get explicit ``NULLS FIRST/LAST`` handling; ``nulls_last`` defaults
+    to PostgreSQL's own placement (last for ascending, first for descending).
+    """
+
+    column: str
+    descending: bool = False
+    nullable: bool = False
+    nulls_last: bool | None = None
+
+    @property
+    def places_nulls_last(self) -> bool:
+        return (not self.descending) if self.nulls_last is None else self.nulls_last
+
+
+@dataclass(frozen=True)
+class PageQuery:
+    """A listing's complete, ordered query, returned instead of a page.
+
+    Exports run it on a server-side cursor and apply ``transform`` (the
+    listing's own row mapping, if any) to each row as it streams.
+    """
+
+    query: str
+    params: tuple
+    transform: Callable[[dict], dict] | None = None
+
+
+_capturing: ContextVar[bool] = ContextVar("capture_page_query", default=False)
+
+
+@contextmanager
+def capture_page_query() -> Iterator[None]:
+    """Make :func:`paginate` return a :class:`PageQuery` instead of rows.
+
+    Listings that shape rows themselves check :func:`capturing_page_query`
+    and return their own ``PageQuery``. The flag follows the context into
+    ``offload_db`` worker threads.
+    """
+    token = _capturing.set(True)
+    try:
+        yield
+    finally:
+        _capturing.reset(token)
+
+
+def capturing_page_query() -> bool:
+    return _capturing.get()
+
+
+def cursor_requested(
+    after: str | None = None,
+    before: str | None = None,
+    paging: str | None = None,
+) -> bool:
+    """Whether a list endpoint should answer in cursor mode.
+
+    Non-string values (unresolved ``Query`` defaults when a handler is called
+    directly) count as absent.
+    """
+    if isinstance(after, str) and after or isinstance(before, str) and before:
+        return True
+    return isinstance(paging, str) and paging.strip().lower() == "cursor"
+
+
+def encode_cursor(row: dict, keyset: Sequence[SortKey]) -> str:
+    """Build the opaque token for *row* from its sort-key values."""
+    values = [_cursor_value(row.get(key.column)) for key in keyset]
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, keyset: Sequence[SortKey]) -> list:
+    """Decode a token produced by :func:`encode_cursor` for the same keyset."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursorError("Malformed pagination cursor") from exc
+    if not isinstance(values, list) or len(values) != len(keyset):
+        raise InvalidCursorError("Pagination cursor does not match this listing")
+    if any(isinstance(value, (dict, list)) for value in values):
+        raise InvalidCursorError("Malformed pagination cursor")
+    return values
+
 
 def paginate(
     query: str,
@@ -14,7 +121,12 @@ def paginate(
     *,
     offset: int | None = None,
     limit: int | None = None,
-) -> dict:
+    keyset: Sequence[SortKey] | None = None,
+    after: str | None = None,
+    before: str | None = None,
+    count: str = "exact",
+    count_tables: Sequence = (),
+) -> dict | PageQuery:
     """Execute *query* with pagination and return a standard envelope.
 
     Supports both:
@@ -22,6 +134,19 @@ def paginate(
     - ``offset``/``limit`` style (preferred for API parity)
 
     ``per_page=0`` or ``limit=0`` means "return all rows".
+
+    Passing ``keyset`` switches to cursor mode: *query* must not carry its
+    own ``ORDER BY``; rows are ordered by the keyset and the window starts
+    after (or ends before) the row encoded in ``after``/``before``. No count
+    is run, so the envelope is ``limit``/``items``/``nextCursor``/
+    ``prevCursor``/``hasMore`` instead of ``offset``/``totalItems``.
+
+    ``count="auto"`` replaces the exact count with :func:`count_rows` (exact
+    for small sets, planner estimate for large ones, cached per
+    ``count_tables`` write state) and adds ``totalExact`` to the envelope.
+
+    Inside :func:`capture_page_query` no SQL runs and the (unpaged) query
+    is returned as a :class:`PageQuery`.
     """
     resolved_offset, resolved_limit = _resolve_window(
         page=page,
@@ -30,18 +155,28 @@ def paginate(
         limit=limit,
     )
 
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        count_sql = f"SELECT COUNT(*) AS total FROM ({query}) AS _counted"
-        cur.execute(count_sql, params)
-        total_items = int(cur.fetchone()["total"])
-
-        if total_items == 0:
-            return {
-                "offset": resolved_offset,
-                "limit": resolved_limit,
-                "totalItems": 0,
-                "items": [],
-            }
+    if keyset is None and _capturing.get():
+        return PageQuery(query, _as_tuple(params))
+
+    if keyset:
+        return _paginate_keyset(
+            query,
+            params,
+            conn,
+            keyset=keyset,
+            limit=resolved_limit,
+            after=after,
+            before=before,
+        )
+
+    if count == "auto":
+        total_items, total_exact = count_rows(conn, query, params, tables=count_tables)
+    else:
+        total_items, total_exact = _exact_count(conn, query, params), True
+
+    with conn.cursor(cursor_factory=ProjectedDictCursor) as cur:
+        if total_items == 0 and total_exact:
+            return _offset_envelope(resolved_offset, resolved_limit, 0, [], count=count)
 
         bound_params = _as_tuple(params)
         if resolved_limit == 0 and resolved_offset > 0:
@@ -57,14 +192,271 @@ def paginate(
         cur.execute(page_sql, page_params)
         rows = cur.fetchall()
 
+    if not total_exact:
+        total_items, total_exact = settle_total(
+            total_items,
+            offset=resolved_offset,
+            limit=resolved_limit,
+            fetched=len(rows),
+        )
+        if total_exact and count_tables:
+            remember_total(conn, query, params, count_tables, total_items)
+
+    return _offset_envelope(
+        resolved_offset,
+        resolved_limit,
+        total_items,
+        rows,
+        count=count,
+        exact=total_exact,
+    )
+
+
+def count_rows(
+    conn,
+    query: str,
+    params: tuple | list | None,
+    *,
+    tables: Sequence = (),
+) -> tuple[int, bool]:
+    """Return ``(total, exact)`` for the rows of *query*.
+
+    Totals cached for the current write state of *tables* are reused.
+    Otherwise the planner's row estimate decides: at or below
+    ``PAGINATION_EXACT_COUNT_THRESHOLD`` the rows are counted exactly, above
+    it the estimate is returned as-is so large listings skip the count.
+    """
+    bound_params = _as_tuple(params)
+    key = stamp = None
+    if tables:
+        key = count_cache.key(query, bound_params)
+        stamp = count_cache.stamp(conn, tables)
+        cached = count_cache.get(key, stamp)
+        if cached is not None:
+            return cached.total, cached.exact
+
+    estimate = _planner_estimate(conn, query, bound_params)
+    if estimate is None or estimate <= settings.PAGINATION_EXACT_COUNT_THRESHOLD:
+        total, exact = _exact_count(conn, query, bound_params), True
+    else:
+        total, exact = estimate, False
+
+    if key is not None:
+        count_cache.put(key, stamp, total, exact=exact)
+    return total, exact
+
+
+def settle_total(total: int, *, offset: int, limit: int, fetched: int) -> tuple[int, bool]:
+    """Correct an estimated *total* with what fetching a page revealed."""
+    if limit == 0 or fetched < limit:
+        if fetched or offset == 0:
+            return offset + fetched, True
+        # Paged past the end: all we learn is that the total is at most offset.
+        return min(total, offset), False
+    return max(total, offset + fetched), False
+
+
+def remember_total(conn, query: str, params, tables: Sequence, total: int) -> None:
+    """Cache an exact *total* learned from reaching the end of a listing."""
+    bound_params = _as_tuple(params)
+    key = count_cache.key(query, bound_params)
+    count_cache.put(key, count_cache.stamp(conn, tables), total, exact=True)
+
+
+def _exact_count(conn, query: str, params: tuple | list | None) -> int:
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"SELECT COUNT(*) AS total FROM ({query}) AS _counted", params)
+        return int(cur.fetchone()["total"])
+
+
+def _planner_estimate(conn, query: str, params: tuple) -> int | None:
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+        row = cur.fetchone()
+    if not row:
+        return None
+    plan = next(iter(row.values()), None)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _offset_envelope(
+    offset: int,
+    limit: int,
+    total: int,
+    items: list,
+    *,
+    count: str,
+    exact: bool = True,
+) -> dict:
+    envelope = {
+        "offset": offset,
+        "limit": limit,
+        "totalItems": total,
+        "items": items,
+    }
+    if count == "auto":
+        envelope["totalExact"] = exact
+    return envelope
+
+
+def empty_cursor_page(limit: int) -> dict:
+    """Standard empty envelope for cursor mode."""
+    return {
+        "limit": limit,
+        "items": [],
+        "nextCursor": None,
+        "prevCursor": None,
+        "hasMore": False,
+    }
+
+
+def _paginate_keyset(
+    query: str,
+    params: tuple | list | None,
+    conn,
+    *,
+    keyset: Sequence[SortKey],
+    limit: int,
+    after: str | None,
+    before: str | None,
+) -> dict:
+    after = after if isinstance(after, str) and after else None
+    before = before if isinstance(before, str) and before else None
+    if after and before:
+        raise InvalidCursorError("Use either after or before, not both")
+
+    backwards = bool(before)
+    token = before if backwards else after
+    bound_params = _as_tuple(params)
+
+    page_sql = f"SELECT * FROM ({query}) AS _page"
+    page_params: tuple = bound_params
+    if token:
+        predicate, predicate_params = _keyset_predicate(
+            keyset, decode_cursor(token, keyset), backwards=backwards
+        )
+        page_sql += f" WHERE {predicate}"
+        page_params = (*page_params, *predicate_params)
+    page_sql += " ORDER BY " + _keyset_order(keyset, backwards=backwards)
+    if limit > 0:
+        page_sql += " LIMIT %s"
+        page_params = (*page_params, limit + 1)
+
+    with conn.cursor(cursor_factory=ProjectedDictCursor) as cur:
+        cur.execute(page_sql, page_params)
+        rows = cur.fetchall()
+
+    has_more = limit > 0 and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return empty_cursor_page(limit)
+
+    more_after = has_more if not backwards else True
+    more_before = has_more if backwards else bool(after)
     return {
-        "offset": resolved_offset,
-        "limit": resolved_limit,
-        "totalItems": total_items,
-        "items": [dict(row) for row in rows],
+        "limit": limit,
+        "items": rows,
+        "nextCursor": encode_cursor(rows[-1], keyset) if more_after else None,
+        "prevCursor": encode_cursor(rows[0], keyset) if more_before else None,
+        "hasMore": more_after,
     }
 
 
+def _keyset_order(keyset: Sequence[SortKey], *, backwards: bool) -> str:
+    parts: list[str] = []
+    for key in keyset:
+        descending = key.descending != backwards
+        part = f"_page.{_quote(key.column)} {'DESC' if descending else 'ASC'}"
+        if key.nullable:
+            nulls_last = key.places_nulls_last != backwards
+            part += " NULLS LAST" if nulls_last else " NULLS FIRST"
+        parts.append(part)
+    return ", ".join(parts)
+
+
+def _keyset_predicate(
+    keyset: Sequence[SortKey],
+    values: Sequence[Any],
+    *,
+    backwards: bool,
+) -> tuple[str, list]:
+    """Return SQL selecting rows strictly past *values* in keyset order."""
+    columns = [f"_page.{_quote(key.column)}" for key in keyset]
+    directions = {key.descending for key in keyset}
+    if len(directions) == 1 and not any(key.nullable for key in keyset) and None not in values:
+        # Uniform direction: a row comparison lets PostgreSQL use a
+        # composite index range scan.
+        descending = next(iter(directions)) != backwards
+        placeholders = ", ".join(["%s"] * len(values))
+        operator = "<" if descending else ">"
+        return f"({', '.join(columns)}) {operator} ({placeholders})", list(values)
+
+    disjuncts: list[str] = []
+    params: list = []
+    for index, key in enumerate(keyset):
+        terms: list[str] = []
+        term_params: list = []
+        for prior, column in zip(values[:index], columns[:index]):
+            if prior is None:
+                terms.append(f"{column} IS NULL")
+            else:
+                terms.append(f"{column} = %s")
+                term_params.append(prior)
+
+        past_sql, past_params = _past_value(key, columns[index], values[index], backwards)
+        if past_sql is None:
+            continue
+        terms.append(past_sql)
+        disjuncts.append(terms[0] if len(terms) == 1 else "(" + " AND ".join(terms) + ")")
+        params.extend(term_params)
+        params.extend(past_params)
+
+    if not disjuncts:
+        return "FALSE", []
+    return "(" + " OR ".join(disjuncts) + ")", params
+
+
+def _past_value(
+    key: SortKey,
+    column: str,
+    value: Any,
+    backwards: bool,
+) -> tuple[str | None, list]:
+    descending = key.descending != backwards
+    nulls_last = key.places_nulls_last != backwards
+    if value is None:
+        # Nothing sorts after a NULL placed last; everything non-NULL sorts
+        # after a NULL placed first.
+        return (None, []) if nulls_last else (f"{column} IS NOT NULL", [])
+
+    operator = "<" if descending else ">"
+    if key.nullable and nulls_last:
+        return f"({column} {operator} %s OR {column} IS NULL)", [value]
+    return f"{column} {operator} %s", [value]
+
+
+def _cursor_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _quote(identifier: str) -> str:
+    escaped = identifier.replace('"', '""')
+    return f'"{escaped}"'
+
+
 def _normalise_page(page: int) -> int:
     try:
         value = int(page)
@@ -0,0 +1,516 @@
+"""Daily payment rollups for finance reports and dashboard KPIs.
+
+The revenue, fund and dashboard endpoints used to aggregate the whole
+payments table (joined with journals, classified with ``LIKE '%cash%'``) on
+every call. ``app_payment_daily`` keeps those aggregates per day, company,
+cancelled flag, cash/bank classification and direction, so a month-to-date
+KPI reads a few dozen rows however long the payment history is.
+
+Keeping it current happens on the write side, in the writer's transaction:
+
+* statement triggers on the payments table collect the days the statement
+  touched (from its transition tables), lock those days in order and
+  rebuild their buckets from the source table, so a committed payment is
+  already in the rollup and readers only ever ``SELECT`` from it;
+* statement triggers on journals find the journals whose classifying
+  columns (type, name) changed, and rebuild, under the same day locks, only
+  the days with payments on those journals.
+
+Trigger bodies name the rollup table with its schema: they fire for
+external writers too, whatever their ``search_path``.
+
+The source (payments table and its date/amount/company/state/type
+columns) is chosen when the migration runs and recorded in
+``app_payment_rollup_source``. Endpoints read the rollup only when their
+own resolved source matches it (:meth:`RollupSource.serves`) and the
+triggers were installed; otherwise they keep querying payments directly.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date
+
+from app.core.lookup_sql import TableRef, app_table, pick_column, quote_ident, resolve_table, table_columns
+from app.core.migrations import optional_ddl
+from app.core.query_cache import compiled_query
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = "app_payment_daily"
+SOURCE_TABLE = "app_payment_rollup_source"
+# Dirty-day queue of the first rollup version, drained by readers; dropped.
+LEGACY_DIRTY_TABLE = "app_payment_rollup_dirty"
+
+# Per-day advisory lock class; the day number is the second key.
+_DAY_LOCK_KEY = 7_420_007
+
+INBOUND_TYPES = ("inbound", "incoming", "in", "receipt", "customer", "thu")
+OUTBOUND_TYPES = ("outbound", "outgoing", "out", "payment", "vendor", "chi")
+
+PAYMENT_TABLE_CANDIDATES = (
+    "account_payments",
+    "accountpayments",
+    "accountpayment",
+    "sale_order_payments",
+    "saleorderpayments",
+    "sale_order_payment",
+    "saleorderpayment",
+    "customer_receipts",
+    "customerreceipts",
+    "payments",
+    "payment",
+)
+JOURNAL_TABLE_CANDIDATES = ("account_journals", "accountjournals", "journals")
+
+_ROLLUP_DDL = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    day DATE NOT NULL,
+    company_id TEXT NOT NULL DEFAULT '',
+    cancelled BOOLEAN NOT NULL,
+    journal_cash BOOLEAN NOT NULL,
+    journal_bank BOOLEAN NOT NULL,
+    dashboard_cash BOOLEAN NOT NULL,
+    dashboard_bank BOOLEAN NOT NULL,
+    direction TEXT NOT NULL,
+    amount_total NUMERIC NOT NULL DEFAULT 0,
+    amount_positive NUMERIC NOT NULL DEFAULT 0,
+    amount_negative NUMERIC NOT NULL DEFAULT 0,
+    amount_abs NUMERIC NOT NULL DEFAULT 0,
+    payment_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (
+        day, company_id, cancelled, journal_cash, journal_bank,
+        dashboard_cash, dashboard_bank, direction
+    )
+);
+CREATE TABLE IF NOT EXISTS {SOURCE_TABLE} (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    table_schema TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    date_col TEXT NOT NULL,
+    amount_col TEXT NOT NULL,
+    company_col TEXT,
+    state_col TEXT,
+    direction_col TEXT,
+    live BOOLEAN NOT NULL DEFAULT FALSE,
+    built_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+
+@dataclass(frozen=True)
+class RollupSource:
+    """The payments table and columns the rollup aggregates."""
+
+    table: TableRef
+    date_col: str
+    amount_col: str
+    company_col: str | None
+    state_col: str | None
+    direction_col: str | None
+
+    def serves(
+        self,
+        table: TableRef,
+        *,
+        date_col: str,
+        amount_col: str,
+        company_col: str | None = None,
+    ) -> bool:
+        """Whether an endpoint resolving these columns can read the rollup."""
+        return (
+            self.table == table
+            and self.date_col == date_col
+            and self.amount_col == amount_col
+            and self.company_col == company_col
+        )
+
+
+def _resolve_source(conn) -> RollupSource | None:
+    table = resolve_table(conn, *PAYMENT_TABLE_CANDIDATES)
+    if table is None:
+        return None
+    cols = table_columns(conn, table)
+    date_col = pick_column(cols, "payment_date", "paymentdate", "date", "created_at", "created_date")
+    amount_col = pick_column(cols, "amount", "amount_total", "payment_amount", "total")
+    if not date_col or not amount_col:
+        return None
+    return RollupSource(
+        table=table,
+        date_col=date_col,
+        amount_col=amount_col,
+        company_col=pick_column(cols, "company_id", "companyid"),
+        state_col=pick_column(cols, "state", "status"),
+        direction_col=pick_column(cols, "payment_type", "paymenttype", "type"),
+    )
+
+
+@compiled_query
+def payment_rollup_source(conn) -> RollupSource | None:
+    """The live rollup source, or ``None`` when endpoints must query payments.
+
+    The source row only changes inside migrations, which reload the schema
+    catalog, so it is cached per catalog version like other query contexts.
+    """
+    if resolve_table(conn, SOURCE_TABLE) is None:
+        return None
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT table_schema, table_name, date_col, amount_col, company_col, "
+            f"state_col, direction_col FROM {SOURCE_TABLE} WHERE live"
+        )
+        row = cur.fetchone()
+    if row is None:
+        return None
+    row = tuple(row.values()) if isinstance(row, dict) else tuple(row)
+    return RollupSource(TableRef(row[0], row[1]), *row[2:])
+
+
+def _like_any(expr: str, *needles: str) -> str:
+    return "(" + " OR ".join(f"{expr} LIKE '%%{needle}%%'" for needle in needles) + ")"
+
+
+@dataclass(frozen=True)
+class _JournalLink:
+    """How payments join journals, and the journal columns that classify them."""
+
+    table: TableRef
+    payment_col: str
+    id_col: str
+    type_col: str | None
+    name_col: str | None
+    dash_type_col: str | None
+    dash_name_col: str | None
+
+    @property
+    def classifying(self) -> tuple[str, ...]:
+        columns = (self.type_col, self.name_col, self.dash_type_col, self.dash_name_col)
+        return tuple(sorted({column for column in columns if column}))
+
+
+def _journal_link(conn, source: RollupSource) -> _JournalLink | None:
+    journal_col = pick_column(table_columns(conn, source.table), "journal_id", "journalid")
+    journal_table = resolve_table(conn, *JOURNAL_TABLE_CANDIDATES) if journal_col else None
+    if journal_table is None:
+        return None
+    j_cols = table_columns(conn, journal_table)
+    j_id = pick_column(j_cols, "id")
+    if not j_id:
+        return None
+    return _JournalLink(
+        table=journal_table,
+        payment_col=journal_col,
+        id_col=j_id,
+        type_col=pick_column(j_cols, "type", "journal_type"),
+        name_col=pick_column(j_cols, "name", "display_name"),
+        dash_type_col=pick_column(j_cols, "type", "journal_type", "journaltype"),
+        dash_name_col=pick_column(j_cols, "name", "display_name", "displayname"),
+    )
+
+
+@compiled_query
+def _rebuild_sql(conn, source: RollupSource, full: bool = False, rollup: str = ROLLUP_TABLE) -> str:
+    """``INSERT ... SELECT`` aggregating payments whose day is in ``%s``.
+
+    The cash/bank flags reproduce both classifications in use: finance and
+    report endpoints look at the journal type then name; the dashboard also
+    considers the payment's partner journal type and payment type. With
+    *full* it aggregates every dated payment and takes no parameters.
+    *rollup* is the (qualified, for trigger bodies) rollup table name.
+    """
+    cols = table_columns(conn, source.table)
+    partner_journal_type_col = pick_column(cols, "partner_journal_type", "partnerjournaltype")
+    payment_type_col = pick_column(cols, "payment_type", "paymenttype")
+
+    join_sql = ""
+    journal_type = journal_name = dash_type = dash_name = None
+    link = _journal_link(conn, source)
+    if link is not None:
+        join_sql = (
+            f" LEFT JOIN {link.table.qualified_name} j"
+            f" ON p.{quote_ident(link.payment_col)} = j.{quote_ident(link.id_col)}"
+        )
+        journal_type, journal_name = link.type_col, link.name_col
+        dash_type, dash_name = link.dash_type_col, link.dash_name_col
+
+    def channel(*pieces: str | None) -> str:
+        present = [piece for piece in pieces if piece]
+        if not present:
+            return "''"
+        return "LOWER(COALESCE(" + ", ".join(present) + ", ''))"
+
+    journal_channel = channel(
+        f"j.{quote_ident(journal_type)}::text" if journal_type else None,
+        f"j.{quote_ident(journal_name)}::text" if journal_name else None,
+    )
+    dashboard_channel = channel(
+        f"j.{quote_ident(dash_type)}::text" if dash_type else None,
+        f"p.{quote_ident(partner_journal_type_col)}::text" if partner_journal_type_col else None,
+        f"p.{quote_ident(payment_type_col)}::text" if payment_type_col else None,
+        f"j.{quote_ident(dash_name)}::text" if dash_name and join_sql else None,
+    )
+
+    date_expr = f"p.{quote_ident(source.date_col)}"
+    amount_expr = f"COALESCE(p.{quote_ident(source.amount_col)}, 0)"
+    company_expr = (
+        f"COALESCE(p.{quote_ident(source.company_col)}::text, '')" if source.company_col else "''"
+    )
+    cancelled_expr = (
+        f"COALESCE(LOWER(p.{quote_ident(source.state_col)}::text), '') IN ('cancel', 'cancelled')"
+        if source.state_col
+        else "FALSE"
+    )
+    if source.direction_col:
+        type_expr = f"LOWER(COALESCE(p.{quote_ident(source.direction_col)}::text, ''))"
+        inbound = ", ".join(f"'{value}'" for value in INBOUND_TYPES)
+        outbound = ", ".join(f"'{value}'" for value in OUTBOUND_TYPES)
+        direction_expr = (
+            f"CASE WHEN {type_expr} IN ({inbound}) THEN 'inbound' "
+            f"WHEN {type_expr} IN ({outbound}) THEN 'outbound' ELSE '' END"
+        )
+    else:
+        direction_expr = f"CASE WHEN {amount_expr} >= 0 THEN 'inbound' ELSE 'outbound' END"
+
+    return (
+        f"INSERT INTO {rollup} ("
+        "day, company_id, cancelled, journal_cash, journal_bank, dashboard_cash, dashboard_bank, "
+        "direction, amount_total, amount_positive, amount_negative, amount_abs, payment_count) "
+        "SELECT "
+        f"{date_expr}::date, {company_expr}, {cancelled_expr}, "
+        f"{_like_any(journal_channel, 'cash', 'tien mat')}, "
+        f"{_like_any(journal_channel, 'bank', 'ngan hang')}, "
+        f"{_like_any(dashboard_channel, 'cash', 'tien mat')}, "
+        f"{_like_any(dashboard_channel, 'bank', 'ngan hang')}, "
+        f"{direction_expr}, "
+        f"SUM({amount_expr}), "
+        f"SUM(CASE WHEN {amount_expr} > 0 THEN {amount_expr} ELSE 0 END), "
+        f"SUM(CASE WHEN {amount_expr} < 0 THEN ABS({amount_expr}) ELSE 0 END), "
+        f"SUM(ABS({amount_expr})), "
+        "COUNT(*) "
+        f"FROM {source.table.qualified_name} p{join_sql} "
+        + (
+            f"WHERE {date_expr} IS NOT NULL "
+            if full
+            else f"WHERE {date_expr} >= %s AND {date_expr} < %s::date + 1 "
+            f"AND {date_expr}::date = ANY(%s::date[]) "
+        )
+        + "GROUP BY 1, 2, 3, 4, 5, 6, 7, 8"
+    )
+
+
+def rollup_for(
+    conn,
+    table: TableRef,
+    *,
+    date_col: str,
+    amount_col: str,
+    company_col: str | None = None,
+) -> RollupSource | None:
+    """Rollup source if it serves the caller's payments columns.
+
+    The triggers keep the rollup current, so this only reads its source row.
+    """
+    source = payment_rollup_source(conn)
+    if source is None or not source.serves(
+        table, date_col=date_col, amount_col=amount_col, company_col=company_col
+    ):
+        return None
+    return source
+
+
+def rollup_where(
+    *,
+    date_from: date | None,
+    date_to: date | None,
+    company_id: str | None = None,
+    exclude_cancelled: bool = False,
+) -> tuple[str, list]:
+    """``WHERE`` clause over :data:`ROLLUP_TABLE` (alias ``r``)."""
+    clauses: list[str] = []
+    params: list = []
+    if date_from is not None:
+        clauses.append("r.day >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        clauses.append("r.day <= %s")
+        params.append(date_to)
+    if company_id is not None:
+        clauses.append("r.company_id = %s")
+        params.append(company_id)
+    if exclude_cancelled:
+        clauses.append("NOT r.cancelled")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _plpgsql_sql(sql: str) -> str:
+    """*sql* in ``EXECUTE ... USING`` form: ``%s`` -> ``$n``, ``%%`` -> ``%``."""
+    positions = iter(range(1, sql.count("%s") + 1))
+    return re.sub(r"%([%s])", lambda m: "%" if m.group(1) == "%" else f"${next(positions)}", sql)
+
+
+def _touched_days_sql(date_ref: str, *relations: str) -> str:
+    dates = " UNION ALL ".join(f"SELECT {date_ref}::date AS day FROM {relation}" for relation in relations)
+    return (
+        f"SELECT array_agg(DISTINCT touched.day ORDER BY touched.day) INTO days "
+        f"FROM ({dates}) AS touched WHERE touched.day IS NOT NULL"
+    )
+
+
+def _rebuild_days_plpgsql(rebuild: str, rollup: str) -> str:
+    """Trigger tail: lock the touched ``days`` in order, then rebuild them."""
+    return f"""
+                IF days IS NULL THEN
+                    RETURN NULL;
+                END IF;
+                -- Concurrent writers to the same day rebuild one after the
+                -- other, each seeing the other's committed rows.
+                FOREACH touched_day IN ARRAY days LOOP
+                    PERFORM pg_advisory_xact_lock({_DAY_LOCK_KEY}, touched_day - DATE '2000-01-01');
+                END LOOP;
+                DELETE FROM {rollup} r WHERE r.day = ANY(days);
+                EXECUTE $rebuild${rebuild}$rebuild$
+                    USING days[1], days[array_length(days, 1)], days;
+                RETURN NULL;"""
+
+
+def _statement_triggers(prefix: str, table: str, function: str) -> str:
+    """Insert, update and delete statement triggers with transition tables.
+
+    One trigger per event: PostgreSQL refuses transition tables on a trigger
+    with several events.
+    """
+    events = (
+        ("insert", "INSERT", "NEW TABLE AS app_rollup_new"),
+        ("update", "UPDATE", "OLD TABLE AS app_rollup_old NEW TABLE AS app_rollup_new"),
+        ("delete", "DELETE", "OLD TABLE AS app_rollup_old"),
+    )
+    return "\n".join(
+        f"DROP TRIGGER IF EXISTS {prefix}_{suffix} ON {table};\n"
+        f"CREATE TRIGGER {prefix}_{suffix} AFTER {event} ON {table} REFERENCING {relations}\n"
+        f"    FOR EACH STATEMENT EXECUTE PROCEDURE {function}();"
+        for suffix, event, relations in events
+    )
+
+
+def _reclassified_journals_sql(link: _JournalLink) -> str:
+    """Journal ids whose classifying columns (or id) an UPDATE changed."""
+    old = ", ".join(f"o.{quote_ident(column)}" for column in link.classifying)
+    new = ", ".join(f"n.{quote_ident(column)}" for column in link.classifying)
+    return (
+        "SELECT o.{id} FROM app_rollup_old o LEFT JOIN app_rollup_new n ON n.{id} = o.{id} "
+        f"WHERE n.{{id}} IS NULL OR ({old}) IS DISTINCT FROM ({new}) "
+        "UNION ALL SELECT n.{id} FROM app_rollup_new n LEFT JOIN app_rollup_old o ON o.{id} = n.{id} "
+        "WHERE o.{id} IS NULL"
+    )
+
+
+def _journal_days_sql(source: RollupSource, link: _JournalLink, journal_ids: str) -> str:
+    """Days with payments on the journals *journal_ids* selects (``{id}`` = journal id)."""
+    date_ref = f"p.{quote_ident(source.date_col)}"
+    return (
+        f"SELECT array_agg(DISTINCT {date_ref}::date ORDER BY {date_ref}::date) INTO days "
+        f"FROM {source.table.qualified_name} p "
+        f"WHERE p.{quote_ident(link.payment_col)} IN ({journal_ids.format(id=quote_ident(link.id_col))}) "
+        f"AND {date_ref} IS NOT NULL"
+    )
+
+
+def ensure_payment_rollups(conn) -> None:
+    """Create the rollup tables, install the sync triggers and build every day.
+
+    Re-running it replaces the first version's dirty-day triggers and queue.
+    """
+    source = _resolve_source(conn)
+    with conn.cursor() as cur:
+        cur.execute(_ROLLUP_DDL)
+        cur.execute(f"DELETE FROM {SOURCE_TABLE}")
+        if source is None:
+            logger.warning("[BOOT] Payments table not found; payment rollups disabled")
+            return
+
+        rollup = app_table(cur, ROLLUP_TABLE).qualified_name
+        date_ref = quote_ident(source.date_col)
+        payments = source.table.qualified_name
+        rebuild_days = _rebuild_days_plpgsql(_plpgsql_sql(_rebuild_sql(conn, source, rollup=rollup)), rollup)
+        optional_ddl(cur, f"DROP TRIGGER IF EXISTS app_payment_rollup_mark_day ON {payments}")
+        live = optional_ddl(
+            cur,
+            f"""
+            CREATE OR REPLACE FUNCTION app_payment_rollup_sync_days() RETURNS trigger
+            LANGUAGE plpgsql AS $fn$
+            DECLARE
+                days date[];
+                touched_day date;
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    {_touched_days_sql(date_ref, "app_rollup_new")};
+                ELSIF TG_OP = 'DELETE' THEN
+                    {_touched_days_sql(date_ref, "app_rollup_old")};
+                ELSE
+                    {_touched_days_sql(date_ref, "app_rollup_old", "app_rollup_new")};
+                END IF;
+                {rebuild_days}
+            END
+            $fn$;
+            {_statement_triggers("app_payment_rollup_sync", payments, "app_payment_rollup_sync_days")}
+            """,
+        )
+        link = _journal_link(conn, source)
+        if link is not None:
+            journals = link.table.qualified_name
+            optional_ddl(cur, f"DROP TRIGGER IF EXISTS app_payment_rollup_mark_all ON {journals}")
+            optional_ddl(cur, f"DROP TRIGGER IF EXISTS app_payment_rollup_sync_all ON {journals}")
+        if live and link is not None and link.classifying:
+            live = optional_ddl(
+                cur,
+                f"""
+                CREATE OR REPLACE FUNCTION app_payment_rollup_sync_journals() RETURNS trigger
+                LANGUAGE plpgsql AS $fn$
+                DECLARE
+                    days date[];
+                    touched_day date;
+                BEGIN
+                    IF TG_OP = 'INSERT' THEN
+                        {_journal_days_sql(source, link, "SELECT n.{id} FROM app_rollup_new n")};
+                    ELSIF TG_OP = 'DELETE' THEN
+                        {_journal_days_sql(source, link, "SELECT o.{id} FROM app_rollup_old o")};
+                    ELSE
+                        {_journal_days_sql(source, link, _reclassified_journals_sql(link))};
+                    END IF;
+                    {rebuild_days}
+                END
+                $fn$;
+                {_statement_triggers("app_payment_rollup_sync", journals, "app_payment_rollup_sync_journals")}
+                """,
+            )
+
+        if not live:
+            logger.warning("[BOOT] Could not install payment rollup triggers; reports read payments directly")
+
+        optional_ddl(
+            cur,
+            "DROP FUNCTION IF EXISTS app_payment_rollup_mark_day(), app_payment_rollup_mark_all(), "
+            "app_payment_rollup_sync_all()",
+        )
+        cur.execute(f"DROP TABLE IF EXISTS {LEGACY_DIRTY_TABLE}")
+        cur.execute(f"TRUNCATE {ROLLUP_TABLE}")
+        cur.execute(_rebuild_sql(conn, source, full=True), ())
+        buckets = cur.rowcount
+        cur.execute(
+            f"INSERT INTO {SOURCE_TABLE} (table_schema, table_name, date_col, amount_col, "
+            "company_col, state_col, direction_col, live) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            (
+                source.table.schema,
+                source.table.table,
+                source.date_col,
+                source.amount_col,
+                source.company_col,
+                source.state_col,
+                source.direction_col,
+                live,
+            ),
+        )
+        logger.info("[BOOT] Built %d payment rollup buckets", buckets)
+
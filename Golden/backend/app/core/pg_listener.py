@@ -0,0 +1,143 @@
+"""Shared LISTEN/NOTIFY connection for cross-worker cache invalidation.
+
+Each worker keeps one dedicated autocommit connection outside the pool and
+dispatches notifications to the handlers registered with :func:`listen`::
+
+    listen("app_session_cache", on_notify, on_connect=cache.clear)
+    start_listener(settings.DATABASE_URL)
+
+``on_connect`` runs after every (re)connect, because anything may have been
+published while the worker was not listening; ``on_disconnect`` runs when
+the connection drops. Channels registered while the listener is running are
+picked up within a second.
+"""
+
+from __future__ import annotations
+
+import logging
+import select
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+_POLL_SECONDS = 1.0
+_RETRY_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class _Subscription:
+    on_notify: Callable[[str], None]
+    on_connect: Callable[[], None] | None = None
+    on_disconnect: Callable[[], None] | None = None
+
+
+_lock = threading.Lock()
+_subscriptions: dict[str, _Subscription] = {}
+
+
+def listen(
+    channel: str,
+    on_notify: Callable[[str], None],
+    *,
+    on_connect: Callable[[], None] | None = None,
+    on_disconnect: Callable[[], None] | None = None,
+) -> None:
+    """Register (or replace) the handlers for *channel*."""
+    with _lock:
+        _subscriptions[channel] = _Subscription(on_notify, on_connect, on_disconnect)
+
+
+def unlisten(channel: str) -> None:
+    with _lock:
+        subscription = _subscriptions.pop(channel, None)
+    if subscription is not None and subscription.on_disconnect is not None:
+        _call(subscription.on_disconnect, channel)
+
+
+def channels() -> list[str]:
+    with _lock:
+        return sorted(_subscriptions)
+
+
+class _Listener(threading.Thread):
+    def __init__(self, dsn: str) -> None:
+        super().__init__(name="pg-notify-listener", daemon=True)
+        self.dsn = dsn
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            conn = None
+            listening: set[str] = set()
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                while not self.stop_event.is_set():
+                    self._sync_channels(conn, listening)
+                    if select.select([conn], [], [], _POLL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        subscription = _subscriptions.get(notify.channel)
+                        if subscription is not None:
+                            _call(subscription.on_notify, notify.channel, notify.payload)
+            except Exception:
+                logger.warning("[NOTIFY] Listener disconnected; retrying", exc_info=True)
+                self.stop_event.wait(_RETRY_SECONDS)
+            finally:
+                for channel in listening:
+                    subscription = _subscriptions.get(channel)
+                    if subscription is not None and subscription.on_disconnect is not None:
+                        _call(subscription.on_disconnect, channel)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    @staticmethod
+    def _sync_channels(conn, listening: set[str]) -> None:
+        with _lock:
+            wanted = dict(_subscriptions)
+        with conn.cursor() as cur:
+            for channel in sorted(listening - wanted.keys()):
+                cur.execute(f'UNLISTEN "{channel}"')
+                listening.discard(channel)
+            for channel in sorted(wanted.keys() - listening):
+                cur.execute(f'LISTEN "{channel}"')
+                listening.add(channel)
+                if wanted[channel].on_connect is not None:
+                    _call(wanted[channel].on_connect, channel)
+
+
+_listener: _Listener | None = None
+
+
+def start_listener(dsn: str) -> None:
+    """Start the listener thread (idempotent)."""
+    global _listener
+    if _listener is not None and _listener.is_alive():
+        return
+    _listener = _Listener(dsn)
+    _listener.start()
+
+
+def stop_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop_event.set()
+    _listener.join(timeout=5.0)
+    _listener = None
+
+
+def _call(handler: Callable, channel: str, *args) -> None:
+    try:
+        handler(*args)
+    except Exception:
+        logger.exception("[NOTIFY] Handler for channel %s failed", channel)
@@ -0,0 +1,95 @@
+"""Compiled query contexts and SQL templates, cached per schema-catalog version.
+
+Routers resolve tables and columns (``resolve_table``/``table_columns``/
+``pick_column``) and assemble SQL fragments on every request. Those results
+only change when the schema does, so builders decorated here are evaluated
+once per catalog version and reused until the catalog reloads::
+
+    @compiled_query
+    def _payment_context(conn) -> PaymentContext | None:
+        ...
+
+    @compiled_template
+    def _select_projection(ctx) -> str:
+        ...
+
+Cached values are shared across requests and threads and must be treated
+as read-only.
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Any, Callable, TypeVar
+
+from app.core.schema_catalog import catalog
+
+T = TypeVar("T")
+
+_registry: dict[str, Callable[..., Any]] = {}
+
+
+def compiled_query(func: Callable[..., T]) -> Callable[..., T]:
+    """Cache ``func(conn, *args)`` per schema version.
+
+    *func* must depend only on the schema and its hashable arguments. Until
+    the catalog has been loaded (first request, or tests with fake
+    connections) calls pass straight through.
+    """
+    name = _qualified_name(func)
+
+    @functools.wraps(func)
+    def wrapper(conn, *args: Any, **kwargs: Any) -> T:
+        if not catalog.loaded:
+            return func(conn, *args, **kwargs)
+        current = catalog.ensure(conn)
+        key = (name, args, tuple(sorted(kwargs.items())))
+        return current.memo(key, lambda: func(conn, *args, **kwargs))
+
+    _registry[name] = func
+    wrapper.uncached = func
+    return wrapper
+
+
+def compiled_template(func: Callable[..., T]) -> Callable[..., T]:
+    """Cache a pure SQL-template builder keyed by its (hashable) arguments."""
+    name = _qualified_name(func)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        if not catalog.loaded:
+            return func(*args, **kwargs)
+        key = (name, args, tuple(sorted(kwargs.items())))
+        return catalog.memo(key, lambda: func(*args, **kwargs))
+
+    _registry[name] = func
+    wrapper.uncached = func
+    return wrapper
+
+
+def compiled_entries() -> dict:
+    """Describe the compiled set for debugging (``/api/health/schema``)."""
+    entries: dict[str, list[str]] = {}
+    for key in catalog.memo_keys():
+        name = key[0] if key and isinstance(key[0], str) else repr(key)
+        if name not in _registry:
+            continue
+        args = key[1] if len(key) > 1 else ()
+        entries.setdefault(name, []).append(", ".join(_describe(arg) for arg in args))
+    return {
+        "schemaVersion": catalog.version,
+        "registered": sorted(_registry),
+        "compiled": {name: sorted(values) for name, values in sorted(entries.items())},
+    }
+
+
+def _qualified_name(func: Callable[..., Any]) -> str:
+    module = func.__module__.rsplit(".", 1)[-1]
+    return f"{module}.{func.__qualname__}"
+
+
+def _describe(value: Any) -> str:
+    ref = getattr(value, "ref", None)
+    if ref is not None and hasattr(ref, "qualified_name"):
+        return ref.qualified_name
+    return repr(value)
@@ -0,0 +1,343 @@
+"""Per-request performance accounting, ``Server-Timing`` and Prometheus metrics.
+
+:class:`RequestMetricsMiddleware` opens a :class:`RequestTiming` for every
+HTTP request and stores it in a context variable. The database layer adds
+to it: ``get_conn()`` reports how long it waited for a pool slot and every
+cursor ``execute`` reports its duration (see ``database._guarded_cursor_class``).
+Context variables follow the request into ``run_db``/``offload_db`` worker
+threads and into ``/api/batch`` sub-requests, so their queries are counted
+on the request that caused them.
+
+When the response starts the middleware adds::
+
+    Server-Timing: db;dur=12.4;desc="7 queries", pool;dur=0.3, app;dur=18.9
+
+and when it ends it logs one JSON line on the ``app.access`` logger and
+adds the request to per-route histograms, rendered in Prometheus text
+format by :func:`render_prometheus` for ``GET /api/metrics``. Routes are
+labelled by their template (``/api/customers/{customer_id}``), never by the
+raw path. Bookkeeping is a few counters under a lock per request and per
+statement, cheap enough to leave on in production.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Iterable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+access_logger = logging.getLogger("app.access")
+
+# Upper bounds (seconds) of the request latency histogram buckets.
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SLOWEST_SQL_CHARS = 300
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestTiming:
+    """Database work attributed to one request."""
+
+    __slots__ = ("_lock", "scope", "pool_wait", "sql_count", "sql_time", "slowest_time", "slowest_sql")
+
+    def __init__(self, scope: Scope | None = None) -> None:
+        self._lock = threading.Lock()
+        # The router adds the matched route to this dict once it resolves.
+        self.scope = scope
+        self.pool_wait = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql: Any = None
+
+    def add_pool_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.pool_wait += seconds
+
+    def add_statement(self, sql: Any, seconds: float) -> None:
+        with self._lock:
+            self.sql_count += 1
+            self.sql_time += seconds
+            if seconds > self.slowest_time:
+                self.slowest_time = seconds
+                self.slowest_sql = sql
+
+    def slowest_text(self) -> str | None:
+        sql = self.slowest_sql
+        if sql is None:
+            return None
+        if isinstance(sql, bytes):
+            sql = sql.decode("utf-8", "replace")
+        return " ".join(str(sql).split())[:SLOWEST_SQL_CHARS]
+
+
+current_timing: ContextVar[RequestTiming | None] = ContextVar("request_timing", default=None)
+
+
+def record_pool_wait(seconds: float) -> None:
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add_pool_wait(seconds)
+
+
+def record_statement(sql: Any, seconds: float) -> None:
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add_statement(sql, seconds)
+
+
+def current_endpoint() -> str | None:
+    """``"GET /api/customers/{customer_id}"`` for the request being served, if any."""
+    timing = current_timing.get()
+    if timing is None or timing.scope is None:
+        return None
+    return f"{timing.scope.get('method', '')} {_route_label(timing.scope)}"
+
+
+# ---------------------------------------------------------------------------
+# Aggregates
+# ---------------------------------------------------------------------------
+
+
+class _RouteSeries:
+    __slots__ = ("buckets", "count", "seconds", "sql_count", "sql_seconds", "pool_wait_seconds")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+class RequestMetrics:
+    """Per ``(method, route, status)`` latency histograms and DB totals."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, str, str], _RouteSeries] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, timing: RequestTiming) -> None:
+        key = (method, route, str(status))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _RouteSeries()
+            series.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            series.count += 1
+            series.seconds += seconds
+            series.sql_count += timing.sql_count
+            series.sql_seconds += timing.sql_time
+            series.pool_wait_seconds += timing.pool_wait
+
+    def snapshot(self) -> dict[tuple[str, str, str], _RouteSeries]:
+        with self._lock:
+            copies = {}
+            for key, series in self._series.items():
+                copy = _RouteSeries()
+                copy.buckets = list(series.buckets)
+                copy.count = series.count
+                copy.seconds = series.seconds
+                copy.sql_count = series.sql_count
+                copy.sql_seconds = series.sql_seconds
+                copy.pool_wait_seconds = series.pool_wait_seconds
+                copies[key] = copy
+            return copies
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{name}="{_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return f"{value:.6f}".rstrip("0").rstrip(".") if isinstance(value, float) else str(value)
+
+
+def render_prometheus(pool: dict | None = None, compression: dict | None = None) -> str:
+    """Render request, pool and compression metrics in Prometheus text format."""
+    lines: list[str] = []
+
+    def family(name: str, kind: str, help_text: str, samples: Iterable[tuple[str, Any]]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample, value in samples:
+            lines.append(f"{sample} {_number(value)}")
+
+    series = sorted(request_metrics.snapshot().items())
+
+    def histogram_samples():
+        name = "tdental_http_request_duration_seconds"
+        for (method, route, status), data in series:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, data.buckets):
+                cumulative += count
+                labels = _labels(method=method, route=route, status=status, le=f"{bound:g}")
+                yield f"{name}_bucket{labels}", cumulative
+            labels = _labels(method=method, route=route, status=status, le="+Inf")
+            yield f"{name}_bucket{labels}", data.count
+            labels = _labels(method=method, route=route, status=status)
+            yield f"{name}_sum{labels}", data.seconds
+            yield f"{name}_count{labels}", data.count
+
+    family(
+        "tdental_http_request_duration_seconds",
+        "histogram",
+        "Request latency by route template.",
+        histogram_samples(),
+    )
+    for name, attr, help_text in (
+        ("tdental_db_statements_total", "sql_count", "SQL statements executed by route."),
+        ("tdental_db_statement_seconds_total", "sql_seconds", "Time spent in SQL by route."),
+        ("tdental_db_pool_wait_seconds_total", "pool_wait_seconds", "Time spent waiting for a pool connection by route."),
+    ):
+        family(
+            name,
+            "counter",
+            help_text,
+            (
+                (f"{name}{_labels(method=method, route=route, status=status)}", getattr(data, attr))
+                for (method, route, status), data in series
+            ),
+        )
+
+    if pool and pool.get("status") == "ok":
+        for name, key, help_text in (
+            ("tdental_db_pool_in_use", "inUse", "Pool connections checked out."),
+            ("tdental_db_pool_idle", "idle", "Idle pool connections."),
+            ("tdental_db_pool_waiters", "waiters", "Callers waiting for a pool connection."),
+            ("tdental_db_pool_max_size", "maxSize", "Pool capacity."),
+        ):
+            family(name, "gauge", help_text, [(name, pool.get(key, 0))])
+        family(
+            "tdental_db_pool_timeouts_total",
+            "counter",
+            "Pool acquisitions that timed out.",
+            [("tdental_db_pool_timeouts_total", pool.get("timeouts", 0))],
+        )
+
+    if compression:
+        by_encoding = sorted((compression.get("compressed") or {}).items())
+        for name, key, help_text in (
+            ("tdental_compression_bytes_in_total", "bytesIn", "Response bytes before compression."),
+            ("tdental_compression_bytes_out_total", "bytesOut", "Response bytes after compression."),
+        ):
+            family(
+                name,
+                "counter",
+                help_text,
+                ((f"{name}{_labels(encoding=encoding)}", counters[key]) for encoding, counters in by_encoding),
+            )
+        family(
+            "tdental_compression_bytes_saved_total",
+            "counter",
+            "Response bytes saved by compression.",
+            [("tdental_compression_bytes_saved_total", compression.get("bytesSaved", 0))],
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if isinstance(path, str) else UNMATCHED_ROUTE
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(scope)
+        token = current_timing.set(timing)
+        started = perf_counter()
+        status = 500
+        event_stream = False
+        response_bytes = 0
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status, event_stream, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                event_stream = headers.get("content-type", "").startswith("text/event-stream")
+                headers.append("Server-Timing", self._server_timing(timing, perf_counter() - started))
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timing.reset(token)
+            elapsed = perf_counter() - started
+            method = scope.get("method", "")
+            route = _route_label(scope)
+            if not event_stream:
+                # A live event stream's duration is the session length.
+                request_metrics.observe(method, route, status, elapsed, timing)
+            if settings.ACCESS_LOG:
+                self._log(scope, method, route, status, elapsed, timing, response_bytes)
+
+    @staticmethod
+    def _server_timing(timing: RequestTiming, elapsed: float) -> str:
+        return (
+            f'db;dur={_ms(timing.sql_time)};desc="{timing.sql_count} queries", '
+            f"pool;dur={_ms(timing.pool_wait)}, "
+            f"app;dur={_ms(elapsed)}"
+        )
+
+    @staticmethod
+    def _log(scope: Scope, method: str, route: str, status: int, elapsed: float,
+             timing: RequestTiming, response_bytes: int) -> None:
+        entry = {
+            "method": method,
+            "path": scope.get("path"),
+            "route": route,
+            "status": status,
+            "durationMs": _ms(elapsed),
+            "dbMs": _ms(timing.sql_time),
+            "dbQueries": timing.sql_count,
+            "poolWaitMs": _ms(timing.pool_wait),
+            "slowestSqlMs": _ms(timing.slowest_time),
+            "slowestSql": timing.slowest_text(),
+            "bytes": response_bytes,
+            "client": (scope.get("client") or (None,))[0],
+            "userAgent": Headers(scope=scope).get("user-agent"),
+        }
+        access_logger.info(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
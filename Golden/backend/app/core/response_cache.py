@@ -0,0 +1,387 @@
+"""Read-through cache for report and dashboard responses.
+
+Report tabs recompute the same aggregates for the same
+``(companyId, dateFrom, dateTo)`` every time they are opened. Handlers
+decorated with :func:`cached_response` keep their result for a per-endpoint
+TTL (capped by ``REPORT_CACHE_TTL_SECONDS``; ``0`` disables the cache) in
+an LRU bounded by ``REPORT_CACHE_MAX_ENTRIES``::
+
+    @router.get("/services")
+    @cached_response("reports.services", tables=SALE_ORDER_TABLES)
+    @offload_db
+    def report_services(...):
+        ...
+
+Each entry remembers the write generation of the tables it declares. A
+generation is bumped when
+
+* a transaction on this worker commits a write to the table (see
+  ``database.add_write_listener``), or
+* a ``NOTIFY app_report_cache`` arrives with the table name. The statement
+  triggers installed by :func:`install_notify_trigger` send it on commit
+  from any worker or external writer.
+
+Concurrent misses for the same key are coalesced: one caller computes the
+response and the others wait for it (single-flight), so a burst of
+identical requests runs the queries once. Placed above ``offload_db``, the
+cache looks up and waits on the event loop, so waiters hold neither a
+worker thread nor a database-limiter slot. A waiter gives up after
+``REPORT_CACHE_WAIT_SECONDS`` and computes the response itself. Hit, miss
+and coalesced counts per endpoint are exposed on
+``/api/health/report-cache``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from time import monotonic
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+from app.core import pg_listener
+from app.core.config import settings
+from app.core.database import add_write_listener
+from app.core.migrations import optional_ddl
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "app_report_cache"
+NOTIFY_TRIGGER = "app_report_cache_notify"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class _Entry:
+    value: Any
+    generations: tuple[int, ...]
+    expires_at: float
+
+
+class _Abandoned(Exception):
+    """The leader was cancelled; waiters compute the response themselves."""
+
+
+class _Flight:
+    """One in-progress computation that identical requests wait on.
+
+    A ``concurrent.futures.Future`` so both threads and coroutines (on any
+    loop) can wait for it.
+    """
+
+    def __init__(self) -> None:
+        self.future: Future = Future()
+
+
+class ResponseCache:
+    """Thread-safe TTL/LRU of handler results with table-write invalidation."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._flights: dict[tuple, _Flight] = {}
+        self._counters: dict[str, dict[str, int]] = {}
+        self._invalidations = 0
+        self.listening = False
+
+    def get_or_compute(
+        self,
+        name: str,
+        key: str,
+        *,
+        tables: frozenset[str],
+        ttl: float,
+        compute: Callable[[], T],
+    ) -> T:
+        if ttl <= 0:
+            return compute()
+
+        entry_key = (name, key)
+        ordered_tables = tuple(sorted(tables))
+        hit, flight, leader, generations = self._lookup(name, entry_key, ordered_tables)
+        if hit:
+            return flight
+        if not leader:
+            try:
+                return flight.future.result(timeout=settings.REPORT_CACHE_WAIT_SECONDS)
+            except (FutureTimeoutError, _Abandoned):
+                _log_wait_fallback(name)
+                return compute()
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            self._finish(entry_key, flight, ordered_tables, generations, ttl, error=exc)
+            raise
+        self._finish(entry_key, flight, ordered_tables, generations, ttl, value=value)
+        return value
+
+    async def aget_or_compute(
+        self,
+        name: str,
+        key: str,
+        *,
+        tables: frozenset[str],
+        ttl: float,
+        compute: Callable[[], Awaitable[T]],
+    ) -> T:
+        """:meth:`get_or_compute` for a coroutine; waiters wait on the event loop."""
+        if ttl <= 0:
+            return await compute()
+
+        entry_key = (name, key)
+        ordered_tables = tuple(sorted(tables))
+        hit, flight, leader, generations = self._lookup(name, entry_key, ordered_tables)
+        if hit:
+            return flight
+        if not leader:
+            try:
+                # shield: a waiter timing out must not cancel the leader's future.
+                return await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(flight.future)),
+                    settings.REPORT_CACHE_WAIT_SECONDS,
+                )
+            except (asyncio.TimeoutError, _Abandoned):
+                _log_wait_fallback(name)
+                return await compute()
+
+        try:
+            value = await compute()
+        except BaseException as exc:
+            self._finish(entry_key, flight, ordered_tables, generations, ttl, error=exc)
+            raise
+        self._finish(entry_key, flight, ordered_tables, generations, ttl, value=value)
+        return value
+
+    def _lookup(self, name: str, entry_key: tuple, tables: tuple[str, ...]):
+        """``(True, value, ...)`` on a hit, else ``(False, flight, leader, generations)``."""
+        with self._lock:
+            generations = self._snapshot(tables)
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry.generations == generations and monotonic() < entry.expires_at:
+                self._entries.move_to_end(entry_key)
+                self._count(name, "hits")
+                return True, entry.value, False, generations
+            flight = self._flights.get(entry_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[entry_key] = _Flight()
+                self._count(name, "misses")
+            else:
+                self._count(name, "coalesced")
+        return False, flight, leader, generations
+
+    def _finish(
+        self,
+        entry_key: tuple,
+        flight: _Flight,
+        tables: tuple[str, ...],
+        generations: tuple[int, ...],
+        ttl: float,
+        *,
+        value: Any = None,
+        error: BaseException | None = None,
+    ) -> None:
+        with self._lock:
+            self._flights.pop(entry_key, None)
+            # A write committed while computing makes the result stale
+            # already; hand it to the waiters but do not keep it.
+            if error is None and self._snapshot(tables) == generations:
+                self._entries[entry_key] = _Entry(value, generations, monotonic() + ttl)
+                self._entries.move_to_end(entry_key)
+                while len(self._entries) > max(settings.REPORT_CACHE_MAX_ENTRIES, 1):
+                    self._entries.popitem(last=False)
+        if error is None:
+            flight.future.set_result(value)
+        elif isinstance(error, Exception):
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_exception(_Abandoned())
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        """Mark *tables* (unqualified names) as written."""
+        with self._lock:
+            for table in tables:
+                name = _table_key(table)
+                if name:
+                    self._generations[name] = self._generations.get(name, 0) + 1
+                    self._invalidations += 1
+
+    def apply(self, payload: str) -> None:
+        """Apply a NOTIFY payload: a table name, or empty for everything."""
+        if payload:
+            self.invalidate([payload])
+        else:
+            self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            endpoints = {}
+            for name, counters in sorted(self._counters.items()):
+                lookups = counters["hits"] + counters["misses"] + counters["coalesced"]
+                endpoints[name] = {
+                    **counters,
+                    "hitRatio": round((counters["hits"] + counters["coalesced"]) / lookups, 4)
+                    if lookups
+                    else None,
+                }
+            return {
+                "entries": len(self._entries),
+                "inFlight": len(self._flights),
+                "invalidations": self._invalidations,
+                "listening": self.listening,
+                "ttlSeconds": settings.REPORT_CACHE_TTL_SECONDS,
+                "endpoints": endpoints,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._counters.clear()
+            self._invalidations = 0
+
+    def _snapshot(self, tables: tuple[str, ...]) -> tuple[int, ...]:
+        return tuple(self._generations.get(table, 0) for table in tables)
+
+    def _count(self, name: str, field: str) -> None:
+        counters = self._counters.setdefault(name, {"hits": 0, "misses": 0, "coalesced": 0})
+        counters[field] += 1
+
+
+response_cache = ResponseCache()
+add_write_listener(response_cache.invalidate)
+
+
+def cached_response(
+    name: str,
+    *,
+    tables: Iterable[str],
+    ttl: float | None = None,
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Cache a handler's result per argument set.
+
+    Parameters starting with ``_`` (``_user`` from ``require_auth``) are left
+    out of the key, so only use this on handlers whose result does not
+    depend on who asks. *tables* are the bare table names the handler reads;
+    *ttl* shortens ``REPORT_CACHE_TTL_SECONDS`` for this endpoint. Coroutine
+    handlers (``offload_db``-wrapped ones) are cached and coalesced on the
+    event loop.
+    """
+    watched = frozenset(_table_key(table) for table in tables)
+
+    def _ttl() -> float:
+        limit = settings.REPORT_CACHE_TTL_SECONDS
+        return limit if ttl is None else min(ttl, limit)
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                return await response_cache.aget_or_compute(
+                    name,
+                    request_key(args, kwargs),
+                    tables=watched,
+                    ttl=_ttl(),
+                    compute=lambda: func(*args, **kwargs),
+                )
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            return response_cache.get_or_compute(
+                name,
+                request_key(args, kwargs),
+                tables=watched,
+                ttl=_ttl(),
+                compute=lambda: func(*args, **kwargs),
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def request_key(args: tuple, kwargs: dict) -> str:
+    # Handlers default their window to "today", so the day is part of the key.
+    public = {key: value for key, value in kwargs.items() if not key.startswith("_")}
+    return json.dumps(
+        [date.today().isoformat(), list(args), public],
+        sort_keys=True,
+        default=_key_default,
+    )
+
+
+def install_notify_trigger(cur, table) -> bool:
+    """Send ``NOTIFY app_report_cache`` after each statement writing *table*."""
+    return optional_ddl(
+        cur,
+        f"""
+        CREATE OR REPLACE FUNCTION {NOTIFY_TRIGGER}() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('{NOTIFY_CHANNEL}', lower(TG_TABLE_NAME));
+            RETURN NULL;
+        END
+        $$;
+        DROP TRIGGER IF EXISTS {NOTIFY_TRIGGER} ON {table.qualified_name};
+        CREATE TRIGGER {NOTIFY_TRIGGER}
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table.qualified_name}
+            FOR EACH STATEMENT EXECUTE PROCEDURE {NOTIFY_TRIGGER}();
+        """,
+    )
+
+
+def _on_connect() -> None:
+    response_cache.listening = True
+    # Writes may have been announced while we were not listening.
+    response_cache.clear()
+
+
+def _on_disconnect() -> None:
+    response_cache.listening = False
+
+
+def start_report_cache_listener(dsn: str) -> None:
+    """Subscribe this worker to cross-worker report invalidations."""
+    pg_listener.listen(
+        NOTIFY_CHANNEL,
+        response_cache.apply,
+        on_connect=_on_connect,
+        on_disconnect=_on_disconnect,
+    )
+    pg_listener.start_listener(dsn)
+
+
+def _log_wait_fallback(name: str) -> None:
+    logger.warning("Report cache %s: leader did not finish in time; computing without it", name)
+
+
+def _table_key(table) -> str:
+    return str(getattr(table, "table", table)).strip().lower()
+
+
+def _key_default(value):
+    dump = getattr(value, "model_dump", None)
+    if dump is not None:
+        return dump(mode="json")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
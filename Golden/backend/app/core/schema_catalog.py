@@ -0,0 +1,411 @@
+"""Process-wide schema catalog shared by every dynamic SQL builder.
+
+The catalog is read once from ``pg_catalog`` (a single query for every user
+table and column), kept in memory, and optionally persisted to
+``SCHEMA_CATALOG_CACHE_PATH`` so a restart against an unchanged database can
+skip the scan entirely.
+
+Invalidation is precise when possible: at boot the app tries to install a
+``ddl_command_end`` event trigger that issues ``NOTIFY app_schema_catalog``,
+and a background listener marks the catalog stale when it fires. Installing
+an event trigger needs superuser rights, so when that fails the catalog falls
+back to comparing a cheap structural fingerprint every
+``SCHEMA_CATALOG_CHECK_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import monotonic
+from typing import Iterable
+
+import psycopg2
+
+from app.core import pg_listener
+from app.core.config import settings
+from app.core.database import get_conn
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "app_schema_catalog"
+
+_CATALOG_SQL = """
+    SELECT
+        n.nspname,
+        c.relname,
+        a.attname,
+        CASE
+            WHEN t.typcategory = 'A' THEN 'ARRAY'
+            WHEN t.typtype IN ('e', 'c', 'r', 'm') THEN 'USER-DEFINED'
+            ELSE format_type(
+                CASE WHEN t.typtype = 'd' THEN t.typbasetype ELSE a.atttypid END,
+                NULL
+            )
+        END AS data_type,
+        NOT a.attnotnull AS is_nullable,
+        pg_get_expr(d.adbin, d.adrelid) AS column_default
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_catalog.pg_attribute a
+      ON a.attrelid = c.oid
+     AND a.attnum > 0
+     AND NOT a.attisdropped
+    LEFT JOIN pg_catalog.pg_type t ON t.oid = a.atttypid
+    LEFT JOIN pg_catalog.pg_attrdef d
+      ON d.adrelid = a.attrelid
+     AND d.adnum = a.attnum
+    WHERE c.relkind IN ('r', 'p')
+      AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+      AND n.nspname NOT LIKE 'pg_toast%'
+      AND n.nspname NOT LIKE 'pg_temp%'
+    ORDER BY n.nspname, c.relname, a.attnum
+"""
+
+# Changes whenever a user table or column is created, dropped, renamed or
+# altered: row counts and the newest catalog-row xmin both move on DDL.
+_FINGERPRINT_SQL = """
+    SELECT md5(
+        COUNT(DISTINCT c.oid)::text || ':' ||
+        COUNT(a.attnum)::text || ':' ||
+        COALESCE(MAX(c.xmin::text::bigint), 0)::text || ':' ||
+        COALESCE(MAX(a.xmin::text::bigint), 0)::text
+    )
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_catalog.pg_attribute a
+      ON a.attrelid = c.oid
+     AND a.attnum > 0
+     AND NOT a.attisdropped
+    WHERE c.relkind IN ('r', 'p')
+      AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+      AND n.nspname NOT LIKE 'pg_toast%'
+      AND n.nspname NOT LIKE 'pg_temp%'
+"""
+
+_EVENT_TRIGGER_SQL = f"""
+    CREATE OR REPLACE FUNCTION app_schema_catalog_notify() RETURNS event_trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM pg_notify('{NOTIFY_CHANNEL}', tg_tag);
+    END
+    $$;
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_event_trigger WHERE evtname = 'app_schema_catalog_ddl'
+        ) THEN
+            CREATE EVENT TRIGGER app_schema_catalog_ddl ON ddl_command_end
+                EXECUTE PROCEDURE app_schema_catalog_notify();
+        END IF;
+    END
+    $$;
+"""
+
+
+@dataclass()
+class CatalogTable:
+    """Columns and column metadata of one table, in ordinal order."""
+
+    schema: str
+    table: str
+    columns: tuple[str, ...] = ()
+    data_types: dict[str, str] = field(default_factory=dict)
+    nullable: dict[str, bool] = field(default_factory=dict)
+    defaults: dict[str, str | None] = field(default_factory=dict)
+
+
+class SchemaCatalog:
+    """In-memory view of every user table; rebuilt only when the schema changes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.tables: dict[tuple[str, str], CatalogTable] = {}
+        self.fingerprint: str | None = None
+        self.version = 0
+        self.loaded = False
+        self.stale = False
+        self.listening = False
+        self.checked_at = 0.0
+        self.loads = 0
+        self.source = ""
+        self._by_name: dict[str, list[CatalogTable]] = {}
+        self._memo: dict[tuple, object] = {}
+
+    # -- access ---------------------------------------------------------
+
+    def ensure(self, conn) -> "SchemaCatalog":
+        """Load or refresh the catalog through *conn* when it is missing or stale."""
+        if self.loaded and not self.stale and not self._check_due():
+            return self
+        with self._lock:
+            if not self.loaded or self.stale:
+                self.refresh(conn)
+            elif self._check_due():
+                self.checked_at = monotonic()
+                if _fingerprint(conn) != self.fingerprint:
+                    self.refresh(conn)
+        return self
+
+    def lookup(self, name: str) -> list[CatalogTable]:
+        """Every table named *name* (case-insensitive) across schemas."""
+        return self._by_name.get(name.strip().lower(), [])
+
+    def get(self, schema: str, table: str) -> CatalogTable | None:
+        return self.tables.get((schema, table))
+
+    def memo(self, key: tuple, builder):
+        """Cache ``builder()`` for the lifetime of the current catalog version."""
+        version = self.version
+        cached = self._memo.get(key, _MISSING)
+        if cached is _MISSING:
+            cached = builder()
+            if version == self.version:
+                self._memo[key] = cached
+        return cached
+
+    def memo_keys(self) -> list[tuple]:
+        return list(self._memo)
+
+    # -- lifecycle ------------------------------------------------------
+
+    def invalidate(self) -> None:
+        """Mark the catalog stale; the next access reloads it."""
+        self.stale = True
+
+    def refresh(self, conn) -> None:
+        """Reload from ``pg_catalog`` and persist when a cache path is configured."""
+        with self._lock:
+            fingerprint = _fingerprint(conn)
+            with conn.cursor() as cur:
+                cur.execute(_CATALOG_SQL)
+                rows = cur.fetchall()
+            self._install(_tables_from_rows(rows), fingerprint, source="database")
+            _save_snapshot(self)
+
+    def load_snapshot(self, conn) -> bool:
+        """Adopt the on-disk snapshot when it matches the live schema fingerprint."""
+        payload = _read_snapshot()
+        if not payload:
+            return False
+        if payload.get("fingerprint") != _fingerprint(conn):
+            return False
+        tables = {}
+        for item in payload.get("tables", []):
+            table = CatalogTable(
+                schema=item["schema"],
+                table=item["table"],
+                columns=tuple(item["columns"]),
+                data_types=dict(item["dataTypes"]),
+                nullable=dict(item["nullable"]),
+                defaults=dict(item["defaults"]),
+            )
+            tables[(table.schema, table.table)] = table
+        with self._lock:
+            self._install(tables, payload["fingerprint"], source="snapshot")
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "version": self.version,
+            "tables": len(self.tables),
+            "source": self.source,
+            "loads": self.loads,
+            "listening": self.listening,
+            "stale": self.stale,
+        }
+
+    def reset(self) -> None:
+        """Drop all state (used by tests and on shutdown)."""
+        with self._lock:
+            self.tables = {}
+            self._by_name = {}
+            self._memo = {}
+            self.fingerprint = None
+            self.loaded = False
+            self.stale = False
+            self.checked_at = 0.0
+
+    def _install(self, tables: dict[tuple[str, str], CatalogTable], fingerprint: str | None, *, source: str) -> None:
+        by_name: dict[str, list[CatalogTable]] = {}
+        for table in tables.values():
+            by_name.setdefault(table.table.lower(), []).append(table)
+        self.tables = tables
+        self._by_name = by_name
+        self._memo = {}
+        self.fingerprint = fingerprint
+        self.version += 1
+        self.loads += 1
+        self.loaded = True
+        self.stale = False
+        self.checked_at = monotonic()
+        self.source = source
+        logger.info("[SCHEMA] Catalog v%s loaded from %s (%s tables)", self.version, source, len(tables))
+
+    def _check_due(self) -> bool:
+        if self.listening:
+            return False
+        interval = settings.SCHEMA_CATALOG_CHECK_SECONDS
+        return interval > 0 and (monotonic() - self.checked_at) >= interval
+
+
+_MISSING = object()
+catalog = SchemaCatalog()
+
+
+def get_catalog(conn) -> SchemaCatalog:
+    """Return the shared catalog, loading or refreshing it through *conn*."""
+    return catalog.ensure(conn)
+
+
+def invalidate_catalog() -> None:
+    """Force the next catalog access to reload (call after in-app DDL)."""
+    catalog.invalidate()
+
+
+def table_names(names: Iterable[str]) -> tuple[str, ...]:
+    """Lowercase, strip and de-duplicate candidate table names, keeping order."""
+    deduped: list[str] = []
+    seen: set[str] = set()
+    for name in names:
+        key = name.strip().lower()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        deduped.append(key)
+    return tuple(deduped)
+
+
+# ---------------------------------------------------------------------------
+# Boot / invalidation wiring
+# ---------------------------------------------------------------------------
+
+
+def warm_catalog() -> bool:
+    """Load the catalog at boot and try to install the DDL event trigger.
+
+    Returns ``True`` when the event trigger is in place, meaning a
+    LISTEN-based invalidator can be started.
+    """
+    with get_conn() as conn:
+        if not catalog.load_snapshot(conn):
+            catalog.refresh(conn)
+
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(_EVENT_TRIGGER_SQL)
+        return True
+    except psycopg2.Error as exc:
+        logger.info(
+            "[SCHEMA] DDL event trigger unavailable (%s); polling fingerprint every %ss",
+            str(exc).strip().splitlines()[0] if str(exc).strip() else type(exc).__name__,
+            settings.SCHEMA_CATALOG_CHECK_SECONDS,
+        )
+        return False
+
+
+def _on_listener_connect() -> None:
+    catalog.listening = True
+    # Anything may have changed while we were not listening.
+    catalog.invalidate()
+
+
+def _on_listener_disconnect() -> None:
+    catalog.listening = False
+
+
+def start_catalog_listener(dsn: str) -> None:
+    """Start the LISTEN/NOTIFY invalidator (idempotent)."""
+    pg_listener.listen(
+        NOTIFY_CHANNEL,
+        lambda _payload: catalog.invalidate(),
+        on_connect=_on_listener_connect,
+        on_disconnect=_on_listener_disconnect,
+    )
+    pg_listener.start_listener(dsn)
+
+
+def stop_catalog_listener() -> None:
+    pg_listener.unlisten(NOTIFY_CHANNEL)
+
+
+# ---------------------------------------------------------------------------
+# Internals
+# ---------------------------------------------------------------------------
+
+
+def _fingerprint(conn) -> str | None:
+    with conn.cursor() as cur:
+        cur.execute(_FINGERPRINT_SQL)
+        row = cur.fetchone()
+    return str(row[0]) if row and row[0] is not None else None
+
+
+def _tables_from_rows(rows) -> dict[tuple[str, str], CatalogTable]:
+    tables: dict[tuple[str, str], CatalogTable] = {}
+    columns: dict[tuple[str, str], list[str]] = {}
+    for schema_name, table_name, column_name, data_type, is_nullable, column_default in rows:
+        key = (schema_name, table_name)
+        table = tables.get(key)
+        if table is None:
+            table = tables[key] = CatalogTable(schema=schema_name, table=table_name)
+            columns[key] = []
+        if column_name is None:
+            continue
+        lowered = column_name.lower()
+        columns[key].append(lowered)
+        table.data_types[lowered] = str(data_type or "").lower()
+        table.nullable[lowered] = bool(is_nullable)
+        table.defaults[lowered] = column_default
+    for key, names in columns.items():
+        tables[key].columns = tuple(names)
+    return tables
+
+
+def _snapshot_path() -> Path | None:
+    raw = settings.SCHEMA_CATALOG_CACHE_PATH
+    return Path(raw) if raw else None
+
+
+def _read_snapshot() -> dict | None:
+    path = _snapshot_path()
+    if path is None or not path.is_file():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        logger.warning("[SCHEMA] Ignoring unreadable catalog snapshot at %s", path)
+        return None
+
+
+def _save_snapshot(current: SchemaCatalog) -> None:
+    path = _snapshot_path()
+    if path is None or not current.fingerprint:
+        return
+    payload = {
+        "fingerprint": current.fingerprint,
+        "tables": [
+            {
+                "schema": table.schema,
+                "table": table.table,
+                "columns": list(table.columns),
+                "dataTypes": table.data_types,
+                "nullable": table.nullable,
+                "defaults": table.defaults,
+            }
+            for table in current.tables.values()
+        ],
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError:
+        logger.warning("[SCHEMA] Could not persist catalog snapshot to %s", path, exc_info=True)
@@ -0,0 +1,199 @@
+"""In-process cache of validated sessions for :func:`validate_token`.
+
+Without it every authenticated request checks out a pooled connection to
+join ``app_sessions`` and ``app_users``. Validated sessions are kept here
+for ``SESSION_CACHE_TTL_SECONDS`` (never past the session's own expiry), in
+an LRU bounded by ``SESSION_CACHE_MAX_ENTRIES``, keyed by a hash of the
+token so raw tokens are not held in memory or sent over NOTIFY.
+
+Changes that must take effect at once (logout, user deactivation, role
+changes, deletion) call :func:`publish_session_change` inside the writing
+transaction. It drops the entries in this worker and issues
+``NOTIFY app_session_cache`` so every other worker drops them when the
+transaction commits.
+
+A lookup that raced such an invalidation must not re-cache what it read
+before it: every invalidation bumps :meth:`SessionCache.generation`, and
+:meth:`SessionCache.put` skips the entry when the generation read before
+the database lookup has moved on.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from time import monotonic, time
+
+from app.core import pg_listener
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "app_session_cache"
+
+
+@dataclass(frozen=True)
+class _Entry:
+    user: dict
+    fresh_until: float
+    expires_at: float | None
+
+
+class SessionCache:
+    """Thread-safe TTL/LRU map of token hash -> validated session user."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.listening = False
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._generation = 0
+
+    def generation(self) -> int:
+        """Read before a database lookup; pass it back to :meth:`put`."""
+        with self._lock:
+            return self._generation
+
+    def get(self, token: str) -> dict | None:
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                monotonic() >= entry.fresh_until
+                or (entry.expires_at is not None and time() >= entry.expires_at)
+            ):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return dict(entry.user)
+
+    def put(
+        self,
+        token: str,
+        user: dict,
+        expires_at: datetime | None = None,
+        *,
+        generation: int | None = None,
+    ) -> None:
+        ttl = settings.SESSION_CACHE_TTL_SECONDS
+        if ttl <= 0:
+            return
+        entry = _Entry(
+            user=dict(user),
+            fresh_until=monotonic() + ttl,
+            expires_at=expires_at.timestamp() if isinstance(expires_at, datetime) else None,
+        )
+        key = token_key(token)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(settings.SESSION_CACHE_MAX_ENTRIES, 1):
+                self._entries.popitem(last=False)
+
+    def invalidate_token(self, token_hash: str) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(token_hash, None) is not None:
+                self._invalidations += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            self._generation += 1
+            stale = [key for key, entry in self._entries.items() if entry.user.get("id") == user_id]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def apply(self, payload: str) -> None:
+        """Apply a NOTIFY payload: ``token:<hash>``, ``user:<id>`` or ``all``."""
+        kind, _, value = (payload or "").partition(":")
+        if kind == "token" and value:
+            self.invalidate_token(value)
+        elif kind == "user" and value:
+            self.invalidate_user(value)
+        else:
+            self.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hitRatio": round(self._hits / lookups, 4) if lookups else None,
+                "invalidations": self._invalidations,
+                "listening": self.listening,
+                "ttlSeconds": settings.SESSION_CACHE_TTL_SECONDS,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+            self._invalidations = 0
+
+
+session_cache = SessionCache()
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def publish_session_change(cur, *, token: str | None = None, user_id: str | None = None) -> None:
+    """Invalidate cached sessions here and, on commit, in every worker.
+
+    *cur* must belong to the transaction that makes the change so other
+    workers are only told once it is visible.
+    """
+    if token:
+        payload = f"token:{token_key(token)}"
+        session_cache.invalidate_token(token_key(token))
+    elif user_id:
+        payload = f"user:{user_id}"
+        session_cache.invalidate_user(str(user_id))
+    else:
+        payload = "all"
+        session_cache.clear()
+    cur.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, payload))
+
+
+def _on_connect() -> None:
+    session_cache.listening = True
+    # Sessions may have been revoked while we were not listening.
+    session_cache.clear()
+
+
+def _on_disconnect() -> None:
+    session_cache.listening = False
+
+
+def start_session_listener(dsn: str) -> None:
+    """Subscribe this worker to cross-worker session invalidations."""
+    pg_listener.listen(
+        NOTIFY_CHANNEL,
+        session_cache.apply,
+        on_connect=_on_connect,
+        on_disconnect=_on_disconnect,
+    )
+    pg_listener.start_listener(dsn)
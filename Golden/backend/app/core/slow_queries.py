@@ -0,0 +1,408 @@
+"""Slow-query capture with sampled ``EXPLAIN (ANALYZE, BUFFERS)`` plans.
+
+Listings build their SQL at request time (``_build_select_sql``,
+``_stock_move_filters``, ``_append_task_common_filters``...), so one
+endpoint can issue very different statements depending on the schema and
+the filters in use. Every statement slower than ``SLOW_QUERY_MS`` is handed
+to :class:`SlowQueryRecorder` by the guarded cursor (see
+``database.add_slow_statement_listener``) together with its parameters and
+the route template of the request that ran it.
+
+Capturing only enqueues. A background thread drains the queue and:
+
+* normalises the SQL (literals and placeholders become ``?``, ``IN`` lists
+  collapse, whitespace is folded) and fingerprints it;
+* keeps the *shape* of the parameters (``(str, int, list[3])``), never
+  their values;
+* for read-only statements, runs ``EXPLAIN (ANALYZE, BUFFERS, FORMAT
+  JSON)`` with the original parameters, at most once per fingerprint every
+  ``SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS``. The plan runs in a ``READ ONLY``
+  transaction under ``SLOW_QUERY_EXPLAIN_TIMEOUT_MS`` and is rolled back;
+  when it times out or fails the estimated plan (no ``ANALYZE``) is kept
+  instead;
+* upserts one ``app_slow_queries`` row per fingerprint and endpoint with
+  call count, total/max/last duration and the latest plan.
+
+``GET /api/health/slow-queries`` lists the top offenders. The recorder's
+own statements are never captured, and a full queue drops new captures
+rather than blocking the request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from time import monotonic
+from typing import Any
+from uuid import UUID
+
+import psycopg2
+
+from app.core.config import settings
+from app.core.database import add_slow_statement_listener, get_conn, written_table
+from app.core.request_metrics import current_endpoint
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_TABLE = "app_slow_queries"
+BACKGROUND_ENDPOINT = "<background>"
+SORT_COLUMNS = {
+    "total": "total_ms",
+    "max": "max_ms",
+    "avg": "total_ms / calls",
+    "calls": "calls",
+    "recent": "last_seen",
+}
+
+_SLOW_QUERY_DDL = f"""
+CREATE TABLE IF NOT EXISTS {SLOW_QUERY_TABLE} (
+    fingerprint TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    normalized_sql TEXT NOT NULL,
+    params_shape TEXT NOT NULL DEFAULT '',
+    calls BIGINT NOT NULL DEFAULT 0,
+    total_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+    max_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+    last_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+    first_seen TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_seen TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    plan JSONB,
+    plan_analyzed BOOLEAN,
+    plan_captured_at TIMESTAMPTZ,
+    PRIMARY KEY (fingerprint, endpoint)
+);
+"""
+
+_UPSERT_SQL = f"""
+INSERT INTO {SLOW_QUERY_TABLE} AS q (
+    fingerprint, endpoint, normalized_sql, params_shape,
+    calls, total_ms, max_ms, last_ms, plan, plan_analyzed, plan_captured_at
+)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, CASE WHEN %s THEN NOW() END)
+ON CONFLICT (fingerprint, endpoint) DO UPDATE SET
+    params_shape = EXCLUDED.params_shape,
+    calls = q.calls + EXCLUDED.calls,
+    total_ms = q.total_ms + EXCLUDED.total_ms,
+    max_ms = GREATEST(q.max_ms, EXCLUDED.max_ms),
+    last_ms = EXCLUDED.last_ms,
+    last_seen = NOW(),
+    plan = COALESCE(EXCLUDED.plan, q.plan),
+    plan_analyzed = COALESCE(EXCLUDED.plan_analyzed, q.plan_analyzed),
+    plan_captured_at = COALESCE(EXCLUDED.plan_captured_at, q.plan_captured_at)
+"""
+
+# Set in the recorder thread so its own statements are not captured.
+_recording: ContextVar[bool] = ContextVar("slow_query_recording", default=False)
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING_RE = re.compile(r"(?:E|e)?'(?:[^']|'')*'")
+_PLACEHOLDER_RE = re.compile(r"%\([^)]+\)s|%s")
+_NUMBER_RE = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?(?![\w$])")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+_READ_RE = re.compile(r"^\(*\s*(?:SELECT|WITH|VALUES|TABLE)\b", re.IGNORECASE)
+_MODIFYING_RE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE|TRUNCATE)\b|\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE)\b", re.IGNORECASE)
+
+
+def normalize_sql(sql: str) -> str:
+    """Fold *sql* to its shape: no comments, literals or placeholder values."""
+    sql = _COMMENT_RE.sub(" ", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(?, ...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        return f"list[{len(value)}]"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float, Decimal)):
+        return "number"
+    if isinstance(value, datetime):
+        return "timestamp"
+    if isinstance(value, date):
+        return "date"
+    if isinstance(value, UUID):
+        return "uuid"
+    return type(value).__name__
+
+
+def params_shape(params: Any) -> str:
+    """Describe *params* by type only, e.g. ``(uuid, str, list[3])``."""
+    if params is None:
+        return ""
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {_type_name(params[key])}" for key in sorted(params)) + "}"
+    return "(" + ", ".join(_type_name(value) for value in params) + ")"
+
+
+def is_explainable(sql: str, normalized: str) -> bool:
+    """Only plain reads are re-run under ``EXPLAIN ANALYZE``."""
+    return (
+        bool(_READ_RE.match(normalized))
+        and not _MODIFYING_RE.search(normalized)
+        and written_table(sql) is None
+    )
+
+
+def ensure_slow_query_table(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(_SLOW_QUERY_DDL)
+
+
+@dataclass
+class _Capture:
+    sql: str
+    params: Any
+    seconds: float
+    endpoint: str
+
+
+@dataclass
+class _Aggregate:
+    normalized: str
+    shape: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+    sample: _Capture | None = None
+
+
+class SlowQueryRecorder:
+    """Queue slow statements on the request path; explain and store them off it."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[_Capture] = queue.Queue(maxsize=max(settings.SLOW_QUERY_QUEUE_SIZE, 1))
+        self._explained_at: dict[str, float] = {}
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.captured = 0
+        self.dropped = 0
+        self.explained = 0
+        self.explain_failures = 0
+        self.written = 0
+
+    # -- request path -----------------------------------------------------
+
+    def capture(self, sql: str, params: Any, seconds: float) -> None:
+        """Listener for ``database.add_slow_statement_listener``; never blocks."""
+        if _recording.get() or self._thread is None:
+            return
+        try:
+            self._queue.put_nowait(_Capture(sql, params, seconds, current_endpoint() or BACKGROUND_ENDPOINT))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.captured += 1
+
+    # -- background thread --------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="slow-query-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout=5)
+
+    def _run(self) -> None:
+        _recording.set(True)
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.flush(batch)
+            except Exception:
+                logger.exception("[SLOWQ] Failed to record %d slow statements", len(batch))
+
+    def flush(self, captures: list[_Capture]) -> None:
+        """Aggregate *captures*, explain new shapes and upsert them."""
+        aggregates: dict[tuple[str, str], _Aggregate] = {}
+        for item in captures:
+            normalized = normalize_sql(item.sql)
+            key = (fingerprint(normalized), item.endpoint)
+            agg = aggregates.get(key)
+            if agg is None:
+                agg = aggregates[key] = _Aggregate(normalized, params_shape(item.params))
+            elapsed_ms = item.seconds * 1000
+            agg.calls += 1
+            agg.total_ms += elapsed_ms
+            agg.last_ms = elapsed_ms
+            if elapsed_ms >= agg.max_ms:
+                agg.max_ms = elapsed_ms
+                agg.sample = item
+
+        rows = []
+        for (digest, endpoint), agg in aggregates.items():
+            plan, analyzed = self._sample_plan(digest, agg)
+            rows.append((
+                digest, endpoint, agg.normalized, agg.shape,
+                agg.calls, agg.total_ms, agg.max_ms, agg.last_ms,
+                json.dumps(plan) if plan is not None else None,
+                analyzed if plan is not None else None,
+                plan is not None,
+            ))
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(_UPSERT_SQL, rows)
+        with self._lock:
+            self.written += len(rows)
+
+    def _sample_plan(self, digest: str, agg: _Aggregate) -> tuple[Any, bool]:
+        sample = agg.sample
+        if sample is None or not is_explainable(sample.sql, agg.normalized):
+            return None, False
+        now = monotonic()
+        last = self._explained_at.get(digest)
+        if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+            return None, False
+        self._explained_at[digest] = now
+        for analyze in (True, False):
+            try:
+                plan = explain(sample.sql, sample.params, analyze=analyze)
+            except psycopg2.Error as exc:
+                logger.info("[SLOWQ] EXPLAIN%s failed: %s", " ANALYZE" if analyze else "", str(exc).strip())
+                with self._lock:
+                    self.explain_failures += 1
+                continue
+            with self._lock:
+                self.explained += 1
+            return plan, analyze
+        return None, False
+
+    # -- admin --------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "thresholdMs": settings.SLOW_QUERY_MS,
+                "running": self._thread is not None,
+                "queued": self._queue.qsize(),
+                "captured": self.captured,
+                "dropped": self.dropped,
+                "explained": self.explained,
+                "explainFailures": self.explain_failures,
+                "written": self.written,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._explained_at.clear()
+            self.captured = self.dropped = self.explained = self.explain_failures = self.written = 0
+
+
+def explain(sql: str, params: Any, *, analyze: bool = True) -> Any:
+    """Return the JSON plan of *sql*, executed and rolled back when *analyze*."""
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    with get_conn() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET TRANSACTION READ ONLY")
+                cur.execute(
+                    "SELECT set_config('statement_timeout', %s, true)",
+                    (str(max(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS, 1)),),
+                )
+                cur.execute(f"EXPLAIN ({options}) {sql}", params)
+                plan = cur.fetchone()[0]
+        finally:
+            conn.rollback()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def top_slow_queries(limit: int = 20, sort: str = "total", endpoint: str | None = None) -> list[dict]:
+    """The worst recorded statements, heaviest first by *sort*."""
+    order = SORT_COLUMNS.get(sort, SORT_COLUMNS["total"])
+    where, params = "", []
+    if endpoint:
+        where = "WHERE endpoint = %s"
+        params.append(endpoint)
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT fingerprint, endpoint, normalized_sql, params_shape, calls,
+                       total_ms, max_ms, last_ms, total_ms / GREATEST(calls, 1) AS avg_ms,
+                       first_seen, last_seen, plan, plan_analyzed, plan_captured_at
+                FROM {SLOW_QUERY_TABLE}
+                {where}
+                ORDER BY {order} DESC
+                LIMIT %s
+                """,
+                (*params, max(1, min(limit, 200))),
+            )
+            rows = cur.fetchall()
+    return [
+        {
+            "fingerprint": row[0],
+            "endpoint": row[1],
+            "sql": row[2],
+            "paramsShape": row[3],
+            "calls": row[4],
+            "totalMs": round(row[5], 2),
+            "maxMs": round(row[6], 2),
+            "lastMs": round(row[7], 2),
+            "avgMs": round(row[8], 2),
+            "firstSeen": row[9].isoformat() if row[9] else None,
+            "lastSeen": row[10].isoformat() if row[10] else None,
+            "plan": row[11],
+            "planAnalyzed": row[12],
+            "planCapturedAt": row[13].isoformat() if row[13] else None,
+        }
+        for row in rows
+    ]
+
+
+def clear_slow_queries() -> int:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"DELETE FROM {SLOW_QUERY_TABLE}")
+            deleted = cur.rowcount
+    slow_query_recorder.reset()
+    return deleted
+
+
+slow_query_recorder = SlowQueryRecorder()
+add_slow_statement_listener(slow_query_recorder.capture)
+
+
+def start_slow_query_recorder() -> None:
+    if settings.SLOW_QUERY_MS > 0:
+        slow_query_recorder.start()
+
+
+def stop_slow_query_recorder() -> None:
+    slow_query_recorder.stop()
@@ -0,0 +1,273 @@
+"""In-memory manifest of the SPA's static files.
+
+At boot every file under ``static/`` is read once, content-hashed and, when
+it is text, pre-compressed with gzip (and brotli when the ``brotli`` package
+is installed). The HTML entry pages are rendered once with each
+``/static/...`` reference rewritten to ``/static/...?v=<hash>``, so a
+request for ``/`` costs a dict lookup instead of hashing four files and
+running a regex per asset.
+
+Responses pick the smallest encoding the client accepts, carry a strong
+``ETag`` and answer ``If-None-Match`` with 304. A URL whose ``v`` matches the
+current hash never changes, so it is served ``immutable`` for a year; any
+other asset URL must revalidate. HTML keeps the no-store headers so a new
+deploy is picked up on the next navigation.
+
+Outside production a watcher thread polls the directory and rebuilds the
+manifest when a file is added, removed or modified, so editing CSS/JS
+locally still only needs a browser reload.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.compression import negotiate
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone still covers every browser
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+URL_PREFIX = "/static"
+VERSION_LENGTH = 12
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+HTML_HEADERS = {
+    "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+# Preferred first when the client accepts several.
+ENCODINGS = ("br", "gzip")
+
+_ASSET_REF = re.compile(r"""(?P<url>/static/[^"'?#\s)]+)(?:\?v=[^"'#\s)]*)?""")
+
+
+@dataclass(frozen=True)
+class Asset:
+    path: str
+    media_type: str
+    version: str
+    body: bytes
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def is_html(self) -> bool:
+        return self.media_type == "text/html"
+
+    def etag(self, encoding: str | None = None) -> str:
+        return f'"{self.version}-{encoding}"' if encoding else f'"{self.version}"'
+
+
+def _media_type(path: Path) -> str:
+    if path.suffix == ".js":
+        return "application/javascript"
+    return mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+
+def _compress(body: bytes, media_type: str) -> dict[str, bytes]:
+    if media_type not in COMPRESSIBLE_TYPES or len(body) < 256:
+        return {}
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+
+class StaticAssetManifest:
+    """Content-hashed, pre-compressed copies of everything under *root*."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._assets: dict[str, Asset] = {}
+        self._snapshot: dict[str, tuple[int, int]] = {}
+        self._built = False
+        self._builds = 0
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    # -- building ---------------------------------------------------------
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        if not self.root.is_dir():
+            return {}
+        snapshot = {}
+        for path in self.root.rglob("*"):
+            if path.is_file() and not path.name.startswith("."):
+                stat = path.stat()
+                snapshot[path.relative_to(self.root).as_posix()] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def build(self) -> None:
+        """(Re)read every file and render the HTML entry pages."""
+        snapshot = self._scan()
+        assets: dict[str, Asset] = {}
+        html_sources: dict[str, str] = {}
+        for rel in sorted(snapshot):
+            path = self.root / rel
+            media_type = _media_type(path)
+            body = path.read_bytes()
+            if media_type == "text/html":
+                html_sources[rel] = body.decode("utf-8")
+                continue
+            assets[rel] = Asset(
+                path=rel,
+                media_type=media_type,
+                version=hashlib.sha256(body).hexdigest()[:VERSION_LENGTH],
+                body=body,
+                variants=_compress(body, media_type),
+            )
+
+        def versioned(match: re.Match) -> str:
+            url = match.group("url")
+            asset = assets.get(url[len(URL_PREFIX) + 1:])
+            return f"{url}?v={asset.version}" if asset else match.group(0)
+
+        for rel, source in html_sources.items():
+            body = _ASSET_REF.sub(versioned, source).encode("utf-8")
+            assets[rel] = Asset(
+                path=rel,
+                media_type="text/html",
+                version=hashlib.sha256(body).hexdigest()[:VERSION_LENGTH],
+                body=body,
+                variants=_compress(body, "text/html"),
+            )
+
+        with self._lock:
+            self._assets = assets
+            self._snapshot = snapshot
+            self._built = True
+            self._builds += 1
+        logger.info("[STATIC] Manifest built: %d files from %s", len(assets), self.root)
+
+    def changed(self) -> bool:
+        with self._lock:
+            previous = self._snapshot
+        return self._scan() != previous
+
+    def get(self, path: str) -> Asset | None:
+        if not self._built:
+            self.build()
+        with self._lock:
+            return self._assets.get(path)
+
+    def url(self, path: str) -> str:
+        """Versioned URL for *path*, as written into the HTML pages."""
+        asset = self.get(path)
+        base = f"{URL_PREFIX}/{path}"
+        return f"{base}?v={asset.version}" if asset else base
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._assets),
+                "bytes": sum(len(asset.body) for asset in self._assets.values()),
+                "compressedBytes": {
+                    encoding: sum(
+                        len(asset.variants.get(encoding, asset.body))
+                        for asset in self._assets.values()
+                    )
+                    for encoding in ENCODINGS
+                    if encoding != "br" or brotli is not None
+                },
+                "builds": self._builds,
+                "watching": self._watcher is not None,
+            }
+
+    # -- serving ----------------------------------------------------------
+
+    def response(self, request: Request, path: str) -> Response:
+        """Serve *path* with encoding negotiation, ETag and cache headers."""
+        asset = self.get(path)
+        if asset is None:
+            return Response(status_code=404)
+
+        encoding = negotiate(
+            request.headers.get("accept-encoding", ""),
+            tuple(name for name in ENCODINGS if name in asset.variants),
+        )
+        if asset.is_html:
+            headers = dict(HTML_HEADERS)
+        elif request.query_params.get("v") == asset.version:
+            headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        else:
+            headers = {"Cache-Control": REVALIDATE_CACHE_CONTROL}
+        headers["ETag"] = asset.etag(encoding)
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match", "")
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if headers["ETag"] in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            body = asset.variants[encoding]
+        else:
+            body = asset.body
+        return Response(content=body, media_type=asset.media_type, headers=headers)
+
+    # -- dev watcher ------------------------------------------------------
+
+    def start_watcher(self, interval: float) -> None:
+        """Rebuild whenever a file under *root* changes (development only)."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(max(interval, 0.1),), name="static-assets-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            self._stop.set()
+            watcher.join(timeout=5)
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                if self.changed():
+                    self.build()
+            except Exception:
+                logger.exception("[STATIC] Failed to rebuild asset manifest")
+
+
+static_assets = StaticAssetManifest(Path(__file__).resolve().parent.parent.parent / "static")
+
+
+def start_static_assets() -> None:
+    """Build the manifest at boot; watch for edits outside production."""
+    static_assets.build()
+    if settings.STATIC_ASSETS_WATCH:
+        static_assets.start_watcher(settings.STATIC_ASSETS_WATCH_SECONDS)
+
+
+def stop_static_assets() -> None:
+    static_assets.stop_watcher()
@@ -1,42 +1,70 @@
 """TDental Golden -- FastAPI application entry point."""
 
-import hashlib
 import logging
-import re
 from contextlib import asynccontextmanager
-from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, Response
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import RedirectResponse, Response
 
-from app.core.middleware import validate_token
+from app.core.middleware import require_admin, require_metrics_access, validate_token
+from app.core.compression import CompressionMiddleware, compression_stats
 from app.core.config import settings
-from app.core.database import close_pool, init_pool
+from app.core.database import close_pool, init_pool, pool_stats, run_db, serving_request
+from app.core.export_jobs import export_jobs
+from app.core.filter_indexes import FILTER_INDEXES_V1, filter_index_migration, filter_index_usage
+from app.core.migrations import Migration, MigrationError, run_migrations
+from app.core.payment_rollup import ensure_payment_rollups
+from app.core.live_events import live_events, start_live_events_listener
+from app.core.pg_listener import stop_listener
+from app.core.query_cache import compiled_entries
+from app.core.request_metrics import RequestMetricsMiddleware, render_prometheus
+from app.core.response_cache import response_cache, start_report_cache_listener
+from app.core.schema_catalog import (
+    catalog as schema_catalog,
+    start_catalog_listener,
+    warm_catalog,
+)
+from app.core.session_cache import session_cache, start_session_listener
+from app.core.slow_queries import (
+    SORT_COLUMNS,
+    clear_slow_queries,
+    ensure_slow_query_table,
+    slow_query_recorder,
+    start_slow_query_recorder,
+    stop_slow_query_recorder,
+    top_slow_queries,
+)
+from app.core.static_assets import start_static_assets, static_assets, stop_static_assets
 
 from app.api.auth import bootstrap_auth_tables, router as auth_router
+from app.api.batch import router as batch_router
 from app.api.callcenter import router as callcenter_router
-from app.api.appointments import router as appointments_router
-from app.api.categories import router as categories_router
-from app.api.commission import router as commission_router
+from app.api.appointments import (
+    ensure_appointment_branch_index,
+    ensure_appointment_tables,
+    router as appointments_router,
+)
+from app.api.categories import ensure_category_fallback_tables, router as categories_router
+from app.api.commission import ensure_commission_fallback_table, router as commission_router
 from app.api.companies import router as companies_router
-from app.api.customers import router as customers_router
+from app.api.customers import ensure_customer_search_index, router as customers_router
 from app.api.dashboard import router as dashboard_router
 from app.api.employees import router as employees_router
+from app.api.events import router as events_router
 from app.api.exam_sessions import router as exam_sessions_router
 from app.api.exports import router as exports_router
 from app.api.finance import router as finance_router
 from app.api.hr import router as hr_router
 from app.api.inventory import router as inventory_router
-from app.api.notifications import router as notifications_router
+from app.api.notifications import ensure_notification_live_trigger, router as notifications_router
 from app.api.public_site import (
     bootstrap_public_site_tables,
     router as public_site_router,
 )
-from app.api.reports import router as reports_router
-from app.api.settings import router as settings_router
-from app.api.tasks import router as tasks_router
+from app.api.reports import ensure_report_cache_triggers, router as reports_router
+from app.api.settings import ensure_settings_table, router as settings_router
+from app.api.tasks import ensure_task_fallback_tables, router as tasks_router
 from app.api.treatments import router as treatments_router
 
 logging.basicConfig(
@@ -46,6 +74,26 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# App-owned tables, created once at boot instead of on request paths.
+APP_MIGRATIONS = (
+    Migration("0001_app_appointments", ensure_appointment_tables),
+    Migration("0002_app_settings", ensure_settings_table),
+    Migration("0003_app_commissions_fallback", ensure_commission_fallback_table),
+    Migration("0004_app_tasks_fallback", ensure_task_fallback_tables),
+    Migration("0005_app_category_fallbacks", ensure_category_fallback_tables),
+    Migration("0006_app_customer_search", ensure_customer_search_index),
+    Migration("0007_app_payment_rollups", ensure_payment_rollups),
+    Migration("0008_app_report_cache_triggers", ensure_report_cache_triggers),
+    Migration("0009_app_appointments_company_day", ensure_appointment_branch_index),
+    Migration("0010_app_notification_live_trigger", ensure_notification_live_trigger),
+    Migration("0011_app_slow_queries", ensure_slow_query_table),
+    filter_index_migration("0012_app_filter_indexes", FILTER_INDEXES_V1),
+    Migration("0013_app_payment_rollup_write_sync", ensure_payment_rollups),
+    Migration("0014_app_payment_rollup_journal_days", ensure_payment_rollups),
+    Migration("0015_app_customer_search_trigram_only", ensure_customer_search_index),
+)
+
+
 def _cookie_samesite() -> str:
     value = settings.COOKIE_SAMESITE.lower()
     if value not in {"lax", "strict", "none"}:
@@ -60,6 +108,7 @@ def _cookie_samesite() -> str:
 async def lifespan(app: FastAPI):
     """Startup / shutdown lifecycle hook."""
     logger.info("[BOOT] Starting TDental Golden on port %s", settings.APP_PORT)
+    start_static_assets()
     init_pool(settings.DATABASE_URL)
     try:
         bootstrap_auth_tables()
@@ -73,7 +122,32 @@ async def lifespan(app: FastAPI):
         logger.warning("[BOOT] Skipping public-site bootstrap because DB pool is unavailable")
     except Exception:
         logger.exception("[BOOT] Failed to bootstrap public-site tables")
+    try:
+        run_migrations(APP_MIGRATIONS)
+    except MigrationError:
+        logger.exception("[BOOT] Failed to apply app migrations; refusing to start")
+        stop_static_assets()
+        close_pool()
+        raise
+    except RuntimeError:
+        logger.warning("[BOOT] Skipping app migrations because DB pool is unavailable")
+    try:
+        if warm_catalog():
+            start_catalog_listener(settings.DATABASE_URL)
+    except RuntimeError:
+        logger.warning("[BOOT] Skipping schema catalog warm-up because DB pool is unavailable")
+    except Exception:
+        logger.exception("[BOOT] Failed to warm schema catalog")
+    if pool_stats()["status"] == "ok":
+        start_session_listener(settings.DATABASE_URL)
+        start_report_cache_listener(settings.DATABASE_URL)
+        start_live_events_listener(settings.DATABASE_URL)
+        start_slow_query_recorder()
     yield
+    export_jobs.shutdown()
+    stop_slow_query_recorder()
+    stop_static_assets()
+    stop_listener()
     close_pool()
     logger.info("[SHUTDOWN] TDental Golden stopped")
 
@@ -102,6 +176,16 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def mark_serving_request(request: Request, call_next):
+    """Flag request scope so the DB layer can reject request-time DDL."""
+    token = serving_request.set(True)
+    try:
+        return await call_next(request)
+    finally:
+        serving_request.reset(token)
+
+
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
     """Attach baseline browser hardening headers."""
@@ -111,69 +195,27 @@ async def add_security_headers(request: Request, call_next):
     response.headers.setdefault("Referrer-Policy", "same-origin")
     return response
 
-# -- Static files -----------------------------------------------------------
 
-_static_dir = Path(__file__).resolve().parent.parent / "static"
-_login_page = _static_dir / "login.html"
-_app_page = _static_dir / "tdental.html"
+# Added after the function middlewares so it sees the final headers of every response.
+app.add_middleware(CompressionMiddleware)
+# Outside compression so ``app`` timing and logged bytes cover the whole stack.
+app.add_middleware(RequestMetricsMiddleware)
 
+# -- Static files -----------------------------------------------------------
 
-def _file_hash(path: Path, length: int = 8) -> str:
-    """Return short MD5 hex of file contents for cache-busting."""
-    try:
-        return hashlib.md5(path.read_bytes()).hexdigest()[:length]  # noqa: S324
-    except Exception:
-        return "0"
-
-
-def _cache_busted_html(html_path: Path) -> str:
-    """Read HTML and rewrite static asset URLs with a content hash query param."""
-    text = html_path.read_text(encoding="utf-8")
-    assets = [
-        ("/static/css/tdental.css", _static_dir / "css" / "tdental.css"),
-        ("/static/js/app.js", _static_dir / "js" / "app.js"),
-        ("/static/css/login.css", _static_dir / "css" / "login.css"),
-        ("/static/js/login.js", _static_dir / "js" / "login.js"),
-    ]
-    for asset_url, asset_path in assets:
-        version = _file_hash(asset_path)
-        # Replace both bare URL and existing ?v=... URL.
-        pattern = rf"{re.escape(asset_url)}(?:\?v=[^\"]*)?"
-        text = re.sub(pattern, f"{asset_url}?v={version}", text)
-    return text
-
-
-def _html_no_cache_headers() -> dict[str, str]:
-    """Headers to force browser revalidation for HTML entry documents."""
-    return {
-        "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-        "Pragma": "no-cache",
-        "Expires": "0",
-    }
+_app_page = "tdental.html"
+_login_page = "login.html"
 
 
-def _render_html(path: Path) -> HTMLResponse:
-    return HTMLResponse(_cache_busted_html(path), headers=_html_no_cache_headers())
+def _render_html(request: Request, page: str) -> Response:
+    return static_assets.response(request, page)
 
 
-@app.middleware("http")
-async def serve_busted_static_html(request: Request, call_next):
-    """
-    Intercept direct static HTML entrypoints so they also get cache-busted assets.
-    This avoids stale UI when users open /static/tdental.html directly.
-    """
-    if request.method in {"GET", "HEAD"}:
-        if request.url.path == "/static/tdental.html":
-            return _render_html(_app_page)
-        if request.url.path == "/static/login.html":
-            return _render_html(_login_page)
-    return await call_next(request)
-
-
-if _static_dir.is_dir():
-    app.mount("/static", StaticFiles(directory=str(_static_dir)), name="static")
-else:
-    logger.warning("[BOOT] Static directory not found at %s", _static_dir)
+@app.api_route("/static/{asset_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_file(asset_path: str, request: Request):
+    """Serve a file from the in-memory asset manifest."""
+    return static_assets.response(request, asset_path)
+
 
 # -- Routers ----------------------------------------------------------------
 
@@ -197,6 +239,8 @@ app.include_router(notifications_router)
 app.include_router(public_site_router)
 app.include_router(exports_router)
 app.include_router(callcenter_router)
+app.include_router(batch_router)
+app.include_router(events_router)
 
 
 # ---------------------------------------------------------------------------
@@ -209,6 +253,85 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/api/health/pool")
+def pool_health(_user: dict = Depends(require_admin)):
+    """Live connection-pool statistics (in use, idle, waiters, wait histogram)."""
+    return pool_stats()
+
+
+@app.get("/api/health/sessions")
+def session_cache_health(_user: dict = Depends(require_admin)):
+    """Session validation cache counters (hits, misses, invalidations)."""
+    return session_cache.stats()
+
+
+@app.get("/api/health/report-cache")
+def report_cache_health(_user: dict = Depends(require_admin)):
+    """Report response cache counters per endpoint (hits, misses, coalesced)."""
+    return response_cache.stats()
+
+
+@app.get("/api/health/live-events")
+def live_events_health(_user: dict = Depends(require_admin)):
+    """Live event fan-out counters (subscribers, published, overflows)."""
+    return live_events.stats()
+
+
+@app.get("/api/health/compression")
+def compression_health(_user: dict = Depends(require_admin)):
+    """Compressed responses and bytes in/out/saved per encoding."""
+    return compression_stats.stats()
+
+
+@app.get("/api/metrics")
+def metrics(_access: None = Depends(require_metrics_access)):
+    """Prometheus scrape endpoint: route latency, SQL, pool and compression."""
+    return Response(
+        render_prometheus(pool=pool_stats(), compression=compression_stats.stats()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/api/health/slow-queries")
+async def slow_queries_health(
+    limit: int = 20,
+    sort: str = "total",
+    endpoint: str | None = None,
+    _user: dict = Depends(require_admin),
+):
+    """Top recorded slow statements with their sampled plans, plus recorder counters."""
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    return {
+        "recorder": slow_query_recorder.stats(),
+        "items": await run_db(top_slow_queries, limit, sort, endpoint),
+    }
+
+
+@app.delete("/api/health/slow-queries")
+async def clear_slow_queries_health(_user: dict = Depends(require_admin)):
+    """Forget recorded statements, e.g. after adding an index."""
+    return {"deleted": await run_db(clear_slow_queries)}
+
+
+@app.get("/api/health/indexes")
+async def filter_indexes_health(_user: dict = Depends(require_admin)):
+    """Scan counts and size of the filter indexes, unused ones first."""
+    return {"items": await run_db(filter_index_usage)}
+
+
+@app.get("/api/health/static")
+def static_assets_health(_user: dict = Depends(require_admin)):
+    """Static asset manifest size, compressed size per encoding and rebuilds."""
+    return static_assets.stats()
+
+
+@app.get("/api/health/schema")
+def schema_health(_user: dict = Depends(require_admin)):
+    """Schema catalog state and the query contexts compiled for its version."""
+    return {"catalog": schema_catalog.stats(), **compiled_entries()}
+
+
 @app.get("/favicon.ico", include_in_schema=False)
 def favicon():
     """Silence favicon 404 noise when no icon asset is provided."""
@@ -235,7 +358,7 @@ def root(request: Request):
         )
         return response
 
-    return _render_html(_app_page)
+    return _render_html(request, _app_page)
 
 
 @app.get("/login")
@@ -247,7 +370,7 @@ def login_page(request: Request):
             validate_token(token, require_session=True)
             return RedirectResponse(url="/")
         except HTTPException:
-            response = _render_html(_login_page)
+            response = _render_html(request, _login_page)
             response.delete_cookie(
                 key="tdental_session",
                 path="/",
@@ -257,7 +380,7 @@ def login_page(request: Request):
             )
             return response
 
-    return _render_html(_login_page)
+    return _render_html(request, _login_page)
 
 
 @app.get("/app")
@@ -280,7 +403,7 @@ def app_page(request: Request):
         )
         return response
 
-    return _render_html(_app_page)
+    return _render_html(request, _app_page)
 
 
 # ---------------------------------------------------------------------------
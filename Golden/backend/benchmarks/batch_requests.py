@@ -0,0 +1,107 @@
+"""Screen-load time: separate GET calls vs one ``POST /api/batch``.
+
+Replays the GET calls the SPA makes when the dashboard opens against a
+running server. The separate calls run six at a time, like a browser on one
+HTTP/1.1 origin. Reports the time until every response has arrived, which
+is when the screen becomes interactive.
+
+    python -m benchmarks.batch_requests --base-url http://localhost:8899 \\
+        --email admin@tdental.vn --password ... --repeat 30
+
+Pass ``--path`` (repeatable) to replay another screen's calls.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+BROWSER_CONNECTIONS = 6
+
+
+def dashboard_paths(today: str) -> list[str]:
+    return [
+        "/api/auth/session",
+        "/api/companies?limit=0",
+        "/api/notifications/init",
+        f"/api/reports/channel-summary?dateFrom={today}&dateTo={today}",
+        f"/api/appointments/reception?date={today}",
+        f"/api/sale-orders?dateFrom={today}&dateTo={today}&limit=200",
+    ]
+
+
+def _request(base_url: str, path: str, token: str, body: dict | None = None) -> bytes:
+    request = urllib.request.Request(
+        base_url.rstrip("/") + path,
+        data=json.dumps(body).encode("utf-8") if body is not None else None,
+        method="POST" if body is not None else "GET",
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.read()
+
+
+def _login(base_url: str, email: str, password: str) -> str:
+    request = urllib.request.Request(
+        base_url.rstrip("/") + "/api/auth/login",
+        data=json.dumps({"email": email, "password": password}).encode("utf-8"),
+        method="POST",
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())["token"]
+
+
+def _separate(pool: ThreadPoolExecutor, base_url: str, paths: list[str], token: str) -> float:
+    started = time.perf_counter()
+    list(pool.map(lambda path: _request(base_url, path, token), paths))
+    return (time.perf_counter() - started) * 1000
+
+
+def _batched(base_url: str, paths: list[str], token: str) -> float:
+    started = time.perf_counter()
+    _request(base_url, "/api/batch", token, {"requests": [{"path": path} for path in paths]})
+    return (time.perf_counter() - started) * 1000
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{label:<10} n={len(samples):<4} p50={statistics.median(ordered):8.2f} ms  "
+        f"p95={p95:8.2f} ms  max={ordered[-1]:8.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8899")
+    parser.add_argument("--token", help="session token (otherwise log in with --email/--password)")
+    parser.add_argument("--email", default="admin@tdental.vn")
+    parser.add_argument("--password")
+    parser.add_argument("--path", action="append", dest="paths", help="GET path to replay")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    token = args.token or _login(args.base_url, args.email, args.password or "")
+    paths = args.paths or dashboard_paths(date.today().isoformat())
+
+    with ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS) as pool:
+        _separate(pool, args.base_url, paths, token)  # warm caches for both modes
+        _batched(args.base_url, paths, token)
+        separate = [_separate(pool, args.base_url, paths, token) for _ in range(args.repeat)]
+        batched = [_batched(args.base_url, paths, token) for _ in range(args.repeat)]
+
+    print(f"{len(paths)} GET calls per screen load")
+    _report("separate", separate)
+    _report("batched", batched)
+    print(f"p50 reduction: {1 - statistics.median(batched) / statistics.median(separate):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Typeahead latency: per-column ILIKE/fold predicates vs ``app_customer_search``.
+
+Seeds a scratch schema with synthetic Vietnamese customers, builds the folded
+search table the way ``ensure_customer_search_index`` does, and times the
+customer-list search both ways. The scratch schema is dropped afterwards.
+
+    python -m benchmarks.customer_search --rows 120000 --repeat 30
+
+Uses ``DATABASE_URL`` unless ``--dsn`` is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import psycopg2
+
+from app.api.customers import _fold_vietnamese, _sql_fold_expr
+from app.core.config import settings
+
+SCHEMA = "bench_customer_search"
+
+FAMILY = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ"]
+MIDDLE = ["Văn", "Thị", "Hữu", "Đức", "Minh", "Ngọc", "Thanh", "Quốc", "Gia", "Bảo"]
+GIVEN = ["An", "Bình", "Châu", "Dũng", "Giang", "Hà", "Hùng", "Khánh", "Linh", "Lộc",
+         "Mai", "Nam", "Nhung", "Phúc", "Quân", "Sơn", "Thảo", "Trâm", "Tuấn", "Yến"]
+
+# Typical typeahead inputs: accented and unaccented names, phone and ref fragments.
+TERMS = ["nguyen", "Nguyễn Văn", "trâm", "duc minh", "hùng", "0903", "KH00123", "le thi mai"]
+
+
+def _seed(cur, rows: int) -> None:
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    cur.execute(
+        f"""
+        CREATE TABLE {SCHEMA}.partners (
+            id uuid PRIMARY KEY,
+            name text,
+            displayname text,
+            phone text,
+            ref text
+        )
+        """
+    )
+    cur.execute(
+        f"""
+        INSERT INTO {SCHEMA}.partners (id, name, displayname, phone, ref)
+        SELECT
+            md5(g::text)::uuid,
+            full_name,
+            full_name,
+            '09' || lpad((g * 7919 % 100000000)::text, 8, '0'),
+            'KH' || lpad(g::text, 6, '0')
+        FROM (
+            SELECT
+                g,
+                (%(family)s::text[])[1 + g %% array_length(%(family)s::text[], 1)] || ' ' ||
+                (%(middle)s::text[])[1 + (g / 7) %% array_length(%(middle)s::text[], 1)] || ' ' ||
+                (%(given)s::text[])[1 + (g / 13) %% array_length(%(given)s::text[], 1)] AS full_name
+            FROM generate_series(1, %(rows)s) AS g
+        ) AS seed
+        """,
+        {"family": FAMILY, "middle": MIDDLE, "given": GIVEN, "rows": rows},
+    )
+    cur.execute(f"CREATE TABLE {SCHEMA}.app_customer_search (partner_id uuid PRIMARY KEY, search_text text NOT NULL)")
+    cur.execute(
+        f"""
+        INSERT INTO {SCHEMA}.app_customer_search (partner_id, search_text)
+        SELECT p.id, {_sql_fold_expr("concat_ws(' ', p.name, p.displayname, p.phone, p.ref)")}
+        FROM {SCHEMA}.partners p
+        """
+    )
+    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    cur.execute(
+        f"CREATE INDEX ON {SCHEMA}.app_customer_search USING gin (search_text gin_trgm_ops)"
+    )
+    cur.execute(f"ANALYZE {SCHEMA}.partners")
+    cur.execute(f"ANALYZE {SCHEMA}.app_customer_search")
+
+
+def _legacy_query(term: str) -> tuple[str, list]:
+    cleaned = term.strip()
+    folded = _fold_vietnamese(cleaned)
+    clauses, params = [], []
+    for col in ("name", "displayname", "phone", "ref"):
+        clauses.append(f"p.{col}::text ILIKE %s")
+        params.append(f"%{cleaned}%")
+        clauses.append(f"{_sql_fold_expr(f'p.{col}')} LIKE %s")
+        params.append(f"%{folded}%")
+    sql = (
+        f"SELECT p.id, p.name FROM {SCHEMA}.partners p "
+        f"WHERE ({' OR '.join(clauses)}) ORDER BY p.name LIMIT 20"
+    )
+    return sql, params
+
+
+def _indexed_query(term: str) -> tuple[str, list]:
+    sql = (
+        f"SELECT p.id, p.name FROM {SCHEMA}.partners p "
+        f"WHERE p.id IN (SELECT cs.partner_id FROM {SCHEMA}.app_customer_search cs "
+        f"WHERE cs.search_text LIKE %s) ORDER BY p.name LIMIT 20"
+    )
+    return sql, [f"%{_fold_vietnamese(term.strip())}%"]
+
+
+def _time(cur, build, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        for term in TERMS:
+            sql, params = build(term)
+            started = time.perf_counter()
+            cur.execute(sql, params)
+            cur.fetchall()
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{label:<10} n={len(samples):<5} p50={statistics.median(ordered):8.2f} ms  "
+        f"p95={p95:8.2f} ms  max={ordered[-1]:8.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=settings.DATABASE_URL)
+    parser.add_argument("--rows", type=int, default=120_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            print(f"Seeding {args.rows} customers into {SCHEMA} ...")
+            _seed(cur, args.rows)
+            _time(cur, _indexed_query, 1)  # warm caches for both paths
+            _time(cur, _legacy_query, 1)
+            _report("legacy", _time(cur, _legacy_query, args.repeat))
+            _report("indexed", _time(cur, _indexed_query, args.repeat))
+            if not args.keep:
+                cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Index advice from the statements the API really runs, plus an index-usage check.
+
+Runs the app in-process (``TestClient``, so against ``DATABASE_URL``,
+normally seeded by ``benchmarks.seed_data``), calls every route in
+``load_test.ROUTES`` plus the branch/customer/keyset variants in
+:data:`FILTER_ROUTES`, and records each SQL statement with its endpoint
+through the slow-statement hook (threshold lowered to zero for the run).
+``app.core.index_advisor`` turns those statements into composite and
+partial index candidates and compares them with the indexes already in the
+catalog.
+
+    python -m benchmarks.index_advisor --password admin123 --verify
+
+Prints each candidate with the endpoints it serves and the index that
+already covers it, if any, then the uncovered ones as ``FilterIndex`` specs
+for the next ``filter_index_migration`` in ``app.core.filter_indexes``.
+``--verify`` also EXPLAINs every captured read and lists the indexes each
+endpoint's plans use and the tables they still scan sequentially, with the
+``idx_scan`` delta of every index during the run. Everything is saved to
+``benchmarks/results/index-advice-<commit>-<UTC time>.json``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.database import add_slow_statement_listener, get_conn
+from app.core.filter_indexes import filter_index_usage
+from app.core.index_advisor import parse_index_definition, plan_usage, recommend, render_migration
+from app.core.lookup_sql import resolve_table
+from app.core.request_metrics import current_endpoint
+from app.core.slow_queries import explain, is_explainable, normalize_sql, stop_slow_query_recorder
+from app.main import app
+from benchmarks.load_test import RESULTS_DIR, ROUTES, _git_commit
+
+# Filtered shapes the load test leaves out; {company_id} and {partner_id} are picked per run.
+FILTER_ROUTES = {
+    "customers_company": "/api/customers?companyId={company_id}&limit=20",
+    "payments_company": "/api/payments?companyId={company_id}&dateFrom={month_start}&dateTo={today}&limit=200",
+    "payments_partner": "/api/payments?partnerId={partner_id}&limit=50",
+    "payments_keyset": "/api/payments?paging=cursor&limit=50",
+    "sale_orders_company": "/api/sale-orders?companyId={company_id}&dateFrom={month_start}&dateTo={today}&limit=200",
+    "sale_orders_partner": "/api/sale-orders?partnerId={partner_id}&limit=50",
+    "dot_khams_company": "/api/dot-khams?companyId={company_id}&dateFrom={month_start}&dateTo={today}&limit=200",
+    "dot_khams_partner": "/api/dot-khams?partnerId={partner_id}&limit=50",
+    "fund_book": "/api/finance/fund-book?companyId={company_id}&dateFrom={month_start}&dateTo={today}",
+    "fund_book_all": "/api/finance/fund-book?dateFrom={month_start}&dateTo={today}",
+}
+
+EXISTING_INDEXES_SQL = """
+SELECT pg_get_indexdef(x.indexrelid)
+FROM pg_index x
+JOIN pg_class c ON c.oid = x.indrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname NOT IN ('pg_catalog', 'information_schema') AND n.nspname NOT LIKE 'pg_toast%'
+"""
+
+INDEX_SCANS_SQL = "SELECT schemaname, indexrelname, idx_scan FROM pg_stat_user_indexes"
+
+
+def _first_id(conn, *tables: str) -> str:
+    ref = resolve_table(conn, *tables)
+    if ref is None:
+        return ""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT id::text FROM {ref.qualified_name} ORDER BY id LIMIT 1")
+        row = cur.fetchone()
+    return row[0] if row else ""
+
+
+def _index_scans() -> dict[str, int]:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_stat_clear_snapshot()")
+            cur.execute(INDEX_SCANS_SQL)
+            return {f"{schema}.{name}": scans for schema, name, scans in cur.fetchall()}
+
+
+def _verify(captured: dict, before: dict[str, int], after: dict[str, int]) -> dict:
+    """Indexes each endpoint's plans use, ``idx_scan`` deltas, and ``app_ix_`` index usage."""
+    plans: dict[str, dict[str, set[str]]] = defaultdict(lambda: {"indexes": set(), "seqScans": set()})
+    for (endpoint, normalized), (sql, params) in captured.items():
+        if not is_explainable(sql, normalized):
+            continue
+        usage = plan_usage(explain(sql, params, analyze=False))
+        plans[endpoint]["indexes"].update(usage["indexes"])
+        plans[endpoint]["seqScans"].update(usage["seqScans"])
+    return {
+        "plans": {
+            endpoint: {key: sorted(values) for key, values in usage.items()}
+            for endpoint, usage in sorted(plans.items())
+        },
+        "indexScans": {
+            name: scans - before.get(name, 0) for name, scans in sorted(after.items()) if scans - before.get(name, 0)
+        },
+        "filterIndexes": filter_index_usage(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--token", help="session token (otherwise log in with --email/--password)")
+    parser.add_argument("--email", default="admin@tdental.vn")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--company-id", default="", help="branch for the companyId routes (default: first company)")
+    parser.add_argument("--partner-id", default="", help="customer for the partnerId routes (default: first partner)")
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--migration-id", default="0016_app_filter_indexes_v2")
+    parser.add_argument("--constant", default="FILTER_INDEXES_V2")
+    parser.add_argument("--verify", action="store_true", help="EXPLAIN captured reads and diff idx_scan")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    # (endpoint, normalized sql) -> (sql, params); first parameters win.
+    captured: dict[tuple[str, str], tuple[str, object]] = {}
+
+    def collect(sql: str, params, _seconds: float) -> None:
+        endpoint = current_endpoint()
+        if endpoint is not None:
+            captured.setdefault((endpoint, normalize_sql(sql)), (sql, params))
+
+    with TestClient(app) as client:
+        # Every statement reaches the listeners; the recorder must not store them.
+        stop_slow_query_recorder()
+        with get_conn() as conn:
+            fill = {
+                "today": args.today.isoformat(),
+                "month_start": args.today.replace(day=1).isoformat(),
+                "year_start": args.today.replace(month=1, day=1).isoformat(),
+                "company_id": args.company_id or _first_id(conn, "companies", "res_company", "company"),
+                "partner_id": args.partner_id or _first_id(conn, "partners", "res_partners", "respartners"),
+            }
+            with conn.cursor() as cur:
+                cur.execute(EXISTING_INDEXES_SQL)
+                existing = [index for (definition,) in cur.fetchall() if (index := parse_index_definition(definition))]
+
+        token = args.token or client.post(
+            "/api/auth/login", json={"email": args.email, "password": args.password}
+        ).json()["token"]
+        before = _index_scans() if args.verify else {}
+        settings.SLOW_QUERY_MS = 1e-9
+        add_slow_statement_listener(collect)
+        statuses = {}
+        for name, path in {**ROUTES, **FILTER_ROUTES}.items():
+            response = client.get(path.format(**fill), headers={"Authorization": f"Bearer {token}"})
+            statuses[name] = response.status_code
+        settings.SLOW_QUERY_MS = 0
+        if args.verify:
+            time.sleep(1.0)  # let backends flush their statistics
+            after = _index_scans()
+            verify = _verify(captured, before, after)
+
+    candidates = recommend(((endpoint, sql) for (endpoint, _), (sql, _) in captured.items()), existing)
+    print(f"{len(captured)} distinct statements from {len(statuses)} routes, {len(existing)} existing indexes\n")
+    for candidate in candidates:
+        status = f"covered by {candidate.covered_by}" if candidate.covered_by else "MISSING"
+        print(f"{status:<48} {candidate.definition()}")
+        print(f"{'':<48} {', '.join(sorted(candidate.endpoints))}")
+    migration = render_migration(candidates, args.constant, args.migration_id)
+    print("\n" + migration)
+
+    started_at = datetime.now(timezone.utc)
+    result = {
+        "startedAt": started_at.isoformat(timespec="seconds"),
+        "git": _git_commit(),
+        "routes": statuses,
+        "statements": len(captured),
+        "candidates": [
+            {
+                "definition": candidate.definition(),
+                "endpoints": sorted(candidate.endpoints),
+                "statements": candidate.statements,
+                "coveredBy": candidate.covered_by,
+            }
+            for candidate in candidates
+        ],
+        "migration": migration,
+    }
+
+    if args.verify:
+        result.update(verify)
+        print(f"{'endpoint':<44} indexes used / sequential scans")
+        for endpoint, usage in result["plans"].items():
+            print(f"{endpoint:<44} {', '.join(usage['indexes']) or '-'} / {', '.join(usage['seqScans']) or '-'}")
+        unused = [row["index"] for row in result["filterIndexes"] if not row["scans"]]
+        if unused:
+            print(f"\nFilter indexes never scanned since stats reset: {', '.join(unused)}")
+
+    output = args.output or RESULTS_DIR / (
+        f"index-advice-{result['git']['commit']}-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"\nSaved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""List-response cost: RealDictCursor + jsonable_encoder vs projected rows + orjson.
+
+Times what ``list_customers``, ``list_payments`` and ``list_sale_orders``
+do after PostgreSQL has answered: fetch the page, shape the rows, encode
+the envelope. The rows come from ``generate_series`` queries with the same
+column types each listing selects (uuid, numeric, timestamp, text), at the
+listings' usual page sizes.
+
+* before: ``RealDictCursor`` rows, ``dict(row)`` copies (two for customers),
+  FastAPI's ``jsonable_encoder`` and ``json.dumps``.
+* after: ``ProjectedDictCursor`` rows shaped in place and encoded by
+  ``app.core.json_response.dumps``.
+
+    python -m benchmarks.json_responses --repeat 30
+
+Uses ``DATABASE_URL`` unless ``--dsn`` is given. ``--offline`` skips the
+database and times only row shaping and encoding on rows built in Python.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import psycopg2
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from psycopg2.extras import RealDictCursor
+
+from app.api.customers import _build_customer_aliases
+from app.core.config import settings
+from app.core.database import ProjectedDictCursor
+from app.core.json_response import dumps
+
+# name -> (select list over generate_series(1, n) AS g, page size, customer aliases?)
+LISTINGS = {
+    "list_customers": (
+        """
+        md5(g::text)::uuid AS id, 'KH' || lpad(g::text, 6, '0') AS ref,
+        'Nguyễn Văn ' || g AS name, 'Nguyễn Văn ' || g AS displayname,
+        '09' || lpad((g * 7919 % 100000000)::text, 8, '0') AS phone,
+        'kh' || g || '@example.vn' AS email, 'male' AS gender,
+        DATE '1990-01-01' + g AS dateofbirth, g || ' Lê Lợi, Quận 1' AS street,
+        md5('c' || g % 5)::uuid AS companyid, TRUE AS active, 'sale' AS orderstate,
+        (g * 1250.5)::numeric(18, 2) AS totaldebit,
+        (g * 9800)::numeric(18, 2) AS amounttreatmenttotal,
+        (g * 8700)::numeric(18, 2) AS amountrevenuetotal,
+        now() - g * INTERVAL '1 hour' AS datecreated,
+        now() - g * INTERVAL '30 minute' AS lastupdated,
+        now() - g * INTERVAL '1 day' AS lasttreatmentcompletedate,
+        'Chi nhánh ' || g % 5 AS __company_name,
+        CURRENT_DATE - g % 30 AS __last_appt, CURRENT_DATE + g % 30 AS __next_appt,
+        now() - g * INTERVAL '1 day' AS __last_treatment
+        """,
+        200,
+        True,
+    ),
+    "list_payments": (
+        """
+        md5(g::text)::uuid::text AS id, 'CUST.IN/' || g AS name,
+        now() - g * INTERVAL '1 hour' AS date, (g * 150000.25)::numeric(18, 2) AS amount,
+        'inbound' AS "paymentType", 'Tiền mặt' AS "journalName",
+        md5('p' || g)::uuid::text AS "partnerId", 'Trần Thị ' || g AS "partnerName",
+        'Thanh toán đợt ' || g AS communication, 'posted' AS state,
+        md5('c' || g % 5)::uuid::text AS "companyId", 'Chi nhánh ' || g % 5 AS "companyName"
+        """,
+        5000,
+        False,
+    ),
+    "list_sale_orders": (
+        """
+        md5(g::text)::uuid::text AS id, 'SO' || lpad(g::text, 6, '0') AS name,
+        now() - g * INTERVAL '1 hour' AS date, 'sale' AS state,
+        (g * 2350000)::numeric(18, 2) AS "amountTotal",
+        md5('p' || g)::uuid::text AS "partnerId", 'Phạm Văn ' || g AS "partnerName",
+        md5('d' || g % 12)::uuid::text AS "doctorId", 'BS. Lê ' || g % 12 AS "doctorName",
+        md5('c' || g % 5)::uuid::text AS "companyId", 'Chi nhánh ' || g % 5 AS "companyName"
+        """,
+        200,
+        False,
+    ),
+}
+
+
+def _envelope(items: list) -> dict:
+    return {"offset": 0, "limit": len(items), "totalItems": len(items), "items": items}
+
+
+def _before(rows: list, customers: bool) -> bytes:
+    items = [dict(row) for row in rows]
+    if customers:
+        items = [_build_customer_aliases(dict(item)) for item in items]
+    return JSONResponse(jsonable_encoder(_envelope(items))).body
+
+
+def _after(rows: list, customers: bool) -> bytes:
+    if customers:
+        rows = [_build_customer_aliases(row) for row in rows]
+    return dumps(_envelope(rows))
+
+
+def _fetch(conn, cursor_factory, select_sql: str, size: int) -> list:
+    with conn.cursor(cursor_factory=cursor_factory) as cur:
+        cur.execute(f"SELECT {select_sql} FROM generate_series(1, %s) AS g", (size,))
+        return cur.fetchall()
+
+
+def _offline_rows(name: str, size: int) -> list[dict]:
+    now = datetime(2026, 3, 1, 9, 0)
+    rows = []
+    for g in range(1, size + 1):
+        row = {
+            "id": str(uuid.UUID(int=g)),
+            "name": f"Nguyễn Văn {g}",
+            "date": now - timedelta(hours=g),
+            "amount": Decimal(g * 15000025) / 100,
+            "state": "sale",
+            "partnerId": str(uuid.UUID(int=g * 7)),
+            "partnerName": f"Trần Thị {g}",
+            "companyId": str(uuid.UUID(int=g % 5)),
+            "companyName": f"Chi nhánh {g % 5}",
+        }
+        if name == "list_customers":
+            row.update({
+                "id": uuid.UUID(int=g), "companyid": uuid.UUID(int=g % 5),
+                "__company_name": f"Chi nhánh {g % 5}", "__last_appt": now.date(),
+                "__next_appt": now.date(), "__last_treatment": now,
+                "totaldebit": Decimal("1250.50") * g, "active": True,
+            })
+        rows.append(row)
+    return rows
+
+
+def _time(repeat: int, run) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=settings.DATABASE_URL)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--offline", action="store_true", help="skip the database")
+    args = parser.parse_args()
+
+    conn = None if args.offline else psycopg2.connect(args.dsn)
+    try:
+        for name, (select_sql, size, customers) in LISTINGS.items():
+            if conn is None:
+                source = _offline_rows(name, size)
+                before = _time(args.repeat, lambda: _before(source, customers))
+                after = _time(args.repeat, lambda: _after([dict(row) for row in source], customers))
+            else:
+                before = _time(args.repeat, lambda: _before(
+                    _fetch(conn, RealDictCursor, select_sql, size), customers))
+                after = _time(args.repeat, lambda: _after(
+                    _fetch(conn, ProjectedDictCursor, select_sql, size), customers))
+            print(
+                f"{name:<17} rows={size:<5} before p50={before:8.2f} ms  "
+                f"after p50={after:8.2f} ms  speedup={before / after:5.2f}x"
+            )
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
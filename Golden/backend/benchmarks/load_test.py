@@ -0,0 +1,214 @@
+"""Fixed-concurrency load test of the main API routes, saved as JSON.
+
+Drives each route in :data:`ROUTES` against a running server (normally one
+backed by ``benchmarks.seed_data``) with ``--concurrency`` clients until
+``--requests`` calls have completed, after ``--warmup`` unmeasured calls.
+Per route it reports p50/p95/p99/max latency, throughput, errors, and the
+mean SQL time and statement count from each response's ``Server-Timing``
+header.
+
+    python -m benchmarks.load_test --base-url http://localhost:8899 \\
+        --password admin123 --concurrency 16 --requests 400
+
+Results go to ``benchmarks/results/load-<commit>-<UTC time>.json`` (or
+``--output``) with the commit, settings and per-route numbers. Pass
+``--compare`` an earlier result file to print the change per route;
+``--max-regression 20`` also exits non-zero when any route's p95 got more
+than 20% slower or its throughput fell by more than 20%.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from benchmarks.batch_requests import _login
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# name -> GET path; {today}, {month_start} and {year_start} are filled per run.
+ROUTES = {
+    "customers": "/api/customers?limit=20",
+    "customers_search": "/api/customers?search=nguyen&limit=20",
+    "sale_orders": "/api/sale-orders?dateFrom={month_start}&dateTo={today}&limit=200",
+    "payments": "/api/payments?dateFrom={month_start}&dateTo={today}&limit=200",
+    "receipts": "/api/receipts?dateFrom={month_start}&dateTo={today}&limit=200",
+    "dot_khams": "/api/dot-khams?dateFrom={month_start}&dateTo={today}&limit=200",
+    "reports_daily": "/api/reports/daily?dateFrom={month_start}&dateTo={today}",
+    "reports_summary": "/api/reports/summary?dateFrom={year_start}&dateTo={today}",
+    "dashboard_overview": "/api/reports/overview?date={today}",
+    "reception": "/api/appointments/reception?date={today}",
+}
+
+_SERVER_TIMING_DB_RE = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _call(base_url: str, path: str, token: str) -> tuple[float, int, float | None, int | None]:
+    request = urllib.request.Request(
+        base_url.rstrip("/") + path,
+        headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"},
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            status, timing = response.status, response.headers.get("Server-Timing", "")
+    except urllib.error.HTTPError as exc:
+        exc.read()
+        status, timing = exc.code, exc.headers.get("Server-Timing", "")
+    except OSError:
+        status, timing = 0, ""
+    elapsed = (time.perf_counter() - started) * 1000
+    match = _SERVER_TIMING_DB_RE.search(timing)
+    if match is None:
+        return elapsed, status, None, None
+    return elapsed, status, float(match.group(1)), int(match.group(2))
+
+
+def run_route(base_url: str, path: str, token: str, *, concurrency: int, requests: int, warmup: int) -> dict:
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: _call(base_url, path, token), range(warmup)))
+        started = time.perf_counter()
+        results = list(pool.map(lambda _: _call(base_url, path, token), range(requests)))
+        wall = time.perf_counter() - started
+
+    latencies = sorted(result[0] for result in results)
+    statuses: dict[str, int] = {}
+    for _, status, _, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    db_ms = [result[2] for result in results if result[2] is not None]
+    queries = [result[3] for result in results if result[3] is not None]
+    return {
+        "path": path,
+        "requests": len(results),
+        "errors": sum(1 for _, status, _, _ in results if not 200 <= status < 400),
+        "statuses": statuses,
+        "p50Ms": round(_percentile(latencies, 50), 2),
+        "p95Ms": round(_percentile(latencies, 95), 2),
+        "p99Ms": round(_percentile(latencies, 99), 2),
+        "meanMs": round(statistics.fmean(latencies), 2),
+        "maxMs": round(latencies[-1], 2),
+        "throughputRps": round(len(results) / wall, 2) if wall else 0.0,
+        "dbMeanMs": round(statistics.fmean(db_ms), 2) if db_ms else None,
+        "queriesMean": round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+def _git_commit() -> dict:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain"))}
+
+
+def compare(current: dict, baseline: dict, max_regression: float | None) -> bool:
+    """Print per-route changes against *baseline*; ``False`` when over the limit."""
+    print(f"\nvs {baseline['git']['commit']} ({baseline['startedAt']})")
+    ok = True
+    for name, now in current["routes"].items():
+        before = baseline["routes"].get(name)
+        if before is None:
+            print(f"{name:<20} (new route)")
+            continue
+        deltas = {
+            key: (now[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            for key in ("p50Ms", "p95Ms", "p99Ms", "throughputRps")
+        }
+        print(
+            f"{name:<20} p50 {deltas['p50Ms']:+6.1f}%  p95 {deltas['p95Ms']:+6.1f}%  "
+            f"p99 {deltas['p99Ms']:+6.1f}%  throughput {deltas['throughputRps']:+6.1f}%"
+        )
+        if max_regression is not None and (
+            deltas["p95Ms"] > max_regression or -deltas["throughputRps"] > max_regression
+        ):
+            ok = False
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8899")
+    parser.add_argument("--token", help="session token (otherwise log in with --email/--password)")
+    parser.add_argument("--email", default="admin@tdental.vn")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--route", action="append", dest="routes", choices=sorted(ROUTES))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="measured calls per route")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured calls per route")
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--label", default="", help="free-form note stored with the results")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path, help="earlier result file to diff against")
+    parser.add_argument("--max-regression", type=float, help="fail when p95/throughput regress by more than this %%")
+    args = parser.parse_args()
+
+    token = args.token or _login(args.base_url, args.email, args.password)
+    fill = {
+        "today": args.today.isoformat(),
+        "month_start": args.today.replace(day=1).isoformat(),
+        "year_start": args.today.replace(month=1, day=1).isoformat(),
+    }
+    started_at = datetime.now(timezone.utc)
+    result = {
+        "startedAt": started_at.isoformat(timespec="seconds"),
+        "git": _git_commit(),
+        "label": args.label,
+        "baseUrl": args.base_url,
+        "concurrency": args.concurrency,
+        "requestsPerRoute": args.requests,
+        "warmupPerRoute": args.warmup,
+        "routes": {},
+    }
+    print(f"{'route':<20} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8} {'db ms':>8} {'sql':>5} errors")
+    for name in args.routes or ROUTES:
+        stats = run_route(
+            args.base_url,
+            ROUTES[name].format(**fill),
+            token,
+            concurrency=args.concurrency,
+            requests=args.requests,
+            warmup=args.warmup,
+        )
+        result["routes"][name] = stats
+        print(
+            f"{name:<20} {stats['p50Ms']:9.2f} {stats['p95Ms']:9.2f} {stats['p99Ms']:9.2f} "
+            f"{stats['throughputRps']:8.1f} {stats['dbMeanMs'] or 0:8.2f} {stats['queriesMean'] or 0:5.1f} "
+            f"{stats['errors']}"
+        )
+
+    output = args.output or RESULTS_DIR / (
+        f"load-{result['git']['commit']}-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"\nSaved {output}")
+
+    if args.compare and not compare(result, json.loads(args.compare.read_text(encoding="utf-8")), args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -390,6 +390,150 @@
     }
   }
 
+  // Several GET calls in one round trip (POST /api/batch). Resolves to the
+  // bodies in request order. A failed sub-request resolves to its entry in
+  // `fallbacks`, or rejects like api() when no fallback is given.
+  async function apiBatch(paths, fallbacks) {
+    fallbacks = fallbacks || [];
+    var payload = null;
+    try {
+      payload = await api('/api/batch', {
+        method: 'POST',
+        body: JSON.stringify({
+          requests: paths.map(function (path, index) { return { id: String(index), path: path }; }),
+        }),
+      });
+    } catch (_err) {
+      payload = null;
+    }
+
+    if (!payload || !Array.isArray(payload.responses)) {
+      return Promise.all(paths.map(function (path, index) {
+        var request = api(path);
+        return fallbacks[index] === undefined ? request : request.catch(function () { return fallbacks[index]; });
+      }));
+    }
+
+    return payload.responses.map(function (entry, index) {
+      if (entry && entry.status >= 200 && entry.status < 300) return entry.body;
+      if (fallbacks[index] !== undefined) return fallbacks[index];
+      var body = (entry && entry.body) || {};
+      throw new Error(body.detail || body.message || 'Request failed');
+    });
+  }
+
+  // ---------------------------------------------------------------------------
+  // Live events (Server-Sent Events from /api/events/stream)
+  // ---------------------------------------------------------------------------
+  var liveEvents = { source: null, companyId: null };
+
+  function startLiveEvents() {
+    if (typeof window.EventSource !== 'function') return;
+    var companyId = getSelectedBranchId() || '';
+    if (liveEvents.source && liveEvents.companyId === companyId) return;
+    stopLiveEvents();
+    liveEvents.companyId = companyId;
+    // EventSource cannot send headers; the session cookie authenticates it.
+    var source = new EventSource('/api/events/stream' + toQueryString({ companyId: companyId }));
+    source.addEventListener('appointment', function (event) {
+      applyAppointmentEvent(parseLiveEvent(event));
+    });
+    source.addEventListener('notification', function (event) {
+      applyNotificationEvent(parseLiveEvent(event));
+    });
+    source.addEventListener('resync', function () {
+      loadNotificationCount();
+      APP.notifications.loaded = false;
+      if (APP.reception && APP.reception.data && document.getElementById('reception-board')) {
+        loadReceptionBoardData();
+      }
+    });
+    liveEvents.source = source;
+  }
+
+  function stopLiveEvents() {
+    if (liveEvents.source) liveEvents.source.close();
+    liveEvents.source = null;
+    liveEvents.companyId = null;
+  }
+
+  function parseLiveEvent(event) {
+    try {
+      return JSON.parse(event.data) || {};
+    } catch (_e) {
+      return {};
+    }
+  }
+
+  function receptionBucket(state) {
+    if (state === 'in_progress') return 'in_progress';
+    if (state === 'done' || state === 'cancel') return 'done';
+    return 'waiting';
+  }
+
+  // Patch the reception board in place instead of re-fetching the day.
+  function applyAppointmentEvent(change) {
+    var state = APP.reception;
+    var raw = change.item || {};
+    if (!state || !state.data || !raw.id) return;
+    if (change.stale) {
+      loadReceptionBoardData();
+      return;
+    }
+    var item = normalizeAppointmentItem(raw);
+    var groups = state.data.groups;
+    var existed = false;
+    Object.keys(groups).forEach(function (bucket) {
+      var kept = groups[bucket].filter(function (row) { return row.id !== item.id; });
+      if (kept.length !== groups[bucket].length) existed = true;
+      groups[bucket] = kept;
+    });
+    var sameDay = String(raw.appointmentDate || '').slice(0, 10) === state.data.date;
+    if (change.op !== 'delete' && sameDay) {
+      var bucketRows = groups[receptionBucket(item.state)];
+      bucketRows.push(item);
+      bucketRows.sort(sortAppointmentsByStart);
+    } else if (!existed) {
+      return;
+    }
+    state.data.totals = {
+      waiting: groups.waiting.length,
+      in_progress: groups.in_progress.length,
+      done: groups.done.length,
+      all: groups.waiting.length + groups.in_progress.length + groups.done.length,
+    };
+    renderReceptionBoard();
+  }
+
+  function applyNotificationEvent(change) {
+    if (change.op === 'created') {
+      setNotificationCount((APP.notifications.unreadCount || 0) + 1);
+      APP.notifications.loaded = false;
+      if (APP.notifications.open) loadNotificationsInbox(true);
+      return;
+    }
+    if (change.op === 'read') {
+      var known = APP.notifications.items.filter(function (item) {
+        return String(item.id) === String(change.id) && !item.isRead;
+      })[0];
+      if (!known) {
+        if (!APP.notifications.items.length) loadNotificationCount();
+        return;
+      }
+      known.isRead = true;
+      setNotificationCount(Math.max(0, (APP.notifications.unreadCount || 1) - 1));
+      renderNotificationInbox();
+    }
+  }
+
+  function setNotificationCount(count) {
+    APP.notifications.unreadCount = count;
+    var badge = document.getElementById('notif-count');
+    if (!badge) return;
+    badge.textContent = count > 99 ? '99+' : String(count);
+    badge.classList.toggle('visible', count > 0);
+  }
+
   // ---------------------------------------------------------------------------
   // Toast System
   // ---------------------------------------------------------------------------
@@ -1563,9 +1707,12 @@
     // Timer - counts from a reference date (e.g., account creation or start of year)
     initTopbarTimer();
 
-    loadBranches();
     initNotificationPanel();
-    loadNotificationCount();
+    // Branch list and unread count share one round trip on page load.
+    apiBatch(['/api/companies?limit=0', '/api/notifications/init'], [null, null]).then(function (result) {
+      loadBranches(result[0]).then(startLiveEvents);
+      loadNotificationCount(result[1]);
+    });
   }
 
   function initTopbarTimer() {
@@ -1588,7 +1735,7 @@
     setInterval(updateTimer, 60000);
   }
 
-  async function loadBranches() {
+  async function loadBranches(prefetched) {
     var selector = document.getElementById('branch-selector');
     var dropdown = document.getElementById('branch-dropdown');
     if (!selector || !dropdown) return;
@@ -1597,7 +1744,8 @@
     selector.innerHTML = '<option value="">Tất cả chi nhánh</option>';
 
     try {
-      var data = await api('/api/companies?limit=0');
+      var data = prefetched !== undefined ? prefetched : await api('/api/companies?limit=0');
+      if (!data) throw new Error('Branches unavailable');
       var branches = Array.isArray(data) ? data : safeItems(data);
       branches.sort(function (a, b) {
         return String(a.name || a.companyName || '').localeCompare(String(b.name || b.companyName || ''), 'vi');
@@ -1639,6 +1787,7 @@
         syncBranchLabel();
         closeBranchSelector();
         loadNotificationCount();
+        startLiveEvents();
         var route = routes[APP.currentRoute];
         if (route && typeof route.render === 'function') route.render();
       });
@@ -1824,7 +1973,7 @@
     panel.classList.toggle('open', APP.notifications.open);
   }
 
-  async function loadNotificationCount() {
+  async function loadNotificationCount(prefetched) {
     var badge = document.getElementById('notif-count');
     if (!badge) return;
 
@@ -1832,7 +1981,7 @@
     badge.classList.remove('visible');
 
     try {
-      var data = await api('/api/notifications/init');
+      var data = prefetched !== undefined ? prefetched : await api('/api/notifications/init');
       var count = data && typeof data.count === 'number' ? data.count : 0;
       APP.notifications.unreadCount = count;
       if (count > 0) {
@@ -1941,6 +2090,7 @@
   }
 
   async function handleLogout() {
+    stopLiveEvents();
     try {
       await api('/api/auth/logout', { method: 'POST' });
     } catch (_e) {
@@ -2226,28 +2376,23 @@
   async function dashboardFetchData(branchId, branchName) {
     var todayISO = dashboardTodayISO();
 
-    var summaryPromise = dashboardSafeApi('/api/reports/summary', {
-      method: 'POST',
-      body: JSON.stringify({
-        companyId: branchId || null,
+    var result = await apiBatch([
+      '/api/reports/channel-summary' + toQueryString({
+        companyId: branchId || undefined,
         dateFrom: todayISO,
         dateTo: todayISO,
       }),
-    });
-
-    var receptionPromise = dashboardSafeApi('/api/appointments/reception' + toQueryString({
-      date: todayISO,
-      companyId: branchId || undefined,
-    }));
-
-    var servicesPromise = dashboardSafeApi('/api/sale-orders' + toQueryString({
-      dateFrom: todayISO,
-      dateTo: todayISO,
-      companyId: branchId || undefined,
-      limit: 200,
-    }));
-
-    var result = await Promise.all([summaryPromise, receptionPromise, servicesPromise]);
+      '/api/appointments/reception' + toQueryString({
+        date: todayISO,
+        companyId: branchId || undefined,
+      }),
+      '/api/sale-orders' + toQueryString({
+        dateFrom: todayISO,
+        dateTo: todayISO,
+        companyId: branchId || undefined,
+        limit: 200,
+      }),
+    ], [null, null, null]);
     var summary = result[0];
     var reception = result[1];
     var services = result[2];
@@ -3255,23 +3400,19 @@
     APP.customerDetail.activeTab = 'info';
     el.innerHTML = '<div class="cdetail-page"><div class="cdetail-loading">' + renderLoadingState('Đang tải thông tin khách hàng...') + '</div></div>';
     try {
-      var result = await Promise.all([
-        api('/api/customers/' + encodeURIComponent(customerId)),
-        api('/api/customers/' + encodeURIComponent(customerId) + '/appointments?limit=20&offset=0').catch(function () { return { items: [] }; }),
-        api('/api/customers/' + encodeURIComponent(customerId) + '/treatments?limit=20&offset=0').catch(function () { return { items: [] }; }),
-        api('/api/dot-khams' + toQueryString({ partnerId: customerId, companyId: getSelectedBranchId(), limit: 20, offset: 0 })).catch(function () { return { items: [] }; }),
-        api('/api/payments' + toQueryString({ partnerId: customerId, companyId: getSelectedBranchId(), limit: 20, offset: 0 })).catch(function () { return { items: [] }; }),
-      ]);
-      APP.customerDetail.data = result[0] || {};
-      APP.customerDetail.appointments = safeItems(result[1]);
-      APP.customerDetail.treatments = safeItems(result[2]);
-      APP.customerDetail.exams = safeItems(result[3]);
-      APP.customerDetail.payments = safeItems(result[4]);
-      // Also fetch images in parallel (non-blocking)
-      APP.customerDetail.images = [];
-      api('/api/customers/' + encodeURIComponent(customerId) + '/images?limit=100&offset=0').then(function (imgData) {
-        APP.customerDetail.images = safeItems(imgData);
-      }).catch(function () { APP.customerDetail.images = []; });
+      var emptyList = { items: [] };
+      var result = await apiBatch([
+        '/api/customers/' + encodeURIComponent(customerId) + '/profile?sections=detail,appointments,treatments,images:100&limit=20',
+        '/api/dot-khams' + toQueryString({ partnerId: customerId, companyId: getSelectedBranchId(), limit: 20, offset: 0 }),
+        '/api/payments' + toQueryString({ partnerId: customerId, companyId: getSelectedBranchId(), limit: 20, offset: 0 }),
+      ], [undefined, emptyList, emptyList]);
+      var profile = result[0] || {};
+      APP.customerDetail.data = profile.detail || {};
+      APP.customerDetail.appointments = safeItems(profile.appointments);
+      APP.customerDetail.treatments = safeItems(profile.treatments);
+      APP.customerDetail.images = safeItems(profile.images);
+      APP.customerDetail.exams = safeItems(result[1]);
+      APP.customerDetail.payments = safeItems(result[2]);
       APP.customerDetail.loading = false;
       buildCustomerDetailDOM(el);
     } catch (err) {
@@ -5716,24 +5857,68 @@
     return doctors;
   }
 
+  // One /calendar/range call for a week or month grid; returns { 'YYYY-MM-DD': [appointments] }.
+  async function fetchCalendarRange(dateFrom, dateTo, companyId) {
+    var params = { dateFrom: dateFrom, dateTo: dateTo };
+    if (companyId) params.companyId = companyId;
+
+    var payload = null;
+    try {
+      payload = await api('/api/appointments/calendar/range' + toQueryString(params));
+    } catch (_err) {
+      payload = null;
+    }
+
+    var byDay = {};
+    if (!payload || !Array.isArray(payload.rows)) return byDay;
+    var fields = payload.fields || [];
+    var at = {};
+    for (var f = 0; f < fields.length; f++) at[fields[f]] = f;
+    var days = payload.days || [];
+    var doctors = payload.doctors || [];
+
+    for (var i = 0; i < payload.rows.length; i++) {
+      var row = payload.rows[i];
+      var doctor = row[at.doctor] === null || row[at.doctor] === undefined ? null : doctors[row[at.doctor]];
+      var date = days[row[at.day]];
+      var item = normalizeAppointmentItem({
+        id: row[at.id],
+        appointmentDate: date,
+        patientName: row[at.patientName],
+        patientPhone: row[at.patientPhone],
+        doctorName: doctor ? doctor.doctorName : '',
+        startTime: calendarMinuteLabel(row[at.startMinute]),
+        endTime: calendarMinuteLabel(row[at.endMinute]),
+        startMinute: row[at.startMinute],
+        endMinute: row[at.endMinute],
+        state: row[at.state],
+        services: row[at.services],
+        notes: row[at.notes],
+      });
+      item.doctorId = doctor && doctor.doctorId ? String(doctor.doctorId) : '';
+      if (!byDay[date]) byDay[date] = [];
+      byDay[date].push(item);
+    }
+    return byDay;
+  }
+
+  function calendarMinuteLabel(minute) {
+    var value = Number(minute);
+    if (!isFinite(value)) return '';
+    return String(Math.floor(value / 60)).padStart(2, '0') + ':' + String(value % 60).padStart(2, '0');
+  }
+
   async function fetchCalendarWeekData(dateInput, companyId) {
     var weekStart = weekStartInput(dateInput || TODAY_ISO);
-    var dayValues = [];
-    for (var i = 0; i < 7; i++) {
-      dayValues.push(shiftDateInput(weekStart, i));
-    }
+    var byDay = await fetchCalendarRange(weekStart, shiftDateInput(weekStart, 6), companyId);
 
     var dayRows = [];
-    for (var j = 0; j < dayValues.length; j++) {
-      var dayPayload = await fetchCalendarDayData(dayValues[j], companyId);
-      var appointments = [];
-      for (var d = 0; d < dayPayload.doctors.length; d++) {
-        appointments = appointments.concat(dayPayload.doctors[d].appointments || []);
-      }
-      appointments = appointments.concat(dayPayload.unassigned || []);
+    for (var i = 0; i < 7; i++) {
+      var day = shiftDateInput(weekStart, i);
+      var appointments = (byDay[day] || []).slice();
       appointments.sort(sortAppointmentsByStart);
       dayRows.push({
-        date: dayPayload.date || dayValues[j],
+        date: day,
         appointments: appointments,
       });
     }
@@ -5748,28 +5933,9 @@
 
   async function fetchCalendarMonthData(dateInput, companyId) {
     var monthStart = monthStartInput(dateInput || TODAY_ISO);
-    var monthEnd = monthEndInput(dateInput || TODAY_ISO);
-    var payload = null;
-    try {
-      payload = await api('/api/appointments' + toQueryString({
-        dateFrom: monthStart,
-        dateTo: monthEnd,
-        limit: 0,
-        companyId: companyId || '',
-      }));
-    } catch (_err) {
-      payload = null;
-    }
-
-    var items = payload ? normalizeAppointmentList(safeItems(payload)) : [];
-    var map = {};
-    for (var i = 0; i < items.length; i++) {
-      var key = String(items[i].appointmentDate || '').slice(0, 10);
-      if (!map[key]) map[key] = [];
-      map[key].push(items[i]);
-    }
-
     var gridStart = weekStartInput(monthStart);
+    var map = await fetchCalendarRange(gridStart, shiftDateInput(gridStart, 41), companyId);
+
     var cells = [];
     for (var idx = 0; idx < 42; idx++) {
       var iso = shiftDateInput(gridStart, idx);
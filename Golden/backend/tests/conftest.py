@@ -3,6 +3,17 @@
 from pathlib import Path
 import sys
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def _reset_report_cache():
+    from app.core.response_cache import response_cache
+
+    response_cache.reset()
+    yield
+    response_cache.reset()
@@ -0,0 +1,245 @@
+import asyncio
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+import app.api.appointments as appointments_module
+from app.api.appointments import AppointmentColumnMap, AppointmentContext
+from app.core.lookup_sql import TableRef
+
+_COLUMNS = dict(
+    id="id",
+    company_id="company_id",
+    partner_id=None,
+    patient_name="patient_name",
+    patient_phone=None,
+    doctor_id=None,
+    doctor_name=None,
+    appointment_date="appointment_date",
+    start_time="start_time",
+    end_time=None,
+    state="state",
+    services=None,
+    notes=None,
+    active="active",
+    deleted_at=None,
+    created_at=None,
+    updated_at=None,
+)
+
+BOOTSTRAP = AppointmentContext(
+    ref=TableRef("public", "app_appointments"),
+    columns=tuple(name for name in _COLUMNS.values() if name),
+    mapping=AppointmentColumnMap(**_COLUMNS),
+    is_bootstrap=True,
+    column_types=(
+        ("active", "boolean"),
+        ("appointment_date", "date"),
+        ("company_id", "text"),
+        ("id", "uuid"),
+        ("patient_name", "text"),
+        ("start_time", "time without time zone"),
+        ("state", "text"),
+    ),
+)
+LEGACY = AppointmentContext(
+    ref=TableRef("dbo", "appointments"),
+    columns=BOOTSTRAP.columns,
+    mapping=AppointmentColumnMap(**_COLUMNS),
+    is_bootstrap=False,
+    column_types=(
+        ("active", "boolean"),
+        ("appointment_date", "timestamp without time zone"),
+        ("company_id", "uuid"),
+        ("id", "uuid"),
+        ("patient_name", "character varying"),
+        ("state", "integer"),
+    ),
+)
+
+
+class _Cursor:
+    def __init__(self, results):
+        self.results = list(results)
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+    def fetchone(self):
+        return self.results.pop(0)
+
+
+class _Conn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, **kwargs):
+        return self._cursor
+
+
+def test_branch_filters_compare_native_column_types():
+    company = "0f4b5a62-3f7c-4d55-9a39-0c2f6c1f6f10"
+    sql, params = appointments_module._build_select_sql(
+        BOOTSTRAP, company_id=company, date_from=date(2026, 3, 1), date_to=date(2026, 3, 1), states={"done"}
+    )
+    assert '"company_id" = %s' in sql
+    assert '"appointment_date" >= %s AND "appointment_date" <= %s' in sql
+    assert '"state" = ANY(%s)' in sql
+    assert "COALESCE(\"active\", TRUE)" in sql
+    assert "CAST(" not in sql.split("WHERE", 1)[1]
+    assert params == ["public.app_appointments", company, date(2026, 3, 1), date(2026, 3, 1), ["done"]]
+
+    legacy_sql, legacy_params = appointments_module._build_select_sql(
+        LEGACY, company_id=company, date_from=date(2026, 3, 1), date_to=date(2026, 3, 1)
+    )
+    assert '"company_id" = %s::uuid' in legacy_sql
+    assert '"appointment_date" >= %s AND "appointment_date" < %s' in legacy_sql
+    assert legacy_params[-1] == date(2026, 3, 2)
+
+    not_a_uuid, _ = appointments_module._build_select_sql(LEGACY, company_id="branch-1")
+    assert "1 = 0" in not_a_uuid
+
+
+def test_page_and_total_come_from_one_statement_with_per_branch_limits():
+    rows = [
+        {"id": "b", "appointment_date": date(2026, 3, 2), "branch_total": 0, "total_items": 57},
+        {"id": "c", "appointment_date": date(2026, 3, 1), "branch_total": 0, "total_items": 57},
+    ]
+    cursor = _Cursor([rows])
+    parts = [
+        appointments_module._build_select_sql(BOOTSTRAP, company_id="c-1"),
+        appointments_module._build_select_sql(LEGACY),
+    ]
+
+    total, page = appointments_module._run_union_query(_Conn(cursor), parts, offset=20, limit=10)
+
+    assert total == 57
+    assert page == [
+        {"id": "b", "appointment_date": date(2026, 3, 2)},
+        {"id": "c", "appointment_date": date(2026, 3, 1)},
+    ]
+    [(sql, params)] = cursor.executed
+    assert sql.count(" LIMIT 30)") == 2
+    assert sql.count("COUNT(*) OVER ()") == 2
+    assert sql.rstrip().endswith("LIMIT %s OFFSET %s")
+    assert params[-2:] == [10, 20]
+
+
+class _SqliteCursor:
+    """Runs the union SQL for real; the statement sticks to syntax SQLite shares."""
+
+    def __init__(self, db):
+        self._cur = db.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        self._cur.execute(sql.replace("%s", "?"), params)
+
+    def _dict(self, row):
+        return {column[0]: value for column, value in zip(self._cur.description, row)}
+
+    def fetchall(self):
+        return [self._dict(row) for row in self._cur.fetchall()]
+
+    def fetchone(self):
+        return self._dict(self._cur.fetchone())
+
+
+def test_total_counts_every_branch_whatever_the_physical_row_order():
+    db = sqlite3.connect(":memory:")
+    for table, days in (("older_first", (1, 9, 8, 7, 6)), ("newer_first", (5, 4, 3))):
+        db.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, appointment_date TEXT, start_time TEXT)")
+        db.executemany(
+            f"INSERT INTO {table} (appointment_date, start_time) VALUES (?, '09:00')",
+            [(f"2026-03-0{day}",) for day in days],
+        )
+    parts = [
+        (f"SELECT %s AS source_table, id, appointment_date, start_time FROM {table}", [table])
+        for table in ("older_first", "newer_first")
+    ]
+    conn = _Conn(_SqliteCursor(db))
+
+    for offset in (0, 2, 6):
+        total, page = appointments_module._run_union_query(conn, parts, offset=offset, limit=2)
+        assert total == 8
+    assert [row["appointment_date"] for row in page] == ["2026-03-03", "2026-03-01"]
+
+
+def test_page_past_the_end_falls_back_to_a_count():
+    cursor = _Cursor([[], {"total": 12}])
+    parts = [appointments_module._build_select_sql(BOOTSTRAP)]
+
+    assert appointments_module._run_union_query(_Conn(cursor), parts, offset=40, limit=20) == (12, [])
+    assert cursor.executed[1][0].startswith("SELECT COUNT(*) AS total FROM (")
+
+
+def test_calendar_range_returns_compact_doctor_by_day_rows(monkeypatch):
+    day_one, day_two = date(2026, 3, 2), date(2026, 3, 3)
+
+    def row(id_, day, doctor_id, doctor_name, start, end, slot_start, slot_span):
+        return {
+            "id": id_, "appointment_date": day, "doctor_id": doctor_id, "doctor_name": doctor_name,
+            "state": "Confirmed", "patient_name": "An", "patient_phone": None, "services": '["Cạo vôi"]',
+            "notes": None, "start_minute": start, "end_minute": end,
+            "slot_start": slot_start, "slot_span": slot_span,
+        }
+
+    cursor = _Cursor([[
+        row("a1", day_one, "d2", "Bình", 540, 600, 6, 2),
+        row("a2", day_one, "d2", "Bình", 570, 600, 7, 1),
+        row("a3", day_one, None, None, 600, 630, 8, 1),
+        row("a4", day_two, "d1", "An", 480, 510, 4, 1),
+    ]])
+
+    @contextmanager
+    def fake_conn():
+        yield _Conn(cursor)
+
+    monkeypatch.setattr(appointments_module, "get_conn", fake_conn)
+    monkeypatch.setattr(appointments_module, "_resolve_contexts", lambda conn: [BOOTSTRAP, LEGACY])
+
+    payload = asyncio.run(appointments_module.calendar_range(dateFrom=day_one, dateTo=None, companyId=None, company=None))
+
+    [(sql, _params)] = cursor.executed
+    assert "AS start_minute" in sql and "AS slot_span" in sql
+    assert payload["days"][0] == "2026-03-02" and len(payload["days"]) == 7
+    assert [doctor["doctorName"] for doctor in payload["doctors"]] == ["An", "Bình"]
+    assert payload["doctors"][1]["counts"][:2] == [2, 0]
+    assert payload["doctors"][1]["busySlots"][0] == 2
+    assert payload["unassigned"]["counts"][0] == 1
+    fields = payload["fields"]
+    first = dict(zip(fields, payload["rows"][0]))
+    assert first == {
+        "id": "a1", "day": 0, "doctor": 1, "startMinute": 540, "endMinute": 600, "slotStart": 6,
+        "slotSpan": 2, "state": "confirmed", "patientName": "An", "patientPhone": None,
+        "services": ["Cạo vôi"], "notes": None,
+    }
+    assert dict(zip(fields, payload["rows"][2]))["doctor"] is None
+
+
+def test_calendar_range_is_bounded():
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(
+            appointments_module.calendar_range(
+                dateFrom=date(2026, 3, 1), dateTo=date(2026, 5, 1), companyId=None, company=None
+            )
+        )
+    assert exc.value.status_code == 422
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression as compression_module
+from app.core.compression import CompressionMiddleware, compression_stats, negotiate
+
+ROWS = [{"id": i, "name": f"Nguyễn Văn {i}", "companyName": "Chi nhánh Quận 1"} for i in range(400)]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(compression_module.settings, "COMPRESSION_ENCODINGS", "gzip")
+    compression_stats.reset()
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return JSONResponse({"items": ROWS})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/export")
+    def export():
+        def chunks():
+            for start in range(0, len(ROWS), 50):
+                yield "".join(json.dumps(row) + "\n" for row in ROWS[start:start + 50])
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: x\n\n" * 200]), media_type="text/event-stream")
+
+    @app.get("/download")
+    def download():
+        return Response("a,b\n" * 1000, media_type="text/csv", headers={"Accept-Ranges": "bytes"})
+
+    app.add_middleware(CompressionMiddleware)
+    with TestClient(app) as test_client:
+        yield test_client
+    compression_stats.reset()
+
+
+def test_large_bodies_are_compressed_and_counted(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == {"items": ROWS}
+    assert int(response.headers["content-length"]) < len(json.dumps({"items": ROWS}))
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    identity = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+    stats = compression_stats.stats()
+    assert stats["compressed"]["gzip"]["responses"] == 1
+    assert stats["bytesSaved"] > 0
+    assert stats["skipped"] == 1
+
+
+def test_streaming_exports_compress_chunk_by_chunk(client):
+    response = client.get("/export", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert [json.loads(line) for line in response.text.splitlines()] == ROWS
+
+
+def test_event_streams_and_range_downloads_are_left_alone(client):
+    for path in ("/events", "/download"):
+        response = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+
+def test_negotiate_honours_q_values_and_server_order():
+    assert negotiate("gzip, br", ("zstd", "br", "gzip")) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", ("br", "gzip")) == "gzip"
+    assert negotiate("br;q=0, *", ("br", "gzip")) == "gzip"
+    assert negotiate("identity", ("br", "gzip")) is None
@@ -9,6 +9,7 @@ import app.api.auth as auth_module
 import app.core.middleware as middleware_module
 import app.main as main_module
 from app.core.security import hash_password
+from app.core.session_cache import session_cache, token_key
 
 
 class FakeAuthDB:
@@ -25,6 +26,9 @@ class FakeAuthDB:
         self.users_by_email = {admin["email"]: admin}
         self.users_by_id = {admin["id"]: admin}
         self.sessions: dict[str, dict] = {}
+        self.session_lookups = 0
+        self.after_session_lookup = lambda: None
+        self.notifications: list[tuple[str, str]] = []
 
     @contextmanager
     def get_conn(self):
@@ -82,6 +86,8 @@ class FakeCursor:
             return
 
         if "from app_sessions s join app_users u on u.id = s.user_id" in normalized:
+            self.db.session_lookups += 1
+            self.db.after_session_lookup()
             token = str(params[0])
             session = self.db.sessions.get(token)
             if session is None:
@@ -99,7 +105,12 @@ class FakeCursor:
             if not user or not user["active"]:
                 self._one = None
                 return
-            self._one = (user["id"], user["name"], user["email"], user["role"])
+            self._one = (user["id"], user["name"], user["email"], user["role"], expires_at)
+            return
+
+        if normalized.startswith("select pg_notify(%s, %s)"):
+            self.db.notifications.append((str(params[0]), str(params[1])))
+            self._one = ("",)
             return
 
         if normalized.startswith("delete from app_sessions where token = %s"):
@@ -138,11 +149,13 @@ def client(monkeypatch, fake_db):
     monkeypatch.setattr(auth_module, "get_conn", fake_db.get_conn)
     monkeypatch.setattr(middleware_module, "get_conn", fake_db.get_conn)
     middleware_module.reset_login_rate_limit_state()
+    session_cache.reset()
 
     with TestClient(main_module.app) as test_client:
         yield test_client
 
     middleware_module.reset_login_rate_limit_state()
+    session_cache.reset()
 
 
 def test_health_endpoint(client):
@@ -275,3 +288,108 @@ def test_security_headers_and_cors_rejection(client):
     )
     assert preflight.status_code == 400
     assert "access-control-allow-origin" not in preflight.headers
+
+
+def test_session_validation_is_cached_until_logout(client, fake_db):
+    token = client.post(
+        "/api/auth/login",
+        json={"email": "admin@tdental.vn", "password": "admin123"},
+    ).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for _ in range(3):
+        assert client.get("/api/auth/session", headers=headers).status_code == 200
+    assert fake_db.session_lookups == 1
+    stats = session_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert fake_db.notifications == [("app_session_cache", f"token:{token_key(token)}")]
+    assert client.get("/api/auth/session", headers=headers).status_code == 401
+    assert fake_db.session_lookups == 2
+
+
+def test_session_cache_drops_user_on_notify_and_expiry(client, fake_db, monkeypatch):
+    login = client.post(
+        "/api/auth/login",
+        json={"email": "admin@tdental.vn", "password": "admin123"},
+    ).json()
+    headers = {"Authorization": f"Bearer {login['token']}"}
+    assert client.get("/api/auth/session", headers=headers).status_code == 200
+
+    # Another worker deactivated the user and published the change.
+    fake_db.users_by_id[login["user"]["id"]]["active"] = False
+    session_cache.apply(f"user:{login['user']['id']}")
+    assert client.get("/api/auth/session", headers=headers).status_code == 401
+
+    fake_db.users_by_id[login["user"]["id"]]["active"] = True
+    monkeypatch.setattr(main_module.settings, "SESSION_CACHE_TTL_SECONDS", 0)
+    assert client.get("/api/auth/session", headers=headers).status_code == 200
+    assert client.get("/api/auth/session", headers=headers).status_code == 200
+    assert fake_db.session_lookups == 4
+    assert session_cache.stats()["entries"] == 0
+
+
+def test_session_read_racing_an_invalidation_is_not_cached(client, fake_db):
+    login = client.post(
+        "/api/auth/login",
+        json={"email": "admin@tdental.vn", "password": "admin123"},
+    ).json()
+    headers = {"Authorization": f"Bearer {login['token']}"}
+
+    # The role change is published while this request's lookup is in flight.
+    fake_db.after_session_lookup = lambda: session_cache.apply(f"user:{login['user']['id']}")
+    assert client.get("/api/auth/session", headers=headers).status_code == 200
+    fake_db.after_session_lookup = lambda: None
+    assert session_cache.stats()["entries"] == 0
+
+    assert client.get("/api/auth/session", headers=headers).status_code == 200
+    assert client.get("/api/auth/session", headers=headers).status_code == 200
+    assert fake_db.session_lookups == 2
+
+
+def test_batch_validates_session_once_and_keeps_request_order(client, fake_db, monkeypatch):
+    token = client.post(
+        "/api/auth/login",
+        json={"email": "admin@tdental.vn", "password": "admin123"},
+    ).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(main_module.settings, "SESSION_CACHE_TTL_SECONDS", 0)
+
+    response = client.post(
+        "/api/batch",
+        headers=headers,
+        json={
+            "requests": [
+                {"id": "session", "path": "/api/auth/session"},
+                {"id": "sessions", "path": "/api/health/sessions?verbose=1"},
+                {"id": "missing", "path": "/api/does-not-exist"},
+                {"path": "https://example.com/api/health"},
+                {"id": "export", "path": "/api/export/customers"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    items = response.json()["responses"]
+    assert [item["id"] for item in items] == ["session", "sessions", "missing", "3", "export"]
+    assert [item["status"] for item in items] == [200, 200, 404, 400, 400]
+    assert items[0]["body"]["user"]["email"] == "admin@tdental.vn"
+    assert "hits" in items[1]["body"]
+    assert fake_db.session_lookups == 1
+
+
+def test_batch_requires_auth_and_caps_size(client, monkeypatch):
+    assert client.post("/api/batch", json={"requests": [{"path": "/api/health"}]}).status_code == 401
+
+    token = client.post(
+        "/api/auth/login",
+        json={"email": "admin@tdental.vn", "password": "admin123"},
+    ).json()["token"]
+    monkeypatch.setattr(main_module.settings, "BATCH_MAX_REQUESTS", 2)
+    response = client.post(
+        "/api/batch",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"requests": [{"path": "/api/health"}] * 3},
+    )
+    assert response.status_code == 400
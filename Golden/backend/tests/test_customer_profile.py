@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+from contextlib import contextmanager
+from uuid import uuid4
+
+import psycopg2
+
+import app.api.customers as customers_module
+
+CUSTOMER_ID = str(uuid4())
+
+
+class _FakeConn:
+    def __init__(self):
+        self.rolled_back = 0
+
+    def rollback(self):
+        self.rolled_back += 1
+
+
+def _install(monkeypatch, *, missing=False, failing=()):
+    conns = []
+    lock = threading.Lock()
+    # Every connection must be open at once for the loaders to get past this.
+    barrier = threading.Barrier(3, timeout=5)
+
+    @contextmanager
+    def fake_conn():
+        conn = _FakeConn()
+        with lock:
+            conns.append(conn)
+        yield conn
+
+    def fake_snapshot(conn):
+        barrier.wait()
+        return {}
+
+    def detail(conn, snapshot, customer_uuid):
+        if missing:
+            return customers_module._error(404, "CUSTOMER_NOT_FOUND", "missing")
+        return {"id": str(customer_uuid), "name": "An"}
+
+    def page(kind):
+        def loader(conn, snapshot, customer_uuid, *args, **kwargs):
+            offset, limit = args[-2:]
+            if kind in failing:
+                raise psycopg2.Error("boom")
+            return {"offset": offset, "limit": limit, "totalItems": 1, "items": [{"kind": kind}]}
+
+        return loader
+
+    monkeypatch.setattr(customers_module.settings, "CUSTOMER_PROFILE_MAX_CONNECTIONS", 3)
+    monkeypatch.setattr(customers_module, "get_conn", fake_conn)
+    monkeypatch.setattr(customers_module, "_load_schema_snapshot", fake_snapshot)
+    monkeypatch.setattr(customers_module, "_load_customer_detail", detail)
+    monkeypatch.setattr(customers_module, "_load_customer_appointments", page("appointments"))
+    monkeypatch.setattr(customers_module, "_load_customer_treatments", page("treatments"))
+    monkeypatch.setattr(customers_module, "_load_customer_sub_resource", page("sub"))
+    return conns
+
+
+def _profile(**kwargs):
+    params = {"sections": None, "limit": None, **kwargs}
+    return asyncio.run(customers_module.get_customer_profile(CUSTOMER_ID, _user={"id": "u-1"}, **params))
+
+
+def test_profile_loads_sections_concurrently_on_separate_connections(monkeypatch):
+    conns = _install(monkeypatch, failing=("treatments",))
+
+    payload = _profile()
+
+    assert len(conns) == 3
+    assert payload["customerId"] == CUSTOMER_ID
+    assert payload["detail"]["name"] == "An"
+    assert payload["appointments"]["limit"] == 20
+    assert payload["teethStatus"]["limit"] == 50
+    assert set(customers_module.PROFILE_SECTIONS) <= set(payload)
+    assert payload["treatments"] is None
+    assert payload["errors"] == {"treatments": {"detail": "boom", "error": "TREATMENT_QUERY_FAILED"}}
+    assert sum(conn.rolled_back for conn in conns) == 1
+
+
+def test_profile_section_selection_and_limits(monkeypatch):
+    _install(monkeypatch)
+
+    payload = _profile(sections="images:100, appointments,detail", limit=10)
+
+    assert [key for key in payload if key not in {"customerId", "errors"}] == ["detail", "appointments", "images"]
+    assert payload["appointments"]["limit"] == 10
+    assert payload["images"]["limit"] == 100
+
+    invalid = _profile(sections="detail,payments")
+    assert invalid.status_code == 422
+    assert json.loads(invalid.body)["error"] == "INVALID_PROFILE_SECTIONS"
+
+
+def test_profile_of_unknown_customer_is_404(monkeypatch):
+    _install(monkeypatch, missing=True)
+
+    response = _profile()
+
+    assert response.status_code == 404
+    assert json.loads(response.body)["error"] == "CUSTOMER_NOT_FOUND"
+
+
+class _FakeCursor:
+    def __init__(self, results):
+        self.results = list(results)
+        self.queries = []
+
+    def execute(self, sql, params):
+        self.queries.append((sql, params))
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+    def fetchone(self):
+        return self.results.pop(0)
+
+
+def test_page_and_total_come_from_one_query():
+    cur = _FakeCursor([[{"id": 1, "__total_items": 7}, {"id": 2, "__total_items": 7}]])
+    total, rows = customers_module._fetch_counted_page(
+        cur, "SELECT t.*", "FROM t WHERE t.p = %s", "ORDER BY t.id", ["x"], 0, 2
+    )
+    assert (total, rows) == (7, [{"id": 1}, {"id": 2}])
+    assert len(cur.queries) == 1
+    assert "COUNT(*) OVER ()" in cur.queries[0][0]
+
+    past_end = _FakeCursor([[], {"total": 7}])
+    assert customers_module._fetch_counted_page(
+        past_end, "SELECT t.*", "FROM t WHERE t.p = %s", "ORDER BY t.id", ["x"], 40, 20
+    ) == (7, [])
+    assert past_end.queries[1] == ("SELECT COUNT(*) AS total FROM t WHERE t.p = %s", ("x",))
@@ -1,11 +1,18 @@
+import ast
+import asyncio
+import inspect
+import time
 from concurrent.futures import ThreadPoolExecutor
-from threading import Lock
+from pathlib import Path
+from threading import Event, Lock, Thread, Timer
 
 import psycopg2
 import pytest
 
 import app.core.database as database
 
+API_DIR = Path(database.__file__).resolve().parents[1] / "api"
+
 
 class DummyConn:
     def __init__(self):
@@ -20,14 +27,16 @@ class DummyConn:
 
 
 class FakePool:
-    def __init__(self, minconn: int, maxconn: int, dsn: str):
+    def __init__(self, minconn: int, maxconn: int, dsn: str, **kwargs):
         self.minconn = minconn
         self.maxconn = maxconn
         self.dsn = dsn
+        self.connect_kwargs = kwargs
         self.in_use = 0
         self.max_in_use = 0
         self.get_calls = 0
         self.put_calls = 0
+        self.closed_conns = 0
         self.closed = False
         self._lock = Lock()
 
@@ -38,10 +47,11 @@ class FakePool:
             self.max_in_use = max(self.max_in_use, self.in_use)
         return DummyConn()
 
-    def putconn(self, conn):
+    def putconn(self, conn, close=False):
         del conn
         with self._lock:
             self.put_calls += 1
+            self.closed_conns += int(close)
             self.in_use -= 1
 
     def closeall(self):
@@ -71,6 +81,7 @@ def test_init_pool_good_database_url_and_get_conn(monkeypatch):
     assert isinstance(database._pool, FakePool)
     assert database._pool.minconn == 2
     assert database._pool.maxconn == 10
+    assert database._pool.connect_kwargs["connection_factory"] is database.GuardedConnection
 
     with database.get_conn() as _conn:
         pass
@@ -96,3 +107,197 @@ def test_get_conn_concurrent_usage_has_no_leak(monkeypatch):
     assert database._pool.put_calls == 10
     assert database._pool.in_use == 0
     assert database._pool.max_in_use <= 10
+
+
+def test_offload_db_overlaps_blocking_handlers():
+    @database.offload_db
+    def slow_handler(delay: float) -> float:
+        time.sleep(delay)
+        return delay
+
+    async def _run_concurrently():
+        started = time.perf_counter()
+        results = await asyncio.gather(*(slow_handler(0.2) for _ in range(5)))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(_run_concurrently())
+
+    assert results == [0.2] * 5
+    # Serialised on the event loop this would take ~1s.
+    assert elapsed < 0.6
+    assert inspect.iscoroutinefunction(slow_handler)
+    assert list(inspect.signature(slow_handler).parameters) == ["delay"]
+
+
+def _direct_calls(node: ast.AST):
+    """Calls in *node*'s body, not descending into nested sync helpers (handed to run_db)."""
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, (ast.FunctionDef, ast.Lambda)):
+            continue
+        if isinstance(child, ast.Call):
+            yield child
+        yield from _direct_calls(child)
+
+
+def test_async_route_handlers_do_not_call_get_conn_on_the_loop():
+    blocking = [
+        f"{path.name}:{node.name}"
+        for path in sorted(API_DIR.glob("*.py"))
+        for node in ast.parse(path.read_text(encoding="utf-8")).body
+        if isinstance(node, ast.AsyncFunctionDef)
+        and any(getattr(call.func, "id", None) == "get_conn" for call in _direct_calls(node))
+    ]
+    assert blocking == []
+
+
+def test_get_conn_waits_for_a_free_connection(monkeypatch):
+    monkeypatch.setattr(database.pg_pool, "ThreadedConnectionPool", FakePool)
+    database.init_pool("postgresql://good-url", minconn=1, maxconn=1, timeout=2)
+    release = Event()
+
+    def _holder():
+        with database.get_conn():
+            release.wait(1)
+
+    holder = Thread(target=_holder)
+    holder.start()
+    while database.pool_stats()["inUse"] == 0:
+        time.sleep(0.005)
+    Timer(0.1, release.set).start()
+
+    with database.get_conn():
+        stats = database.pool_stats()
+    holder.join()
+
+    assert stats["inUse"] == 1
+    assert database._pool.max_in_use == 1
+    assert database.pool_stats()["acquired"] == 2
+    assert database.pool_stats()["waitSecondsMax"] >= 0.05
+
+
+def test_get_conn_times_out_when_pool_exhausted(monkeypatch):
+    monkeypatch.setattr(database.pg_pool, "ThreadedConnectionPool", FakePool)
+    database.init_pool("postgresql://good-url", minconn=1, maxconn=1, timeout=0.05)
+
+    with database.get_conn():
+        with pytest.raises(database.PoolTimeoutError):
+            with database.get_conn():
+                pass
+
+    stats = database.pool_stats()
+    assert stats["timeouts"] == 1
+    assert stats["inUse"] == 0
+    assert stats["waiters"] == 0
+
+
+def test_get_conn_closes_broken_connection(monkeypatch):
+    monkeypatch.setattr(database.pg_pool, "ThreadedConnectionPool", FakePool)
+    database.init_pool("postgresql://good-url")
+
+    with pytest.raises(psycopg2.OperationalError):
+        with database.get_conn() as conn:
+            conn.closed = 2
+            raise psycopg2.OperationalError("server closed the connection")
+
+    assert database._pool.closed_conns == 1
+    assert database.pool_stats()["recycled"] == 1
+    assert database.pool_stats()["inUse"] == 0
+
+
+def test_request_ddl_guard_only_fires_inside_requests(monkeypatch):
+    monkeypatch.setattr(database.settings, "DDL_GUARD_MODE", "raise")
+    ddl = "\n  -- ensure table\n  CREATE TABLE IF NOT EXISTS app_x (id int)"
+
+    database.check_request_ddl(ddl)
+
+    token = database.serving_request.set(True)
+    try:
+        database.check_request_ddl("SELECT * FROM created_tables")
+        database.check_request_ddl("UPDATE app_x SET id = 1")
+        with pytest.raises(database.RequestDDLError):
+            database.check_request_ddl(ddl)
+        monkeypatch.setattr(database.settings, "DDL_GUARD_MODE", "log")
+        database.check_request_ddl("ALTER TABLE app_x ADD COLUMN y int")
+    finally:
+        database.serving_request.reset(token)
+
+
+def test_guarded_cursor_class_checks_before_executing(monkeypatch):
+    executed = []
+
+    class BaseCursor:
+        def execute(self, query, vars=None):
+            executed.append(query)
+
+    monkeypatch.setattr(database.settings, "DDL_GUARD_MODE", "raise")
+    cursor = database._guarded_cursor_class(BaseCursor)()
+    token = database.serving_request.set(True)
+    try:
+        cursor.execute("SELECT 1")
+        with pytest.raises(database.RequestDDLError):
+            cursor.execute("DROP TABLE app_x")
+    finally:
+        database.serving_request.reset(token)
+
+    assert executed == ["SELECT 1"]
+    assert database._guarded_cursor_class(BaseCursor) is type(cursor)
+
+
+def test_guarded_cursor_records_written_tables():
+    class FakeConnection:
+        pending_writes: set
+
+        def __init__(self):
+            self.pending_writes = set()
+
+    class BaseCursor:
+        def __init__(self, connection):
+            self.connection = connection
+
+        def execute(self, query, vars=None):
+            return None
+
+    conn = FakeConnection()
+    cursor = database._guarded_cursor_class(BaseCursor)(conn)
+    cursor.execute('UPDATE "dbo"."Partners" SET name = %s', ("x",))
+    cursor.execute("/* audit */ INSERT INTO app_settings (key) VALUES (%s)", ("k",))
+    cursor.execute("SELECT * FROM saleorders")
+
+    assert conn.pending_writes == {"partners", "app_settings"}
+    assert database.written_table("DELETE FROM ONLY public.customer_receipts WHERE id = 1") == (
+        "customer_receipts"
+    )
+    assert database.written_table("WITH x AS (SELECT 1) SELECT * FROM x") is None
+
+
+def test_notify_table_writes_calls_listeners(monkeypatch):
+    seen = []
+    monkeypatch.setattr(database, "_write_listeners", [])
+    database.add_write_listener(seen.append)
+    database.add_write_listener(seen.append)
+
+    database.notify_table_writes(["Partners", ""])
+    database.notify_table_writes([])
+
+    assert seen == [frozenset({"partners"})]
+
+
+def test_get_conn_on_the_event_loop_does_not_wait_for_a_slot(monkeypatch):
+    monkeypatch.setattr(database.pg_pool, "ThreadedConnectionPool", FakePool)
+    database.init_pool("postgresql://good-url", minconn=1, maxconn=1, timeout=5)
+
+    async def _direct():
+        started = time.monotonic()
+        with pytest.raises(database.PoolTimeoutError):
+            with database.get_conn():
+                pass
+        return time.monotonic() - started
+
+    with database.get_conn():
+        elapsed = asyncio.run(_direct())
+
+    assert elapsed < 1
+    stats = database.pool_stats()
+    assert stats["rejected"] == 1
+    assert stats["timeouts"] == 0
+    assert stats["waiters"] == 0
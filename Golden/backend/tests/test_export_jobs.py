@@ -0,0 +1,119 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import app.api.exports as exports_module
+import app.core.export_jobs as export_jobs_module
+from app.core.export_jobs import ExportJob, ExportJobManager, source_tables
+from app.core.pagination import PageQuery
+
+QUERY = PageQuery(
+    'SELECT p.id, p.name FROM "dbo"."partners" p LEFT JOIN dbo.companies c ON c.id = p.companyid ORDER BY p.id',
+    ("cmp-1",),
+)
+
+
+@contextmanager
+def _conn_ctx():
+    yield object()
+
+
+def _wait(manager, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job is not None and job.status in {"done", "failed"}:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("export job did not finish")
+
+
+def _collect(response) -> bytes:
+    async def _read():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(_read())
+
+
+def test_identical_submissions_reuse_the_file_until_tables_change(monkeypatch, tmp_path):
+    stamps = [((0, 0), 10)]
+    runs = []
+    monkeypatch.setattr(export_jobs_module.settings, "EXPORT_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(export_jobs_module.count_cache, "stamp", lambda _conn, tables: stamps[-1])
+    monkeypatch.setattr(export_jobs_module, "get_conn", _conn_ctx)
+    monkeypatch.setattr(export_jobs_module, "count_rows", lambda *args, **kwargs: (2, True))
+
+    def fake_rows(source):
+        runs.append(source)
+        yield {"id": 1, "name": "An"}
+        yield {"id": 2, "name": "Bình"}
+
+    monkeypatch.setattr(export_jobs_module, "iter_rows", fake_rows)
+    manager = ExportJobManager()
+    submit = dict(resource="customers", fmt="csv", columns=[], source=QUERY, filename="customers.csv")
+
+    job, reused = manager.submit(object(), **submit)
+    assert not reused
+    done = _wait(manager, job.id)
+    assert done.status == "done"
+    assert done.to_dict()["rowsWritten"] == 2
+    assert done.to_dict()["progress"] == 1.0
+    assert (tmp_path / f"{job.id}.csv").read_bytes().decode("utf-8").lstrip("\ufeff").splitlines() == [
+        "Id,Name",
+        "1,An",
+        "2,Bình",
+    ]
+
+    again, reused = manager.submit(object(), **submit)
+    assert reused and again.id == job.id
+    assert len(runs) == 1
+
+    stamps.append(((1, 0), 11))
+    rerun, reused = manager.submit(object(), **submit)
+    assert not reused
+    _wait(manager, rerun.id)
+    assert len(runs) == 2
+    assert list(tmp_path.glob("*.part")) == []
+    manager.shutdown()
+
+
+def test_source_tables_come_from_from_and_join_clauses():
+    assert source_tables(QUERY) == ['"dbo"."partners"', "dbo.companies"]
+    assert source_tables([{"id": 1}]) == []
+
+
+def test_download_serves_byte_ranges(monkeypatch, tmp_path):
+    monkeypatch.setattr(export_jobs_module.settings, "EXPORT_SPOOL_DIR", str(tmp_path))
+    manager = ExportJobManager()
+    job = ExportJob(
+        id="a" * 32, resource="payments", format="ndjson", filename="payments.ndjson",
+        status="done", finished_at=1.0,
+    )
+    manager._save(job)
+    (tmp_path / job.output_name).write_bytes(b"0123456789")
+    monkeypatch.setattr(exports_module, "export_jobs", manager)
+
+    def download(headers):
+        request = SimpleNamespace(headers=headers)
+        return asyncio.run(exports_module.download_export_job(job.id, request, _user={"id": "u-1"}))
+
+    full = download({})
+    assert full.status_code == 200
+    assert full.headers["accept-ranges"] == "bytes"
+    assert _collect(full) == b"0123456789"
+
+    partial = download({"range": "bytes=4-"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == "bytes 4-9/10"
+    assert _collect(partial) == b"456789"
+
+    suffix = download({"range": "bytes=-3"})
+    assert _collect(suffix) == b"789"
+
+    stale = download({"range": "bytes=4-", "if-range": '"other"'})
+    assert stale.status_code == 200
+
+    beyond = download({"range": "bytes=20-"})
+    assert beyond.status_code == 416
+    assert beyond.headers["content-range"] == "bytes */10"
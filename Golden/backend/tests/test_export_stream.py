@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+from openpyxl import load_workbook
+from starlette.requests import Request
+
+import app.api.exports as exports_module
+import app.core.export_stream as export_stream
+from app.core.pagination import PageQuery, capturing_page_query
+
+ROWS = [
+    {"id": 1, "fullName": "Nguyễn Văn An", "amount": Decimal("12.50"), "date": date(2026, 3, 1)},
+    {"id": 2, "fullName": "Trần Thị Bình", "amount": None, "date": None},
+]
+
+
+class NamedCursor:
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.name = name
+        self.itersize = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, sql, params):
+        self.conn.executed.append((sql, params))
+
+    def __iter__(self):
+        self.conn.itersizes.append(self.itersize)
+        return iter(list(self.conn.rows))
+
+
+class NamedCursorConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.itersizes = []
+        self.cursor_names = []
+
+    def cursor(self, name=None, **kwargs):
+        del kwargs
+        self.cursor_names.append(name)
+        return NamedCursor(self, name)
+
+
+@contextmanager
+def _conn_ctx(conn):
+    yield conn
+
+
+def _collect(chunks) -> bytes:
+    return b"".join(chunks)
+
+
+def test_page_query_rows_stream_through_named_cursor(monkeypatch):
+    conn = NamedCursorConn(ROWS)
+    monkeypatch.setattr(export_stream, "get_conn", lambda: _conn_ctx(conn))
+    monkeypatch.setattr(export_stream.settings, "EXPORT_FETCH_ROWS", 50)
+    source = PageQuery("SELECT * FROM t ORDER BY id", ("x",), transform=lambda row: {**row, "id": str(row["id"])})
+
+    body = _collect(export_stream.ndjson_chunks(source, []))
+
+    lines = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    assert [line["id"] for line in lines] == ["1", "2"]
+    assert lines[0]["amount"] == 12.5
+    assert lines[0]["date"] == "2026-03-01"
+    assert conn.executed == [("SELECT * FROM t ORDER BY id", ("x",))]
+    assert conn.cursor_names[0].startswith("export_")
+    assert conn.itersizes == [50]
+
+
+def test_csv_writes_bom_labels_and_requested_columns():
+    body = _collect(export_stream.csv_chunks(iter(ROWS), ["fullName", "amount"]))
+
+    text = body.decode("utf-8")
+    assert text.startswith("\ufeff")
+    assert text.lstrip("\ufeff").splitlines() == ["Full Name,Amount", "Nguyễn Văn An,12.50", "Trần Thị Bình,"]
+
+
+def test_xlsx_is_write_only_and_sizes_columns_from_sample(monkeypatch):
+    monkeypatch.setattr(export_stream.settings, "EXPORT_WIDTH_SAMPLE_ROWS", 1)
+
+    path = export_stream.write_xlsx(iter(ROWS), [])
+    try:
+        sheet = load_workbook(path).active
+        values = [[cell.value for cell in row] for row in sheet.iter_rows()]
+        assert values[0] == ["Id", "Full Name", "Amount", "Date"]
+        assert values[1][1] == "Nguyễn Văn An"
+        assert values[2][3] is None
+        assert sheet.cell(row=1, column=1).font.bold
+        assert sheet.column_dimensions["B"].width == 15
+    finally:
+        _collect(export_stream.file_chunks(path))
+    assert not os.path.exists(path)
+
+
+def test_export_endpoint_streams_captured_listing(monkeypatch):
+    captured = {}
+
+    async def fake_listing(resource, request, user):
+        captured["capturing"] = capturing_page_query()
+        return PageQuery("SELECT 1", ())
+
+    monkeypatch.setattr(exports_module, "_call_listing", fake_listing)
+    monkeypatch.setattr(exports_module, "ndjson_chunks", lambda source, columns: iter([b'{"a": 1}\n']))
+
+    response = asyncio.run(
+        exports_module.export_resource(
+            resource="Payments", request=None, format="ndjson", columns=None, _user={"id": "u-1"}
+        )
+    )
+
+    assert captured["capturing"] is True
+    assert response.media_type == "application/x-ndjson"
+    assert response.headers["content-disposition"].endswith('.ndjson"')
+    assert 'filename="payments-' in response.headers["content-disposition"]
+
+
+def test_customer_export_listing_runs_off_the_event_loop(monkeypatch):
+    seen = {}
+
+    def fake_list_customers(**kwargs):
+        seen["thread"] = threading.get_ident()
+        seen["capturing"] = capturing_page_query()
+        seen["companyId"] = kwargs["company_id"]
+        return PageQuery("SELECT 1", ())
+
+    monkeypatch.setattr(exports_module.customers_module, "list_customers", fake_list_customers)
+    request = Request({"type": "http", "query_string": b"companyId=cmp-1", "headers": []})
+
+    async def _load():
+        seen["loop_thread"] = threading.get_ident()
+        return await exports_module._load_rows("customers", request, {"id": "u-1"})
+
+    assert isinstance(asyncio.run(_load()), PageQuery)
+    assert seen["thread"] != seen["loop_thread"]
+    assert seen["capturing"] is True
+    assert seen["companyId"] == "cmp-1"
@@ -0,0 +1,170 @@
+from app.core import filter_indexes as filter_module
+from app.core.filter_indexes import FILTER_INDEXES_V1, ensure_filter_indexes
+from app.core.index_advisor import (
+    extract_access_patterns,
+    parse_index_definition,
+    plan_usage,
+    recommend,
+    render_migration,
+)
+from app.core.lookup_sql import TableRef
+
+PAYMENTS_LISTING = (
+    'SELECT t.id, p."name" FROM "dbo"."accountpayments" t '
+    'LEFT JOIN "dbo"."partners" p ON p."id" = t."partnerid" '
+    'WHERE t."companyid"::text = %s AND t."paymentdate"::date >= %s AND t."paymentdate"::date <= %s '
+    'ORDER BY t."paymentdate" DESC NULLS LAST, t."id" DESC LIMIT %s OFFSET %s'
+)
+PAYMENTS_RECENT = "SELECT t.id FROM dbo.accountpayments t ORDER BY t.paymentdate DESC NULLS LAST, t.id DESC LIMIT %s"
+FUND_BOOK = (
+    'SELECT SUM(p."amount") FROM "dbo"."accountpayments" p '
+    "WHERE COALESCE(LOWER(p.\"state\"::text), '') NOT IN ('cancel', 'cancelled') "
+    'AND p."companyid"::text = %s AND p."paymentdate"::date BETWEEN %s AND %s'
+)
+ACTIVE_CUSTOMERS = (
+    'SELECT p.* FROM "dbo"."partners" p WHERE COALESCE(p."active", TRUE) = TRUE '
+    'AND p."companyid" = %s AND (p.name ILIKE %s OR p.ref ILIKE %s) ORDER BY p."datecreated" DESC LIMIT %s'
+)
+
+
+class FakeCursor:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self.executed)
+
+
+def test_extract_access_patterns_separates_keys_constants_and_sort():
+    listing = extract_access_patterns(PAYMENTS_LISTING)
+    where = next(p for p in listing if p.equality)
+    assert where.table == "dbo.accountpayments"
+    assert where.equality == ["companyid::text"]
+    assert where.ranges == ["paymentdate::date", "paymentdate::date"]
+    assert where.order == [("paymentdate", (True, False)), ("id", (True, True))]
+    assert sorted((p.table, p.joins[0]) for p in listing if p.joins) == [
+        ("dbo.accountpayments", "partnerid"),
+        ("dbo.partners", "id"),
+    ]
+
+    (fund_book,) = extract_access_patterns(FUND_BOOK)
+    assert fund_book.constants == ["COALESCE(LOWER(state::text), '') NOT IN ('cancel', 'cancelled')"]
+    assert fund_book.ranges == ["paymentdate::date"]
+
+    (customers,) = extract_access_patterns(ACTIVE_CUSTOMERS)
+    assert customers.equality == ["companyid"]
+    assert customers.constants == ["COALESCE(active, TRUE) = TRUE"]
+    assert extract_access_patterns("CREATE INDEX x ON t (a) WHERE b") == []
+
+
+def test_recommend_checks_expression_and_partial_indexes_against_catalog():
+    existing = [
+        parse_index_definition(definition)
+        for definition in (
+            "CREATE UNIQUE INDEX partners_pkey ON dbo.partners USING btree (id)",
+            "CREATE INDEX idx_dbo_accountpayments_companyid ON dbo.accountpayments USING btree (companyid)",
+            "CREATE INDEX app_ix_accountpayments_live_company_day ON dbo.accountpayments USING btree "
+            "(((companyid)::text), ((paymentdate)::date)) WHERE (COALESCE(lower((state)::text), ''::text) "
+            "<> ALL (ARRAY['cancel'::text, 'cancelled'::text]))",
+            "CREATE INDEX app_ix_accountpayments_recent ON dbo.accountpayments USING btree "
+            "(paymentdate DESC NULLS LAST, id DESC)",
+            "CREATE INDEX partners_active ON dbo.partners USING btree (companyid, datecreated) "
+            "WHERE (COALESCE(active, true) = true)",
+        )
+    ]
+    candidates = recommend(
+        [
+            ("GET /api/payments", PAYMENTS_LISTING),
+            ("GET /api/payments", PAYMENTS_RECENT),
+            ("GET /api/finance/fund-book", FUND_BOOK),
+            ("GET /api/customers", ACTIVE_CUSTOMERS),
+        ],
+        existing,
+    )
+    covered = {candidate.definition(): candidate.covered_by for candidate in candidates}
+
+    # The listing has no state filter, so the partial index cannot serve it:
+    # the fund-book candidate merges into the listing's unfiltered one.
+    assert covered["dbo.accountpayments (companyid::text, paymentdate::date)"] is None
+    assert covered["dbo.accountpayments (paymentdate DESC NULLS LAST, id DESC)"] == "app_ix_accountpayments_recent"
+    active = "dbo.partners (companyid, datecreated DESC) WHERE COALESCE(active, TRUE) = TRUE"
+    assert covered[active] == "partners_active"
+    assert covered["dbo.partners (id)"] == "partners_pkey"
+
+    migration = render_migration(candidates, "FILTER_INDEXES_V2", "0013_app_filter_indexes_v2")
+    assert "keys=('({companyid}::text)', '({paymentdate}::date)')," in migration
+    assert "tables=('accountpayments',)" in migration and "'{paymentdate} DESC NULLS LAST'" not in migration
+    assert "partners_active" not in migration
+    assert migration.rstrip().endswith(
+        "# APP_MIGRATIONS: filter_index_migration('0013_app_filter_indexes_v2', FILTER_INDEXES_V2),"
+    )
+
+
+def test_filter_indexes_mirror_router_predicates_and_skip_missing_columns(monkeypatch):
+    tables = {
+        "accountpayments": ("id", "companyid", "partnerid", "paymentdate", "state"),
+        "partners": ("id", "companyid", "datecreated", "active"),
+        "saleorders": ("id", "companyid", "partnerid", "dateorder"),
+    }
+
+    def fake_resolve(conn, *candidates):
+        found = next((name for name in candidates if name in tables), None)
+        return TableRef("dbo", found) if found else None
+
+    monkeypatch.setattr(filter_module, "resolve_table", fake_resolve)
+    monkeypatch.setattr(filter_module, "table_columns", lambda conn, ref: tables[ref.table])
+    conn = FakeConnection()
+
+    created = ensure_filter_indexes(conn, FILTER_INDEXES_V1)
+
+    ddl = [sql for sql in conn.executed if sql.startswith("CREATE INDEX")]
+    assert len(created) == len(ddl) == 9
+    assert 'CREATE INDEX IF NOT EXISTS "app_ix_partners_active_company_created" ON "dbo"."partners" ' \
+        '("companyid", "datecreated") WHERE COALESCE("active", TRUE) = TRUE' in ddl
+    assert not any("dotkham" in sql for sql in ddl)
+    assert [sql for sql in conn.executed if sql.startswith("ANALYZE")] == [
+        'ANALYZE "dbo"."accountpayments"',
+        'ANALYZE "dbo"."partners"',
+        'ANALYZE "dbo"."saleorders"',
+    ]
+
+    # The migration's own indexes cover the router shapes; join keys are left
+    # to the schema's single-column indexes.
+    existing = [
+        parse_index_definition(sql.replace("IF NOT EXISTS ", "").replace('" (', '" USING btree (', 1)) for sql in ddl
+    ]
+    statements = [("GET /api/payments", PAYMENTS_LISTING), ("GET /api/finance/fund-book", FUND_BOOK)]
+    candidates = recommend(statements, existing)
+    assert sorted(candidate.definition() for candidate in candidates if not candidate.covered_by) == [
+        "dbo.accountpayments (partnerid)",
+        "dbo.partners (id)",
+    ]
+
+
+def test_plan_usage_lists_index_and_sequential_scans():
+    plan = [
+        {
+            "Plan": {
+                "Node Type": "Nested Loop",
+                "Plans": [
+                    {"Node Type": "Index Scan", "Index Name": "app_ix_accountpayments_recent"},
+                    {"Node Type": "Seq Scan", "Relation Name": "partners"},
+                ],
+            }
+        }
+    ]
+    assert plan_usage(plan) == {"indexes": ["app_ix_accountpayments_recent"], "seqScans": ["partners"]}
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from fastapi import APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.json_response import FastJSONResponse, FastJSONRoute, dumps
+
+
+def test_dumps_matches_fastapi_encoding():
+    payload = {
+        "totalItems": 2,
+        "items": [
+            {
+                "id": UUID("6f1c1f1e-0a8d-4a57-9d55-2b8f0f5f1a01"),
+                "amount": Decimal("1250000.50"),
+                "count": Decimal("3"),
+                "date": date(2026, 3, 1),
+                "createdAt": datetime(2026, 3, 1, 8, 30, 15, 120000),
+                "paidAt": datetime(2026, 3, 1, 1, 30, tzinfo=timezone.utc),
+                "slot": time(9, 45),
+                "name": "Nguyễn Thị Mai",
+                "tags": {"vip"},
+                "active": True,
+                "notes": None,
+            }
+        ],
+    }
+    assert dumps(payload) == JSONResponse(jsonable_encoder(payload)).body
+    assert dumps({"big": 2**70}) == JSONResponse({"big": 2**70}).body
+
+
+def test_route_class_encodes_results_and_keeps_handlers_plain():
+    router = APIRouter(route_class=FastJSONRoute)
+
+    @router.post("/things", status_code=201)
+    def create_thing():
+        return {"amount": Decimal("9.90")}
+
+    @router.get("/missing")
+    async def missing_thing():
+        return JSONResponse({"detail": "nope"}, status_code=404)
+
+    assert create_thing() == {"amount": Decimal("9.90")}
+
+    created = asyncio.run(router.routes[0].endpoint())
+    assert isinstance(created, FastJSONResponse)
+    assert created.status_code == 201
+    assert created.body == b'{"amount":9.9}'
+
+    missing = asyncio.run(router.routes[1].endpoint())
+    assert missing.status_code == 404
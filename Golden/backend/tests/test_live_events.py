@@ -0,0 +1,128 @@
+import asyncio
+import json
+from contextlib import contextmanager
+
+import app.api.appointments as appointments_module
+import app.core.live_events as live_events_module
+from app.core.live_events import LiveEventHub, publish_live_event
+
+
+def _envelope(event_type="appointment", company_id="c-1", **data):
+    return json.dumps({"type": event_type, "companyId": company_id, "data": data})
+
+
+def _drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+def test_events_fan_out_by_company_and_replay_after_reconnect():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        hub = LiveEventHub()
+        branch_one = hub.subscribe(loop, "c-1")
+        branch_two = hub.subscribe(loop, "c-2")
+        everyone = hub.subscribe(loop, None)
+
+        hub.dispatch(_envelope(op="upsert", item={"id": "a1"}))
+        hub.dispatch(_envelope("notification", None, op="created", id="n1"))
+        await asyncio.sleep(0)
+
+        assert [event.type for event in _drain(branch_one.queue)] == ["appointment", "notification"]
+        assert [event.type for event in _drain(branch_two.queue)] == ["notification"]
+        received = _drain(everyone.queue)
+        assert len(received) == 2
+        assert received[0].encode().startswith(f"id: {received[0].id}\nevent: appointment\n".encode())
+
+        hub.unsubscribe(branch_one)
+        hub.dispatch(_envelope(op="delete", item={"id": "a1"}))
+        resumed = hub.subscribe(loop, "c-1", last_event_id=received[0].id)
+        assert [json.loads(event.data).get("op") for event in _drain(resumed.queue)] == ["created", "delete"]
+
+        elsewhere = hub.subscribe(loop, "c-1", last_event_id="otherworker-3")
+        assert [event.type for event in _drain(elsewhere.queue)] == ["resync"]
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_gets_resync_instead_of_unbounded_queue(monkeypatch):
+    monkeypatch.setattr(live_events_module.settings, "LIVE_EVENTS_QUEUE_SIZE", 2)
+
+    async def scenario():
+        hub = LiveEventHub()
+        subscription = hub.subscribe(asyncio.get_running_loop(), None)
+        for index in range(5):
+            hub.dispatch(_envelope(op="upsert", item={"id": f"a{index}"}))
+        await asyncio.sleep(0)
+        events = _drain(subscription.queue)
+        assert "resync" in [event.type for event in events]
+        assert len(events) <= 2
+        assert hub.stats()["overflows"] >= 1
+
+    asyncio.run(scenario())
+
+
+class _Cursor:
+    def __init__(self):
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        self.executed.append((sql, params))
+
+
+def test_publish_sends_notify_and_trims_oversized_payloads():
+    cur = _Cursor()
+    publish_live_event(cur, "appointment", company_id="c-1", data={"op": "upsert", "item": {"id": "a1"}})
+    [(sql, (channel, payload))] = cur.executed
+    assert sql == "SELECT pg_notify(%s, %s)"
+    assert channel == "app_live_events"
+    assert json.loads(payload) == {"type": "appointment", "companyId": "c-1", "data": {"op": "upsert", "item": {"id": "a1"}}}
+
+    big = _Cursor()
+    publish_live_event(big, "appointment", data={"op": "upsert", "item": {"id": "a2", "notes": "x" * 9000}})
+    envelope = json.loads(big.executed[0][1][1])
+    assert envelope["data"] == {"op": "upsert", "stale": True, "item": {"id": "a2"}}
+
+
+def test_state_patch_publishes_and_detail_read_does_not(monkeypatch):
+    published = []
+    applied = []
+    item = {"id": "a1", "companyId": "c-1", "state": "arrived"}
+
+    class Conn:
+        def cursor(self):
+            return _Cursor()
+
+    @contextmanager
+    def fake_get_conn():
+        yield Conn()
+
+    monkeypatch.setattr(appointments_module, "get_conn", fake_get_conn)
+    monkeypatch.setattr(appointments_module, "_resolve_contexts", lambda conn: ["ctx"])
+    monkeypatch.setattr(appointments_module, "_find_appointment_for_update", lambda conn, contexts, i: ("ctx", item))
+    monkeypatch.setattr(
+        appointments_module, "_apply_state_update_locked", lambda conn, ctx, i, state: applied.append(state)
+    )
+    monkeypatch.setattr(appointments_module, "_fetch_items", lambda conn, contexts, **kwargs: (1, [item]))
+    monkeypatch.setattr(appointments_module, "_row_to_item", dict)
+    monkeypatch.setattr(
+        appointments_module,
+        "publish_live_event",
+        lambda cur, event_type, company_id=None, data=None: published.append((event_type, company_id, data)),
+    )
+
+    assert asyncio.run(appointments_module.get_appointment("a1")) == item
+    assert published == []
+
+    patch = appointments_module.AppointmentStatePatch.model_construct(state="arrived")
+    asyncio.run(appointments_module.patch_appointment_state("a1", patch))
+    assert applied == ["arrived"]
+    assert published == [("appointment", "c-1", {"op": "upsert", "item": item})]
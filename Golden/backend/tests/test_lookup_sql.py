@@ -1,11 +1,25 @@
-from app.core import lookup_sql
+import json
+
+import pytest
+
+import app.api.customers as customers_module
+from app.core import lookup_sql, schema_catalog
+from app.core.lookup_sql import TableRef
+
+CATALOG_ROWS = [
+    ("dbo", "companies", "id", "uuid", False, None),
+    ("dbo", "companies", "name", "character varying", True, None),
+    ("public", "companies", "id", "uuid", False, "gen_random_uuid()"),
+    ("public", "company", "id", "uuid", False, None),
+    ("public", "partners", "id", "uuid", False, None),
+    ("public", "partners", "Name", "text", True, None),
+]
 
 
 class _Cursor:
-    def __init__(self, row):
-        self._row = row
-        self.sql = ""
-        self.params = None
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
 
     def __enter__(self):
         return self
@@ -14,50 +28,159 @@ class _Cursor:
         return False
 
     def execute(self, sql, params=None):
-        self.sql = sql
-        self.params = params
+        self.conn.sql_history.append(sql)
+        if "md5(" in sql:
+            self._rows = [(self.conn.fingerprint,)]
+        elif "pg_catalog.pg_attrdef" in sql:
+            self._rows = list(self.conn.rows)
+        else:
+            raise AssertionError(f"Unexpected SQL: {sql}")
 
     def fetchone(self):
-        return self._row
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
 
 
 class _Conn:
-    def __init__(self, row):
-        self.cursor_obj = _Cursor(row)
-        self.cursor_calls = 0
+    def __init__(self, rows=CATALOG_ROWS, fingerprint="fp-1"):
+        self.rows = rows
+        self.fingerprint = fingerprint
+        self.sql_history: list[str] = []
+
+    def cursor(self, **kwargs):
+        del kwargs
+        return _Cursor(self)
 
-    def cursor(self):
-        self.cursor_calls += 1
-        return self.cursor_obj
+    @property
+    def catalog_loads(self):
+        return sum("pg_catalog.pg_attrdef" in sql for sql in self.sql_history)
+
+
+@pytest.fixture(autouse=True)
+def reset_catalog(monkeypatch):
+    monkeypatch.setattr(schema_catalog.settings, "SCHEMA_CATALOG_CACHE_PATH", "")
+    monkeypatch.setattr(schema_catalog.settings, "SCHEMA_CATALOG_CHECK_SECONDS", 0)
+    schema_catalog.catalog.reset()
+    yield
+    schema_catalog.catalog.reset()
 
 
 def test_resolve_table_prefers_dbo_over_public():
-    lookup_sql._TABLE_CACHE.clear()
-    conn = _Conn(("dbo", "companies"))
+    conn = _Conn()
 
     table = lookup_sql.resolve_table(conn, "Companies", "company", "companies")
 
-    assert table is not None
-    assert table.schema == "dbo"
-    assert table.table == "companies"
-    assert "WHEN 'dbo' THEN 0" in conn.cursor_obj.sql
-    assert "WHEN 'public' THEN 1" in conn.cursor_obj.sql
-    assert conn.cursor_obj.sql.index("WHEN 'dbo' THEN 0") < conn.cursor_obj.sql.index(
-        "WHEN 'public' THEN 1"
-    )
-    assert conn.cursor_obj.params == (["companies", "company"],)
+    assert table == TableRef(schema="dbo", table="companies")
+    assert lookup_sql.table_columns(conn, table) == ("id", "name")
+    assert lookup_sql.resolve_table(conn, "missing") is None
 
 
 def test_resolve_table_uses_cache_without_second_query():
-    lookup_sql._TABLE_CACHE.clear()
-    first_conn = _Conn(("dbo", "companies"))
-    second_conn = _Conn(("public", "companies"))
+    first_conn = _Conn()
+    second_conn = _Conn()
 
     first = lookup_sql.resolve_table(first_conn, "companies")
     second = lookup_sql.resolve_table(second_conn, "companies")
+    lookup_sql.table_columns(second_conn, second)
 
-    assert first is not None
-    assert second is not None
     assert first == second
-    assert first_conn.cursor_calls == 1
-    assert second_conn.cursor_calls == 0
+    assert first_conn.catalog_loads == 1
+    assert second_conn.sql_history == []
+
+
+def test_catalog_reloads_only_after_invalidation_or_fingerprint_change(monkeypatch):
+    conn = _Conn()
+    lookup_sql.resolve_table(conn, "companies")
+
+    schema_catalog.invalidate_catalog()
+    lookup_sql.resolve_table(conn, "companies")
+    assert conn.catalog_loads == 2
+
+    monkeypatch.setattr(schema_catalog.settings, "SCHEMA_CATALOG_CHECK_SECONDS", 0.000001)
+    lookup_sql.resolve_table(conn, "companies")
+    assert conn.catalog_loads == 2
+
+    conn.rows = [row for row in CATALOG_ROWS if row[0] == "public"]
+    conn.fingerprint = "fp-2"
+    assert lookup_sql.resolve_table(conn, "companies") == TableRef("public", "companies")
+    assert conn.catalog_loads == 3
+
+
+def test_customer_snapshot_shares_catalog_and_prefers_public():
+    conn = _Conn()
+    lookup_sql.resolve_table(conn, "companies")
+
+    snapshot = customers_module._load_schema_snapshot(conn)
+
+    assert conn.catalog_loads == 1
+    assert snapshot["companies"].schema == "public"
+    assert snapshot["companies"].defaults["id"] == "gen_random_uuid()"
+    assert snapshot["partners"].columns == ["id", "name"]
+    assert snapshot["partners"].data_types["name"] == "text"
+    assert customers_module._load_schema_snapshot(conn) is snapshot
+
+
+def test_catalog_snapshot_is_reused_on_restart(monkeypatch, tmp_path):
+    path = tmp_path / "catalog.json"
+    monkeypatch.setattr(schema_catalog.settings, "SCHEMA_CATALOG_CACHE_PATH", str(path))
+    schema_catalog.catalog.refresh(_Conn())
+    assert json.loads(path.read_text())["fingerprint"] == "fp-1"
+
+    schema_catalog.catalog.reset()
+    conn = _Conn()
+    assert schema_catalog.catalog.load_snapshot(conn)
+    assert conn.catalog_loads == 0
+    assert lookup_sql.resolve_table(conn, "companies") == TableRef("dbo", "companies")
+
+    schema_catalog.catalog.reset()
+    assert not schema_catalog.catalog.load_snapshot(_Conn(fingerprint="fp-2"))
+
+
+class _DdlCursor(_Cursor):
+    def execute(self, sql, params=None):
+        if "md5(" in sql or "pg_catalog.pg_attrdef" in sql:
+            return super().execute(sql, params)
+        self.conn.sql_history.append(sql)
+        self._rows = [("app",)] if "to_regclass" in sql else []
+        if "CREATE EXTENSION" in sql and not self.conn.trigram:
+            raise customers_module.psycopg2.Error("permission denied to create extension")
+
+
+class _DdlConn(_Conn):
+    def __init__(self, trigram):
+        super().__init__()
+        self.trigram = trigram
+
+    def cursor(self, **kwargs):
+        del kwargs
+        return _DdlCursor(self)
+
+
+def _customer_search_ddl(trigram):
+    conn = _DdlConn(trigram)
+    customers_module.ensure_customer_search_index(conn)
+    return [sql for sql in conn.sql_history if "pg_catalog" not in sql and "md5(" not in sql]
+
+
+def test_customer_search_index_uses_trigrams_and_a_qualified_trigger():
+    ddl = _customer_search_ddl(trigram=True)
+
+    assert any("partner_id uuid PRIMARY KEY" in sql for sql in ddl)
+    assert any("gin_trgm_ops" in sql for sql in ddl)
+    assert "DROP INDEX IF EXISTS idx_app_customer_search_prefix" in ddl
+    backfill = next(sql for sql in ddl if "ON CONFLICT" in sql and "FROM \"public\".\"partners\"" in sql)
+    assert "TRANSLATE(LOWER(COALESCE(concat_ws(' ', p.\"name\")::text, ''))" in backfill
+    trigger = next(sql for sql in ddl if "CREATE TRIGGER app_customer_search_sync" in sql)
+    # External writers may not have the app schema on their search_path.
+    assert 'DELETE FROM "app"."app_customer_search" WHERE' in trigger
+    assert 'INSERT INTO "app"."app_customer_search" (partner_id' in trigger
+
+
+def test_customer_search_index_is_dropped_without_trgm():
+    ddl = _customer_search_ddl(trigram=False)
+
+    assert "ROLLBACK TO SAVEPOINT optional_ddl" in ddl
+    assert "DROP TABLE IF EXISTS app_customer_search" in ddl
+    assert not any("CREATE TABLE" in sql or "CREATE INDEX" in sql or "CREATE TRIGGER" in sql for sql in ddl)
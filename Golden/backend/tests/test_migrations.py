@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+
+import pytest
+
+import app.core.migrations as migrations_module
+import app.main as main_module
+from app.core.migrations import Migration, MigrationError
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, sql, params=None):
+        normalized = " ".join(sql.split())
+        self.conn.sql_history.append(normalized)
+        if normalized.startswith("SELECT id FROM app_schema_migrations"):
+            self._rows = [(migration_id,) for migration_id in sorted(self.conn.applied)]
+        elif normalized.startswith("INSERT INTO app_schema_migrations"):
+            self.conn.pending.add(params[0])
+
+    def fetchall(self):
+        return self._rows
+
+
+class _Conn:
+    def __init__(self, applied=()):
+        self.applied = set(applied)
+        self.pending: set[str] = set()
+        self.sql_history: list[str] = []
+        self.transactions = 0
+
+    def cursor(self, **kwargs):
+        del kwargs
+        return _Cursor(self)
+
+
+def _patch_get_conn(monkeypatch, conn):
+    @contextmanager
+    def _get_conn():
+        conn.transactions += 1
+        conn.pending = set()
+        yield conn
+        conn.applied |= conn.pending
+
+    monkeypatch.setattr(migrations_module, "get_conn", _get_conn)
+
+
+def test_run_migrations_applies_pending_once(monkeypatch):
+    conn = _Conn(applied={"0001_a"})
+    calls = []
+    _patch_get_conn(monkeypatch, conn)
+    steps = [
+        Migration("0001_a", lambda _conn: calls.append("a")),
+        Migration("0002_b", lambda _conn: calls.append("b")),
+    ]
+
+    assert migrations_module.run_migrations(steps) == ["0002_b"]
+    assert migrations_module.run_migrations(steps) == []
+    assert calls == ["b"]
+    assert conn.sql_history[0].startswith("SELECT pg_advisory_xact_lock")
+
+
+def test_run_migrations_commits_each_migration_and_stops_on_failure(monkeypatch):
+    conn = _Conn()
+    calls = []
+    _patch_get_conn(monkeypatch, conn)
+
+    def _broken(_conn):
+        raise ValueError("bad ddl")
+
+    steps = [
+        Migration("0001_a", lambda _conn: calls.append("a")),
+        Migration("0002_b", _broken),
+        Migration("0003_c", lambda _conn: calls.append("c")),
+    ]
+
+    with pytest.raises(MigrationError, match="0002_b"):
+        migrations_module.run_migrations(steps)
+
+    # 0001 committed in its own transaction; 0003 never ran.
+    assert conn.applied == {"0001_a"}
+    assert calls == ["a"]
+    assert conn.transactions == 3
+    lock_count = sum(sql.startswith("SELECT pg_advisory_xact_lock") for sql in conn.sql_history)
+    assert lock_count == 3
+
+
+def test_app_migration_ids_are_unique_and_ordered():
+    ids = [migration.id for migration in main_module.APP_MIGRATIONS]
+
+    assert len(ids) == len(set(ids))
+    assert ids == sorted(ids)
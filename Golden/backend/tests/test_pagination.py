@@ -1,4 +1,21 @@
-from app.core.pagination import paginate
+from datetime import datetime
+
+import pytest
+
+from app.core import pagination
+from app.core.count_cache import count_cache
+from app.core.database import notify_table_writes
+from app.core.pagination import (
+    InvalidCursorError,
+    PageQuery,
+    SortKey,
+    capture_page_query,
+    cursor_requested,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+    settle_total,
+)
 
 
 class FakePaginationCursor:
@@ -141,3 +158,276 @@ def test_paginate_limit_zero_with_offset_returns_all_from_offset():
     assert result["limit"] == 0
     assert result["totalItems"] == 20
     assert [item["id"] for item in result["items"]] == [16, 17, 18, 19, 20]
+
+
+class RecordingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, sql, params):
+        self.conn.executed.append((" ".join(sql.split()), tuple(params or ())))
+
+    def fetchall(self):
+        return list(self.conn.rows)
+
+
+class RecordingConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed: list[tuple[str, tuple]] = []
+
+    def cursor(self, **kwargs):
+        del kwargs
+        return RecordingCursor(self)
+
+
+KEYSET = (
+    SortKey("date", descending=True, nullable=True, nulls_last=True),
+    SortKey("id", descending=True),
+)
+
+
+def test_keyset_first_page_skips_count_and_returns_next_cursor():
+    rows = [
+        {"id": "c", "date": datetime(2026, 2, 3, 9, 0)},
+        {"id": "b", "date": datetime(2026, 2, 2, 9, 0)},
+        {"id": "a", "date": None},
+    ]
+    conn = RecordingConn(rows)
+
+    result = paginate("SELECT id, date FROM sample", [], conn, limit=2, keyset=KEYSET)
+
+    assert len(conn.executed) == 1
+    sql, params = conn.executed[0]
+    assert "count(" not in sql.lower()
+    assert sql == (
+        'SELECT * FROM (SELECT id, date FROM sample) AS _page '
+        'ORDER BY _page."date" DESC NULLS LAST, _page."id" DESC LIMIT %s'
+    )
+    assert params == (3,)
+    assert [item["id"] for item in result["items"]] == ["c", "b"]
+    assert result["hasMore"] is True
+    assert result["prevCursor"] is None
+    assert "totalItems" not in result
+    assert decode_cursor(result["nextCursor"], KEYSET) == ["2026-02-02T09:00:00", "b"]
+
+
+def test_keyset_after_token_filters_past_cursor_row():
+    conn = RecordingConn([{"id": "a", "date": None}])
+    token = encode_cursor({"id": "b", "date": datetime(2026, 2, 2, 9, 0)}, KEYSET)
+
+    result = paginate(
+        "SELECT id, date FROM sample WHERE company_id = %s",
+        ["cmp-1"],
+        conn,
+        limit=2,
+        keyset=KEYSET,
+        after=token,
+    )
+
+    sql, params = conn.executed[0]
+    assert (
+        'WHERE ((_page."date" < %s OR _page."date" IS NULL) '
+        'OR (_page."date" = %s AND _page."id" < %s))'
+    ) in sql
+    assert params == ("cmp-1", "2026-02-02T09:00:00", "2026-02-02T09:00:00", "b", 3)
+    assert result["hasMore"] is False
+    assert result["nextCursor"] is None
+    assert decode_cursor(result["prevCursor"], KEYSET) == [None, "a"]
+
+
+def test_keyset_before_token_reverses_order_and_rows():
+    conn = RecordingConn([{"id": 4}, {"id": 3}, {"id": 2}])
+    keyset = (SortKey("id"),)
+
+    result = paginate(
+        "SELECT id FROM sample",
+        None,
+        conn,
+        limit=2,
+        keyset=keyset,
+        before=encode_cursor({"id": 5}, keyset),
+    )
+
+    sql, params = conn.executed[0]
+    assert 'WHERE (_page."id") < (%s) ORDER BY _page."id" DESC LIMIT %s' in sql
+    assert params == (5, 3)
+    assert [item["id"] for item in result["items"]] == [3, 4]
+    assert result["hasMore"] is True
+    assert decode_cursor(result["nextCursor"], keyset) == [4]
+    assert decode_cursor(result["prevCursor"], keyset) == [3]
+
+
+def test_keyset_after_null_placed_last_only_compares_tiebreaker():
+    conn = RecordingConn([])
+    token = encode_cursor({"id": "a", "date": None}, KEYSET)
+
+    result = paginate("SELECT id, date FROM sample", [], conn, limit=5, keyset=KEYSET, after=token)
+
+    sql, params = conn.executed[0]
+    assert 'WHERE ((_page."date" IS NULL AND _page."id" < %s))' in sql
+    assert params == ("a", 6)
+    assert result == {
+        "limit": 5,
+        "items": [],
+        "nextCursor": None,
+        "prevCursor": None,
+        "hasMore": False,
+    }
+
+
+def test_keyset_rejects_malformed_or_mismatched_cursor():
+    conn = RecordingConn([])
+
+    with pytest.raises(InvalidCursorError):
+        paginate("SELECT 1", [], conn, limit=5, keyset=KEYSET, after="not-a-cursor!")
+    with pytest.raises(InvalidCursorError):
+        paginate(
+            "SELECT 1",
+            [],
+            conn,
+            limit=5,
+            keyset=KEYSET,
+            after=encode_cursor({"id": 1}, (SortKey("id"),)),
+        )
+    assert conn.executed == []
+
+
+def test_capture_returns_unpaged_query_without_running_sql():
+    conn = RecordingConn([])
+
+    with capture_page_query():
+        captured = paginate("SELECT * FROM t ORDER BY id", ["x"], conn, offset=40, limit=20)
+
+    assert captured == PageQuery("SELECT * FROM t ORDER BY id", ("x",))
+    assert conn.executed == []
+    assert isinstance(paginate("SELECT * FROM t", (), FakePaginationConn([]), offset=0, limit=5), dict)
+
+
+def test_cursor_requested_ignores_unresolved_defaults():
+    assert cursor_requested("abc", None, None)
+    assert cursor_requested(None, None, " Cursor ")
+    assert not cursor_requested(None, None, "offset")
+    assert not cursor_requested(object(), object(), object())
+
+
+class CountingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._one = None
+        self._all = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, sql, params):
+        normalized = " ".join(sql.split())
+        self.conn.executed.append(normalized)
+        if "pg_stat_user_tables" in normalized:
+            self._one = (self.conn.write_stamp,)
+        elif normalized.startswith("EXPLAIN (FORMAT JSON)"):
+            self._one = {"QUERY PLAN": [{"Plan": {"Plan Rows": self.conn.estimate}}]}
+        elif normalized.startswith("SELECT COUNT(*)"):
+            self._one = {"total": len(self.conn.rows)}
+        else:
+            limit, offset = params[-2], params[-1]
+            self._all = self.conn.rows[offset : offset + limit]
+
+    def fetchone(self):
+        return self._one
+
+    def fetchall(self):
+        return self._all
+
+
+class CountingConn:
+    def __init__(self, rows, estimate):
+        self.rows = rows
+        self.estimate = estimate
+        self.write_stamp = 0
+        self.executed: list[str] = []
+
+    def cursor(self, **kwargs):
+        del kwargs
+        return CountingCursor(self)
+
+    def ran(self, prefix):
+        return sum(sql.startswith(prefix) for sql in self.executed)
+
+
+@pytest.fixture
+def fresh_count_cache(monkeypatch):
+    monkeypatch.setattr(pagination.settings, "PAGINATION_EXACT_COUNT_THRESHOLD", 1000)
+    count_cache.reset()
+    yield count_cache
+    count_cache.reset()
+
+
+def test_auto_count_uses_planner_estimate_for_large_results(fresh_count_cache):
+    conn = CountingConn([{"id": i} for i in range(1, 51)], estimate=250_000)
+
+    result = paginate(
+        "SELECT id FROM receipts",
+        [],
+        conn,
+        offset=0,
+        limit=20,
+        count="auto",
+        count_tables=("receipts",),
+    )
+
+    assert conn.ran("SELECT COUNT(*)") == 0
+    assert result["totalItems"] == 250_000
+    assert result["totalExact"] is False
+    assert len(result["items"]) == 20
+
+
+def test_auto_count_is_exact_for_small_results_and_cached(fresh_count_cache):
+    conn = CountingConn([{"id": i} for i in range(1, 51)], estimate=40)
+
+    first = paginate("SELECT id FROM receipts", [], conn, limit=20, count="auto", count_tables=("receipts",))
+    second = paginate("SELECT id FROM receipts", [], conn, limit=20, count="auto", count_tables=("receipts",))
+
+    assert first["totalItems"] == second["totalItems"] == 50
+    assert first["totalExact"] is True
+    assert conn.ran("SELECT COUNT(*)") == 1
+    assert conn.ran("EXPLAIN") == 1
+
+
+def test_auto_count_cache_invalidated_by_table_writes(fresh_count_cache):
+    conn = CountingConn([{"id": i} for i in range(1, 11)], estimate=10)
+    query = "SELECT id FROM receipts"
+
+    paginate(query, [], conn, limit=5, count="auto", count_tables=('"dbo"."Receipts"',))
+    notify_table_writes({"receipts"})
+    conn.rows.append({"id": 11})
+    result = paginate(query, [], conn, limit=5, count="auto", count_tables=('"dbo"."Receipts"',))
+    assert result["totalItems"] == 11
+
+    conn.write_stamp = 1
+    conn.rows.append({"id": 12})
+    result = paginate(query, [], conn, limit=5, count="auto", count_tables=('"dbo"."Receipts"',))
+    assert result["totalItems"] == 12
+    assert conn.ran("SELECT COUNT(*)") == 3
+
+
+def test_auto_count_settles_estimate_on_last_page(fresh_count_cache):
+    conn = CountingConn([{"id": i} for i in range(1, 31)], estimate=5_000)
+
+    result = paginate(
+        "SELECT id FROM receipts", [], conn, offset=20, limit=20, count="auto", count_tables=("receipts",)
+    )
+
+    assert result["totalItems"] == 30
+    assert result["totalExact"] is True
+    assert settle_total(5_000, offset=100, limit=20, fetched=0) == (100, False)
+    assert settle_total(5_000, offset=0, limit=20, fetched=0) == (0, True)
@@ -0,0 +1,165 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import date
+
+import app.api.dashboard as dashboard_module
+import app.core.payment_rollup as rollup_module
+from app.core.lookup_sql import TableRef
+from app.core.payment_rollup import RollupSource
+
+PAYMENTS = TableRef("public", "accountpayments")
+JOURNALS = TableRef("public", "accountjournals")
+SOURCE = RollupSource(
+    table=PAYMENTS,
+    date_col="paymentdate",
+    amount_col="amount",
+    company_col="companyid",
+    state_col="state",
+    direction_col="paymenttype",
+)
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((" ".join(sql.split()), params))
+        self._rows = self.conn.results.pop(0) if self.conn.results else []
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class _Conn:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.executed: list[tuple[str, object]] = []
+
+    def cursor(self, **kwargs):
+        del kwargs
+        return _Cursor(self)
+
+
+@contextmanager
+def _conn_ctx(conn):
+    yield conn
+
+
+def _fake_schema(monkeypatch):
+    def fake_resolve(_conn, *candidates):
+        if "accountjournals" in candidates:
+            return JOURNALS
+        if "accountpayments" in candidates:
+            return PAYMENTS
+        return None
+
+    def fake_columns(_conn, table):
+        if table == PAYMENTS:
+            return ("id", "companyid", "paymentdate", "journalid", "state", "amount", "paymenttype")
+        return ("id", "type", "name")
+
+    monkeypatch.setattr(rollup_module, "resolve_table", fake_resolve)
+    monkeypatch.setattr(rollup_module, "table_columns", fake_columns)
+
+
+def test_rollup_for_only_reads_the_rollup(monkeypatch):
+    monkeypatch.setattr(rollup_module, "payment_rollup_source", lambda _conn: SOURCE)
+    conn = _Conn()
+
+    source = rollup_module.rollup_for(
+        conn, PAYMENTS, date_col="paymentdate", amount_col="amount", company_col="companyid"
+    )
+
+    assert source == SOURCE
+    assert conn.executed == []
+
+
+def test_payment_writes_rebuild_their_days_in_statement_triggers(monkeypatch):
+    _fake_schema(monkeypatch)
+    ddl = []
+
+    def fake_optional_ddl(_cur, sql):
+        ddl.append(" ".join(sql.split()))
+        return True
+
+    monkeypatch.setattr(rollup_module, "optional_ddl", fake_optional_ddl)
+    monkeypatch.setattr(rollup_module, "_resolve_source", lambda _conn: SOURCE)
+    conn = _Conn([], [], [("app",)])
+
+    rollup_module.ensure_payment_rollups(conn)
+
+    payments_sync, journals_sync = (sql for sql in ddl if "CREATE TRIGGER" in sql)
+    assert payments_sync.count("FOR EACH STATEMENT") == 3
+    assert "REFERENCING OLD TABLE AS app_rollup_old NEW TABLE AS app_rollup_new" in payments_sync
+    assert "pg_advisory_xact_lock(" in payments_sync
+    # Qualified: external writers may not have the app schema on their search_path.
+    assert 'DELETE FROM "app"."app_payment_daily" r' in payments_sync
+    rebuild = payments_sync.split("$rebuild$")[1]
+    assert rebuild.startswith('INSERT INTO "app"."app_payment_daily"')
+    assert "%s" not in rebuild and "LIKE '%cash%'" in rebuild
+    assert '"paymentdate" >= $1 AND p."paymentdate" < $2::date + 1 AND p."paymentdate"::date = ANY($3::date[])' in rebuild
+    assert "USING days[1], days[array_length(days, 1)], days" in payments_sync
+    # Journal writes rebuild only the days of journals whose type/name changed.
+    assert journals_sync.count('ON "public"."accountjournals"') == 6
+    assert "REFERENCING OLD TABLE AS app_rollup_old NEW TABLE AS app_rollup_new" in journals_sync
+    assert '(o."name", o."type") IS DISTINCT FROM (n."name", n."type")' in journals_sync
+    assert 'WHERE p."journalid" IN (SELECT o."id" FROM app_rollup_old o LEFT JOIN' in journals_sync
+    assert "LOCK TABLE" not in journals_sync and "pg_advisory_xact_lock(" in journals_sync
+    assert 'DELETE FROM "app"."app_payment_daily" r WHERE r.day = ANY(days)' in journals_sync
+    assert "DROP TABLE IF EXISTS app_payment_rollup_dirty" in [sql for sql, _ in conn.executed]
+    source_row = conn.executed[-1]
+    assert source_row[0].startswith("INSERT INTO app_payment_rollup_source")
+    assert source_row[1][-1] is True
+
+
+def test_rollup_for_skips_callers_with_a_different_source(monkeypatch):
+    monkeypatch.setattr(rollup_module, "payment_rollup_source", lambda _conn: SOURCE)
+    conn = _Conn()
+
+    source = rollup_module.rollup_for(
+        conn, PAYMENTS, date_col="createdat", amount_col="amount", company_col="companyid"
+    )
+
+    assert source is None
+    assert conn.executed == []
+
+
+def test_dashboard_trend_reads_rollup_when_it_serves_the_payments(monkeypatch):
+    conn = _Conn([{"bucket_date": date(2026, 3, 2), "total_cash": 5, "total_bank": 0, "total_other": 0, "total_amount": 5}])
+    monkeypatch.setattr(dashboard_module, "get_conn", lambda: _conn_ctx(conn))
+    monkeypatch.setattr(
+        dashboard_module,
+        "_resolve_payment_context",
+        lambda _conn: {
+            "payment_table": PAYMENTS,
+            "amount_col": "amount",
+            "date_col": "paymentdate",
+            "company_col": "companyid",
+        },
+    )
+    monkeypatch.setattr(rollup_module, "payment_rollup_source", lambda _conn: SOURCE)
+
+    result = asyncio.run(
+        dashboard_module.dashboard_overview_trend(
+            companyId="cmp-1", days=2, dateTo=date(2026, 3, 2), _user={"id": "u-1"}
+        )
+    )
+
+    sql, params = conn.executed[-1]
+    assert "FROM app_payment_daily r" in sql
+    assert "accountpayments" not in sql
+    assert "NOT r.cancelled" in sql
+    assert params == (date(2026, 3, 1), date(2026, 3, 2), "cmp-1")
+    assert [item["cash"] for item in result["items"]] == [0.0, 5.0]
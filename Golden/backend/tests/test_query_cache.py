@@ -0,0 +1,88 @@
+import pytest
+
+import app.api.appointments as appointments_module
+import app.api.reports as reports_module
+from app.core import query_cache, schema_catalog
+from app.core.schema_catalog import CatalogTable
+
+
+class _NoQueryConn:
+    def cursor(self, **kwargs):
+        raise AssertionError("compiled contexts must not query the database")
+
+
+def _install(tables):
+    schema_catalog.catalog._install(
+        {(table.schema, table.table): table for table in tables},
+        "fp",
+        source="test",
+    )
+
+
+PAYMENTS = CatalogTable(
+    schema="public",
+    table="account_payments",
+    columns=("id", "amount", "payment_date", "partner_id", "company_id"),
+)
+APPOINTMENTS = CatalogTable(
+    schema="public",
+    table="app_appointments",
+    columns=("id", "company_id", "patient_name", "appointment_date", "start_time", "state"),
+)
+
+
+@pytest.fixture(autouse=True)
+def loaded_catalog(monkeypatch):
+    monkeypatch.setattr(schema_catalog.settings, "SCHEMA_CATALOG_CACHE_PATH", "")
+    monkeypatch.setattr(schema_catalog.settings, "SCHEMA_CATALOG_CHECK_SECONDS", 0)
+    schema_catalog.catalog.reset()
+    _install([PAYMENTS, APPOINTMENTS])
+    yield
+    schema_catalog.catalog.reset()
+
+
+def test_compiled_context_is_built_once_per_schema_version():
+    conn = _NoQueryConn()
+
+    first = reports_module._payment_context(conn)
+    second = reports_module._payment_context(conn)
+
+    assert first is second
+    assert first.amount_col == "amount"
+    assert first.date_col == "payment_date"
+    assert first.company_id_col == "company_id"
+
+    _install([CatalogTable(schema="public", table="account_payments", columns=("id", "amount", "date"))])
+    third = reports_module._payment_context(conn)
+
+    assert third is not first
+    assert third.date_col == "date"
+    assert third.company_id_col is None
+
+
+def test_appointment_contexts_and_projection_are_reused():
+    conn = _NoQueryConn()
+
+    contexts = appointments_module._resolve_contexts(conn)
+    assert appointments_module._resolve_contexts(conn) is contexts
+    assert [ctx.ref.table for ctx in contexts] == ["app_appointments"]
+
+    sql_a, params_a = appointments_module._build_select_sql(contexts[0], company_id="c-1")
+    sql_b, params_b = appointments_module._build_select_sql(contexts[0], company_id="c-2")
+
+    assert sql_a == sql_b
+    assert params_a == ["public.app_appointments", "c-1"]
+    assert params_b == ["public.app_appointments", "c-2"]
+    assert appointments_module._select_projection(contexts[0]) is appointments_module._select_projection(
+        contexts[0]
+    )
+
+
+def test_compiled_entries_lists_cached_contexts():
+    appointments_module._resolve_contexts(_NoQueryConn())
+
+    entries = query_cache.compiled_entries()
+
+    assert entries["schemaVersion"] == schema_catalog.catalog.version
+    assert "reports._payment_context" in entries["registered"]
+    assert "appointments._resolve_contexts" in entries["compiled"]
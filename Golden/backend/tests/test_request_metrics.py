@@ -0,0 +1,102 @@
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import middleware as middleware_module
+from app.core import request_metrics as metrics_module
+from app.core.request_metrics import (
+    RequestMetricsMiddleware,
+    record_pool_wait,
+    record_statement,
+    render_prometheus,
+    request_metrics,
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(metrics_module.settings, "ACCESS_LOG", True)
+    request_metrics.reset()
+    app = FastAPI()
+
+    @app.get("/api/customers/{customer_id}")
+    def get_customer(customer_id: str):
+        record_pool_wait(0.002)
+        record_statement("SELECT  *\n  FROM partners WHERE id = %s", 0.004)
+        record_statement("SELECT count(*) FROM appointments", 0.010)
+        return {"id": customer_id}
+
+    @app.get("/api/events/stream")
+    def stream():
+        return StreamingResponse(iter(["data: x\n\n"]), media_type="text/event-stream")
+
+    app.add_middleware(RequestMetricsMiddleware)
+    with TestClient(app) as test_client:
+        yield test_client
+    request_metrics.reset()
+
+
+def test_server_timing_and_access_log_report_request_sql(client, caplog):
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        response = client.get("/api/customers/abc", headers={"User-Agent": "pytest"})
+
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith('db;dur=14.0;desc="2 queries", pool;dur=2.0, app;dur=')
+
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert entry["path"] == "/api/customers/abc"
+    assert entry["route"] == "/api/customers/{customer_id}"
+    assert entry["dbQueries"] == 2
+    assert entry["dbMs"] == 14.0
+    assert entry["poolWaitMs"] == 2.0
+    assert entry["slowestSql"] == "SELECT count(*) FROM appointments"
+    assert entry["userAgent"] == "pytest"
+
+
+def test_prometheus_histogram_is_labelled_by_route_template(client):
+    client.get("/api/customers/a")
+    client.get("/api/customers/b")
+    client.get("/missing")
+    client.get("/api/events/stream")
+
+    text = render_prometheus(
+        pool={"status": "ok", "inUse": 1, "idle": 3, "waiters": 0, "maxSize": 4, "timeouts": 2},
+        compression={"compressed": {"gzip": {"bytesIn": 900, "bytesOut": 300}}, "bytesSaved": 600},
+    )
+
+    route = 'method="GET",route="/api/customers/{customer_id}",status="200"'
+    assert "# TYPE tdental_http_request_duration_seconds histogram" in text
+    assert f'tdental_http_request_duration_seconds_bucket{{{route},le="+Inf"}} 2' in text
+    assert f"tdental_http_request_duration_seconds_count{{{route}}} 2" in text
+    assert f"tdental_db_statements_total{{{route}}} 4" in text
+    assert 'route="<unmatched>",status="404"' in text
+    assert "/api/events/stream" not in text
+    assert "/api/customers/a" not in text
+    assert "tdental_db_pool_in_use 1" in text
+    assert "tdental_db_pool_timeouts_total 2" in text
+    assert 'tdental_compression_bytes_out_total{encoding="gzip"} 300' in text
+    assert "tdental_compression_bytes_saved_total 600" in text
+
+
+def test_metrics_access_accepts_token_or_falls_back_to_admin(monkeypatch):
+    monkeypatch.setattr(middleware_module.settings, "METRICS_TOKEN", "scrape-secret")
+
+    def fake_require_auth(request):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    monkeypatch.setattr(middleware_module, "require_auth", fake_require_auth)
+
+    def request(authorization):
+        return SimpleNamespace(headers={"Authorization": authorization} if authorization else {})
+
+    assert middleware_module.require_metrics_access(request("Bearer scrape-secret")) is None
+    for authorization in ("Bearer wrong", "Basic scrape-secret", None):
+        with pytest.raises(HTTPException) as exc:
+            middleware_module.require_metrics_access(request(authorization))
+        assert exc.value.status_code == 401
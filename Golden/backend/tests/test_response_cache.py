@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import app.core.response_cache as response_cache_module
+from app.core import database
+from app.core.database import notify_table_writes, offload_db
+from app.core.response_cache import cached_response, response_cache
+
+
+def test_concurrent_identical_requests_run_the_handler_once():
+    release = threading.Event()
+    calls = []
+
+    @cached_response("test.burst", tables=("accountpayments",))
+    def handler(companyId=None, _user=None):
+        calls.append(companyId)
+        release.wait(timeout=5)
+        return {"companyId": companyId}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(handler(companyId="cmp-1", _user={"id": f"u-{i}"})))
+        for i in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while response_cache.stats()["endpoints"].get("test.burst", {}).get("coalesced", 0) < 19:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["cmp-1"]
+    assert results == [{"companyId": "cmp-1"}] * 20
+    stats = response_cache.stats()["endpoints"]["test.burst"]
+    assert stats == {"hits": 0, "misses": 1, "coalesced": 19, "hitRatio": 0.95}
+
+
+def test_table_writes_and_notifications_invalidate_matching_entries():
+    calls = []
+
+    @cached_response("test.payments", tables=("accountpayments",))
+    def payments(companyId=None):
+        calls.append(("payments", companyId))
+        return len(calls)
+
+    @cached_response("test.orders", tables=("saleorders",))
+    def orders(companyId=None):
+        calls.append(("orders", companyId))
+        return len(calls)
+
+    payments(companyId="a")
+    payments(companyId="a")
+    payments(companyId="b")
+    orders(companyId="a")
+    assert len(calls) == 3
+
+    notify_table_writes(["accountpayments"])
+    payments(companyId="a")
+    orders(companyId="a")
+    assert calls[-1] == ("payments", "a")
+
+    response_cache.apply("saleorders")
+    orders(companyId="a")
+    assert calls[-1] == ("orders", "a")
+    assert len(calls) == 5
+
+
+def test_result_computed_across_a_write_is_not_kept():
+    calls = []
+
+    @cached_response("test.racing", tables=("appointments",))
+    def handler():
+        calls.append(1)
+        if len(calls) == 1:
+            notify_table_writes(["appointments"])
+        return len(calls)
+
+    assert handler() == 1
+    assert handler() == 2
+    assert handler() == 2
+
+
+def test_coalesced_waiters_wait_on_the_loop_without_a_db_slot():
+    release = threading.Event()
+    calls = []
+
+    @cached_response("test.async_burst", tables=("accountpayments",))
+    @offload_db
+    def handler(companyId=None, _user=None):
+        calls.append(companyId)
+        release.wait(timeout=5)
+        return {"companyId": companyId}
+
+    async def _burst():
+        tasks = [asyncio.create_task(handler(companyId="cmp-1", _user={"id": f"u-{i}"})) for i in range(20)]
+        deadline = time.monotonic() + 5
+        while response_cache.stats()["endpoints"].get("test.async_burst", {}).get("coalesced", 0) < 19:
+            assert time.monotonic() < deadline
+            await asyncio.sleep(0.005)
+        borrowed = database._db_limiter().borrowed_tokens
+        release.set()
+        return borrowed, await asyncio.gather(*tasks)
+
+    borrowed, results = asyncio.run(_burst())
+
+    assert borrowed == 1
+    assert calls == ["cmp-1"]
+    assert results == [{"companyId": "cmp-1"}] * 20
+
+
+def test_waiter_computes_itself_when_the_leader_is_slow_or_cancelled(monkeypatch):
+    monkeypatch.setattr(response_cache_module.settings, "REPORT_CACHE_WAIT_SECONDS", 0.05)
+    calls = []
+
+    @cached_response("test.slow_leader", tables=("appointments",))
+    async def handler(day=None):
+        calls.append(day)
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+        return len(calls)
+
+    async def _race(cancel_leader: bool):
+        leader = asyncio.create_task(handler(day=str(cancel_leader)))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(handler(day=str(cancel_leader)))
+        if cancel_leader:
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await waiter
+        value = await waiter
+        leader.cancel()
+        return value
+
+    assert asyncio.run(_race(cancel_leader=False)) == 2
+    calls.clear()
+    assert asyncio.run(_race(cancel_leader=True)) == 2
+    assert response_cache.stats()["inFlight"] == 0
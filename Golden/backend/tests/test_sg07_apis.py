@@ -81,6 +81,36 @@ def test_summary_returns_zero_when_source_tables_missing(monkeypatch):
     }
 
 
+def test_channel_summary_get_shares_the_post_summary_cache(monkeypatch):
+    calls = []
+
+    def fake_resolve_table(*_args, **_kwargs):
+        calls.append(1)
+        return None
+
+    monkeypatch.setattr(dashboard_module, "get_conn", lambda: _conn_ctx(object()))
+    monkeypatch.setattr(dashboard_module, "resolve_table", fake_resolve_table)
+
+    posted = asyncio.run(
+        dashboard_module.reports_summary(
+            dashboard_module.SummaryRequest(companyId="cmp-1", dateFrom=date(2026, 2, 1), dateTo=date(2026, 2, 1)),
+            _user={"id": "u-1"},
+        )
+    )
+    resolved = len(calls)
+    fetched = asyncio.run(
+        dashboard_module.reports_channel_summary(
+            companyId="cmp-1",
+            dateFrom=date(2026, 2, 1),
+            dateTo=date(2026, 2, 1),
+            _user={"id": "u-2"},
+        )
+    )
+
+    assert fetched == posted
+    assert len(calls) == resolved
+
+
 def test_daily_report_applies_date_company_filters(monkeypatch):
     conn = object()
     captured = {}
@@ -112,6 +142,7 @@ def test_daily_report_applies_date_company_filters(monkeypatch):
         return ("id", "type", "name")
 
     monkeypatch.setattr(reports_module, "table_columns", fake_columns)
+    monkeypatch.setattr(reports_module, "rollup_for", lambda *_args, **_kwargs: None)
 
     def fake_paginate(**kwargs):
         captured.update(kwargs)
@@ -0,0 +1,144 @@
+from contextlib import contextmanager
+from uuid import uuid4
+
+import psycopg2
+import pytest
+
+from app.core import database
+from app.core import slow_queries as slow_module
+from app.core.request_metrics import RequestTiming, current_timing
+from app.core.slow_queries import (
+    SlowQueryRecorder,
+    _Capture,
+    is_explainable,
+    normalize_sql,
+    params_shape,
+)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def executemany(self, sql, rows):
+        self.conn.upserts.extend(rows)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.upserts = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    conn = FakeConnection()
+
+    @contextmanager
+    def fake_get_conn():
+        yield conn
+
+    monkeypatch.setattr(slow_module, "get_conn", fake_get_conn)
+    monkeypatch.setattr(slow_module.settings, "SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", 3600.0)
+    recorder = SlowQueryRecorder()
+    recorder.conn = conn
+    return recorder
+
+
+def test_normalize_sql_folds_literals_placeholders_and_lists():
+    sql = """
+        -- listing
+        SELECT p.id, p.name FROM partners p
+        WHERE p.companyid = %s AND p.name ILIKE 'Nguy%%' AND p.id IN (%s, %s, %s)
+          AND p.col1 > 42 LIMIT 50 OFFSET %(offset)s
+    """
+    assert normalize_sql(sql) == (
+        "SELECT p.id, p.name FROM partners p WHERE p.companyid = ? AND p.name ILIKE ? "
+        "AND p.id IN (?, ...) AND p.col1 > ? LIMIT ? OFFSET ?"
+    )
+    assert params_shape((uuid4(), "x", [1, 2, 3], None, 5)) == "(uuid, str, list[3], null, number)"
+    assert params_shape({"offset": 0, "q": "a"}) == "{offset: number, q: str}"
+    assert is_explainable("WITH x AS (SELECT 1) SELECT * FROM x", "WITH x AS (SELECT ?) SELECT * FROM x")
+    for sql in (
+        "UPDATE partners SET name = %s",
+        "WITH d AS (DELETE FROM app_x RETURNING id) SELECT * FROM d",
+        "SELECT * FROM saleorders WHERE id = %s FOR UPDATE",
+    ):
+        assert not is_explainable(sql, normalize_sql(sql))
+
+
+def test_guarded_cursor_reports_statements_over_threshold(monkeypatch):
+    seen = []
+    clock = iter([0.0, 0.1, 1.0, 1.9])
+
+    class BaseCursor:
+        def execute(self, query, vars=None):
+            return None
+
+    monkeypatch.setattr(database, "perf_counter", lambda: next(clock))
+    monkeypatch.setattr(database, "_slow_statement_listeners", [])
+    monkeypatch.setattr(database.settings, "SLOW_QUERY_MS", 500.0)
+    database.add_slow_statement_listener(lambda sql, params, seconds: seen.append((sql, params, seconds)))
+
+    cursor = database._guarded_cursor_class(BaseCursor)()
+    cursor.execute("SELECT 1")
+    cursor.execute("SELECT pg_sleep(%s)", (0.9,))
+
+    assert seen == [("SELECT pg_sleep(%s)", (0.9,), pytest.approx(0.9))]
+
+
+def test_capture_attributes_route_and_drops_when_full(recorder, monkeypatch):
+    recorder._thread = object()
+    recorder._queue.maxsize = 1
+    scope = {"method": "GET", "route": type("Route", (), {"path": "/api/customers/{customer_id}"})()}
+    token = current_timing.set(RequestTiming(scope))
+    try:
+        recorder.capture("SELECT 1", None, 0.6)
+        recorder.capture("SELECT 2", None, 0.7)
+    finally:
+        current_timing.reset(token)
+
+    assert recorder._queue.get_nowait().endpoint == "GET /api/customers/{customer_id}"
+    assert recorder.stats()["captured"] == 1
+    assert recorder.stats()["dropped"] == 1
+
+
+def test_flush_aggregates_and_samples_plans(recorder, monkeypatch):
+    explained = []
+
+    def fake_explain(sql, params, *, analyze=True):
+        explained.append((sql, params, analyze))
+        if analyze:
+            raise psycopg2.errors.QueryCanceled("canceling statement due to statement timeout")
+        return [{"Plan": {"Node Type": "Seq Scan"}}]
+
+    monkeypatch.setattr(slow_module, "explain", fake_explain)
+    listing = "SELECT * FROM partners WHERE name ILIKE %s LIMIT 50"
+    recorder.flush([
+        _Capture(listing, ("%a%",), 0.6, "GET /api/customers"),
+        _Capture(listing, ("%b%",), 0.9, "GET /api/customers"),
+        _Capture("UPDATE partners SET name = %s WHERE id = %s", ("x", 1), 0.7, "PUT /api/customers/{id}"),
+    ])
+
+    rows = {row[1]: row for row in recorder.conn.upserts}
+    listing_row = rows["GET /api/customers"]
+    assert listing_row[2] == "SELECT * FROM partners WHERE name ILIKE ? LIMIT ?"
+    assert listing_row[3] == "(str)"
+    assert listing_row[4:8] == (2, pytest.approx(1500.0), pytest.approx(900.0), pytest.approx(900.0))
+    assert listing_row[8] == '[{"Plan": {"Node Type": "Seq Scan"}}]'
+    assert listing_row[9] is False
+    assert rows["PUT /api/customers/{id}"][8] is None
+    assert explained == [(listing, ("%b%",), True), (listing, ("%b%",), False)]
+
+    recorder.flush([_Capture(listing, ("%c%",), 0.8, "GET /api/customers")])
+    assert len(explained) == 2
+    assert recorder.stats()["explained"] == 1
+    assert recorder.stats()["explainFailures"] == 1
@@ -0,0 +1,79 @@
+import gzip
+
+from starlette.requests import Request
+
+from app.core.static_assets import IMMUTABLE_CACHE_CONTROL, StaticAssetManifest
+
+
+def _request(path, query="", **headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def _site(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "js").mkdir()
+    (tmp_path / "css" / "site.css").write_text("body { color: #123; }\n" * 40)
+    (tmp_path / "js" / "app.js").write_text("console.log('v1');\n" * 40)
+    (tmp_path / "index.html").write_text(
+        '<link rel="stylesheet" href="/static/css/site.css">'
+        '<script src="/static/js/app.js?v=4"></script>'
+        '<img src="/static/img/missing.svg">'
+    )
+    manifest = StaticAssetManifest(tmp_path)
+    manifest.build()
+    return manifest
+
+
+def test_html_is_prerendered_with_content_hashed_asset_urls(tmp_path):
+    manifest = _site(tmp_path)
+    html = manifest.get("index.html").body.decode()
+    assert f'href="{manifest.url("css/site.css")}"' in html
+    assert f'src="{manifest.url("js/app.js")}"' in html
+    assert "?v=4" not in html
+    assert 'src="/static/img/missing.svg"' in html
+
+    response = manifest.response(_request("/static/index.html"), "index.html")
+    assert response.headers["cache-control"].startswith("no-store")
+
+
+def test_assets_negotiate_encoding_and_revalidate_with_etag(tmp_path):
+    manifest = _site(tmp_path)
+    asset = manifest.get("js/app.js")
+
+    hashed = manifest.response(_request("/static/js/app.js", f"v={asset.version}", accept_encoding="gzip, deflate"), "js/app.js")
+    assert hashed.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert hashed.headers["content-encoding"] == "gzip"
+    assert hashed.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(hashed.body) == asset.body
+
+    plain = manifest.response(_request("/static/js/app.js", accept_encoding="gzip;q=0"), "js/app.js")
+    assert plain.headers["cache-control"] == "no-cache"
+    assert "content-encoding" not in plain.headers
+    assert plain.body == asset.body
+
+    not_modified = manifest.response(
+        _request("/static/js/app.js", accept_encoding="gzip", if_none_match=hashed.headers["etag"]),
+        "js/app.js",
+    )
+    assert not_modified.status_code == 304
+    assert manifest.response(_request("/static/nope.js"), "nope.js").status_code == 404
+
+
+def test_rebuild_after_edit_changes_versions(tmp_path):
+    manifest = _site(tmp_path)
+    before = manifest.url("js/app.js")
+    assert not manifest.changed()
+
+    (tmp_path / "js" / "app.js").write_text("console.log('v2');\n" * 41)
+    assert manifest.changed()
+    manifest.build()
+
+    after = manifest.url("js/app.js")
+    assert after != before
+    assert after in manifest.get("index.html").body.decode()
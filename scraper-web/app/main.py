@@ -2,6 +2,7 @@ import os
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse, RedirectResponse
 from app.api import auth, routes
 from app.core.database import ensure_auth_tables, get_conn, get_cursor
@@ -23,6 +24,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/HTML responses of 1 KB or more for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Resolve paths relative to the project root (where Dockerfile WORKDIR is /app)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # /app
 STATIC_DIR = os.path.join(BASE_DIR, "static")